@@ -1,4 +1,5 @@
 from .base import Database
+from .cube import CubeDatabase
 from .mysql import MySQLDatabase
 from .postgresql import PostgreSQLDatabase
 from .redshift import RedshiftDatabase
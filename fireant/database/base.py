@@ -5,6 +5,8 @@ from pypika import (
     terms,
 )
 
+from .results import read_data_frame
+
 
 class Database(object):
     """
@@ -16,6 +18,9 @@ class Database(object):
 
     slow_query_log_min_seconds = 15
 
+    # Whether the database supports GROUPING SETS, which are used to query the choices of several dimensions at once
+    supports_grouping_sets = False
+
     def __init__(self, host=None, port=None, database=None, max_processes=2, max_result_set_size=200000,
                  cache_middleware=None):
         self.host = host
@@ -31,6 +36,33 @@ class Database(object):
         """
         raise NotImplementedError
 
+    def streaming_cursor(self, connection):
+        """
+        This function returns a cursor which streams the results of a query from the database rather than buffering the
+        entire result set in memory when the query is executed. Drivers which require a special cursor class for this
+        should override this function.
+        """
+        return connection.cursor()
+
+    def fetch_dataframe(self, query, dtypes=None):
+        """
+        Executes a query and returns the result set as a data frame.
+
+        :param query:
+            The query string to execute.
+        :param dtypes:
+            An optional dict mapping column names to numpy dtypes for columns whose types are known in advance.
+        """
+        with self.connect() as connection:
+            cursor = connection.cursor()
+
+            try:
+                cursor.execute(query)
+                return read_data_frame(cursor, dtypes)
+
+            finally:
+                cursor.close()
+
     def trunc_date(self, field, interval):
         """
         This function must create a Pypika function which truncates a Date or DateTime object to a specific interval.
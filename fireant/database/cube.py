@@ -0,0 +1,969 @@
+import copy
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    is_bool_dtype,
+    is_categorical_dtype,
+    is_numeric_dtype,
+)
+from pypika import (
+    Query,
+    Table,
+    terms,
+)
+from pypika.enums import UnionType
+from pypika.queries import (
+    QueryBuilder,
+    _UnionQuery,
+)
+
+from .base import Database
+from .results import _is_numeric
+
+cube_logger = logging.getLogger('fireant.query_log')
+
+_AGGREGATE_FUNCTIONS = {'SUM', 'COUNT', 'AVG', 'MIN', 'MAX'}
+
+_PERIOD_FREQUENCIES = {
+    'month': 'M',
+    'quarter': 'Q',
+    'year': 'A',
+}
+
+
+class CubeException(Exception):
+    pass
+
+
+class Trunc(terms.Function):
+    """
+    Truncates dates to the start of an interval in a cube query.
+    """
+
+    def __init__(self, field, interval, alias=None):
+        super(Trunc, self).__init__('TRUNC', field, interval, alias=alias)
+
+
+class DateAdd(terms.Function):
+    """
+    Adds a number of date parts, such as years or weeks, to dates in a cube query.
+    """
+
+    def __init__(self, field, date_part, interval, alias=None):
+        super(DateAdd, self).__init__('DATE_ADD', date_part, interval, field, alias=alias)
+
+
+class CubeQueryBuilder(QueryBuilder):
+    """
+    Renders a query as a JSON plan which is executed by a `CubeDatabase` instead of as SQL.
+    """
+
+    def get_sql(self, with_alias=False, subquery=False, **kwargs):
+        if not self._selects:
+            return ''
+        return json.dumps(self._get_plan())
+
+    def union(self, other):
+        return CubeUnionQuery(self, other, False)
+
+    def union_all(self, other):
+        return CubeUnionQuery(self, other, True)
+
+    def _get_plan(self):
+        if self._joins or 1 != len(self._from) or not isinstance(self._from[0], Table):
+            raise CubeException('Cube queries must select from a single table without joins.')
+
+        return {
+            'from': str(self._from[0]),
+            'select': [[_get_alias(term), _make_plan(term)] for term in self._selects],
+            'where': _make_plan(self._wheres) if self._wheres is not None else None,
+            'groupby': [_make_plan(term) for term in self._groupbys],
+            'having': _make_plan(self._havings) if self._havings is not None else None,
+            'orderby': [[_make_plan(term), term.alias, _is_descending(order)] for term, order in self._orderbys],
+            'limit': self._limit,
+            'offset': self._offset,
+        }
+
+
+class CubeUnionQuery(_UnionQuery):
+    def __init__(self, base_query, union_query, union_all):
+        super(CubeUnionQuery, self).__init__(base_query, union_query,
+                                             UnionType.all if union_all else UnionType.distinct)
+        self._union_all = union_all
+
+    def union(self, other):
+        query = copy.copy(self)
+        query._unions = self._unions + [(None, other)]
+        return query
+
+    union_all = union
+
+    def get_sql(self, with_alias=False, subquery=False, **kwargs):
+        queries = [self.base_query] + [union_query for _, union_query in self._unions]
+        return json.dumps({
+            'union': [query._get_plan() for query in queries],
+            'all': self._union_all,
+            'orderby': [[_make_plan(term), term.alias, _is_descending(order)] for term, order in self._orderbys],
+            'limit': self._limit,
+            'offset': self._offset,
+        })
+
+
+class CubeQuery(Query):
+    @classmethod
+    def _builder(cls):
+        return CubeQueryBuilder()
+
+
+def _is_descending(order):
+    return order is not None and 'DESC' == order.value
+
+
+def _get_alias(term):
+    return term.alias or getattr(term, 'name', None) or str(term)
+
+
+def _make_plan(term):
+    """
+    Converts a pypika term into a JSON-serializable expression tree.
+    """
+    if isinstance(term, terms.Star):
+        return ['*']
+
+    if isinstance(term, terms.Field):
+        return ['field', term.name]
+
+    if isinstance(term, terms.NullValue):
+        return ['null']
+
+    if isinstance(term, terms.ValueWrapper):
+        value = term.value
+        if isinstance(value, date):
+            return ['datetime', value.isoformat()]
+        if isinstance(value, np.generic):
+            value = value.item()
+        return ['value', value]
+
+    if isinstance(term, terms.Tuple):
+        return ['tuple', [_make_plan(value) for value in term.values]]
+
+    if isinstance(term, terms.Not):
+        return ['not', _make_plan(term.term)]
+
+    if isinstance(term, terms.Negative):
+        return ['negative', _make_plan(term.term)]
+
+    if isinstance(term, terms.ComplexCriterion):
+        return [term.comparator.value.lower(), _make_plan(term.left), _make_plan(term.right)]
+
+    if isinstance(term, terms.BasicCriterion):
+        return ['compare', term.comparator.name, _make_plan(term.left), _make_plan(term.right)]
+
+    if isinstance(term, terms.ContainsCriterion) and isinstance(term.container, terms.Tuple):
+        return ['in', _make_plan(term.term), _make_plan(term.container), term._is_negated]
+
+    if isinstance(term, terms.BetweenCriterion):
+        return ['between', _make_plan(term.term), _make_plan(term.start), _make_plan(term.end)]
+
+    if isinstance(term, terms.NullCriterion):
+        return ['isnull', _make_plan(term.term)]
+
+    if isinstance(term, terms.Case):
+        # The criteria and values are flattened, followed by the else value: [case, criterion, value, ..., else]
+        return ['case'] \
+               + [_make_plan(part) for case in term._cases for part in case] \
+               + [_make_plan(term._else) if term._else is not None else ['null']]
+
+    if isinstance(term, terms.ArithmeticExpression):
+        return ['arithmetic', term.operator.value, _make_plan(term.left), _make_plan(term.right)]
+
+    if isinstance(term, terms.Function) and not isinstance(term, terms.AnalyticFunction):
+        return ['function', term.name.upper(), [_make_plan(arg) for arg in term.args],
+                bool(getattr(term, '_distinct', False)),
+                str(getattr(term, 'as_type', '')).upper()]
+
+    raise CubeException('{} terms are not supported by the cube database.'.format(type(term).__name__))
+
+
+class _Encoded(object):
+    """
+    A dictionary encoded column. The dictionary holds the distinct values in ascending order and the codes are the
+    positions of the values in the dictionary, or -1 for nulls. Since the dictionary is sorted, the order of the codes
+    is the order of the values.
+    """
+
+    __slots__ = ('codes', 'dictionary')
+
+    def __init__(self, codes, dictionary):
+        self.codes = codes
+        self.dictionary = dictionary
+
+    @classmethod
+    def encode(cls, values):
+        codes, dictionary = pd.factorize(values, sort=True)
+        return cls(codes.astype(np.int64), np.asarray(dictionary))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def take(self, rows):
+        return _Encoded(self.codes[rows], self.dictionary)
+
+    def decode(self):
+        return _take_with_nulls(self.dictionary, self.codes)
+
+    def map(self, function):
+        """
+        Applies a vectorized function to the values of the dictionary instead of every row.
+        """
+        values = function(self.dictionary)
+
+        if values.dtype == np.bool_:
+            # Nulls never match a predicate
+            return np.append(values, False)[self.codes]
+
+        codes, dictionary = pd.factorize(values, sort=True)
+        return _Encoded(np.append(codes, -1)[self.codes], np.asarray(dictionary))
+
+
+def _take_with_nulls(values, indices):
+    is_null = indices < 0
+    result = values[np.where(is_null, 0, indices)] \
+        if len(values) \
+        else np.empty(len(indices), dtype=values.dtype)
+
+    if not is_null.any():
+        return result
+
+    if 'M' == values.dtype.kind:
+        result = result.copy()
+        result[is_null] = np.datetime64('NaT')
+    elif values.dtype.kind in 'iuf':
+        result = result.astype(np.float64)
+        result[is_null] = np.nan
+    else:
+        result = result.astype(object)
+        result[is_null] = None
+    return result
+
+
+def _decode(column):
+    return column.decode() \
+        if isinstance(column, _Encoded) \
+        else column
+
+
+def _is_column(value):
+    return isinstance(value, (_Encoded, np.ndarray))
+
+
+class CubeTable(object):
+    """
+    The columns of a table held in memory by a `CubeDatabase`. Dimension columns are dictionary encoded as arrays of
+    integer codes, so filters are evaluated once for each distinct value and rows are grouped by their codes. Metric
+    columns are kept as numpy arrays.
+    """
+
+    def __init__(self, columns, length):
+        self.columns = columns
+        self.length = length
+
+    @classmethod
+    def from_data_frame(cls, data_frame, dimensions=None):
+        """
+        :param data_frame:
+            The rows of the table.
+        :param dimensions: (Optional)
+            The names of the columns to dictionary encode. By default all of the columns which are not numeric are
+            encoded. Numeric dimension columns, such as ids, can be encoded as well by listing them.
+        """
+        columns = OrderedDict()
+        for name, values in data_frame.iteritems():
+            encode = name in dimensions \
+                if dimensions is not None \
+                else not is_numeric_dtype(values) or is_bool_dtype(values)
+
+            if is_categorical_dtype(values):
+                values = values.astype(object)
+            columns[name] = _Encoded.encode(values.values) \
+                if encode \
+                else values.values
+
+        return cls(columns, len(data_frame))
+
+    @property
+    def dimensions(self):
+        return [name
+                for name, column in self.columns.items()
+                if isinstance(column, _Encoded)]
+
+    def take(self, rows):
+        return CubeTable(OrderedDict((name, column.take(rows) if isinstance(column, _Encoded) else column[rows])
+                                     for name, column in self.columns.items()),
+                         len(np.arange(self.length)[rows]))
+
+    def concat(self, other):
+        """
+        :return:
+            A table with the rows of this table followed by the rows of the other table. The dictionaries of the encoded
+            columns are merged and the codes of both tables are translated to the merged dictionaries.
+        """
+        if list(self.columns) != list(other.columns):
+            raise ValueError('The tables must have the same columns.')
+
+        columns = OrderedDict()
+        for name, column in self.columns.items():
+            other_column = other.columns[name]
+
+            if isinstance(column, _Encoded) and isinstance(other_column, _Encoded):
+                dictionary = np.concatenate([column.dictionary, other_column.dictionary])
+                mapping, merged = pd.factorize(dictionary, sort=True)
+                split = len(column.dictionary)
+                codes = np.concatenate([np.append(mapping[:split], -1)[column.codes],
+                                        np.append(mapping[split:], -1)[other_column.codes]])
+                columns[name] = _Encoded(codes, np.asarray(merged))
+
+            else:
+                values = np.concatenate([_decode(column), _decode(other_column)])
+                columns[name] = _Encoded.encode(values) \
+                    if isinstance(column, _Encoded) \
+                    else values
+
+        return CubeTable(columns, self.length + other.length)
+
+    def max(self, name):
+        column = self.columns[name]
+        if isinstance(column, _Encoded):
+            return column.dictionary[column.codes.max()] \
+                if len(column) and 0 <= column.codes.max() \
+                else None
+
+        values = column[pd.notnull(column)]
+        return values.max() if len(values) else None
+
+
+class _Groups(object):
+    def __init__(self, ids, count, representatives):
+        self.ids = ids
+        self.count = count
+        self.representatives = representatives
+
+
+class _Context(object):
+    """
+    The rows of a table which an expression is evaluated for. Without groups, expressions are evaluated for each row.
+    With groups, aggregate functions are evaluated for each group and other expressions for a row of each group.
+    """
+
+    def __init__(self, table, rows=None, groups=None):
+        self.table = table
+        self.rows = rows
+        self.groups = groups
+
+    @property
+    def length(self):
+        if self.groups is not None:
+            return self.groups.count
+        return self.table.length if self.rows is None else len(self.rows)
+
+    def ungrouped(self):
+        return _Context(self.table, self.rows)
+
+    def column(self, name):
+        try:
+            column = self.table.columns[name]
+        except KeyError:
+            raise CubeException('The column {} is not in the cube table.'.format(name))
+
+        rows = self.groups.representatives \
+            if self.groups is not None \
+            else self.rows
+        if rows is None:
+            return column
+        return column.take(rows) if isinstance(column, _Encoded) else column[rows]
+
+
+def _evaluate(plan, context):
+    """
+    Evaluates an expression tree.
+
+    :return:
+        A numpy array, an encoded column or a scalar value.
+    """
+    node = plan[0]
+
+    if 'field' == node:
+        return context.column(plan[1])
+    if 'value' == node:
+        return plan[1]
+    if 'datetime' == node:
+        return pd.Timestamp(plan[1])
+    if 'null' == node:
+        return None
+    if 'tuple' == node:
+        return [_evaluate(value, context) for value in plan[1]]
+    if '*' == node:
+        return 1
+
+    if 'and' == node or 'or' == node:
+        left, right = _as_mask(_evaluate(plan[1], context), context), _as_mask(_evaluate(plan[2], context), context)
+        return left & right if 'and' == node else left | right
+    if 'not' == node:
+        # As in SQL, a negated predicate does not match rows where the predicate is null
+        return ~_as_mask(_evaluate(plan[1], context), context) & ~_has_nulls(plan[1], context)
+
+    if 'function' == node:
+        return _evaluate_function(plan, context)
+
+    if 'negative' == node:
+        return _apply(lambda values: -values, _evaluate(plan[1], context))
+    if 'arithmetic' == node:
+        return _evaluate_arithmetic(plan[1], _evaluate(plan[2], context), _evaluate(plan[3], context))
+    if 'compare' == node:
+        return _evaluate_comparison(plan[1], _evaluate(plan[2], context), _evaluate(plan[3], context), context)
+
+    if 'in' == node:
+        values = _evaluate(plan[2], context)
+        is_negated = plan[3]
+        return _predicate(lambda series: ~series.isin(values) if is_negated else series.isin(values),
+                          _evaluate(plan[1], context), context)
+    if 'between' == node:
+        start, end = _evaluate(plan[2], context), _evaluate(plan[3], context)
+        return _predicate(lambda series: (series >= start) & (series <= end), _evaluate(plan[1], context), context)
+    if 'isnull' == node:
+        column = _evaluate(plan[1], context)
+        if isinstance(column, _Encoded):
+            return column.codes < 0
+        return _as_mask(pd.isnull(column), context)
+    if 'case' == node:
+        # Each row takes the value of the first criterion that it matches
+        cases = plan[1:-1]
+        return np.select([_as_mask(_evaluate(criterion, context), context) for criterion in cases[::2]],
+                         [_to_array(_evaluate(value, context), context) for value in cases[1::2]],
+                         _to_array(_evaluate(plan[-1], context), context))
+
+    raise CubeException('{} expressions are not supported by the cube database.'.format(node))
+
+
+def _as_mask(value, context):
+    if _is_column(value):
+        return np.asarray(_decode(value), dtype=bool)
+    return np.full(context.length, bool(value), dtype=bool)
+
+
+def _has_nulls(plan, context):
+    """
+    :return:
+        A mask of the rows where any of the columns of an expression are null, not including the columns which are
+        aggregated.
+    """
+    if 'field' == plan[0]:
+        column = context.column(plan[1])
+        return column.codes < 0 \
+            if isinstance(column, _Encoded) \
+            else np.asarray(pd.isnull(column))
+
+    if 'function' == plan[0]:
+        if plan[1] in _AGGREGATE_FUNCTIONS:
+            return np.zeros(context.length, dtype=bool)
+        parts = plan[2]
+    else:
+        parts = [part for part in plan[1:] if isinstance(part, list) and part and isinstance(part[0], str)]
+
+    mask = np.zeros(context.length, dtype=bool)
+    for part in parts:
+        mask |= _has_nulls(part, context)
+    return mask
+
+
+def _predicate(function, column, context):
+    """
+    Evaluates a predicate on the dictionary of an encoded column, or on each row of other columns. Null values never
+    match a predicate.
+    """
+    if isinstance(column, _Encoded):
+        return column.map(lambda dictionary: function(pd.Series(dictionary)).fillna(False).values.astype(bool))
+
+    if not _is_column(column):
+        return _as_mask(function(pd.Series([column])).fillna(False).values[0], context)
+
+    series = pd.Series(column)
+    return (function(series).fillna(False) & series.notnull()).values.astype(bool)
+
+
+def _apply(function, value):
+    """
+    Applies a vectorized function to the values of a column, to the dictionary of an encoded column or to a scalar.
+    """
+    if isinstance(value, _Encoded):
+        return value.map(function)
+    if isinstance(value, np.ndarray):
+        return function(value)
+    if value is None:
+        return None
+    return function(np.array([value]))[0]
+
+
+_COMPARISONS = {
+    'eq': lambda left, right: left == right,
+    'ne': lambda left, right: left != right,
+    'gt': lambda left, right: left > right,
+    'gte': lambda left, right: left >= right,
+    'lt': lambda left, right: left < right,
+    'lte': lambda left, right: left <= right,
+}
+
+
+def _evaluate_comparison(comparator, left, right, context):
+    if comparator in ('like', 'not_like', 'ilike', 'not_ilike'):
+        pattern = re.compile(_like_to_regex(right), re.IGNORECASE if 'ilike' in comparator else 0)
+        matches = _predicate(lambda series: series.astype(str).str.match(pattern), left, context)
+        return ~matches if comparator.startswith('not_') else matches
+
+    compare = _COMPARISONS[comparator]
+    if not _is_column(right):
+        return _predicate(lambda series: compare(series, right), left, context)
+    if not _is_column(left):
+        return _predicate(lambda series: compare(left, series), right, context)
+
+    left, right = pd.Series(_decode(left)), pd.Series(_decode(right))
+    return (compare(left, right) & left.notnull() & right.notnull()).values.astype(bool)
+
+
+def _like_to_regex(pattern):
+    return ''.join('.*' if '%' == char else '.' if '_' == char else re.escape(char)
+                   for char in pattern) + '$'
+
+
+def _evaluate_arithmetic(operator, left, right):
+    left, right = _decode(left), _decode(right)
+    if left is None or right is None:
+        return None
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        left = np.asarray(left, dtype=np.float64) if _is_column(left) else left
+        right = np.asarray(right, dtype=np.float64) if _is_column(right) else right
+
+        result = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.true_divide}[operator](left, right)
+
+    # Division by zero is null, as with most databases
+    if isinstance(result, np.ndarray):
+        result[np.isinf(result)] = np.nan
+    return result
+
+
+def _evaluate_function(plan, context):
+    _, name, args, is_distinct, as_type = plan
+
+    if name in _AGGREGATE_FUNCTIONS:
+        if context.groups is None:
+            raise CubeException('Aggregate functions can only be used in grouped cube queries.')
+        return _aggregate(name, args[0], is_distinct, context)
+
+    values = [_evaluate(arg, context) for arg in args]
+
+    if 'TRUNC' == name:
+        return _apply(lambda dates: _truncate(dates, values[1]), values[0])
+    if 'DATE_ADD' == name:
+        return _apply(lambda dates: _add_dates(dates, values[0], values[1]), values[2])
+    if 'LOWER' == name:
+        return _apply(lambda strings: pd.Series(strings).str.lower().values, values[0])
+    if 'UPPER' == name:
+        return _apply(lambda strings: pd.Series(strings).str.upper().values, values[0])
+    if 'CAST' == name and as_type in ('VARCHAR', 'TEXT', 'CHAR'):
+        return _apply(lambda array: pd.Series(array).astype(str).values, values[0])
+
+    raise CubeException('The function {} is not supported by the cube database.'.format(name))
+
+
+def _aggregate(name, arg, is_distinct, context):
+    groups = context.groups
+    values = _evaluate(arg, context.ungrouped())
+
+    if not _is_column(values):
+        # COUNT(*) or an aggregate of a constant
+        values = np.full(len(groups.ids), values, dtype=object if values is None else None)
+
+    if name in ('MIN', 'MAX') and isinstance(values, _Encoded):
+        # The dictionary is sorted, so the smallest code is the smallest value
+        codes = pd.Series(np.where(values.codes < 0, np.nan, values.codes))
+        extremes = getattr(codes.groupby(groups.ids), name.lower())().reindex(np.arange(groups.count)).values
+        return _take_with_nulls(values.dictionary, np.where(np.isnan(extremes), -1, extremes).astype(np.int64))
+
+    values = _decode(values)
+    not_null = pd.notnull(values)
+
+    if 'COUNT' == name:
+        if is_distinct:
+            counts = pd.Series(values[not_null]).groupby(groups.ids[not_null]).nunique()
+            return counts.reindex(np.arange(groups.count), fill_value=0).values.astype(np.float64)
+        return np.bincount(groups.ids, weights=not_null, minlength=groups.count)
+
+    if name in ('MIN', 'MAX'):
+        series = pd.Series(values[not_null])
+        return getattr(series.groupby(groups.ids[not_null]), name.lower())() \
+            .reindex(np.arange(groups.count)).values
+
+    numbers = np.where(not_null, values, 0).astype(np.float64)
+    counts = np.bincount(groups.ids, weights=not_null, minlength=groups.count)
+    sums = np.bincount(groups.ids, weights=numbers, minlength=groups.count)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = sums / counts if 'AVG' == name else sums
+    result[0 == counts] = np.nan
+    return result
+
+
+def _truncate(dates, interval):
+    dates = pd.DatetimeIndex(dates)
+
+    if 'hour' == interval:
+        truncated = dates.floor('H')
+    elif 'week' == interval:
+        # Weeks start on Monday, as with the ISO weeks used by the databases
+        truncated = dates.normalize() - pd.to_timedelta(dates.weekday, unit='D')
+    elif interval in _PERIOD_FREQUENCIES:
+        truncated = dates.to_period(_PERIOD_FREQUENCIES[interval]).to_timestamp()
+    else:
+        truncated = dates.normalize()
+
+    return truncated.values
+
+
+def _add_dates(dates, date_part, interval):
+    date_part = str(date_part).lower()
+    if 'quarter' == date_part:
+        date_part, interval = 'month', 3 * interval
+
+    offset = pd.DateOffset(**{date_part + 's': interval})
+    return (pd.DatetimeIndex(dates) + offset).values
+
+
+def _contains_aggregate(plan):
+    if not isinstance(plan, list) or not plan:
+        return False
+    if 'function' == plan[0] and plan[1] in _AGGREGATE_FUNCTIONS:
+        return True
+    return any(_contains_aggregate(part) for part in plan[1:] if isinstance(part, list))
+
+
+def _group(table, rows, groupby):
+    """
+    Assigns a group id to each of the rows by combining the codes of the values of the group by expressions.
+    """
+    context = _Context(table, rows)
+    length = context.length
+
+    combined = np.zeros(length, dtype=np.int64)
+    for plan in groupby:
+        column = _evaluate(plan, context)
+
+        if isinstance(column, _Encoded):
+            codes, cardinality = column.codes, len(column.dictionary)
+        elif _is_column(column):
+            codes, uniques = pd.factorize(column, sort=True)
+            cardinality = len(uniques)
+        else:
+            codes, cardinality = np.zeros(length, dtype=np.int64), 1
+
+        # Nulls are a group of their own
+        codes = np.where(codes < 0, cardinality, codes)
+        combined, _ = pd.factorize(combined * (cardinality + 1) + codes)
+
+    ids, uniques = pd.factorize(combined)
+    first_rows = np.unique(ids, return_index=True)[1]
+    representatives = first_rows if rows is None else rows[first_rows]
+    return _Groups(ids, len(uniques), representatives)
+
+
+def _execute(plan, tables):
+    if 'union' in plan:
+        data_frames = [_execute(query_plan, tables) for query_plan in plan['union']]
+        columns = data_frames[0].columns
+        data_frame = pd.concat([data_frame.set_axis(columns, axis=1, inplace=False)
+                                for data_frame in data_frames], ignore_index=True)
+        if not plan['all']:
+            data_frame = data_frame.drop_duplicates()
+
+        orders = [(data_frame[alias or order_plan[1]], is_desc)
+                  for order_plan, alias, is_desc in plan['orderby']]
+        return _order_and_limit(data_frame, orders, plan['limit'], plan['offset'])
+
+    try:
+        table = tables[plan['from']]
+    except KeyError:
+        raise CubeException('The table {} is not loaded in the cube database.'.format(plan['from']))
+
+    rows = np.flatnonzero(_as_mask(_evaluate(plan['where'], _Context(table)), _Context(table))) \
+        if plan['where'] is not None \
+        else None
+
+    is_aggregated = plan['groupby'] \
+                    or plan['having'] is not None \
+                    or any(_contains_aggregate(select_plan) for _, select_plan in plan['select'])
+    if not is_aggregated:
+        context = _Context(table, rows)
+    elif plan['groupby']:
+        context = _Context(table, rows, _group(table, rows, plan['groupby']))
+    else:
+        # Aggregates without a group by have a single group, even if there are no rows
+        length = _Context(table, rows).length
+        context = _Context(table, rows, _Groups(np.zeros(length, dtype=np.int64), 1, np.arange(min(length, 1))))
+
+    data_frame = pd.DataFrame(OrderedDict((alias, _to_array(_evaluate(select_plan, context), context))
+                                          for alias, select_plan in plan['select']),
+                              columns=[alias for alias, _ in plan['select']])
+
+    orders = [(data_frame[alias]
+               if alias in data_frame.columns
+               else pd.Series(_to_array(_evaluate(order_plan, context), context)), is_desc)
+              for order_plan, alias, is_desc in plan['orderby']]
+
+    if plan['having'] is not None:
+        mask = _as_mask(_evaluate(plan['having'], context), context)
+        data_frame = data_frame[mask]
+        orders = [(values[mask], is_desc) for values, is_desc in orders]
+
+    return _order_and_limit(data_frame, orders, plan['limit'], plan['offset'])
+
+
+def _to_array(value, context):
+    if _is_column(value):
+        return _decode(value)
+    return np.full(context.length, value, dtype=object if value is None or isinstance(value, str) else None)
+
+
+def _order_and_limit(data_frame, orders, limit, offset):
+    if orders:
+        keys = pd.DataFrame({i: values.values for i, (values, _) in enumerate(orders)})
+        positions = keys.sort_values(list(keys.columns),
+                                     ascending=[not is_desc for _, is_desc in orders],
+                                     kind='mergesort',
+                                     na_position='last').index
+        data_frame = data_frame.iloc[positions]
+
+    start = offset or 0
+    stop = start + limit if limit is not None else None
+    return data_frame.iloc[start:stop].reset_index(drop=True)
+
+
+class _CubeCursor(object):
+    """
+    A DB-API style cursor for streaming the results of a cube query.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.description = None
+        self._rows = iter(())
+
+    def execute(self, query):
+        data_frame = self.database.execute(query)
+        self.description = [(column,) for column in data_frame.columns]
+        self._rows = data_frame.itertuples(index=False, name=None)
+
+    def fetchmany(self, size):
+        return [row for _, row in zip(range(size), self._rows)]
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def close(self):
+        self._rows = iter(())
+
+
+class _CubeConnection(object):
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self):
+        return _CubeCursor(self.database)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CubeDatabase(Database):
+    """
+    An in-memory database which answers slicer queries from tables held in the process, for example a daily aggregate
+    of a table which is queried too often to send every query to the warehouse. The tables are loaded from a data
+    frame, another database or a parquet file, and can be refreshed incrementally as the warehouse loads new rows.
+
+    Queries are rendered as JSON plans rather than SQL and executed with vectorized numpy functions on the columns of
+    the tables. Filters and functions on dimensions are evaluated once for each distinct value of their dictionary and
+    rows are grouped by the codes of the dimension values. Queries must select from a single table without joins.
+    """
+
+    # The pypika query class to use for constructing queries
+    query_cls = CubeQuery
+
+    def __init__(self, max_processes=2, max_result_set_size=200000, cache_middleware=None):
+        super(CubeDatabase, self).__init__(max_processes=max_processes,
+                                           max_result_set_size=max_result_set_size,
+                                           cache_middleware=cache_middleware)
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # The tables are shared by copies of the database, such as the copies used for reference queries
+        return copy.copy(self)
+
+    def load(self, table, data_frame, dimensions=None):
+        """
+        Loads the rows of a table from a data frame, replacing any rows already loaded for the table.
+
+        :param table:
+            The pypika Table which is queried by the slicer.
+        :param data_frame:
+            A data frame with a column for each column of the table.
+        :param dimensions: (Optional)
+            The names of the columns to dictionary encode, see `CubeTable.from_data_frame`.
+        """
+        cube_table = CubeTable.from_data_frame(data_frame, dimensions)
+        with self._lock:
+            self._tables[str(table)] = cube_table
+
+    def load_from_database(self, table, database, query=None, dimensions=None):
+        """
+        Loads the rows of a table from another database, such as the warehouse.
+
+        :param table:
+            The pypika Table which is queried by the slicer.
+        :param database:
+            The database to query the rows from.
+        :param query: (Optional)
+            The query for the rows. By default all of the rows of the table are selected from the other database.
+        :param dimensions: (Optional)
+            The names of the columns to dictionary encode, see `CubeTable.from_data_frame`.
+        """
+        if query is None:
+            query = database.query_cls.from_(table).select('*')
+
+        self.load(table, database.fetch_dataframe(str(query)), dimensions)
+
+    def load_parquet(self, table, path, dimensions=None, **kwargs):
+        """
+        Loads the rows of a table from a parquet snapshot. This requires the `pyarrow` or `fastparquet` package.
+
+        :param table:
+            The pypika Table which is queried by the slicer.
+        :param path:
+            The path of the parquet file.
+        :param dimensions: (Optional)
+            The names of the columns to dictionary encode, see `CubeTable.from_data_frame`.
+        :param kwargs:
+            Additional arguments for `pd.read_parquet`.
+        """
+        self.load(table, pd.read_parquet(path, **kwargs), dimensions)
+
+    def refresh(self, table, database, column, query=None, dimensions=None):
+        """
+        Incrementally refreshes a table from another database. The rows from the latest value of a column onwards, such
+        as the latest date, are queried again and replace the loaded rows from that value onwards, so that the latest
+        rows are updated as well as new rows added.
+
+        :param table:
+            The pypika Table which is queried by the slicer.
+        :param database:
+            The database to query the rows from.
+        :param column:
+            The name of a column which increases as rows are loaded, such as a date column.
+        :param query: (Optional)
+            The query for the rows, see `load_from_database`. It is filtered to the rows from the latest value of the
+            column.
+        :param dimensions: (Optional)
+            The names of the columns to dictionary encode if the table is not loaded yet, see
+            `CubeTable.from_data_frame`. Otherwise the columns which are encoded in the loaded table are encoded.
+        """
+        key = str(table)
+        cube_table = self._tables.get(key)
+        if cube_table is None:
+            return self.load_from_database(table, database, query, dimensions)
+
+        latest = cube_table.max(column)
+        if query is None:
+            query = database.query_cls.from_(table).select('*')
+        if latest is not None:
+            latest = pd.Timestamp(latest) if isinstance(latest, np.datetime64) else latest
+            query = query.where(terms.Field(column) >= latest)
+
+        new_rows = CubeTable.from_data_frame(database.fetch_dataframe(str(query)), cube_table.dimensions)
+
+        with self._lock:
+            cube_table = self._tables[key]
+            if latest is not None:
+                is_older = _evaluate(['compare', 'lt', ['field', column], _make_plan(terms.ValueWrapper(latest))],
+                                     _Context(cube_table))
+                cube_table = cube_table.take(np.flatnonzero(is_older))
+            self._tables[key] = cube_table.concat(new_rows)
+
+    def refresh_every(self, seconds, table, database, column, query=None, dimensions=None):
+        """
+        Refreshes a table incrementally in a background thread, see `refresh`. Errors are logged and the table is
+        refreshed again after the next period.
+
+        :param seconds:
+            The number of seconds between refreshes.
+        :return:
+            A `threading.Event` which stops the refreshes when it is set.
+        """
+        stopped = threading.Event()
+
+        def refresh_periodically():
+            while not stopped.wait(seconds):
+                try:
+                    self.refresh(table, database, column, query, dimensions)
+                except Exception:
+                    cube_logger.exception('Failed to refresh the cube table {}'.format(table))
+
+        thread = threading.Thread(target=refresh_periodically)
+        thread.daemon = True
+        thread.start()
+        return stopped
+
+    def connect(self):
+        return _CubeConnection(self)
+
+    def execute(self, query):
+        """
+        Executes a cube query.
+
+        :param query:
+            The JSON plan of a query, as rendered by `CubeQuery`.
+        :return:
+            A data frame with the result set.
+        """
+        return _execute(json.loads(str(query)), self._tables)
+
+    def fetch_dataframe(self, query, dtypes=None):
+        data_frame = self.execute(query)
+
+        for column, dtype in (dtypes or {}).items():
+            # The metric columns are already numeric arrays
+            if column not in data_frame.columns or _is_numeric(dtype):
+                continue
+            try:
+                data_frame[column] = data_frame[column].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+
+        return data_frame
+
+    def trunc_date(self, field, interval):
+        return Trunc(field, str(interval))
+
+    def date_add(self, field, date_part, interval):
+        return DateAdd(field, str(date_part), interval)
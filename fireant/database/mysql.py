@@ -83,6 +83,11 @@ class MySQLDatabase(Database):
                                 user=self.user, password=self.password,
                                 charset=self.charset, cursorclass=pymysql.cursors.Cursor)
 
+    def streaming_cursor(self, connection):
+        # The unbuffered cursor reads rows from the socket as they are fetched instead of loading the full result set
+        import pymysql
+        return connection.cursor(pymysql.cursors.SSCursor)
+
     def trunc_date(self, field, interval):
         return Trunc(field, str(interval))
 
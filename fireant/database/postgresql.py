@@ -1,3 +1,5 @@
+import uuid
+
 from pypika import (
     PostgreSQLQuery,
     functions as fn,
@@ -27,6 +29,8 @@ class PostgreSQLDatabase(Database):
     # The pypika query class to use for constructing queries
     query_cls = PostgreSQLQuery
 
+    supports_grouping_sets = True
+
     def __init__(self, host='localhost', port=5432, database=None,
                  user=None, password=None, max_processes=1, cache_middleware=None):
         super(PostgreSQLDatabase, self).__init__(host, port, database,
@@ -41,6 +45,10 @@ class PostgreSQLDatabase(Database):
         return psycopg2.connect(host=self.host, port=self.port, dbname=self.database,
                                 user=self.user, password=self.password)
 
+    def streaming_cursor(self, connection):
+        # Named cursors in psycopg2 are server-side cursors which only transfer rows as they are fetched
+        return connection.cursor(name='fireant_{}'.format(uuid.uuid4().hex))
+
     def trunc_date(self, field, interval):
         return DateTrunc(field, str(interval))
 
@@ -11,6 +11,8 @@ class RedshiftDatabase(PostgreSQLDatabase):
     # The pypika query class to use for constructing queries
     query_cls = RedshiftQuery
 
+    supports_grouping_sets = False
+
     def __init__(self, host='localhost', port=5439, database=None,
                  user=None, password=None, max_processes=1, cache_middleware=None):
         super(RedshiftDatabase, self).__init__(host, port, database, user, password,
@@ -0,0 +1,147 @@
+from collections import OrderedDict
+from decimal import Decimal
+from numbers import (
+    Integral,
+    Number,
+)
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    is_categorical_dtype,
+    union_categoricals,
+)
+
+
+def read_data_frame(cursor, dtypes=None, batch_size=10000):
+    """
+    Reads the result set of an executed query from a DB-API cursor into a data frame.
+
+    Rows are fetched in batches and each batch is transposed into one numpy array per column. Columns with a known dtype
+    are converted to a typed array while the batch is read, so only one batch of the result set is held as python
+    objects at a time. The types of the remaining columns are inferred once all of the rows have been read, as
+    `pd.read_sql` would, including coercing decimals to floats.
+
+    :param cursor:
+        A DB-API cursor on which a query has been executed.
+    :param dtypes:
+        A dict mapping column names to numpy dtypes, `'category'` or `'numeric'`. If a column contains values that
+        cannot be converted to the given dtype, such as NULL values in a bool column, the type is inferred instead.
+        Categorical columns are encoded batch by batch, so repeated values such as labels are only held once. Numeric
+        columns are read as integers if all of their values are integers and as floats otherwise, as long as all of
+        their values are numbers.
+    :param batch_size:
+        The number of rows to fetch from the cursor at a time.
+    :return:
+        A `pd.DataFrame` with a column for each column in the cursor description.
+    """
+    dtypes = dtypes or {}
+    columns, batches = None, []
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+
+        if columns is None:
+            # The description is read after fetching since it is not available for server-side cursors until then
+            columns = [column[0] for column in cursor.description]
+
+        batches.append([_decode_values(values, dtypes.get(column))
+                        for column, values in zip(columns, zip(*rows))])
+
+    if columns is None:
+        columns = [column[0] for column in cursor.description or ()]
+        return pd.DataFrame(OrderedDict((column, pd.Series([], dtype=_get_empty_dtype(dtypes.get(column))).values)
+                                        for column in columns),
+                            columns=columns)
+
+    return pd.DataFrame(OrderedDict((column, _concat_values(column_batches))
+                                    for column, column_batches in zip(columns, zip(*batches))),
+                        columns=columns)
+
+
+def _decode_values(values, dtype):
+    if dtype is None:
+        return _object_array(values)
+
+    if is_categorical_dtype(dtype):
+        return pd.Categorical(_object_array(values))
+
+    if _is_numeric(dtype):
+        return _numeric_values(values)
+
+    dtype = np.dtype(dtype)
+    try:
+        if dtype.kind == 'M':
+            # Much faster than converting datetime objects with numpy
+            return pd.to_datetime(_object_array(values)).values.astype(dtype)
+
+        if dtype != np.bool_ or None not in values:
+            return np.array(values, dtype=dtype)
+
+    except (TypeError, ValueError):
+        pass
+
+    return _object_array(values)
+
+
+def _get_empty_dtype(dtype):
+    if dtype is None:
+        return object
+    if _is_numeric(dtype):
+        return np.float64
+    return dtype
+
+
+def _is_numeric(dtype):
+    # Comparing a numpy dtype to a string which is not a dtype name raises an error
+    return isinstance(dtype, str) and 'numeric' == dtype
+
+
+def _numeric_values(values):
+    # Strings are not converted even if they look like numbers
+    types = set(map(type, values))
+    if not all(issubclass(type_, Number) or type_ is type(None) for type_ in types):
+        return _object_array(values)
+
+    if all(issubclass(type_, Integral) for type_ in types):
+        return np.array(values, dtype=np.int64)
+
+    return np.array(values, dtype=np.float64)
+
+
+def _object_array(values):
+    # Preallocate the array so that sequence values such as arrays are not expanded into another dimension
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _concat_values(batches):
+    if all(isinstance(batch, pd.Categorical) for batch in batches):
+        try:
+            return union_categoricals(batches)
+        except TypeError:
+            # The categories of each batch have different types, such as when a batch contains only NULL values
+            return pd.Categorical(np.concatenate([np.asarray(batch, dtype=object) for batch in batches]))
+
+    values = np.concatenate([np.asarray(batch) for batch in batches]) \
+        if 1 < len(batches) \
+        else batches[0]
+
+    if values.dtype != object:
+        return values
+
+    return _infer_values(values)
+
+
+def _infer_values(values):
+    inferred = pd.Series(values).infer_objects()
+
+    if inferred.dtype == object:
+        not_null = values[pd.notnull(values)]
+        if len(not_null) and all(isinstance(value, Decimal) for value in not_null):
+            return values.astype(np.float64)
+
+    return inferred.values
@@ -35,6 +35,8 @@ class SnowflakeDatabase(Database):
     # The pypika query class to use for constructing queries
     query_cls = VerticaQuery
 
+    supports_grouping_sets = True
+
     DATETIME_INTERVALS = {
         'hour': 'HH',
         'day': 'DD',
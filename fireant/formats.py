@@ -5,8 +5,13 @@ from datetime import (
     datetime,
     time,
 )
+from functools import lru_cache
 
-from fireant.slicer.totals import TOTALS_MARKERS
+from fireant.slicer.totals import (
+    MAX_NUMBER,
+    MAX_TIMESTAMP,
+    TOTALS_MARKERS,
+)
 
 INF_VALUE = "Inf"
 NULL_VALUE = 'null'
@@ -26,6 +31,19 @@ def date_as_millis(value):
     return int(1000 * value.timestamp())
 
 
+def dates_as_millis(values):
+    """
+    Converts date/time values into milliseconds since the epoch. This is the vectorized counterpart of `date_as_millis`
+    for datetime64 values, which are converted all at once from their int64 nanoseconds.
+
+    :param values:
+        A `pd.DatetimeIndex` or a `pd.Series` of datetime64 values, without any NaT values.
+    :return:
+        A numpy int64 array containing the milliseconds since the epoch for each value.
+    """
+    return pd.DatetimeIndex(values).asi8 // 10 ** 6
+
+
 def coerce_type(value):
     if value is None:
         return None
@@ -53,6 +71,62 @@ def coerce_type(value):
     return value
 
 
+def _map_distinct(values, func):
+    """
+    Applies a function to each value, calling the function only once per distinct value. Null values are passed to the
+    function one by one since they are not included in the distinct values.
+
+    :return:
+        A numpy object array containing the result of the function for each value.
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+
+    mapped = np.empty(len(uniques) + 1, dtype=object)
+    mapped[:-1] = [func(value) for value in uniques]
+    result = mapped[codes]
+
+    for i in np.flatnonzero(codes == -1):
+        result[i] = func(values[i])
+
+    return result
+
+
+def coerce_type_series(values):
+    """
+    Coerces an array of values into proper primitive values. This is the vectorized counterpart of `coerce_type` and
+    returns the same values. Numeric arrays are converted all at once and the values of other arrays are coerced once
+    per distinct value.
+
+    :param values:
+        A `pd.Index`, `pd.Series` or numpy array.
+    :return:
+        A numpy object array containing the coerced values.
+    """
+    dtype = values.dtype
+
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        # Booleans are coerced to ints as well
+        return np.asarray(values).astype(np.int64 if pd.api.types.is_bool_dtype(dtype) else dtype).astype(object)
+
+    if pd.api.types.is_float_dtype(dtype):
+        raw = np.asarray(values)
+        result = raw.astype(np.float64).astype(object)
+
+        # Floats are truncated to ints like in `coerce_type` while NaN and inf values stay floats
+        with np.errstate(invalid='ignore'):
+            is_int = np.isfinite(raw) & (np.abs(raw) < 2 ** 63)
+        result[is_int] = np.trunc(raw[is_int]).astype(np.int64).astype(object)
+
+        is_large = np.isfinite(raw) & ~is_int
+        result[is_large] = [coerce_type(value) for value in raw[is_large].tolist()]
+        return result
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return np.asarray(values.astype(object))
+
+    return _map_distinct(np.asarray(values, dtype=object), coerce_type)
+
+
 def dimension_value(value):
     """
     Format a dimension value. This will coerce the raw string or date values into a proper primitive value like a
@@ -79,6 +153,48 @@ def dimension_value(value):
     return coerce_type(value)
 
 
+def dimension_value_series(values):
+    """
+    Formats an array of dimension values. This is the vectorized counterpart of `dimension_value` and returns the same
+    values. Dates are formatted with numpy for the whole array at once and the categories of categorical values are only
+    formatted once.
+
+    :param values:
+        A `pd.Index`, `pd.Series` or numpy array.
+    :return:
+        A numpy object array containing the formatted values.
+    """
+    dtype = values.dtype
+
+    if pd.api.types.is_categorical_dtype(dtype):
+        categorical = pd.Categorical(values)
+        formatted = np.append(dimension_value_series(categorical.categories), NULL_VALUE)
+        return formatted[categorical.codes]
+
+    if pd.api.types.is_datetime64_dtype(dtype):
+        # Dates are usually repeated for each combination of the other dimensions, so each date is only formatted once
+        codes, timestamps = pd.factorize(pd.DatetimeIndex(values))
+        has_time = np.asarray(timestamps != timestamps.normalize())
+
+        formatted = np.where(has_time,
+                             np.char.replace(np.datetime_as_string(timestamps.values, unit='s'), 'T', ' '),
+                             np.datetime_as_string(timestamps.values, unit='D')).astype(object)
+        formatted[np.asarray(timestamps == MAX_TIMESTAMP)] = 'Totals'
+        return np.append(formatted, NULL_VALUE)[codes]
+
+    if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        raw = np.asarray(values)
+
+        result = coerce_type_series(raw)
+        result[pd.isnull(raw)] = NULL_VALUE
+        if pd.api.types.is_integer_dtype(dtype):
+            # As with `dimension_value`, only the exact totals marker is matched, not floats which round to it
+            result[raw == MAX_NUMBER] = 'Totals'
+        return result
+
+    return _map_distinct(np.asarray(values, dtype=object), dimension_value)
+
+
 def metric_value(value):
     """
     Converts a raw metric value into a safe type. This will change dates into strings, NaNs into Nones, and np types
@@ -96,18 +212,42 @@ def metric_value(value):
     if value is None or value is '' or pd.isnull(value):
         return None
 
-    if isinstance(value, float):
+    if isinstance(value, (float, np.floating)):
         if np.isinf(value):
             return None
         return float(value)
 
-    if isinstance(value, np.int64):
-        # Cannot transform np.int64 to json
+    if isinstance(value, np.integer):
+        # Cannot transform np integer types to json
         return int(value)
 
     return value
 
 
+def metric_value_series(values):
+    """
+    Converts a series of raw metric values into safe types. This is the vectorized counterpart of `metric_value` and
+    returns the same values. NaN/inf values in float series are replaced with None using a mask for the whole series.
+
+    :param values:
+        A `pd.Series` of raw metric values.
+    :return:
+        A `pd.Series` with the same index containing the converted values as python objects.
+    """
+    dtype = values.dtype
+
+    if not (pd.api.types.is_float_dtype(dtype) or pd.api.types.is_integer_dtype(dtype)):
+        # Other types need to be handled value by value
+        return pd.Series([metric_value(value) for value in values], index=values.index, name=values.name, dtype=object)
+
+    raw = values.values
+    converted = raw.astype(object)
+    if pd.api.types.is_float_dtype(dtype):
+        converted[~np.isfinite(raw)] = None
+
+    return pd.Series(converted, index=values.index, name=values.name)
+
+
 def metric_display(value, prefix=None, suffix=None, precision=None):
     """
     Converts a metric value into the display value by applying formatting.
@@ -135,6 +275,10 @@ def metric_display(value, prefix=None, suffix=None, precision=None):
     if isinstance(value, bool):
         value = str(value).lower()
 
+    # Downcast metrics such as float32 or int32 are not subclasses of the python types
+    if isinstance(value, (np.floating, np.integer)):
+        value = value.item()
+
     if prefix == '$' and isinstance(value, (float, int)) and value < 0:
         value = -value
         prefix = '-$'
@@ -158,3 +302,85 @@ def metric_display(value, prefix=None, suffix=None, precision=None):
           value=str(value),
           suffix=suffix or '',
     )
+
+
+@lru_cache(maxsize=None)
+def _number_formatter(precision):
+    """
+    Creates the function which formats numbers with the given precision. The functions are cached so that they are
+    only created once for each precision.
+    """
+    precision_format = '{{:,.{precision}f}}'.format(precision=precision).format \
+        if precision is not None \
+        else None
+    integer_format = '{:,.0f}'.format
+
+    def format_number(value):
+        if isinstance(value, float):
+            if precision_format is not None:
+                return precision_format(value)
+
+            if value.is_integer():
+                return integer_format(value)
+
+            # Stripping trailing zeros is necessary because %f can add them if no precision is set
+            return '{:,f}'.format(value).rstrip('.0')
+
+        return integer_format(value)
+
+    return format_number
+
+
+def metric_display_series(values, prefix=None, suffix=None, precision=None):
+    """
+    Converts a series of metric values into display values. This is the vectorized counterpart of `metric_display` and
+    returns the same display values, but only formats each distinct number one by one while NaN/inf values, negative
+    amounts in dollars, prefixes and suffixes are handled for the whole series at once.
+
+    :param values:
+        A `pd.Series` of raw metric values.
+    :param prefix:
+        An optional prefix.
+    :param suffix:
+        An optional suffix.
+    :param precision:
+        The decimal precision, the number of decimal places to round to.
+    :return:
+        A `pd.Series` with the same index containing the formatted display values.
+    """
+    dtype = values.dtype
+
+    if pd.api.types.is_bool_dtype(dtype):
+        display = np.where(values.values, 'true', 'false').astype(object)
+        return pd.Series((prefix or '') + display + (suffix or ''), index=values.index, name=values.name)
+
+    if not (pd.api.types.is_float_dtype(dtype) or pd.api.types.is_integer_dtype(dtype)):
+        # Mixed types need to be handled value by value
+        return values.apply(lambda value: metric_display(value, prefix, suffix, precision))
+
+    raw = values.values
+    is_null = pd.isnull(raw)
+    is_inf = np.isinf(raw) if pd.api.types.is_float_dtype(dtype) else np.zeros(len(raw), dtype=bool)
+    is_number = ~(is_null | is_inf)
+
+    numbers = raw[is_number]
+    prefixes = np.full(len(numbers), prefix or '', dtype=object)
+
+    if prefix == '$':
+        is_negative = numbers < 0
+        numbers = np.where(is_negative, -numbers, numbers)
+        prefixes[is_negative] = '-$'
+
+    # Each distinct number is only formatted once
+    codes, uniques = pd.factorize(numbers)
+    format_number = _number_formatter(precision)
+    formatted = np.array([format_number(number) for number in uniques.tolist()] or [], dtype=object)[codes] \
+        if len(numbers) \
+        else np.array([], dtype=object)
+
+    display = np.empty(len(raw), dtype=object)
+    display[is_null] = NULL_VALUE
+    display[is_inf] = INF_VALUE
+    display[is_number] = prefixes + formatted + (suffix or '')
+
+    return pd.Series(display, index=values.index, name=values.name)
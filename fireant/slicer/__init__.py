@@ -1,3 +1,4 @@
+from .aggregates import AggregateTable
 from .dimensions import (
     BooleanDimension,
     CategoricalDimension,
@@ -31,6 +32,13 @@ from .operations import (
     RollingMean,
     Share,
 )
+from .queries import (
+    CallbackWatermark,
+    ChoicesCache,
+    ColumnWatermark,
+    QueryCache,
+    Watermark,
+)
 from .references import (
     DayOverDay,
     MonthOverMonth,
@@ -0,0 +1,256 @@
+"""
+Recommends aggregate tables for the slicer queries in a workload log, see `fireant.slicer.queries.workload`. The log can
+be analyzed with `recommend_aggregate_tables`, or from the command line with::
+
+    python -m fireant.slicer.aggregate_advisor workload.log --table-rows 250000000
+"""
+import argparse
+import json
+import re
+import sys
+from collections import (
+    OrderedDict,
+    namedtuple,
+)
+
+import pandas as pd
+
+from .intervals import DatetimeInterval
+from .queries.resampling import (
+    is_finer_interval,
+    is_interval_end,
+    is_interval_start,
+)
+
+Recommendation = namedtuple('Recommendation', ('table', 'dimensions', 'metrics', 'queries', 'rows', 'seconds_saved',
+                                               'ddl'))
+
+
+def read_workload_log(lines):
+    """
+    Reads the records of a workload log. Lines which are not workload records, such as the records of other loggers
+    written to the same file, are skipped.
+
+    :param lines:
+        An iterable of the lines of the log.
+    :return:
+        A generator of the records as dicts.
+    """
+    for line in lines:
+        start = line.find('{')
+        if -1 == start:
+            continue
+
+        try:
+            record = json.loads(line[start:])
+        except ValueError:
+            continue
+
+        if isinstance(record, dict) and 'dimensions' in record and 'duration' in record:
+            yield record
+
+
+def recommend_aggregate_tables(records, table_rows=None, limit=5):
+    """
+    Recommends aggregate tables which would answer the most expensive part of a workload.
+
+    Each combination of dimensions and intervals in the workload is a candidate aggregate table. A candidate could
+    answer the queries with the same or fewer dimensions and the same or coarser intervals, when all of their filters
+    are on those dimensions, their date ranges are aligned to the intervals of the candidate and all of their metrics
+    are sums of a column, see `AggregateTable`. The candidates are ranked by the number of seconds that the database
+    would have saved on those queries.
+
+    :param records:
+        The records of the workload, see `read_workload_log`.
+    :param table_rows: (Optional)
+        The number of rows in the table of the slicer, or a dict of the number of rows for the name of each table. The
+        queries to an aggregate table are assumed to take as long as the queries to the table times the ratio of their
+        numbers of rows. The number of rows of an aggregate table is estimated from the largest result set of a query
+        with its dimensions. Without the number of rows of the table, the queries to the aggregate table are assumed to
+        take no time at all.
+    :param limit:
+        The maximum number of recommendations.
+    :return:
+        A list of `Recommendation`s, with the largest number of seconds saved first.
+    """
+    records = [record
+               for record in records
+               if _can_pre_aggregate(record)]
+
+    display_keys = {dimension['display_key']: dimension['key']
+                    for record in records
+                    for dimension in record['dimensions']
+                    if dimension.get('display_key')}
+
+    candidates = OrderedDict()
+    for record in records:
+        key = (record['table'], _shape(record))
+        candidates[key] = max(candidates.get(key, 0), record['rows'] or 0)
+
+    recommendations = []
+    for (table, shape), rows in candidates.items():
+        covered = [record
+                   for record in records
+                   if record['table'] == table and _covers(shape, record, display_keys)]
+        if not covered:
+            continue
+
+        ratio = min(1., rows / _get_table_rows(table_rows, table)) \
+            if _get_table_rows(table_rows, table) \
+            else 0.
+        seconds_saved = sum(record['duration'] for record in covered) * (1 - ratio)
+
+        dimensions = _find_dimensions(covered, shape)
+        metrics = _find_metrics(covered)
+        recommendations.append(Recommendation(table=table,
+                                              dimensions=[(dimension['key'], dimension['interval'])
+                                                          for dimension in dimensions],
+                                              metrics=[metric['key'] for metric in metrics],
+                                              queries=len(covered),
+                                              rows=rows,
+                                              seconds_saved=round(seconds_saved, 4),
+                                              ddl=make_aggregate_table_ddl(table, dimensions, metrics)))
+
+    recommendations.sort(key=lambda recommendation: -recommendation.seconds_saved)
+    return recommendations[:limit]
+
+
+def make_aggregate_table_ddl(table, dimensions, metrics):
+    """
+    :param table:
+        The SQL of the table of the slicer.
+    :param dimensions:
+        The dimension records of the aggregate table.
+    :param metrics:
+        The metric records of the aggregate table.
+    :return:
+        A `CREATE TABLE AS SELECT` statement for the aggregate table. The columns have the same names as the columns of
+        the table, so that the same definitions can be used to query either table.
+    """
+    suffix = '_'.join(dimension['key'] if dimension['interval'] is None
+                      else '{}_{}'.format(dimension['key'], dimension['interval'])
+                      for dimension in dimensions)
+    aggregate_table = re.sub(r'"([^"]*)"$',
+                             lambda match: '"{}_by_{}"'.format(match.group(1), suffix or 'total'),
+                             table)
+
+    groups, selects = [], []
+    for dimension in dimensions:
+        groups.append(dimension['definition'])
+        selects.append('{} "{}"'.format(dimension['definition'], dimension['column']))
+
+        if dimension.get('display_key'):
+            groups.append(dimension['display_definition'])
+            selects.append('{} "{}"'.format(dimension['display_definition'], dimension['display_column']))
+
+    # Several metrics can be defined with the same column
+    metric_columns = OrderedDict((metric['column'], metric['definition'])
+                                 for metric in metrics)
+    selects += ['{} "{}"'.format(definition, column)
+                for column, definition in metric_columns.items()]
+
+    ddl = 'CREATE TABLE {} AS SELECT {} FROM {}'.format(aggregate_table, ','.join(selects), table)
+    if groups:
+        ddl += ' GROUP BY {}'.format(','.join(groups))
+    return ddl
+
+
+def _can_pre_aggregate(record):
+    metric_keys = {metric['key'] for metric in record['metrics']}
+    return not record['joins'] \
+           and all(dimension['column'] is not None
+                   and (not dimension.get('display_key') or dimension['display_column'] is not None)
+                   for dimension in record['dimensions']) \
+           and all(metric['column'] is not None
+                   for metric in record['metrics']) \
+           and all(filter_.get('metric') is None or filter_['metric'] in metric_keys
+                   for filter_ in record['filters'])
+
+
+def _shape(record):
+    return tuple(sorted((dimension['key'], dimension['interval'])
+                        for dimension in record['dimensions']))
+
+
+def _covers(shape, record, display_keys):
+    intervals = dict(shape)
+    if not all(dimension['key'] in intervals
+               and _is_finer_interval(intervals[dimension['key']], dimension['interval'])
+               for dimension in record['dimensions']):
+        return False
+
+    # The columns of the filtered dimensions must also be in the aggregate table
+    if not all(display_keys.get(filter_key, filter_key) in intervals
+               for filter_ in record['filters']
+               for filter_key in filter_.get('dimensions', ())):
+        return False
+
+    # Date ranges which split an interval of the aggregate table would include dates outside of the range
+    return all(_is_aligned_range(filter_, intervals[filter_['dimensions'][0]])
+               for filter_ in record['filters']
+               if 'start' in filter_)
+
+
+def _is_aligned_range(filter_, interval_key):
+    return interval_key is None \
+           or is_interval_start(pd.Timestamp(filter_['start']), interval_key) \
+           and is_interval_end(pd.Timestamp(filter_['stop']), interval_key)
+
+
+def _is_finer_interval(interval_key, coarser_interval_key):
+    if interval_key is None or coarser_interval_key is None:
+        return interval_key == coarser_interval_key
+    return is_finer_interval(DatetimeInterval(interval_key), DatetimeInterval(coarser_interval_key))
+
+
+def _find_dimensions(records, shape):
+    dimensions = OrderedDict()
+    for record in records:
+        for dimension in record['dimensions']:
+            if (dimension['key'], dimension['interval']) in shape:
+                dimensions.setdefault(dimension['key'], dimension)
+
+    return list(dimensions.values())
+
+
+def _find_metrics(records):
+    metrics = OrderedDict()
+    for record in records:
+        for metric in record['metrics']:
+            metrics.setdefault(metric['key'], metric)
+
+    return list(metrics.values())
+
+
+def _get_table_rows(table_rows, table):
+    return table_rows.get(table) \
+        if isinstance(table_rows, dict) \
+        else table_rows
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Recommends aggregate tables for the slicer queries in a workload '
+                                                 'log.')
+    parser.add_argument('logs', nargs='*', type=argparse.FileType('r'), default=[sys.stdin],
+                        help='Workload log files. The log is read from stdin if no files are given.')
+    parser.add_argument('--table-rows', type=int,
+                        help='The number of rows in the table of the slicer.')
+    parser.add_argument('--limit', type=int, default=5,
+                        help='The maximum number of recommendations.')
+    args = parser.parse_args(args)
+
+    records = [record
+               for log in args.logs
+               for record in read_workload_log(log)]
+
+    for i, recommendation in enumerate(recommend_aggregate_tables(records, args.table_rows, args.limit), 1):
+        print('-- {}. Saves {} seconds on {} queries, about {} rows'.format(i,
+                                                                             recommendation.seconds_saved,
+                                                                             recommendation.queries,
+                                                                             recommendation.rows))
+        print(recommendation.ddl + ';')
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+from .exceptions import SlicerException
+
+
+class AggregateTable(object):
+    """
+    A pre-aggregated copy of the table of a slicer, grouped by some of its dimensions, such as a table with the daily
+    totals for each party. Slicer queries which only use the dimensions and metrics of an aggregate table are sent to
+    the aggregate table instead of the table of the slicer.
+
+    The aggregate table must have columns with the same names as the columns used by the definitions of its dimensions
+    and metrics, and the metric definitions must give the same results on the pre-aggregated rows, for example a `SUM`
+    of a column which holds the sums of the column of the slicer table. Only additive metrics can be pre-aggregated.
+
+    :param table:
+        A pypika Table reference to the aggregate table.
+    :param dimensions:
+        The dimensions which the aggregate table is grouped by. Continuous dimensions are given with the interval of the
+        aggregate table, such as `slicer.dimensions.timestamp(daily)`, and can be queried with that or a coarser
+        interval.
+    :param metrics:
+        The additive metrics which can be queried from the aggregate table.
+    :param rows: (Optional)
+        The approximate number of rows in the aggregate table. When several aggregate tables can answer a query, the one
+        with the fewest rows is used. Aggregate tables without a number of rows are used after the others, in the order
+        they were given to the slicer.
+    """
+
+    def __init__(self, table, dimensions, metrics, rows=None):
+        non_additive_metrics = [metric.key
+                                for metric in metrics
+                                if not metric.additive]
+        if non_additive_metrics:
+            raise SlicerException('The metrics {} of the aggregate table {} are not additive.'
+                                  .format(non_additive_metrics, table))
+
+        self.table = table
+        self.dimensions = dimensions
+        self.metrics = metrics
+        self.rows = rows
+
+    def __repr__(self):
+        return 'AggregateTable({table},dimensions=[{dimensions}],metrics=[{metrics}])' \
+            .format(table=self.table,
+                    dimensions=','.join([d.key for d in self.dimensions]),
+                    metrics=','.join([m.key for m in self.metrics]))
@@ -47,30 +47,36 @@ class BooleanFilter(DimensionFilter):
             else Not(dimension_definition)
 
         super(BooleanFilter, self).__init__(dimension_key, definition)
+        self.value = value
 
 
 class ContainsFilter(DimensionFilter):
     def __init__(self, dimension_key, dimension_definition, values):
         definition = dimension_definition.isin(values)
         super(ContainsFilter, self).__init__(dimension_key, definition)
+        self.values = values
 
 
 class ExcludesFilter(DimensionFilter):
     def __init__(self, dimension_key, dimension_definition, values):
         definition = dimension_definition.notin(values)
         super(ExcludesFilter, self).__init__(dimension_key, definition)
+        self.values = values
 
 
 class RangeFilter(DimensionFilter):
     def __init__(self, dimension_key, dimension_definition, start, stop):
         definition = dimension_definition[start:stop]
         super(RangeFilter, self).__init__(dimension_key, definition)
+        self.start = start
+        self.stop = stop
 
 
 class PatternFilter(DimensionFilter):
     def __init__(self, dimension_key, dimension_definition, pattern, *patterns):
         definition = self._apply(dimension_definition, (pattern,) + patterns)
         super(PatternFilter, self).__init__(dimension_key, definition)
+        self.patterns = (pattern,) + patterns
 
     def _apply(self, dimension_definition, patterns):
         definition = Lower(dimension_definition).like(Lower(patterns[0]))
@@ -84,3 +90,42 @@ class PatternFilter(DimensionFilter):
 class AntiPatternFilter(PatternFilter):
     def _apply(self, dimension_definition, pattern):
         return super(AntiPatternFilter, self)._apply(dimension_definition, pattern).negate()
+
+
+class KeysetFilter(DimensionFilter):
+    """
+    Filters a query to the rows which follow a set of dimension values when ordered ascending by those dimensions. This
+    is used for keyset pagination, where the last values of the previous page are used instead of an offset so that
+    the database does not need to scan and discard all of the rows on the previous pages.
+
+    NULLs are ordered before all other values, so a NULL value in the cursor is followed by the non-NULL values.
+    """
+
+    def __init__(self, dimension_keys, dimension_definitions, values):
+        definition = self._apply(dimension_definitions, values)
+        super(KeysetFilter, self).__init__(dimension_keys[0], definition)
+        self.dimension_keys = dimension_keys
+
+    @staticmethod
+    def _apply(dimension_definitions, values):
+        # Expands the row value comparison (d0, d1, ...) > (v0, v1, ...) since it is not supported by all vendors:
+        #   d0 > v0 OR (d0 = v0 AND d1 > v1) OR ...
+        definition = None
+
+        # NULLs never compare equal or greater, so they are matched with IS NULL and IS NOT NULL instead
+        for i, (dimension_definition, value) in enumerate(zip(dimension_definitions, values)):
+            criterion = dimension_definition.notnull() \
+                if value is None \
+                else dimension_definition > value
+
+            for previous_definition, previous_value in zip(dimension_definitions[:i], values[:i]):
+                equal = previous_definition.isnull() \
+                    if previous_value is None \
+                    else previous_definition == previous_value
+                criterion = equal & criterion
+
+            definition = criterion \
+                if definition is None \
+                else definition | criterion
+
+        return definition
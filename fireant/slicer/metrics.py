@@ -26,13 +26,25 @@ class Metric(SlicerElement):
 
     :param suffix:
         A suffix for rendering labels in visualizations such as '€'
+
+    :param dtype: (optional)
+        A numpy dtype such as 'float32' or 'int32' to downcast the metric values to after they are fetched, in order to
+        reduce the memory used by large result sets. By default, metric values are fetched as 64-bit floats.
+
+    :param additive: (optional)
+        True if the value of the metric for a group of rows is the sum of its values for any split of the rows, such as
+        ``SUM`` or ``COUNT`` but not ``AVG`` or ``COUNT(DISTINCT)``. The cached results of additive metrics for a finer
+        interval of a date dimension can be rolled up to answer queries for a coarser interval.
     """
 
-    def __init__(self, key, definition, label=None, precision=None, prefix=None, suffix=None):
+    def __init__(self, key, definition, label=None, precision=None, prefix=None, suffix=None, dtype=None,
+                 additive=False):
         super(Metric, self).__init__(key, label, definition)
         self.precision = precision
         self.prefix = prefix
         self.suffix = suffix
+        self.dtype = dtype
+        self.additive = additive
         self._share = False
 
     def __eq__(self, other):
@@ -1,5 +1,13 @@
 from .builder import (
     DimensionChoicesQueryBuilder,
     DimensionLatestQueryBuilder,
+    MultipleDimensionChoicesQueryBuilder,
     SlicerQueryBuilder,
 )
+from .cache import QueryCache
+from .choices import ChoicesCache
+from .watermarks import (
+    CallbackWatermark,
+    ColumnWatermark,
+    Watermark,
+)
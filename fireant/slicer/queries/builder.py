@@ -1,9 +1,11 @@
+from collections import OrderedDict
 from typing import (
     Dict,
     Iterable,
 )
 
 import pandas as pd
+import time
 
 from fireant.utils import (
     format_dimension_key,
@@ -13,7 +15,15 @@ from fireant.utils import (
 )
 from pypika import Order
 from . import special_cases
-from .execution import fetch_data
+from .cache import table_name
+from .choices import ChoicesIndex
+from .execution import (
+    downcast_metrics,
+    fetch_data,
+    iter_fetch_data,
+    reduce_result_set,
+    transform_widgets,
+)
 from .finders import (
     find_and_group_references_for_dimensions,
     find_and_replace_reference_dimensions,
@@ -21,16 +31,43 @@ from .finders import (
     find_operations_for_widgets,
     find_share_dimensions,
 )
-from .pagination import paginate
+from .pagination import (
+    Page,
+    decode_cursor,
+    keyset_paginate,
+    make_keyset_orders,
+    paginate,
+)
+from .resampling import (
+    can_resample,
+    resample,
+)
 from .sql_transformer import (
+    CHOICES_DIMENSION_KEY,
+    make_choices_query,
     make_latest_query,
     make_orders_for_dimensions,
     make_slicer_query,
     make_slicer_query_with_totals_and_references,
+    make_terms_for_dimension,
 )
+from .subsumption import (
+    CachedQuery,
+    apply_filters,
+    find_filters_to_apply,
+)
+from .workload import log_workload
 from .. import QueryException
 from ..base import SlicerElement
 from ..dimensions import Dimension
+from ..filters import (
+    KeysetFilter,
+    MetricFilter,
+)
+from ..operations import (
+    RollingOperation,
+    Share,
+)
 from ..references import reference_key
 from ..totals import scrub_totals_from_share_results
 
@@ -84,6 +121,31 @@ class QueryBuilder(object):
         """
         self._offset = offset
 
+    def _get_cached(self, cache, key, load):
+        """
+        Gets a value from one of the caches of the slicer. If the slicer has a watermark, the value is only reused while
+        the watermark of the table of the slicer is unchanged.
+
+        :param cache:
+            A `QueryCache`.
+        :param key:
+            The key of the value in the cache.
+        :param load:
+            A function without arguments which queries the value.
+        :return:
+            The cached value.
+        """
+        return cache.get(key, load,
+                         table=self.slicer.table,
+                         watermark=self._get_watermark())
+
+    def _get_watermark(self):
+        watermark = getattr(self.slicer, 'watermark', None)
+
+        return watermark.get(self.slicer) \
+            if watermark is not None \
+            else None
+
     @property
     def queries(self):
         """
@@ -189,17 +251,18 @@ class SlicerQueryBuilder(QueryBuilder):
         to fetch the data.  When references are used, the base query normally produced is wrapped in an outer query and
         a query for each reference is joined based on the referenced dimension shifted.
         """
+        return self._make_queries(self._filters,
+                                  self._orders or make_orders_for_dimensions(self._dimensions))
+
+    def _make_queries(self, filters, orders, metrics=None):
         # First run validation for the query on all widgets
         self._validate()
 
-        # Optionally select all metrics for slicer to better utilize caching
-        metrics = list(self.slicer.metrics) \
-            if self.slicer.always_query_all_metrics \
-            else find_metrics_for_widgets(self._widgets)
+        if metrics is None:
+            metrics = self._metrics
         operations = find_operations_for_widgets(self._widgets)
         share_dimensions = find_share_dimensions(self._dimensions, operations)
         references = find_and_replace_reference_dimensions(self._references, self._dimensions)
-        orders = (self._orders or make_orders_for_dimensions(self._dimensions))
 
         return make_slicer_query_with_totals_and_references(self.slicer.database,
                                                             self.table,
@@ -207,11 +270,66 @@ class SlicerQueryBuilder(QueryBuilder):
                                                             self._dimensions,
                                                             metrics,
                                                             operations,
-                                                            self._filters,
+                                                            filters,
                                                             references,
                                                             orders,
                                                             share_dimensions=share_dimensions,
-                                                            apply_filter_to_totals=self._apply_filter_to_totals)
+                                                            apply_filter_to_totals=self._apply_filter_to_totals,
+                                                            aggregate_tables=self.slicer.aggregate_tables)
+
+    @property
+    def _metrics(self):
+        # Optionally select all metrics for slicer to better utilize caching
+        return list(self.slicer.metrics) \
+            if self.slicer.always_query_all_metrics \
+            else find_metrics_for_widgets(self._widgets)
+
+    def _validate_partial_results(self):
+        """
+        Keyset pages and streamed chunks only contain part of the result set, so they cannot be used with references,
+        totals or operations which are computed across the whole result set after it is fetched.
+        """
+        operations = find_operations_for_widgets(self._widgets)
+
+        if any([self._references,
+                find_share_dimensions(self._dimensions, operations),
+                any(dimension.is_rollup for dimension in self._dimensions),
+                any(not isinstance(operation, Share) for operation in operations)]):
+            raise QueryException('Partial result sets cannot be used with references, totals or operations that '
+                                 'require the full result set.')
+
+    def _make_keyset_queries(self, limit, after=None):
+        """
+        Serialize this query builder to a list of Pypika/SQL queries for fetching a single page of results using keyset
+        pagination. Instead of an offset, the rows are filtered to those following the dimension values in the cursor
+        and ordered by the dimensions with NULLs first, so that the database can seek directly to the start of the
+        page.
+
+        One extra row is selected in order to determine whether there is a next page.
+        """
+        if not self._dimensions:
+            raise QueryException('Must select at least one dimension to use keyset pagination.')
+        if self._orders:
+            raise QueryException('Keyset pagination cannot be used with custom orders.')
+
+        self._validate_partial_results()
+
+        terms = [make_terms_for_dimension(dimension, self.slicer.database.trunc_date)[0]
+                 for dimension in self._dimensions]
+
+        filters = list(self._filters)
+        if after is not None:
+            filters.append(KeysetFilter([dimension.key for dimension in self._dimensions],
+                                        terms,
+                                        decode_cursor(after)))
+
+        queries = []
+        for query in self._make_queries(filters, ()):
+            for term, orientation in make_keyset_orders(terms):
+                query = query.orderby(term, order=orientation)
+            queries.append(query.limit(limit + 1))
+
+        return queries
 
     def fetch(self, hint=None) -> Iterable[Dict]:
         """
@@ -222,16 +340,286 @@ class SlicerQueryBuilder(QueryBuilder):
         :return:
             A list of dict (JSON) objects containing the widget configurations.
         """
-        queries = add_hints(self.queries, hint)
+        result_cache = getattr(self.slicer, 'result_cache', None)
+
+        data_frame = self._fetch_data_frame(add_hints(self.queries, hint)) \
+            if result_cache is None \
+            else self._fetch_cached_data_frame(result_cache, hint)
+        data_frame = paginate(data_frame,
+                              self._widgets,
+                              orders=self._orders,
+                              limit=self._limit,
+                              offset=self._offset)
+
+        return self._transform_widgets(data_frame)
+
+    def fetch_page(self, limit, after=None, hint=None) -> Page:
+        """
+        Fetch a single page of data for this query using keyset pagination and transform it into the widgets. Rows are
+        ordered by the dimensions and each page costs the same to query regardless of how deep it is.
+
+        :param limit:
+            The number of rows in a page.
+        :param after:
+            The cursor returned with the previous page. If None, then the first page is fetched.
+        :param hint:
+            A query hint label used with database vendors which support it. Adds a label comment to the query.
+        :return:
+            A `Page` tuple of the list of widget configurations and the cursor for the next page. The cursor is None
+            when there are no more pages.
+        """
+        queries = add_hints(self._make_keyset_queries(limit, after), hint)
+
+        # The rows are kept in the order of the database so the cursor is taken from the last row of the page
+        data_frame = self._fetch_data_frame(queries, keep_order=True)
+        data_frame, cursor = keyset_paginate(data_frame, limit)
+
+        return Page(self._transform_widgets(data_frame), cursor)
+
+    def iter_fetch(self, chunksize=10000, hint=None) -> Iterable[pd.DataFrame]:
+        """
+        Fetch the data for this query in chunks using a streaming cursor. This is meant for exporting large result sets
+        since only one chunk is held in memory at a time and the result set is not capped by the max result set size of
+        the database. The widgets are not transformed, instead the data frame for each chunk is yielded.
+
+        :param chunksize:
+            The maximum number of rows in each chunk.
+        :param hint:
+            A query hint label used with database vendors which support it. Adds a label comment to the query.
+        :return:
+            A generator of `pd.DataFrame`, one for each chunk of rows in the order they are returned by the database.
+        """
+        self._validate_partial_results()
+
+        query = add_hints(self.queries, hint)[0]
+        if self._limit is not None or self._offset is not None:
+            query = query.limit(self._limit).offset(self._offset)
+
+        operations = find_operations_for_widgets(self._widgets)
 
+        def apply_operations(data_frame):
+            for operation in operations:
+                df_key = format_metric_key(operation.key)
+                data_frame[df_key] = operation.apply(data_frame, None)
+
+            return data_frame
+
+        # Validation is done before creating the generator so that errors are raised immediately
+        return map(apply_operations, iter_fetch_data(self.slicer.database, query, self._dimensions, chunksize))
+
+    def _fetch_data_frame(self, queries, metrics=None, keep_order=False):
         operations = find_operations_for_widgets(self._widgets)
         share_dimensions = find_share_dimensions(self._dimensions, operations)
 
+        # Only part of the metrics are fetched when the others are cached
+        is_partial = metrics is not None
+        if not is_partial:
+            metrics = self._metrics
+
+        start_time = time.time()
         data_frame = fetch_data(self.slicer.database,
                                 queries,
                                 self._dimensions,
                                 share_dimensions,
-                                self.reference_groups)
+                                self.reference_groups,
+                                keep_order=keep_order)
+        log_workload(self.slicer.database,
+                     self.table,
+                     self._dimensions,
+                     metrics,
+                     self._filters,
+                     self._references,
+                     round(time.time() - start_time, 4),
+                     data_frame)
+        data_frame = downcast_metrics(data_frame, metrics, self._references)
+
+        if is_partial:
+            # The operations are applied once the result set is complete
+            return data_frame
+
+        return self._apply_operations(data_frame)
+
+    def _fetch_cached_data_frame(self, result_cache, hint=None):
+        """
+        Fetches the result set using the result cache of the slicer. The columns of each metric are cached separately
+        for the dimensions, filters and references of this query, so only the metrics which are not cached yet are
+        queried and then joined with the cached columns. If the metrics are not cached for the filters of this query
+        but a cached result set of a query with broader filters contains all of them, that result set is filtered
+        instead. Likewise, a cached result set with finer intervals is rolled up if all of the metrics are additive.
+        """
+        query_key = self._make_result_cache_key()
+        filters_key = tuple((repr(filter_), apply_to_totals)
+                            for filter_, apply_to_totals in zip(self._filters, self._apply_filter_to_totals))
+        key = (query_key, filters_key)
+        watermark = self._get_watermark()
+        metrics = self._metrics
+
+        # The columns of the dimension display values are cached with every query, so if they have expired then so have
+        # the metric columns
+        cached = {metric.key: result_cache.peek((key, metric.key), watermark)
+                  for metric in metrics}
+        cached_query = result_cache.peek((key, None), watermark)
+        missing_metrics = [metric
+                           for metric in metrics
+                           if cached_query is None or cached[metric.key] is None]
+
+        if missing_metrics:
+            data_frame = self._filter_broader_cached_result(result_cache, query_key, watermark)
+            if data_frame is None:
+                data_frame = self._resample_finer_cached_result(result_cache, query_key, filters_key, watermark)
+            if data_frame is not None:
+                return self._apply_operations(data_frame)
+
+            orders = self._orders or make_orders_for_dimensions(self._dimensions)
+            queries = add_hints(self._make_queries(self._filters, orders, metrics=missing_metrics), hint)
+            data_frame = self._fetch_data_frame(queries, metrics=missing_metrics)
+
+            display_columns = data_frame[[column
+                                          for column in data_frame.columns
+                                          if column.startswith(format_dimension_key(''))]]
+            cached_query = CachedQuery(self._dimensions, self._filters, display_columns)
+            result_cache.put((key, None), cached_query,
+                             table=self.table,
+                             watermark=watermark,
+                             group=self._make_result_cache_group(query_key))
+
+            for metric in missing_metrics:
+                cached[metric.key] = data_frame[[format_metric_key(reference_key(metric, reference))
+                                                 for reference in [None] + self._references]]
+                result_cache.put((key, metric.key), cached[metric.key], table=self.table, watermark=watermark)
+
+        data_frame = self._join_cached_columns(cached_query.display_columns, [cached[metric.key]
+                                                                              for metric in metrics])
+        return self._apply_operations(data_frame)
+
+    def _filter_broader_cached_result(self, result_cache, query_key, watermark):
+        """
+        Finds a cached result set of this query with broader filters which contains all of the metrics of this query,
+        for example when drilling down into a dimension, and filters it to the rows matching the filters of this query.
+
+        :return:
+            The filtered data frame, or None if no cached result set can be used.
+        """
+        operations = find_operations_for_widgets(self._widgets)
+
+        # Totals and rolling operations are computed over all of the rows of a query, so they change with the filters
+        if any(dimension.is_rollup for dimension in self._dimensions) \
+              or find_share_dimensions(self._dimensions, operations) \
+              or any(isinstance(operation, RollingOperation) for operation in operations):
+            return None
+
+        for cached_key, _ in result_cache.keys(self._make_result_cache_group(query_key)):
+            if query_key != cached_key[0]:
+                continue
+
+            cached_query = result_cache.peek((cached_key, None), watermark)
+            # A result set which was truncated to the max result set size may be missing rows
+            if cached_query is None \
+                  or len(cached_query.display_columns) >= self.slicer.database.max_result_set_size:
+                continue
+
+            filters = find_filters_to_apply(self._dimensions, cached_query.filters, self._filters)
+            columns = [result_cache.peek((cached_key, metric.key), watermark)
+                       for metric in self._metrics]
+            if filters is None or any(column is None for column in columns):
+                continue
+
+            data_frame = self._join_cached_columns(cached_query.display_columns, columns)
+            return apply_filters(data_frame, filters)
+
+        return None
+
+    def _resample_finer_cached_result(self, result_cache, query_key, filters_key, watermark):
+        """
+        Finds a cached result set of this query with finer intervals of its continuous dimensions, for example daily
+        instead of monthly, which contains all of the metrics of this query and rolls it up to the intervals of this
+        query. This is only done when the metrics are additive, so that the values can be summed. The totals and
+        reference columns are summed the same way.
+
+        :return:
+            The rolled up data frame, or None if no cached result set can be used.
+        """
+        operations = find_operations_for_widgets(self._widgets)
+
+        # Metric filters and delta percentages are computed for each interval, so they cannot be rolled up
+        if not all(getattr(metric, 'additive', False) for metric in self._metrics) \
+              or any(isinstance(filter_, MetricFilter) for filter_ in self._filters) \
+              or any(reference.delta_percent for reference in self._references) \
+              or any(isinstance(operation, RollingOperation) for operation in operations):
+            return None
+
+        # The keys of the queries in the group only differ in the intervals of the dimensions
+        for cached_key, _ in result_cache.keys(self._make_result_cache_group(query_key)):
+            if filters_key != cached_key[1]:
+                continue
+
+            cached_query = result_cache.peek((cached_key, None), watermark)
+            # A result set which was truncated to the max result set size may be missing rows
+            if cached_query is None \
+                  or len(cached_query.display_columns) >= self.slicer.database.max_result_set_size \
+                  or not can_resample(cached_query.dimensions, self._dimensions):
+                continue
+
+            columns = [result_cache.peek((cached_key, metric.key), watermark)
+                       for metric in self._metrics]
+            if any(column is None for column in columns):
+                continue
+
+            data_frame = self._join_cached_columns(cached_query.display_columns, columns)
+            return resample(data_frame,
+                            self._dimensions,
+                            [format_metric_key(reference_key(metric, reference))
+                             for reference in [None] + self._references
+                             for metric in self._metrics])
+
+        return None
+
+    def _join_cached_columns(self, display_columns, metric_columns):
+        data_frame = pd.concat([display_columns] + list(metric_columns), axis=1) \
+            .sort_index(na_position='first')
+
+        # Same order of columns as when all of the metrics are fetched with one query
+        return data_frame[list(display_columns.columns)
+                          + [format_metric_key(reference_key(metric, reference))
+                             for reference in [None] + self._references
+                             for metric in self._metrics]]
+
+    def _make_result_cache_key(self):
+        """
+        :return:
+            A key of everything in this query which changes the values of a metric, other than the metric itself and the
+            filters.
+        """
+        operations = find_operations_for_widgets(self._widgets)
+        share_dimensions = find_share_dimensions(self._dimensions, operations)
+
+        return (table_name(self.table),
+                tuple((dimension.key, repr(getattr(dimension, 'interval', None)), dimension.is_rollup)
+                      for dimension in self._dimensions),
+                tuple(repr(reference)
+                      for reference in self._references),
+                tuple(dimension.key
+                      for dimension in share_dimensions),
+                # Rolling operations widen the date range filters of the query
+                tuple(operation.window
+                      for operation in operations
+                      if isinstance(operation, RollingOperation)),
+                # Orders only change the results when the result set is truncated to the max result set size
+                tuple((str(definition), str(orientation))
+                      for definition, orientation in self._orders))
+
+    @staticmethod
+    def _make_result_cache_group(query_key):
+        """
+        :return:
+            The key of the group of cached result sets which can answer a query with the given result cache key. The
+            result sets in a group differ only in their filters and in the intervals of their dimensions, which are the
+            second item of the key.
+        """
+        return query_key[:1] + query_key[2:]
+
+    def _apply_operations(self, data_frame):
+        operations = find_operations_for_widgets(self._widgets)
 
         # Apply operations
         for operation in operations:
@@ -240,16 +628,22 @@ class SlicerQueryBuilder(QueryBuilder):
                 data_frame[df_key] = operation.apply(data_frame, reference)
 
         data_frame = scrub_totals_from_share_results(data_frame, self._dimensions)
-        data_frame = special_cases.apply_operations_to_data_frame(operations, data_frame)
-        data_frame = paginate(data_frame,
-                              self._widgets,
-                              orders=self._orders,
-                              limit=self._limit,
-                              offset=self._offset)
+        return special_cases.apply_operations_to_data_frame(operations, data_frame)
+
+    def _transform_widgets(self, data_frame):
+        # Imported here since the widgets package depends on the slicer package
+        from ..widgets.context import RenderContext
+
+        # The preprocessing of the data frame, such as the display values and the formatted metric columns, is shared by
+        # all of the widgets
+        context = RenderContext(data_frame, self._dimensions)
 
         # Apply transformations
-        return [widget.transform(data_frame, self.slicer, self._dimensions, self._references)
-                for widget in self._widgets]
+        return transform_widgets(self._widgets,
+                                 context,
+                                 self.slicer,
+                                 self._references,
+                                 pool=self.slicer.transform_pool)
 
     def __str__(self):
         return str(self.queries)
@@ -312,7 +706,26 @@ class DimensionChoicesQueryBuilder(QueryBuilder):
             cut off due to the pagination.  These results will be returned at the head of the results.
         :return:
             A list of dict (JSON) objects containing the widget configurations.
+
+        If the slicer has a choices cache and the query only filters the dimension of the choices, the choices are
+        filtered in memory instead of querying the database.
         """
+        choices_index = self._get_choices_index(hint)
+        if choices_index is not None:
+            choices = choices_index.filter(self._filters)
+
+            if force_include:
+                include = choices.index.astype(str).isin([str(x) for x in force_include])
+                choices = pd.concat([choices[include], choices[~include]])
+
+            start, end = self._offset or 0, None
+            if self._limit is not None:
+                end = start + self._limit
+            return choices.iloc[start:end]
+
+        return self._fetch_choices(hint, force_include)
+
+    def _fetch_choices(self, hint=None, force_include=()):
         query = add_hints(self.queries, hint)[0]
 
         dimension = self._dimensions[0]
@@ -331,19 +744,76 @@ class DimensionChoicesQueryBuilder(QueryBuilder):
         query = query.orderby(definition)
 
         data = fetch_data(self.slicer.database, [query], self._dimensions)
+        return self._make_choices(data)
 
-        df_key = format_dimension_key(getattr(dimension, 'display_key', None))
-        if df_key is not None:
-            return data[df_key]
+    def fetch_page(self, limit, after=None, hint=None) -> Page:
+        """
+        Fetch a single page of choices for this dimension using keyset pagination. The choices are ordered by the
+        dimension's value (not the display value) and each page costs the same to query regardless of how deep it is.
 
-        display_key = 'display'
-        if hasattr(dimension, 'display_values'):
-            # Include provided display values
-            data[display_key] = pd.Series(dimension.display_values)
-        else:
-            data[display_key] = data.index.tolist()
+        :param limit:
+            The number of choices in a page.
+        :param after:
+            The cursor returned with the previous page. If None, then the first page is fetched.
+        :param hint:
+            For database vendors that support it, add a query hint to collect analytics on the queries triggerd by
+            fireant.
+        :return:
+            A `Page` tuple of the choices as a `pd.Series` and the cursor for the next page. The cursor is None when
+            there are no more pages.
+        """
+        dimension = self._dimensions[0]
+
+        choices_index = self._get_choices_index(hint)
+        if choices_index is not None:
+            choices = choices_index.filter(self._filters).sort_index(na_position='first')
+            if after is not None:
+                value = decode_cursor(after)[0]
+                choices = choices[choices.index.notnull()]
+                if value is not None:
+                    choices = choices[choices.index > value]
+
+            return keyset_paginate(choices, limit)
+
+        filters = list(self._filters)
+        if after is not None:
+            filters.append(KeysetFilter([dimension.key],
+                                        [dimension.definition],
+                                        decode_cursor(after)))
+
+        query = make_slicer_query(database=self.slicer.database,
+                                  base_table=self.table,
+                                  joins=self.slicer.joins,
+                                  dimensions=self._dimensions,
+                                  filters=filters)
+        for term, orientation in make_keyset_orders([dimension.definition.as_(format_dimension_key(dimension.key))]):
+            query = query.orderby(term, order=orientation)
+        query = add_hints([query.limit(limit + 1)], hint)[0]
 
-        return data[display_key]
+        data = fetch_data(self.slicer.database, [query], self._dimensions, keep_order=True)
+        return keyset_paginate(self._make_choices(data), limit)
+
+    def _get_choices_index(self, hint=None):
+        """
+        :return:
+            The `ChoicesIndex` with all of the choices of the dimension from the choices cache of the slicer, if it has
+            one and the filters of this query can be applied to the cached choices. Otherwise None.
+        """
+        choices_cache = getattr(self.slicer, 'choices_cache', None)
+        dimension = self._dimensions[0]
+
+        if choices_cache is None or not ChoicesIndex.supports(dimension, self._filters):
+            return None
+
+        def load():
+            all_choices = DimensionChoicesQueryBuilder(self.slicer, dimension)._fetch_choices(hint)
+            return ChoicesIndex(dimension, all_choices)
+
+        # Slicers can share a cache, so the key includes the table the choices are queried from
+        return self._get_cached(choices_cache, (table_name(self.table), dimension.key), load)
+
+    def _make_choices(self, data):
+        return make_choices(self._dimensions[0], data)
 
     def __repr__(self):
         return ".".join(["slicer", self._dimensions[0].key, "choices"]
@@ -351,6 +821,112 @@ class DimensionChoicesQueryBuilder(QueryBuilder):
                            for f in self._filters])
 
 
+class MultipleDimensionChoicesQueryBuilder(QueryBuilder):
+    """
+    This builder is used for fetching the choices of several dimensions with a single query, such as for a bar of
+    filters. The filters are shared by all of the dimensions.
+    """
+
+    def __init__(self, slicer):
+        super(MultipleDimensionChoicesQueryBuilder, self).__init__(slicer, slicer.hint_table or slicer.table)
+        self._exclude_own_filters = False
+
+    @immutable
+    def __call__(self, dimension: Dimension, *dimensions: Dimension, exclude_own_filters=False):
+        """
+        :param dimension:
+            A dimension to fetch the choices of.
+        :param dimensions:
+            More dimensions to fetch the choices of.
+        :param exclude_own_filters:
+            If True, the filters on a dimension are not applied to the choices of that dimension, so that the choices
+            which are not selected yet are still available. This requires a query for each dimension filtered this way,
+            which are combined into one query with UNION ALL.
+        """
+        self._dimensions += [dimension] + list(dimensions)
+        self._exclude_own_filters = exclude_own_filters
+
+    @property
+    def queries(self):
+        """
+        Serializes this query builder as a set of SQL queries. This method will always return a list of one query since
+        the choices of all of the dimensions are fetched with one query.
+        """
+        if not self._dimensions:
+            raise QueryException('Must select at least one dimension to query choices')
+
+        query = make_choices_query(database=self.slicer.database,
+                                   base_table=self.table,
+                                   joins=self.slicer.joins,
+                                   dimensions=self._dimensions,
+                                   filters=self._filters,
+                                   exclude_own_filters=self._exclude_own_filters)
+        return [query]
+
+    def fetch(self, hint=None) -> Dict[str, pd.Series]:
+        """
+        Fetch the choices of the dimensions.
+
+        :param hint:
+            For database vendors that support it, add a query hint to collect analytics on the queries triggerd by
+            fireant.
+        :return:
+            An ordered dict mapping the key of each dimension to its choices, a `pd.Series` like the result of
+            `DimensionChoicesQueryBuilder.fetch`.
+        """
+        queries = add_hints(self.queries, hint)
+        data = fetch_data(self.slicer.database, queries, ())
+
+        choices = OrderedDict()
+        for dimension in self._dimensions:
+            columns = [format_dimension_key(dimension.key)]
+            if dimension.has_display_field:
+                columns.append(format_dimension_key(dimension.display_key))
+
+            dimension_data = data.loc[data[CHOICES_DIMENSION_KEY] == dimension.key, columns]
+            dimension_data = reduce_result_set([dimension_data], (), [dimension], ())
+            dimension_choices = make_choices(dimension, dimension_data)
+
+            # Order the choices like the query for the choices of a single dimension does, by the display definition if
+            # the dimension has one, otherwise by the dimension definition
+            choices[dimension.key] = dimension_choices.sort_values(kind='mergesort') \
+                if dimension.has_display_field \
+                else dimension_choices.sort_index(kind='mergesort')
+
+        return choices
+
+    def __repr__(self):
+        return ".".join(["slicer",
+                         "choices({})".format(",".join(dimension.key for dimension in self._dimensions))]
+                        + ["filter({})".format(repr(f))
+                           for f in self._filters])
+
+
+def make_choices(dimension, data):
+    """
+    Creates the choices of a dimension from the result set of a choices query.
+
+    :param dimension:
+        The dimension of the choices.
+    :param data:
+        The result set data frame, indexed by the dimension values.
+    :return:
+        A `pd.Series` indexed by the dimension values with the display values as values.
+    """
+    df_key = format_dimension_key(getattr(dimension, 'display_key', None))
+    if df_key is not None:
+        return data[df_key]
+
+    display_key = 'display'
+    if hasattr(dimension, 'display_values'):
+        # Include provided display values
+        data[display_key] = pd.Series(dimension.display_values)
+    else:
+        data[display_key] = data.index.tolist()
+
+    return data[display_key]
+
+
 class DimensionLatestQueryBuilder(QueryBuilder):
     def __init__(self, slicer):
         super(DimensionLatestQueryBuilder, self).__init__(slicer, slicer.hint_table or slicer.table)
@@ -382,6 +958,26 @@ class DimensionLatestQueryBuilder(QueryBuilder):
         return [query]
 
     def fetch(self, hint=None):
+        """
+        Fetches the latest values of the dimensions. If the slicer has a latest cache, the values are returned from the
+        cache.
+
+        :param hint:
+            For database vendors that support it, add a query hint to collect analytics on the queries triggerd by
+            fireant.
+        :return:
+            A `pd.Series` with the latest value of each dimension, indexed by the dimension keys.
+        """
+        latest_cache = getattr(self.slicer, 'latest_cache', None)
+        if latest_cache is None:
+            return self._fetch_latest(hint)
+
+        # Slicers can share a cache, so the key includes the table the values are queried from
+        key = (table_name(self.table), tuple(dimension.key for dimension in self._dimensions))
+        # The cached series is copied so that callers cannot modify it
+        return self._get_cached(latest_cache, key, lambda: self._fetch_latest(hint)).copy()
+
+    def _fetch_latest(self, hint=None):
         data = super().fetch(hint=hint).reset_index().iloc[0]
         # Remove the row index as the name and trim the special dimension key characters from the dimension key
         data.name = None
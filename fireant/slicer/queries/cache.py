@@ -0,0 +1,286 @@
+import threading
+import time
+from collections import (
+    OrderedDict,
+    namedtuple,
+)
+
+from .slow_query_logger import query_logger
+
+CacheEntry = namedtuple('CacheEntry', ('value', 'loaded_at', 'table', 'watermark', 'group'))
+
+
+def table_name(table):
+    """
+    :param table:
+        A pypika `Table` or the name of a table.
+    :return:
+        The name of the table, which is used to find the cached values of a table.
+    """
+    return getattr(table, '_table_name', table)
+
+
+class QueryCache(object):
+    """
+    Keeps the results of small but slow queries in memory, such as the latest values of dimensions or the choices of
+    a dimension, which change rarely but are queried often.
+
+    Values younger than `ttl` are returned from the cache. Once a value is older than `ttl` it is stale. If `hard_ttl`
+    is set, stale values younger than `hard_ttl` are still returned immediately while the value is refreshed in a
+    background thread (stale-while-revalidate), so requests do not wait on the query. Only one refresh runs at a time
+    for each key. Values which are older than `hard_ttl`, or stale values without a `hard_ttl`, are loaded again before
+    they are returned.
+
+    Values can also be cached with the watermark of the table they were queried from, such as the time the table was
+    last loaded. A value is only returned while the watermark of its table is unchanged, so with a watermark the `ttl`
+    can be set to None to keep values until the table loads new data.
+
+    With `max_entries`, the least recently used values are removed once the cache holds more values than that, so that
+    a cache of values which are rarely queried again, such as result sets, does not keep growing.
+    """
+
+    def __init__(self, ttl=300, hard_ttl=None, max_entries=None):
+        """
+        :param ttl:
+            The number of seconds after which a value is refreshed. If None, values are kept until they are
+            invalidated.
+        :param hard_ttl:
+            The number of seconds after which a stale value is no longer returned while it is refreshed. If None, stale
+            values are never returned.
+        :param max_entries:
+            The number of values after which the least recently used values are removed. If None, the number of values
+            is not limited.
+        """
+        self.ttl = ttl
+        self.hard_ttl = hard_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # The keys of the values in each group, so that related values can be found without scanning every key
+        self._groups = {}
+        self._locks = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        # Invalidating a key, a table or the whole cache increments its generation, so that values which were being
+        # loaded while it was invalidated are not cached
+        self._generation = 0
+        self._key_generations = {}
+        self._table_generations = {}
+
+    def __deepcopy__(self, memo):
+        # The query builders are copied with their slicer whenever they are modified, but all copies share the cache
+        return self
+
+    def __reduce__(self):
+        # The values are only kept in the memory of this process, so a pickled cache, such as the cache of a slicer sent
+        # to another process to transform widgets, is unpickled empty
+        return type(self), (self.ttl, self.hard_ttl, self.max_entries)
+
+    def get(self, key, load, table=None, watermark=None):
+        """
+        :param key:
+            A hashable key of the value.
+        :param load:
+            A function without arguments which returns the value. It is called if the value is not cached yet or has
+            expired.
+        :param table: (Optional)
+            The table the value is queried from, so that it can be removed with `invalidate_table`.
+        :param watermark: (Optional)
+            The current watermark of the table. A cached value with a different watermark is loaded again.
+        :return:
+            The cached value.
+        """
+        table = table_name(table)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.watermark == watermark:
+            age = time.monotonic() - entry.loaded_at
+
+            if not self._is_older(age, self.ttl):
+                self._touch(key)
+                return entry.value
+
+            if not self._is_older(age, self._hard_ttl):
+                self._touch(key)
+                self._refresh_in_background(key, load, table, watermark)
+                return entry.value
+
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a value, the others wait and use the loaded value
+        with lock:
+            entry = self._entries.get(key)
+            if entry is None \
+                  or entry.watermark != watermark \
+                  or self._is_older(time.monotonic() - entry.loaded_at, self._hard_ttl):
+                generation = self._get_generation(key, table)
+                entry = CacheEntry(load(), time.monotonic(), table, watermark, None)
+                self._set_if_not_invalidated(key, entry, generation)
+            else:
+                self._touch(key)
+
+        return entry.value
+
+    def peek(self, key, watermark=None):
+        """
+        Gets a value without loading it. Values are never returned once they are stale.
+
+        :param key:
+            A hashable key of the value.
+        :param watermark: (Optional)
+            The current watermark of the table of the value.
+        :return:
+            The cached value, or None if the value is not cached or has expired.
+        """
+        entry = self._entries.get(key)
+
+        if entry is None \
+              or entry.watermark != watermark \
+              or self._is_older(time.monotonic() - entry.loaded_at, self.ttl):
+            return None
+
+        self._touch(key)
+        return entry.value
+
+    def put(self, key, value, table=None, watermark=None, group=None):
+        """
+        Adds a value to the cache, replacing any cached value with the same key.
+
+        :param key:
+            A hashable key of the value.
+        :param value:
+            The value.
+        :param table: (Optional)
+            The table the value was queried from, so that it can be removed with `invalidate_table`.
+        :param watermark: (Optional)
+            The watermark of the table when the value was queried.
+        :param group: (Optional)
+            A hashable key of a group of related values, so that the keys of the group can be listed with `keys`.
+        """
+        with self._lock:
+            self._set(key, CacheEntry(value, time.monotonic(), table_name(table), watermark, group))
+
+    def keys(self, group=None):
+        """
+        :param group: (Optional)
+            The key of a group of values. If None, the keys of all of the values are returned.
+        :return:
+            A list of the keys of the cached values, including values which have expired.
+        """
+        with self._lock:
+            if group is None:
+                return list(self._entries.keys())
+
+            return list(self._groups.get(group, ()))
+
+    def invalidate(self, key=None):
+        """
+        Removes a value from the cache so that it is loaded again the next time it is needed. A value which is being
+        loaded or refreshed while it is invalidated is not cached.
+
+        :param key:
+            The key of a value. If None, all values are removed.
+        """
+        with self._lock:
+            if key is None:
+                self._generation += 1
+                self._entries.clear()
+                self._groups.clear()
+            else:
+                self._key_generations[key] = self._key_generations.get(key, 0) + 1
+                self._remove(key)
+
+    def invalidate_table(self, table):
+        """
+        Removes all of the values queried from a table, for example after the table was reloaded.
+
+        :param table:
+            A pypika `Table` or the name of a table.
+        """
+        table = table_name(table)
+
+        with self._lock:
+            self._table_generations[table] = self._table_generations.get(table, 0) + 1
+
+            for key, entry in list(self._entries.items()):
+                if entry.table == table:
+                    self._remove(key)
+
+    @property
+    def _hard_ttl(self):
+        return self.hard_ttl \
+            if self.hard_ttl is not None \
+            else self.ttl
+
+    @staticmethod
+    def _is_older(age, ttl):
+        return ttl is not None and ttl <= age
+
+    def _get_generation(self, key, table):
+        with self._lock:
+            return self._generation, self._key_generations.get(key, 0), self._table_generations.get(table, 0)
+
+    def _set_if_not_invalidated(self, key, entry, generation):
+        """
+        Caches a loaded value unless its key or table was invalidated since the generation was taken before loading it,
+        in which case the value may have been queried before the data changed.
+        """
+        with self._lock:
+            if generation == (self._generation,
+                              self._key_generations.get(key, 0),
+                              self._table_generations.get(entry.table, 0)):
+                self._set(key, entry)
+
+    def _set(self, key, entry):
+        # Must be called while holding the lock
+        self._remove(key)
+        self._entries[key] = entry
+        if entry.group is not None:
+            self._groups.setdefault(entry.group, OrderedDict())[key] = None
+
+        # The least recently used values are first
+        while self.max_entries is not None and self.max_entries < len(self._entries):
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        # Must be called while holding the lock
+        entry = self._entries.pop(key, None)
+        if entry is None or entry.group is None:
+            return
+
+        group = self._groups.get(entry.group)
+        group.pop(key, None)
+        if not group:
+            del self._groups[entry.group]
+
+    def _touch(self, key):
+        if self.max_entries is None:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+    def _refresh_in_background(self, key, load, table, watermark):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        generation = self._get_generation(key, table)
+
+        def refresh():
+            try:
+                entry = CacheEntry(load(), time.monotonic(), table, watermark, None)
+                self._set_if_not_invalidated(key, entry, generation)
+
+            except Exception:
+                # The stale value is kept and the refresh is retried by the next request
+                query_logger.exception('Failed to refresh the cached value of {}'.format(key))
+
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
@@ -0,0 +1,184 @@
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .cache import QueryCache
+from ..filters import (
+    AntiPatternFilter,
+    ContainsFilter,
+    ExcludesFilter,
+    PatternFilter,
+)
+
+# The greatest code point, which sorts after every string starting with a prefix
+_MAX_CHAR = '\U0010ffff'
+
+_ANY = object()
+_ONE = object()
+
+
+def _parse_pattern(pattern):
+    """
+    Splits a SQL `LIKE` pattern into a list of characters and wildcards. `%` matches any number of characters, `_`
+    matches a single character and a backslash escapes the next character.
+    """
+    tokens, chars = [], iter(pattern)
+
+    for char in chars:
+        if '\\' == char:
+            tokens.append(next(chars, '\\'))
+        elif '%' == char:
+            tokens.append(_ANY)
+        elif '_' == char:
+            tokens.append(_ONE)
+        else:
+            tokens.append(char)
+
+    return tokens
+
+
+class PrefixIndex(object):
+    """
+    A case-insensitive index of the string values of a column used to match `LIKE` patterns. The lower-cased values are
+    kept in a sorted array, so patterns with only a trailing `%`, such as those used for autocompletion, are matched
+    with a binary search. Other patterns are matched by scanning all of the values.
+    """
+
+    def __init__(self, values):
+        """
+        :param values:
+            An iterable of values. Null values never match any pattern, as in SQL.
+        """
+        values = pd.Series(values)
+        self.is_null = values.isnull().values
+
+        # An object array holds each string at its own length, whereas a fixed width string array would make every
+        # string as wide as the longest one
+        self.strings = np.empty(len(values), dtype=object)
+        self.strings[:] = ['' if is_null else str(value).lower()
+                           for value, is_null in zip(values, self.is_null)]
+        self.order = np.argsort(self.strings, kind='mergesort')
+        self.sorted_strings = self.strings[self.order]
+
+    def match(self, pattern):
+        """
+        :param pattern:
+            A SQL `LIKE` pattern, which is matched without case like `LOWER(value) LIKE LOWER(pattern)`.
+        :return:
+            A numpy bool array which is True for the values matching the pattern.
+        """
+        tokens = _parse_pattern(pattern.lower())
+
+        n_literals = next((i for i, token in enumerate(tokens) if token in (_ANY, _ONE)), len(tokens))
+        prefix, rest = ''.join(tokens[:n_literals]), tokens[n_literals:]
+
+        if all(token is _ANY for token in rest):
+            mask = np.zeros(len(self.strings), dtype=bool)
+            end = prefix + _MAX_CHAR \
+                if rest \
+                else prefix
+            start = np.searchsorted(self.sorted_strings, prefix, side='left')
+            stop = np.searchsorted(self.sorted_strings, end, side='right')
+            mask[self.order[start:stop]] = True
+
+        else:
+            regex = re.compile(''.join('.*' if token is _ANY
+                                       else '.' if token is _ONE
+                                       else re.escape(token)
+                                       for token in tokens) + r'\Z', re.DOTALL)
+            mask = np.fromiter((regex.match(string) is not None for string in self.strings),
+                               dtype=bool, count=len(self.strings))
+
+        return mask & ~self.is_null
+
+
+class ChoicesIndex(object):
+    """
+    The choices of a dimension held in memory, which answers the filters of a choices query without querying the
+    database. Only filters on the dimension itself are supported: `isin`, `notin`, `like` and `not_like`.
+    """
+
+    def __init__(self, dimension, choices):
+        """
+        :param dimension:
+            The dimension of the choices.
+        :param choices:
+            A `pd.Series` of all of the choices of the dimension as returned by `DimensionChoicesQueryBuilder.fetch`,
+            indexed by the dimension values with the display values as values.
+        """
+        self.dimension = dimension
+        self.choices = choices
+        self._prefix_indexes = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def supports(dimension, filters):
+        """
+        :return:
+            True if all of the filters can be applied to the choices of the dimension in memory.
+        """
+        return all(isinstance(filter_, (PatternFilter, ContainsFilter, ExcludesFilter))
+                   and filter_.dimension_key in (dimension.key, dimension.display_key)
+                   # The values can also be a sub-query, which cannot be applied in memory
+                   and (isinstance(filter_, PatternFilter)
+                        or isinstance(filter_.values, (list, tuple, set, frozenset)))
+                   for filter_ in filters)
+
+    def filter(self, filters):
+        """
+        :param filters:
+            A list of filters which are supported by this index.
+        :return:
+            A `pd.Series` with the choices matching all of the filters, in the same order as the choices.
+        """
+        mask = np.ones(len(self.choices), dtype=bool)
+
+        for filter_ in filters:
+            is_display = filter_.dimension_key != self.dimension.key
+
+            if isinstance(filter_, PatternFilter):
+                prefix_index = self._get_prefix_index(is_display)
+                matches = np.zeros(len(self.choices), dtype=bool)
+                for pattern in filter_.patterns:
+                    matches |= prefix_index.match(pattern)
+
+                # Null values match neither LIKE nor NOT LIKE
+                mask &= ~matches & ~prefix_index.is_null \
+                    if isinstance(filter_, AntiPatternFilter) \
+                    else matches
+                continue
+
+            values = pd.Series(self.choices.values) \
+                if is_display \
+                else self.choices.index.to_series()
+            matches = np.asarray(values.isin(filter_.values))
+
+            mask &= ~matches & np.asarray(values.notnull()) \
+                if isinstance(filter_, ExcludesFilter) \
+                else matches
+
+        return self.choices[mask]
+
+    def _get_prefix_index(self, is_display):
+        # The index is built the first time a pattern is matched against either the values or the display values
+        with self._lock:
+            if is_display not in self._prefix_indexes:
+                values = self.choices.values \
+                    if is_display \
+                    else self.choices.index
+                self._prefix_indexes[is_display] = PrefixIndex(values)
+
+            return self._prefix_indexes[is_display]
+
+
+class ChoicesCache(QueryCache):
+    """
+    Keeps the choices of the dimensions of a slicer in memory so that choices queries, such as the queries of an
+    autocomplete filter which are sent on every keystroke, are answered without querying the database. The choices of
+    a dimension are loaded with a single query the first time they are needed and refreshed once they are older than
+    the TTL. With a `hard_ttl`, stale choices are returned while they are refreshed in the background.
+
+    A cache is used by passing it to a slicer as the `choices_cache` argument.
+    """
@@ -1,3 +1,4 @@
+import pickle
 from functools import (
     reduce,
     wraps,
@@ -9,36 +10,179 @@ from typing import (
     Union,
 )
 
+import numpy as np
 import pandas as pd
 import time
+from pandas.api.types import is_categorical_dtype
 
 from fireant.database import Database
 from fireant.slicer.totals import get_totals_marker_for_dtype
 from fireant.utils import (
     chunks,
     format_dimension_key,
+    format_metric_key,
 )
 from .finders import find_totals_dimensions
 from .slow_query_logger import (
     query_logger,
     slow_query_logger,
 )
-from ..dimensions import Dimension
+from ..dimensions import (
+    BooleanDimension,
+    CategoricalDimension,
+    DatetimeDimension,
+    Dimension,
+    UniqueDimension,
+)
+from ..references import reference_key
 
 
 def fetch_data(database: Database,
                queries: Union[Sized, Iterable],
                dimensions: Iterable[Dimension],
                share_dimensions: Iterable[Dimension] = (),
-               reference_groups=()):
-    iterable = [(str(query.limit(int(database.max_result_set_size))), database)
+               reference_groups=(),
+               keep_order=False):
+    iterable = [(str(query.limit(_get_limit(query, database))), database, _get_column_dtypes(query, dimensions))
                 for query in queries]
 
     with ThreadPool(processes=database.max_processes) as pool:
         results = pool.map(_exec, iterable)
         pool.close()
 
-    return reduce_result_set(results, reference_groups, dimensions, share_dimensions)
+    return reduce_result_set(results, reference_groups, dimensions, share_dimensions, keep_order=keep_order)
+
+
+def transform_widgets(widgets, context, slicer, references, pool=None):
+    """
+    Transforms the result set of a query into each of the widgets. When a pool is given, the widgets are transformed
+    concurrently in the pool, while widgets which are not thread-safe are transformed one at a time in the current
+    thread.
+
+    :param widgets:
+        A list of widgets.
+    :param context:
+        The `RenderContext` of the result set, which contains the data frame and the dimensions of the query.
+    :param slicer:
+    :param references:
+    :param pool: (Optional)
+        A `multiprocessing.pool.ThreadPool` or `multiprocessing.Pool` which is reused for every query. With a process
+        pool, the context, the slicer and the references are serialized once and each process receives them with a
+        batch of the widgets.
+    :return:
+        A list containing the result of transforming each widget, in the same order as the widgets.
+    """
+    concurrent_widgets = [widget
+                          for widget in widgets
+                          if getattr(widget, 'thread_safe', False)]
+
+    if pool is None or len(concurrent_widgets) <= 1:
+        return [_transform_widget(widget, context, slicer, references)
+                for widget in widgets]
+
+    in_threads = isinstance(pool, ThreadPool)
+    concurrent_results = pool.map_async(_transform_widget_task,
+                                        [(widget, context, slicer, references)
+                                         for widget in concurrent_widgets]) \
+        if in_threads \
+        else _transform_widgets_in_processes(pool, concurrent_widgets, context, slicer, references)
+
+    # The other widgets are transformed in this thread while the pool is working
+    results = [_transform_widget(widget, context, slicer, references)
+               if not getattr(widget, 'thread_safe', False)
+               else None
+               for widget in widgets]
+
+    concurrent_results = iter(concurrent_results.get()
+                              if in_threads
+                              else [result
+                                    for batch_results in concurrent_results.get()
+                                    for result in batch_results])
+    return [next(concurrent_results)
+            if getattr(widget, 'thread_safe', False)
+            else result
+            for widget, result in zip(widgets, results)]
+
+
+def _transform_widget(widget, context, slicer, references):
+    return widget.transform(context.data_frame, slicer, context.dimensions, references, context=context)
+
+
+def _transform_widget_task(args):
+    return _transform_widget(*args)
+
+
+def _transform_widgets_in_processes(pool, widgets, context, slicer, references):
+    """
+    Transforms widgets in a process pool. The state shared by the widgets, including the data frame, is pickled once
+    rather than with every widget, and the widgets are split into one batch for each process of the pool, so that each
+    process only receives the state once.
+
+    :return:
+        An `AsyncResult` of a list of the results of each batch.
+    """
+    state = pickle.dumps((context, slicer, references), protocol=pickle.HIGHEST_PROTOCOL)
+
+    # The number of processes of a pool is not public, so the widgets are split into one batch each if it is missing
+    processes = getattr(pool, '_processes', None) or len(widgets)
+    batch_size = -(-len(widgets) // processes)
+
+    return pool.map_async(_transform_widgets_batch_task,
+                          [(state, batch)
+                           for batch in chunks(widgets, batch_size)])
+
+
+def _transform_widgets_batch_task(args):
+    state, widgets = args
+    context, slicer, references = pickle.loads(state)
+    return [_transform_widget(widget, context, slicer, references)
+            for widget in widgets]
+
+
+def _get_limit(query, database):
+    # Keep a limit already set on the query, such as for pagination, unless it exceeds the max result set size
+    max_result_set_size = int(database.max_result_set_size)
+    query_limit = getattr(query, '_limit', None)
+
+    if query_limit is None:
+        return max_result_set_size
+    return min(int(query_limit), max_result_set_size)
+
+
+def _get_column_dtypes(query, dimensions):
+    """
+    Determines the dtypes of the columns in the result set of a query which are known from the slicer elements, so the
+    result set can be read directly into typed columns. Metrics are read as numbers if all of their values are numbers,
+    and are downcast to their `dtype` afterwards if one is set, see `downcast_metrics`. The values of categorical
+    and unique dimensions as well as display values are read as categoricals since the same labels are repeated in
+    many rows. The types of other columns are inferred.
+
+    :return:
+        A tuple of column name and dtype pairs.
+    """
+    dimension_dtypes = {}
+    for dimension in dimensions:
+        if isinstance(dimension, DatetimeDimension):
+            dimension_dtypes[format_dimension_key(dimension.key)] = np.dtype('datetime64[ns]')
+        elif isinstance(dimension, BooleanDimension):
+            dimension_dtypes[format_dimension_key(dimension.key)] = np.dtype(bool)
+        elif isinstance(dimension, (CategoricalDimension, UniqueDimension)):
+            dimension_dtypes[format_dimension_key(dimension.key)] = 'category'
+
+        if dimension.has_display_field:
+            dimension_dtypes[format_dimension_key(dimension.display_key)] = 'category'
+
+    metric_prefix = format_metric_key('')
+    dtypes = []
+    for term in getattr(query, '_selects', ()):
+        alias = getattr(term, 'alias', None) or ''
+
+        if alias.startswith(metric_prefix):
+            dtypes.append((alias, 'numeric'))
+        elif alias in dimension_dtypes:
+            dtypes.append((alias, dimension_dtypes[alias]))
+
+    return tuple(dtypes)
 
 
 def _exec(args):
@@ -55,6 +199,20 @@ def db_cache(func):
     return wrapper
 
 
+def _log_duration(query, database, start_time):
+    _log_query_duration(query, database, time.time() - start_time)
+
+
+def _log_query_duration(query, database, duration):
+    duration = round(duration, 4)
+    query_log_msg = '[{duration} seconds]: {query}'.format(duration=duration,
+                                                           query=query)
+    query_logger.info(query_log_msg)
+
+    if database.slow_query_log_min_seconds is not None and duration >= database.slow_query_log_min_seconds:
+        slow_query_logger.warning(query_log_msg)
+
+
 def log(func):
     @wraps(func)
     def wrapper(query, database, *args):
@@ -63,13 +221,7 @@ def log(func):
 
         result = func(query, database, *args)
 
-        duration = round(time.time() - start_time, 4)
-        query_log_msg = '[{duration} seconds]: {query}'.format(duration=duration,
-                                                               query=query)
-        query_logger.info(query_log_msg)
-
-        if database.slow_query_log_min_seconds is not None and duration >= database.slow_query_log_min_seconds:
-            slow_query_logger.warning(query_log_msg)
+        _log_duration(query, database, start_time)
 
         return result
 
@@ -78,7 +230,7 @@ def log(func):
 
 @db_cache
 @log
-def _do_fetch_data(query: str, database: Database):
+def _do_fetch_data(query: str, database: Database, column_dtypes=()):
     """
     Executes a query to fetch data from database middleware and builds/cleans the data as a data frame. The query
     execution is logged with its duration.
@@ -86,17 +238,80 @@ def _do_fetch_data(query: str, database: Database):
     :param database:
         instance of `fireant.Database`, database middleware
     :param query: Query string
+    :param column_dtypes:
+        A tuple of column name and dtype pairs for the columns whose types are known in advance.
 
     :return: `pd.DataFrame` constructed from the result of the query
     """
-    with database.connect() as connection:
-        return pd.read_sql(query, connection, coerce_float=True, parse_dates=True)
+    return database.fetch_dataframe(query, dtypes=dict(column_dtypes))
+
+
+def iter_fetch_data(database: Database,
+                    query,
+                    dimensions: Iterable[Dimension],
+                    chunksize: int):
+    """
+    Executes a query and yields the results as data frames of at most `chunksize` rows. A streaming cursor is used so
+    that only one chunk of the result set is held in memory at a time. The result set is not limited by the max result
+    set size of the database and is not cached.
+
+    :param database:
+        instance of `fireant.Database`, database middleware
+    :param query:
+        The query to execute. Only queries without totals or references can be streamed.
+    :param dimensions:
+        A list of dimensions, used for setting the index on each chunk.
+    :param chunksize:
+        The maximum number of rows in each chunk.
+    :return:
+        A generator of `pd.DataFrame`
+    """
+    query = str(query)
+    dimension_keys = [format_dimension_key(d.key)
+                      for d in dimensions]
+
+    # Only the time spent fetching is logged, not the time the consumer spends processing each chunk
+    duration = 0.
+    start_time = time.time()
+    query_logger.debug(query)
+
+    try:
+        with database.connect() as connection:
+            cursor = database.streaming_cursor(connection)
+
+            try:
+                cursor.execute(query)
+
+                while True:
+                    rows = cursor.fetchmany(chunksize)
+                    if not rows:
+                        break
+
+                    # The description is read after fetching since it is not available for server-side cursors until
+                    # then
+                    columns = [column[0] for column in cursor.description]
+                    chunk = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+                    duration += time.time() - start_time
+                    yield chunk.set_index(dimension_keys) \
+                        if dimension_keys \
+                        else chunk
+                    start_time = time.time()
+
+            finally:
+                cursor.close()
+
+    finally:
+        # Also logged when the consumer stops iterating early
+        duration += time.time() - start_time
+        _log_query_duration(query, database, duration)
 
 
 def reduce_result_set(results: Iterable[pd.DataFrame],
                       reference_groups,
                       dimensions: Iterable[Dimension],
-                      share_dimensions: Iterable[Dimension]):
+                      share_dimensions: Iterable[Dimension],
+                      keep_order=False):
     """
     Reduces the result sets from individual queries into a single data frame. This effectively joins sets of references
     and concats the sets of totals.
@@ -105,6 +320,7 @@ def reduce_result_set(results: Iterable[pd.DataFrame],
     :param reference_groups: A list of groups of references (grouped by interval such as WoW, etc)
     :param dimensions: A list of dimensions, used for setting the index on the result data frame.
     :param share_dimensions: A list of dimensions from which the totals are used for calculating share operations.
+    :param keep_order: If True, the rows are kept in the order of the queries instead of being sorted by the index.
     :return:
     """
 
@@ -115,7 +331,13 @@ def reduce_result_set(results: Iterable[pd.DataFrame],
                       for d in dimensions]
     totals_dimension_keys = [format_dimension_key(d.key)
                              for d in find_totals_dimensions(dimensions, share_dimensions)]
+    result_groups = [[_decategorize_columns(result, dimension_keys)
+                      for result in result_group]
+                     for result_group in result_groups]
     dimension_dtypes = result_groups[0][0][dimension_keys].dtypes
+    categorical_columns = [column
+                           for column, dtype in result_groups[0][0].dtypes.items()
+                           if is_categorical_dtype(dtype)]
 
     # Reduce each group to one data frame per rolled up dimension
     group_data_frames = []
@@ -141,8 +363,73 @@ def reduce_result_set(results: Iterable[pd.DataFrame],
 
         group_data_frames.append(reduced)
 
-    return pd.concat(group_data_frames, sort=False) \
-        .sort_index(na_position='first')
+    data_frame = pd.concat(group_data_frames, sort=False)
+    if not keep_order:
+        data_frame = data_frame.sort_index(na_position='first')
+
+    # Concatenating categoricals with different categories, such as from the totals results, results in object columns
+    for column in categorical_columns:
+        if not is_categorical_dtype(data_frame[column].dtype):
+            data_frame[column] = data_frame[column].astype('category')
+
+    return data_frame
+
+
+def _decategorize_columns(data_frame, columns):
+    """
+    Converts categorical columns back to plain values. This is used for dimension values before they are set as the
+    index. The values are still shared between rows, since they are taken from the categories, and a multi-index
+    encodes its levels the same way categoricals do.
+    """
+    categorical_columns = [column
+                           for column in columns
+                           if is_categorical_dtype(data_frame[column].dtype)]
+    if not categorical_columns:
+        return data_frame
+
+    # Copy the data frame so that cached results are not modified
+    data_frame = data_frame.copy(deep=False)
+    for column in categorical_columns:
+        data_frame[column] = np.asarray(data_frame[column])
+
+    return data_frame
+
+
+def downcast_metrics(data_frame, metrics, references=()):
+    """
+    Downcasts the values of metrics with a `dtype` set, such as `float32` or `int32`, in order to reduce the memory used
+    by large result sets. Metrics are not downcast to integers if they contain NaN values. Reference columns are
+    downcast the same way except for delta percentages.
+
+    :param data_frame:
+        The result set data frame. This data frame is modified.
+    :param metrics:
+        A list of metrics used in the query.
+    :param references:
+        A list of references used in the query.
+    :return:
+        The data frame with the metric columns downcast.
+    """
+    for metric in metrics:
+        if getattr(metric, 'dtype', None) is None:
+            continue
+
+        dtype = np.dtype(metric.dtype)
+        for reference in [None] + list(references):
+            if reference is not None and reference.delta_percent:
+                continue
+
+            df_key = format_metric_key(reference_key(metric, reference))
+            if df_key not in data_frame.columns:
+                continue
+
+            values = data_frame[df_key]
+            if dtype.kind in 'iu' and values.isnull().any():
+                continue
+
+            data_frame[df_key] = values.astype(dtype)
+
+    return data_frame
 
 
 def _replace_nans_for_totals_values(data_frame, dtypes):
@@ -4,12 +4,14 @@ from collections import (
     namedtuple,
 )
 
+import pandas as pd
 from toposort import (
     CircularDependencyError,
     toposort_flatten,
 )
 
 from fireant.utils import (
+    flatten,
     groupby,
     ordered_distinct_list,
     ordered_distinct_list_by_attr,
@@ -18,7 +20,19 @@ from ..exceptions import (
     CircularJoinsException,
     MissingTableJoinException,
 )
+from ..dimensions import TotalsDimension
+from ..filters import (
+    KeysetFilter,
+    MetricFilter,
+    RangeFilter,
+)
+from ..intervals import DatetimeInterval
 from ..operations import Share
+from .resampling import (
+    is_finer_interval,
+    is_interval_end,
+    is_interval_start,
+)
 
 ReferenceGroup = namedtuple('ReferenceGroup', ('dimension', 'time_unit', 'intervals'))
 
@@ -86,6 +100,90 @@ def find_joins_for_tables(joins, base_table, required_tables):
         raise CircularJoinsException(str(e))
 
 
+def find_aggregate_table(aggregate_tables, base_table, dimensions, metrics, filters):
+    """
+    Finds the smallest aggregate table which can answer a query on the base table. An aggregate table can answer a query
+    if it has every dimension of the query with the same or a finer interval, every metric of the query and every
+    dimension and metric used by the filters of the query, and the query does not require any joins. Date ranges must
+    start at the start of an interval of the aggregate table and stop at the end of one, otherwise the first and last
+    rows of the aggregate table would include dates outside of the range.
+
+    :param aggregate_tables:
+        A list of `AggregateTable`s of the slicer.
+    :param base_table:
+        The table of the slicer.
+    :param dimensions:
+        The dimensions of the query. Totals dimensions are not grouped and are ignored.
+    :param metrics:
+        The metrics of the query.
+    :param filters:
+        The filters of the query.
+    :return:
+        The `AggregateTable` with the fewest rows which can answer the query, or None if the query must be sent to the
+        base table.
+    """
+    if not aggregate_tables or find_required_tables_to_join(flatten([dimensions, metrics, filters]), base_table):
+        return None
+
+    def can_answer(aggregate_table):
+        intervals = {dimension.key: getattr(dimension, 'interval', None)
+                     for dimension in aggregate_table.dimensions}
+        dimension_keys = set(intervals) | {dimension.display_key
+                                           for dimension in aggregate_table.dimensions
+                                           if dimension.has_display_field}
+        metric_keys = {metric.key
+                       for metric in aggregate_table.metrics}
+
+        for dimension in dimensions:
+            if isinstance(dimension, TotalsDimension):
+                continue
+            if dimension.key not in intervals \
+                  or not is_finer_interval(intervals[dimension.key], getattr(dimension, 'interval', None)):
+                return False
+
+        for filter_ in filters:
+            if isinstance(filter_, MetricFilter):
+                if filter_.metric_key not in metric_keys:
+                    return False
+                continue
+
+            filter_keys = filter_.dimension_keys \
+                if isinstance(filter_, KeysetFilter) \
+                else [filter_.dimension_key]
+            if not set(filter_keys) <= dimension_keys:
+                return False
+
+            if isinstance(filter_, RangeFilter) \
+                  and not _is_aligned_range(filter_, intervals.get(filter_.dimension_key)):
+                return False
+
+        return all(metric.key in metric_keys
+                   for metric in metrics)
+
+    # Sorting is stable, so tables without a number of rows keep their order after the others
+    by_rows = sorted(aggregate_tables, key=lambda aggregate_table: (aggregate_table.rows is None,
+                                                                   aggregate_table.rows or 0))
+    return next((aggregate_table
+                 for aggregate_table in by_rows
+                 if can_answer(aggregate_table)), None)
+
+
+def _is_aligned_range(filter_, interval):
+    """
+    :return:
+        True if the rows of a table aggregated to the interval, which are filtered by their truncated values, cover the
+        same range as the rows of the base table.
+    """
+    if interval is None:
+        return True
+
+    if not isinstance(interval, DatetimeInterval):
+        return False
+
+    return is_interval_start(pd.Timestamp(filter_.start), interval.key) \
+           and is_interval_end(pd.Timestamp(filter_.stop), interval.key)
+
+
 def find_metrics_for_widgets(widgets):
     """
     :return:
@@ -1,6 +1,17 @@
+import base64
+import json
+from collections import namedtuple
+
 import pandas as pd
+from datetime import date
+
+from fireant.utils import wrap_list
+from pypika import (
+    Case,
+    Order,
+)
 
-from pypika import Order
+Page = namedtuple('Page', ('data', 'cursor'))
 
 
 def _get_window(limit, offset):
@@ -135,3 +146,74 @@ def _group_paginate(data_frame, start=None, end=None, orders=()):
         .sort_values(data_frame.index.names[0], ascending=True) \
         .groupby(level=0) \
         .apply(_apply_pagination)
+
+
+def _cursor_value(value):
+    if pd.isnull(value):
+        return None
+
+    if isinstance(value, date):
+        return str(value)
+
+    if hasattr(value, 'item'):
+        # Convert numpy types to their corresponding python types so they can be serialized
+        return value.item()
+
+    return value
+
+
+def encode_cursor(values):
+    """
+    Encodes the dimension values of the last row of a page into an opaque cursor string.
+
+    :param values:
+        A list of dimension values, one for each dimension in the query.
+    :return:
+        A URL-safe string which can be passed back as the `after` argument when fetching the next page.
+    """
+    values = [_cursor_value(value)
+              for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor created with `encode_cursor` into the list of dimension values.
+    """
+    return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+
+
+def make_keyset_orders(terms):
+    """
+    Creates the orders for keyset pagination by a list of dimension terms. Vendors disagree on whether NULLs are
+    ordered first or last, so each term is preceded by a term which orders the NULLs first, matching `KeysetFilter`.
+
+    :param terms:
+        The pypika terms of the dimensions.
+    :return:
+        A list of tuples of the term and the direction to order in.
+    """
+    return [order
+            for term in terms
+            for order in [(Case().when(term.isnull(), 0).else_(1), Order.asc),
+                          (term, Order.asc)]]
+
+
+def keyset_paginate(data, limit):
+    """
+    Cuts a keyset page out of a result set which was queried with one extra row beyond the limit. The extra row only
+    serves to determine whether there is a next page.
+
+    :param data:
+        A data frame or series in the order returned by the database, indexed by the dimension values. The cursor is
+        taken from the last row of the page in that order, so the data must not be re-sorted before it is paginated.
+    :param limit:
+        The number of rows in a page.
+    :return:
+        A `Page` containing the data and the cursor for the next page, or None if this is the last page.
+    """
+    if len(data) <= limit:
+        return Page(data, None)
+
+    data = data.iloc[:limit]
+    return Page(data, encode_cursor(wrap_list(data.index[-1])))
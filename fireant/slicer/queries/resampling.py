@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+from ..intervals import (
+    DatetimeInterval,
+    NumericInterval,
+)
+from ..totals import (
+    MAX_NUMBER,
+    MAX_TIMESTAMP,
+)
+
+# Datetime intervals from the finest to the coarsest
+_DATETIME_INTERVAL_KEYS = ['hour', 'day', 'week', 'month', 'quarter', 'year']
+
+_PERIOD_FREQUENCIES = {
+    'month': 'M',
+    'quarter': 'Q',
+    'year': 'A',
+}
+
+
+def is_finer_interval(interval, coarser_interval):
+    """
+    :return:
+        True if every interval of `interval` lies within a single interval of `coarser_interval`, so that the values of
+        additive metrics for the coarser interval are the sums of the values for the finer interval.
+    """
+    if interval == coarser_interval:
+        return True
+
+    if isinstance(interval, DatetimeInterval) and isinstance(coarser_interval, DatetimeInterval):
+        # Weeks can span two months
+        return 'week' != interval.key \
+               and interval.key in _DATETIME_INTERVAL_KEYS \
+               and coarser_interval.key in _DATETIME_INTERVAL_KEYS \
+               and _DATETIME_INTERVAL_KEYS.index(interval.key) < _DATETIME_INTERVAL_KEYS.index(coarser_interval.key)
+
+    if isinstance(interval, NumericInterval) and isinstance(coarser_interval, NumericInterval):
+        return 0 == coarser_interval.size % interval.size \
+               and 0 == (coarser_interval.offset - interval.offset) % interval.size
+
+    return False
+
+
+def is_interval_start(timestamp, interval_key):
+    """
+    :return:
+        True if the timestamp is the start of an interval of the datetime interval with the given key.
+    """
+    if 'hour' == interval_key:
+        return timestamp == timestamp.floor('H')
+
+    is_day = timestamp == timestamp.normalize()
+    if 'day' == interval_key:
+        return is_day
+    if 'week' == interval_key:
+        # Weeks start on Monday, as with the ISO weeks used by the databases
+        return is_day and 0 == timestamp.weekday()
+
+    is_month = is_day and 1 == timestamp.day
+    if 'month' == interval_key:
+        return is_month
+    if 'quarter' == interval_key:
+        return is_month and 1 == timestamp.month % 3
+    return is_month and 1 == timestamp.month
+
+
+def is_interval_end(timestamp, interval_key):
+    """
+    :return:
+        True if the timestamp is the last day of an interval of the datetime interval with the given key. The stop of a
+        date range is inclusive, so it must be a whole day.
+    """
+    return timestamp == timestamp.normalize() \
+           and is_interval_start(timestamp + pd.Timedelta(days=1), interval_key)
+
+
+def can_resample(cached_dimensions, dimensions):
+    """
+    :param cached_dimensions:
+        The dimensions of a cached query.
+    :param dimensions:
+        The dimensions of a new query.
+    :return:
+        True if the dimensions are the same except for the intervals of continuous dimensions, and each interval of the
+        new query is coarser than the interval of the cached query.
+    """
+    if len(cached_dimensions) != len(dimensions):
+        return False
+
+    is_coarser = False
+    for cached_dimension, dimension in zip(cached_dimensions, dimensions):
+        if cached_dimension.key != dimension.key or cached_dimension.is_rollup != dimension.is_rollup:
+            return False
+
+        cached_interval, interval = getattr(cached_dimension, 'interval', None), getattr(dimension, 'interval', None)
+        if cached_interval != interval:
+            if not is_finer_interval(cached_interval, interval):
+                return False
+            is_coarser = True
+
+    return is_coarser
+
+
+def resample(data_frame, dimensions, metric_columns):
+    """
+    Rolls a result set up to coarser intervals of its continuous dimensions, for example from days to months.
+
+    :param data_frame:
+        The result set data frame of a query with finer intervals.
+    :param dimensions:
+        The dimensions with the coarser intervals, in the order of the levels of the index of the data frame.
+    :param metric_columns:
+        The columns of additive metrics, which are summed. The first value of the other columns, such as the display
+        values of dimensions, is used.
+    :return:
+        A data frame with one row for each combination of the dimension values with the coarser intervals.
+    """
+    levels = [_truncate(data_frame.index.get_level_values(i), getattr(dimension, 'interval', None))
+              for i, dimension in enumerate(dimensions)]
+
+    # Null dimension values would be dropped when grouping by the values, so the rows are grouped by their codes
+    codes = [pd.factorize(level)[0] for level in levels]
+    grouped = data_frame.reset_index(drop=True).groupby(codes, sort=False)
+
+    other_columns = [column
+                     for column in data_frame.columns
+                     if column not in metric_columns]
+    result = pd.concat([grouped[other_columns].first(),
+                        grouped[metric_columns].sum(min_count=1)], axis=1)
+
+    # The groups are in the order of their first row
+    first_rows = np.flatnonzero(0 == grouped.cumcount().values)
+    result.index = pd.MultiIndex.from_arrays([level[first_rows] for level in levels], names=data_frame.index.names) \
+        if 1 < len(levels) \
+        else levels[0][first_rows].rename(data_frame.index.name)
+
+    return result[data_frame.columns].sort_index(na_position='first')
+
+
+def _truncate(values, interval):
+    """
+    Truncates the values of a dimension to the start of their interval the same way as the database. Totals markers are
+    kept as they are.
+    """
+    if isinstance(interval, NumericInterval):
+        is_totals = values == MAX_NUMBER
+        truncated = np.floor((values - interval.offset) / interval.size) * interval.size + interval.offset
+        return pd.Index(np.where(is_totals, values, truncated), name=values.name)
+
+    if not isinstance(interval, DatetimeInterval):
+        return values
+
+    is_totals = values == MAX_TIMESTAMP
+    values = pd.DatetimeIndex(values).where(~is_totals)
+
+    if 'hour' == interval.key:
+        truncated = values.floor('H')
+    elif 'day' == interval.key:
+        truncated = values.normalize()
+    elif 'week' == interval.key:
+        # Weeks start on Monday, as with the ISO weeks used by the databases
+        truncated = values.normalize() - pd.to_timedelta(values.weekday, unit='D')
+    else:
+        truncated = values.to_period(_PERIOD_FREQUENCIES[interval.key]).to_timestamp()
+
+    truncated = truncated.values.copy()
+    truncated[is_totals] = MAX_TIMESTAMP.to_datetime64()
+    return pd.DatetimeIndex(truncated, name=values.name)
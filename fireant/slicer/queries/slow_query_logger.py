@@ -3,3 +3,5 @@ import logging
 query_logger = logging.getLogger('fireant.query_log')
 
 slow_query_logger = logging.getLogger('fireant.slow_query_log')
+
+workload_logger = logging.getLogger('fireant.workload_log')
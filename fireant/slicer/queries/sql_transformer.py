@@ -1,4 +1,6 @@
+import copy
 import itertools
+from functools import reduce
 from typing import Iterable
 
 from fireant.utils import (
@@ -7,11 +9,19 @@ from fireant.utils import (
     format_metric_key,
 )
 from pypika import (
+    Case,
     Table,
     functions as fn,
 )
+from pypika.terms import (
+    Function,
+    NullValue,
+    Tuple,
+    ValueWrapper,
+)
 
 from .finders import (
+    find_aggregate_table,
     find_and_group_references_for_dimensions,
     find_joins_for_tables,
     find_required_tables_to_join,
@@ -32,6 +42,9 @@ from ..joins import Join
 from ..metrics import Metric
 from ...database import Database
 
+# The column of a choices query for several dimensions containing the key of the dimension that each row is a choice for
+CHOICES_DIMENSION_KEY = '$choices$'
+
 
 def adapt_for_totals_query(totals_dimension, dimensions, filters, apply_filter_to_totals):
     """
@@ -79,7 +92,8 @@ def make_slicer_query_with_totals_and_references(database,
                                                  references,
                                                  orders,
                                                  apply_filter_to_totals=(),
-                                                 share_dimensions=()):
+                                                 share_dimensions=(),
+                                                 aggregate_tables=()):
     """
     :param database:
     :param table:
@@ -92,6 +106,9 @@ def make_slicer_query_with_totals_and_references(database,
     :param orders:
     :param apply_filter_to_totals:
     :param share_dimensions:
+    :param aggregate_tables:
+        A list of `AggregateTable`s. Each of the queries, including the totals and reference queries, selects from the
+        smallest aggregate table which can answer it, or from the table otherwise.
     :return:
     """
 
@@ -134,13 +151,20 @@ def make_slicer_query_with_totals_and_references(database,
                                                       metrics,
                                                       query_filters,
                                                       references)
+            # The reference metrics are renamed copies of the metrics, so the aggregate table is found with the metrics
+            aggregate_table = find_aggregate_table(aggregate_tables,
+                                                   table,
+                                                   ref_dimensions,
+                                                   metrics,
+                                                   ref_filters)
             query = make_slicer_query(ref_database,
                                       table,
                                       joins,
                                       ref_dimensions,
                                       ref_metrics,
                                       ref_filters,
-                                      orders)
+                                      orders,
+                                      from_table=getattr(aggregate_table, 'table', None))
 
             # Add these to the query instance so when the data frames are joined together, the correct references and
             # totals can be applied when combining the separate result set from each query.
@@ -158,7 +182,8 @@ def make_slicer_query(database: Database,
                       dimensions: Iterable[Dimension] = (),
                       metrics: Iterable[Metric] = (),
                       filters: Iterable[Filter] = (),
-                      orders: Iterable = ()):
+                      orders: Iterable = (),
+                      from_table: Table = None):
     """
     Creates a pypika/SQL query from a list of slicer elements.
 
@@ -185,39 +210,37 @@ def make_slicer_query(database: Database,
         A collection of filters to apply to the query.
     :param orders:
         A collection of orders as tuples of the metric/dimension to order by and the direction to order in.
+    :param from_table:
+        pypika.Table - An aggregate table with the same columns as the base table to select from instead of the base
+        table. The query must not require any joins.
 
     :return:
     """
-    query = database.query_cls.from_(base_table)
-    elements = flatten([metrics, dimensions, filters])
-
-    # Add joins
-    join_tables_needed_for_query = find_required_tables_to_join(elements, base_table)
-    for join in find_joins_for_tables(joins, base_table, join_tables_needed_for_query):
-        query = query.join(join.table, how=join.join_type).on(join.criterion)
+    query = _make_query_with_joins(database, base_table, joins, flatten([metrics, dimensions, filters]),
+                                   from_table=from_table)
 
     # Add dimensions
     for dimension in dimensions:
-        terms = make_terms_for_dimension(dimension, database.trunc_date)
+        terms = [_for_table(term, from_table)
+                 for term in make_terms_for_dimension(dimension, database.trunc_date)]
         query = query.select(*terms)
         # Don't group TotalsDimensions
         if not isinstance(dimension, TotalsDimension):
             query = query.groupby(*terms)
 
     # Add filters
-    for filter_ in filters:
-        query = query.where(filter_.definition) \
-            if isinstance(filter_, DimensionFilter) \
-            else query.having(filter_.definition)
+    query = _add_filters(query, filters, from_table)
 
     # Add metrics
-    terms = make_terms_for_metrics(metrics)
+    terms = [_for_table(term, from_table)
+             for term in make_terms_for_metrics(metrics)]
     if terms:
         query = query.select(*terms)
 
     # Get the aliases for selected elements so missing ones can be included in the query if they are used for sorting
     select_aliases = {el.alias for el in query._selects}
     for (term, orientation) in orders:
+        term = _for_table(term, from_table)
         query = query.orderby(term, order=orientation)
 
         if term.alias not in select_aliases:
@@ -226,16 +249,115 @@ def make_slicer_query(database: Database,
     return query
 
 
+def make_choices_query(database: Database,
+                       base_table: Table,
+                       joins: Iterable[Join] = (),
+                       dimensions: Iterable[Dimension] = (),
+                       filters: Iterable[Filter] = (),
+                       exclude_own_filters=False):
+    """
+    Creates a pypika/SQL query for the choices of several dimensions at once. The query selects the columns of all of
+    the dimensions, but each row only contains the values of one dimension and NULL for the others. The key of that
+    dimension is selected as the `CHOICES_DIMENSION_KEY` column.
+
+    If the database supports them, the query groups by a grouping set for each dimension, so the table is only scanned
+    once. Otherwise, or if the dimensions are filtered differently, the query is a union of a query for each dimension.
+
+    :param database:
+    :param base_table:
+        pypika.Table - The base table of the query, the one in the FROM clause
+    :param joins:
+        A collection of joins available in the slicer. Only joins required for the query will be used.
+    :param dimensions:
+        A collection of dimensions to query the choices of.
+    :param filters:
+        A collection of filters to apply to the query.
+    :param exclude_own_filters:
+        If True, the filters on each dimension are not applied to the choices of that dimension.
+    :return:
+    """
+    filters_per_dimension = [[filter_
+                              for filter_ in filters
+                              if not exclude_own_filters
+                              or getattr(filter_, 'dimension_key', None) not in (dimension.key, dimension.display_key)]
+                             for dimension in dimensions]
+    filters_are_shared = all(len(dimension_filters) == len(filters)
+                             for dimension_filters in filters_per_dimension)
+
+    if database.supports_grouping_sets and filters_are_shared:
+        query = _make_query_with_joins(database, base_table, joins, flatten([dimensions, filters]))
+
+        grouping_sets, choices_dimension_key = [], Case()
+        for dimension in dimensions:
+            terms = make_terms_for_dimension(dimension, database.trunc_date)
+            query = query.select(*terms)
+            grouping_sets.append(Tuple(*terms))
+
+            # GROUPING is 0 for the columns which are grouped in the grouping set of a row
+            choices_dimension_key = choices_dimension_key.when(Function('GROUPING', terms[0]) == 0, dimension.key)
+
+        query = query \
+            .select(choices_dimension_key.as_(CHOICES_DIMENSION_KEY)) \
+            .groupby(Function('GROUPING SETS', *grouping_sets))
+        return _add_filters(query, filters)
+
+    queries = []
+    for dimension, dimension_filters in zip(dimensions, filters_per_dimension):
+        query = _make_query_with_joins(database, base_table, joins, flatten([[dimension], dimension_filters]))
+
+        # The columns of all of the dimensions are selected in the same order in each query of the union
+        for other_dimension in dimensions:
+            terms = make_terms_for_dimension(other_dimension, database.trunc_date)
+            query = query.select(*terms).groupby(*terms) \
+                if other_dimension is dimension \
+                else query.select(*[NullValue().as_(term.alias) for term in terms])
+
+        query = query.select(ValueWrapper(dimension.key).as_(CHOICES_DIMENSION_KEY))
+        queries.append(_add_filters(query, dimension_filters))
+
+    return reduce(lambda union, query: union.union_all(query), queries)
+
+
+def _make_query_with_joins(database, base_table, joins, elements, from_table=None):
+    query = database.query_cls.from_(from_table or base_table)
+
+    join_tables_needed_for_query = find_required_tables_to_join(elements, base_table)
+    for join in find_joins_for_tables(joins, base_table, join_tables_needed_for_query):
+        query = query.join(join.table, how=join.join_type).on(join.criterion)
+
+    return query
+
+
+def _for_table(term, table):
+    """
+    Copies a term with each of its fields taken from another table. This is used for the aggregate tables, which have
+    the same columns as the base table. Since a query without joins does not qualify its fields with their table, the
+    SQL of the term does not change.
+    """
+    if table is None:
+        return term
+
+    term = copy.deepcopy(term)
+    for field in term.fields():
+        field.table = table
+    return term
+
+
+def _add_filters(query, filters, from_table=None):
+    for filter_ in filters:
+        definition = _for_table(filter_.definition, from_table)
+        query = query.where(definition) \
+            if isinstance(filter_, DimensionFilter) \
+            else query.having(definition)
+
+    return query
+
+
 def make_latest_query(database: Database,
                       base_table: Table,
                       joins: Iterable[Join] = (),
                       dimensions: Iterable[Dimension] = ()):
-    query = database.query_cls.from_(base_table)
-
-    # Add joins
-    join_tables_needed_for_query = find_required_tables_to_join(dimensions, base_table)
-    for join in find_joins_for_tables(joins, base_table, join_tables_needed_for_query):
-        query = query.join(join.table, how=join.join_type).on(join.criterion)
+    query = _make_query_with_joins(database, base_table, joins, dimensions)
 
     for dimension in dimensions:
         f_dimension_key = format_dimension_key(dimension.key)
@@ -0,0 +1,172 @@
+from collections import namedtuple
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from fireant.utils import format_dimension_key
+from ..dimensions import (
+    ContinuousDimension,
+    DatetimeDimension,
+)
+from ..filters import (
+    BooleanFilter,
+    ContainsFilter,
+    ExcludesFilter,
+    MetricFilter,
+    RangeFilter,
+)
+from .resampling import is_interval_start
+
+# The dimensions and filters of a cached result set along with the columns of its dimension display values
+CachedQuery = namedtuple('CachedQuery', ('dimensions', 'filters', 'display_columns'))
+
+_LIST_TYPES = (list, tuple, set, frozenset)
+
+
+def find_filters_to_apply(dimensions, cached_filters, filters):
+    """
+    Determines whether a cached result set contains every row of a query with the same dimensions and metrics but
+    narrower filters, such as an `isin` filter with fewer values or a date range which starts later.
+
+    :param dimensions:
+        The dimensions of both queries.
+    :param cached_filters:
+        The filters of the cached query.
+    :param filters:
+        The filters of the new query.
+    :return:
+        A list of the filters which must be applied to the cached result set to answer the new query, or None if the
+        new query cannot be answered from the cached result set.
+    """
+    if any(isinstance(filter_, MetricFilter)
+           for filter_ in list(cached_filters) + list(filters)):
+        return None
+
+    new_filters = [filter_
+                   for filter_ in filters
+                   if filter_ not in cached_filters]
+
+    # Every filter of the cached query must be kept by the new query, otherwise rows are missing from the cached result
+    for cached_filter in cached_filters:
+        if cached_filter not in filters \
+              and not any(_is_narrower(filter_, cached_filter) for filter_ in new_filters):
+            return None
+
+    if not all(_can_apply(filter_, dimensions, cached_filters) for filter_ in new_filters):
+        return None
+
+    return new_filters
+
+
+def apply_filters(data_frame, filters):
+    """
+    Filters a result set in memory the same way the filters are applied by the database.
+
+    :param data_frame:
+        The result set data frame.
+    :param filters:
+        A list of filters returned by `find_filters_to_apply`.
+    :return:
+        A data frame with the rows matching all of the filters.
+    """
+    mask = np.ones(len(data_frame), dtype=bool)
+
+    for filter_ in filters:
+        f_key = format_dimension_key(filter_.dimension_key)
+        values = data_frame.index.get_level_values(f_key) \
+            if f_key in data_frame.index.names \
+            else data_frame[f_key]
+
+        if isinstance(filter_, RangeFilter):
+            matches = (values >= pd.Timestamp(filter_.start)) & (values <= pd.Timestamp(filter_.stop))
+
+        elif isinstance(filter_, BooleanFilter):
+            matches = values == filter_.value
+
+        else:
+            matches = pd.Series(values).isin(filter_.values)
+
+            # Null values match neither IN nor NOT IN
+            if isinstance(filter_, ExcludesFilter):
+                matches = ~matches & pd.Series(values).notnull()
+
+        mask &= np.asarray(matches, dtype=bool)
+
+    return data_frame[mask]
+
+
+def _is_narrower(filter_, cached_filter):
+    if type(filter_) is not type(cached_filter) or filter_.dimension_key != cached_filter.dimension_key:
+        return False
+
+    if isinstance(filter_, RangeFilter):
+        return _range_value(cached_filter.start) <= _range_value(filter_.start) \
+               and _range_value(filter_.stop) <= _range_value(cached_filter.stop)
+
+    if isinstance(filter_, (ContainsFilter, ExcludesFilter)) \
+          and isinstance(filter_.values, _LIST_TYPES) \
+          and isinstance(cached_filter.values, _LIST_TYPES):
+        return set(filter_.values) <= set(cached_filter.values) \
+            if isinstance(filter_, ContainsFilter) \
+            else set(filter_.values) >= set(cached_filter.values)
+
+    return False
+
+
+def _can_apply(filter_, dimensions, cached_filters):
+    """
+    :return:
+        True if the filter can be applied to the index or the display values of a result set with the dimensions.
+    """
+    if not isinstance(filter_, (BooleanFilter, ContainsFilter, ExcludesFilter, RangeFilter)):
+        return False
+
+    if isinstance(filter_, (ContainsFilter, ExcludesFilter)) and not isinstance(filter_.values, _LIST_TYPES):
+        # The values can also be a sub-query
+        return False
+
+    display_keys = {dimension.display_key
+                    for dimension in dimensions
+                    if dimension.has_display_field}
+    if filter_.dimension_key in display_keys:
+        return isinstance(filter_, (ContainsFilter, ExcludesFilter))
+
+    dimension = next((dimension
+                      for dimension in dimensions
+                      if dimension.key == filter_.dimension_key), None)
+    if dimension is None:
+        return False
+
+    if not isinstance(dimension, ContinuousDimension):
+        return not isinstance(filter_, RangeFilter)
+
+    # The values of continuous dimensions are truncated to intervals, so only date ranges which do not split an interval
+    # can be applied to them
+    return isinstance(dimension, DatetimeDimension) \
+           and isinstance(filter_, RangeFilter) \
+           and _is_aligned_range(filter_, dimension.interval.key, cached_filters)
+
+
+def _is_aligned_range(filter_, interval_key, cached_filters):
+    """
+    A date range can be applied to the truncated dates if its start is the start of an interval and it has the same
+    stop as the cached query. Otherwise the first or last interval of the cached result also contains dates outside of
+    the range, since the stop of a range is inclusive.
+    """
+    cached_ranges = [cached_filter
+                     for cached_filter in cached_filters
+                     if isinstance(cached_filter, RangeFilter)
+                     and cached_filter.dimension_key == filter_.dimension_key]
+
+    same_start = any(_range_value(cached_range.start) == _range_value(filter_.start) for cached_range in cached_ranges)
+    same_stop = any(_range_value(cached_range.stop) == _range_value(filter_.stop) for cached_range in cached_ranges)
+
+    return same_stop and (same_start or is_interval_start(pd.Timestamp(filter_.start), interval_key))
+
+
+def _range_value(value):
+    # Dates and datetimes cannot be compared with each other, so both are compared as timestamps
+    return pd.Timestamp(value) \
+        if isinstance(value, date) \
+        else value
@@ -0,0 +1,105 @@
+import pandas as pd
+
+from pypika import functions as fn
+from .cache import (
+    QueryCache,
+    table_name,
+)
+from .execution import fetch_data
+
+WATERMARK_KEY = '$watermark$'
+
+
+class Watermark(object):
+    """
+    Tracks when the table of a slicer last loaded new data. The watermark of the table is part of the key of every
+    value in the caches of the slicer, so cached values are reused until the watermark moves. The watermark itself is
+    polled at most once every `ttl` seconds.
+
+    This is an abstract base class, subclasses implement `load` to get the current watermark of a table.
+    """
+
+    def __init__(self, ttl=60):
+        """
+        :param ttl:
+            The number of seconds the watermark of a table is cached before it is polled again.
+        """
+        self.ttl = ttl
+        self._cache = QueryCache(ttl=ttl)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def get(self, slicer):
+        """
+        :param slicer:
+            The slicer whose table the watermark is returned for.
+        :return:
+            The current watermark of the table of the slicer.
+        """
+        return self._cache.get(table_name(slicer.table), lambda: self.load(slicer))
+
+    def invalidate(self, table=None):
+        """
+        Forgets the watermark of a table so that it is polled the next time it is needed.
+
+        :param table:
+            A pypika `Table` or the name of a table. If None, the watermarks of all tables are forgotten.
+        """
+        self._cache.invalidate(None if table is None else table_name(table))
+
+    def load(self, slicer):
+        """
+        :param slicer:
+            The slicer whose table the watermark is loaded for.
+        :return:
+            The current watermark of the table. It must be comparable with `==`.
+        """
+        raise NotImplementedError()
+
+
+class ColumnWatermark(Watermark):
+    """
+    Uses the greatest value of a column of the table of the slicer as the watermark, such as a timestamp column which is
+    set when rows are loaded.
+    """
+
+    def __init__(self, definition, ttl=60):
+        """
+        :param definition:
+            A pypika term of the column, for example `table.load_ts`.
+        :param ttl:
+            The number of seconds the watermark of a table is cached before it is queried again.
+        """
+        super(ColumnWatermark, self).__init__(ttl=ttl)
+        self.definition = definition
+
+    def load(self, slicer):
+        query = slicer.database.query_cls \
+            .from_(slicer.table) \
+            .select(fn.Max(self.definition).as_(WATERMARK_KEY))
+
+        value = fetch_data(slicer.database, [query], ())[WATERMARK_KEY].iloc[0]
+        # The column of an empty table has no greatest value, which must still equal itself
+        return None \
+            if pd.isnull(value) \
+            else value
+
+
+class CallbackWatermark(Watermark):
+    """
+    Gets the watermark of the table of the slicer from a function, for example from the metadata of an ETL job.
+    """
+
+    def __init__(self, callback, ttl=60):
+        """
+        :param callback:
+            A function which takes the pypika table of a slicer and returns its current watermark.
+        :param ttl:
+            The number of seconds the watermark of a table is cached before the function is called again.
+        """
+        super(CallbackWatermark, self).__init__(ttl=ttl)
+        self.callback = callback
+
+    def load(self, slicer):
+        return self.callback(slicer.table)
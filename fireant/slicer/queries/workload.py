@@ -0,0 +1,134 @@
+"""
+A structured log of the slicer queries sent to the database. Each slicer data query is logged to the
+`fireant.workload_log` logger as a line of JSON with the dimensions, intervals, metrics and filters of the query and how
+long the database took to answer it. The log can be analyzed with `fireant.slicer.aggregate_advisor`.
+"""
+import json
+import logging
+import time
+from datetime import date
+
+import pandas as pd
+from pypika import functions as fn
+from pypika.terms import Field
+
+from .finders import find_required_tables_to_join
+from .slow_query_logger import workload_logger
+from ..filters import (
+    KeysetFilter,
+    MetricFilter,
+    RangeFilter,
+)
+from ..intervals import DatetimeInterval
+
+
+def log_workload(database, table, dimensions, metrics, filters, references, duration, data_frame):
+    """
+    Logs a slicer query to the workload log, if it is enabled.
+
+    :param database:
+        The database of the slicer, used to truncate the dates of continuous dimensions.
+    :param table:
+        The table of the slicer.
+    :param dimensions:
+        The dimensions of the query.
+    :param metrics:
+        The metrics which were fetched.
+    :param filters:
+        The filters of the query.
+    :param references:
+        The references of the query.
+    :param duration:
+        The number of seconds the database took to answer all of the queries for the totals and references.
+    :param data_frame:
+        The result set of the query.
+    """
+    if not workload_logger.isEnabledFor(logging.INFO):
+        return
+
+    record = make_workload_record(database, table, dimensions, metrics, filters, references, duration,
+                                  len(data_frame))
+    workload_logger.info(json.dumps(record, sort_keys=True))
+
+
+def make_workload_record(database, table, dimensions, metrics, filters, references, duration, rows):
+    """
+    :param rows:
+        The number of rows in the result set of the query.
+    :return:
+        A dict with the details of a slicer query which are needed to decide which aggregate tables could answer it.
+        The columns of dimensions and metrics are only set if they can be pre-aggregated, that is dimensions which are
+        defined as a column of the table and metrics which are defined as the `SUM` of a column.
+    """
+    joins = find_required_tables_to_join(list(dimensions) + list(metrics) + list(filters), table)
+
+    return {
+        'time': time.time(),
+        'table': str(table),
+        'joins': [str(join_table) for join_table in joins],
+        'dimensions': [_make_dimension_record(database, dimension) for dimension in dimensions],
+        'metrics': [{'key': metric.key,
+                     'definition': str(metric.definition),
+                     'column': _get_pre_aggregated_column(metric)}
+                    for metric in metrics],
+        'filters': [_make_filter_record(filter_) for filter_ in filters],
+        'references': [repr(reference) for reference in references],
+        'duration': duration,
+        'rows': rows,
+    }
+
+
+def _make_dimension_record(database, dimension):
+    interval = getattr(dimension, 'interval', None)
+    definition = database.trunc_date(dimension.definition, interval) \
+        if interval is not None \
+        else dimension.definition
+
+    record = {
+        'key': dimension.key,
+        'interval': str(interval) if interval is not None else None,
+        'rollup': dimension.is_rollup,
+        'definition': str(definition),
+        'column': _get_column(dimension.definition, interval),
+    }
+
+    if dimension.has_display_field:
+        record.update(display_key=dimension.display_key,
+                      display_definition=str(dimension.display_definition),
+                      display_column=_get_column(dimension.display_definition))
+
+    return record
+
+
+def _make_filter_record(filter_):
+    if isinstance(filter_, MetricFilter):
+        return {'metric': filter_.metric_key}
+
+    if isinstance(filter_, KeysetFilter):
+        return {'dimensions': list(filter_.dimension_keys)}
+
+    record = {'dimensions': [filter_.dimension_key]}
+
+    # The rows of an aggregate table with truncated dates can only be filtered by ranges aligned to its intervals
+    if isinstance(filter_, RangeFilter) and isinstance(filter_.start, date) and isinstance(filter_.stop, date):
+        record.update(start=pd.Timestamp(filter_.start).isoformat(),
+                      stop=pd.Timestamp(filter_.stop).isoformat())
+
+    return record
+
+
+def _get_column(definition, interval=None):
+    # Only dates can be truncated the same way in the aggregate table and in a query
+    if not isinstance(definition, Field) or not isinstance(interval, (DatetimeInterval, type(None))):
+        return None
+    return definition.name
+
+
+def _get_pre_aggregated_column(metric):
+    """
+    Metrics defined as the sum of a column return the same values from an aggregate table with the sums of the column.
+    """
+    definition = metric.definition
+    if not metric.additive or not isinstance(definition, fn.Sum) or 1 != len(definition.args):
+        return None
+    return _get_column(definition.args[0])
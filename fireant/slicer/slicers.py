@@ -1,9 +1,13 @@
 import itertools
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+from threading import Lock
 
 from .dimensions import DisplayDimension
 from .queries import (
     DimensionChoicesQueryBuilder,
     DimensionLatestQueryBuilder,
+    MultipleDimensionChoicesQueryBuilder,
     SlicerQueryBuilder,
 )
 
@@ -52,6 +56,47 @@ class _Container(object):
                         for a, b in itertools.zip_longest(self._items, getattr(other, '_items', ()))])
 
 
+class _TransformPool(object):
+    """
+    Holds the pool used to transform the widgets of a slicer. The query builders copy the slicer whenever they are
+    modified, so the copies share the holder and its pool, which is created the first time it is needed. The pool is
+    not pickled with the slicer, for example when widgets are transformed in processes.
+    """
+
+    def __init__(self, max_threads=1, max_processes=None, pool=None):
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self.pool = pool
+        self._lock = Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __getstate__(self):
+        # Pools and locks cannot be pickled
+        state = self.__dict__.copy()
+        state['pool'] = None
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def get(self):
+        if self.pool is not None \
+                or (not self.max_processes and (self.max_threads or 1) <= 1):
+            return self.pool
+
+        with self._lock:
+            if self.pool is None:
+                self.pool = Pool(processes=self.max_processes) \
+                    if self.max_processes \
+                    else ThreadPool(processes=self.max_threads)
+
+        return self.pool
+
+
 class Slicer(object):
     """
     WRITEME
@@ -67,7 +112,15 @@ class Slicer(object):
 
     def __init__(self, table, database, joins=(), dimensions=(), metrics=(),
                  hint_table=None,
-                 always_query_all_metrics=False):
+                 always_query_all_metrics=False,
+                 max_transform_threads=1,
+                 max_transform_processes=None,
+                 transform_pool=None,
+                 choices_cache=None,
+                 latest_cache=None,
+                 result_cache=None,
+                 watermark=None,
+                 aggregate_tables=()):
         """
         Constructor for a slicer.  Contains all the fields to initialize the slicer.
 
@@ -96,6 +149,45 @@ class Slicer(object):
 
         :param always_query_all_metrics: (Default: False)
             When true, all metrics will be included in database queries in order to increase cache hits.
+
+        :param max_transform_threads: (Default: 1)
+            The number of threads used to transform the result set of a query into its widgets concurrently. By default,
+            the widgets are transformed one at a time. When greater than one, a pool of threads is created the first
+            time it is needed and reused for every query of the slicer. Widgets which are not thread-safe, such as
+            matplotlib charts, are always transformed one at a time.
+
+        :param max_transform_processes: (Optional)
+            When set, widgets are transformed in a pool of this many processes instead of threads. This is useful for
+            widgets which spend most of their time in python code, such as tables, since threads cannot run python code
+            in parallel. The result set of each query is serialized once and sent to each process with a batch of the
+            widgets. The caches of the slicer are not sent to the processes.
+
+        :param transform_pool: (Optional)
+            A `multiprocessing.pool.ThreadPool` or `multiprocessing.Pool` used to transform widgets concurrently, for
+            example a pool shared by several slicers. When set, `max_transform_threads` and `max_transform_processes`
+            are ignored.
+
+        :param choices_cache: (Optional)
+            A `ChoicesCache` which keeps the choices of the dimensions in memory. When set, choices queries which only
+            filter the dimension of the choices, such as the `like` filters of an autocomplete, are answered from the
+            cache instead of the database.
+
+        :param latest_cache: (Optional)
+            A `QueryCache` which keeps the latest values of dimensions, fetched with `slicer.latest`, in memory.
+
+        :param result_cache: (Optional)
+            A `QueryCache` which keeps the result sets of `slicer.data` queries in memory, with the columns of each
+            metric cached separately. A query then only fetches the metrics which are not cached yet for the same
+            dimensions, filters and references.
+
+        :param watermark: (Optional)
+            A `Watermark` which tracks when the table of this slicer loads new data. When set, the values in the caches
+            of this slicer are reused until the watermark of the table moves.
+
+        :param aggregate_tables: (Optional)
+            A list of `AggregateTable`s, pre-aggregated copies of the table grouped by some of the dimensions. Each
+            query of `slicer.data`, including the queries for totals and references, is sent to the smallest aggregate
+            table which has all of its dimensions, intervals and metrics, or to the table otherwise.
         """
         self.table = table
         self.database = database
@@ -109,10 +201,40 @@ class Slicer(object):
         # add query builder entry points
         self.data = SlicerQueryBuilder(self)
         self.latest = DimensionLatestQueryBuilder(self)
+        self.choices = MultipleDimensionChoicesQueryBuilder(self)
         for dimension in dimensions:
             dimension.choices = DimensionChoicesQueryBuilder(self, dimension)
 
         self.always_query_all_metrics = always_query_all_metrics
+        self.max_transform_threads = max_transform_threads
+        self.max_transform_processes = max_transform_processes
+        self._transform_pool = _TransformPool(max_transform_threads, max_transform_processes, transform_pool)
+        self.choices_cache = choices_cache
+        self.latest_cache = latest_cache
+        self.result_cache = result_cache
+        self.watermark = watermark
+        self.aggregate_tables = aggregate_tables
+
+    @property
+    def transform_pool(self):
+        """
+        The pool used to transform widgets concurrently, or None if they are transformed one at a time. The pool is
+        created the first time it is needed and reused for every query, including the queries of copies of the slicer.
+        """
+        return self._transform_pool.get()
+
+    def invalidate_caches(self):
+        """
+        Removes all of the cached values queried from the table of this slicer, for example after the table was
+        reloaded, from each of the caches of this slicer. The watermark of the table is polled again the next time it
+        is needed. Other slicers sharing the caches keep their values.
+        """
+        for cache in (self.choices_cache, self.latest_cache, self.result_cache):
+            if cache is not None:
+                cache.invalidate_table(self.table)
+
+        if self.watermark is not None:
+            self.watermark.invalidate(self.table)
 
     def __eq__(self, other):
         return isinstance(other, Slicer) \
@@ -45,12 +45,16 @@ class TransformableWidget(Widget):
     # should be applied to the number of series rather than the number of data points.
     group_pagination = False
 
-    def transform(self, data_frame, slicer, dimensions, references):
+    # This attribute can be overridden for widgets which cannot be transformed concurrently with other widgets, such as
+    # widgets which use global state.
+    thread_safe = True
+
+    def transform(self, data_frame, slicer, dimensions, references, context=None):
         """
         - Main entry point -
 
         Transformers the result set `pd.DataFrame` from a slicer query into the output format for this specific widget
-        type.
+        type. The data frame is shared by all of the widgets in a query, so it must not be modified.
 
         :param data_frame:
             The data frame containing the data. Index must match the dimensions parameter.
@@ -60,6 +64,9 @@ class TransformableWidget(Widget):
             A list of dimensions that are being rendered.
         :param references:
             A list of references that are being rendered.
+        :param context:
+            A `RenderContext` for the data frame, which is shared by all of the widgets in a query. If None, the widget
+            creates its own context.
         :return:
             A dict meant to be dumped as JSON.
         """
@@ -3,6 +3,9 @@ from typing import (
     Union,
 )
 
+import numpy as np
+import pandas as pd
+
 from fireant import (
     Metric,
     Operation,
@@ -107,3 +110,41 @@ class ChartWidget:
                                                     for series in axis
                                                     if isinstance(series.metric, Operation)
                                                     for operation in [series.metric] + series.metric.operations])
+
+    @staticmethod
+    def _group_by_series(data_frame, is_timeseries=False):
+        """
+        Groups the rows of the data frame by the index levels after the 0th, one group for each series.
+
+        :param data_frame:
+        :param is_timeseries:
+            When True, the rows of each series are sorted by the 0th index level.
+        :return:
+            A list of tuples containing the dimension values of a series and a numpy array with the positions of the
+            rows of the series in the data frame.
+        """
+        first_level = data_frame.index.get_level_values(0)
+
+        if len(data_frame) == 0 or not isinstance(data_frame.index, pd.MultiIndex):
+            positions = np.argsort(first_level.values, kind='mergesort') \
+                if is_timeseries \
+                else np.arange(len(data_frame))
+            return [([], positions)]
+
+        # The groups are numbered in the order they first appear and rows with null dimension values are excluded
+        group_numbers = data_frame.groupby(level=data_frame.index.names[1:], sort=False).ngroup().values
+
+        positions = np.lexsort((first_level.values, group_numbers)) \
+            if is_timeseries \
+            else np.argsort(group_numbers, kind='mergesort')
+        positions = positions[group_numbers[positions] != -1]
+
+        group_sizes = np.bincount(group_numbers[positions])
+        groups = np.split(positions, np.cumsum(group_sizes)[:-1])
+
+        series = []
+        for group in groups:
+            dimension_values = data_frame.index[group[0]][1:]
+            series.append((dimension_values[0] if 1 == len(dimension_values) else dimension_values, group))
+
+        return series
@@ -0,0 +1,164 @@
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from fireant import formats
+from fireant.formats import (
+    INF_VALUE,
+    NULL_VALUE,
+)
+from fireant.utils import format_dimension_key
+from ..totals import (
+    MAX_NUMBER,
+    MAX_STRING,
+    MAX_TIMESTAMP,
+)
+
+
+class RenderContext:
+    """
+    Holds the preprocessing of a result set which is shared by all of the widgets rendering it, such as the display
+    values of the dimensions and the formatted metric columns. Each value is computed the first time a widget needs it
+    and then reused by the other widgets, so that rendering the same result set into several widgets only does the work
+    once.
+
+    The context is read-only. Widgets must not modify the data frame or any of the values returned by the context. The
+    context can be used by widgets which are transformed concurrently in threads.
+    """
+
+    def __init__(self, data_frame, dimensions):
+        """
+        :param data_frame:
+            The result set data frame, the same one that is passed to the widgets.
+        :param dimensions:
+            A list of dimensions that are being rendered.
+        """
+        self.data_frame = data_frame
+        self.dimensions = dimensions
+        self._cache = {}
+        self._lock = Lock()
+        self._key_locks = {}
+
+    def __getstate__(self):
+        # Locks cannot be pickled, which is required to use the context in another process
+        state = self.__dict__.copy()
+        del state['_lock']
+        del state['_key_locks']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+        self._key_locks = {}
+
+    def _get_or_compute(self, key, compute):
+        # The context lock is only held to look up the lock of a key, so that values for different keys are computed
+        # concurrently while widgets transformed in other threads wait for a value instead of computing it again.
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+            key_lock = self._key_locks.setdefault(key, Lock())
+
+        with key_lock:
+            if key not in self._cache:
+                value = compute()
+
+                with self._lock:
+                    self._cache[key] = value
+
+        return self._cache[key]
+
+    @property
+    def display_values(self):
+        """
+        The display values for each dimension. For dimensions with a display field, the display values are taken from
+        the data frame, otherwise the display values configured in the slicer are used.
+
+        :return:
+            A dict mapping the keys of the dimensions with display values to either a dict or a `pd.Series` where the
+            display value can be accessed using the dimension value as the key.
+        """
+
+        def compute():
+            display_values = {}
+
+            for dimension in self.dimensions:
+                key = format_dimension_key(dimension.key)
+
+                if hasattr(dimension, 'display_values'):
+                    display_values[key] = dimension.display_values
+
+                elif dimension.has_display_field:
+                    display_values[key] = self.display_field_values(dimension) \
+                        .fillna(value=NULL_VALUE) \
+                        .replace([np.inf, -np.inf], INF_VALUE)
+
+            return display_values
+
+        return self._get_or_compute('display_values', compute)
+
+    def display_field_values(self, dimension):
+        """
+        The raw values of the display field of a dimension, without replacing any null values.
+
+        :param dimension:
+            A dimension with a display field.
+        :return:
+            A `pd.Series` with the first display value for each dimension value.
+        """
+        key = format_dimension_key(dimension.key)
+        f_display_key = format_dimension_key(dimension.display_key)
+
+        return self._get_or_compute(('display_field_values', key),
+                                    lambda: self.data_frame[f_display_key].groupby(level=key).first())
+
+    def totals_mask(self, level):
+        """
+        :param level:
+            The position of a level of the index of the data frame.
+        :return:
+            A numpy bool array which is True for the rows containing totals for that level.
+        """
+
+        def compute():
+            values = self.data_frame.index.get_level_values(level)
+
+            if pd.api.types.is_datetime64_any_dtype(values):
+                return np.asarray(values == MAX_TIMESTAMP)
+
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                return np.asarray(values == MAX_NUMBER)
+
+            return np.asarray(values.isin([MAX_STRING]))
+
+        return self._get_or_compute(('totals_mask', level), compute)
+
+    def metric_values(self, metric_key):
+        """
+        :param metric_key:
+            The key of a metric column in the data frame.
+        :return:
+            A numpy object array with the values of the metric converted by `formats.metric_value_series`.
+        """
+        return self._get_or_compute(('metric_values', metric_key),
+                                    lambda: formats.metric_value_series(self.data_frame[metric_key]).values)
+
+    def metric_display(self, metric_key, prefix=None, suffix=None, precision=None):
+        """
+        :param metric_key:
+            The key of a metric column in the data frame.
+        :param prefix:
+            An optional prefix.
+        :param suffix:
+            An optional suffix.
+        :param precision:
+            The decimal precision, the number of decimal places to round to.
+        :return:
+            A `pd.Series` with the display values of the metric formatted by `formats.metric_display_series`.
+        """
+        return self._get_or_compute(('metric_display', metric_key, prefix, suffix, precision),
+                                    lambda: formats.metric_display_series(self.data_frame[metric_key],
+                                                                          prefix,
+                                                                          suffix,
+                                                                          precision))
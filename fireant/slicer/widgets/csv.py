@@ -1,7 +1,11 @@
 from typing import Iterable
 
+import pandas as pd
+
 from fireant import Metric
 from .pandas import Pandas
+from ..exceptions import QueryException
+from ..references import reference_label
 
 
 class CSV(Pandas):
@@ -9,7 +13,59 @@ class CSV(Pandas):
         super().__init__(metric, *metrics, **kwargs)
         self.group_pagination = group_pagination
 
-    def transform(self, data_frame, slicer, dimensions, references):
-        result_df = super(CSV, self).transform(data_frame, slicer, dimensions, references)
+    def transform(self, data_frame, slicer, dimensions, references, context=None):
+        result_df = super(CSV, self).transform(data_frame, slicer, dimensions, references, context)
         result_df.columns.names = [None]
         return result_df.to_csv()
+
+    def transform_chunks(self, chunks, slicer, dimensions, references):
+        """
+        Transforms chunks of a result set into CSV incrementally, without ever holding the full result set in memory.
+        This is meant to be used with `SlicerQueryBuilder.iter_fetch` for streaming large exports, for example as an
+        HTTP response or into a file with `file.writelines(...)`.
+
+        Pivoting, transposing and sorting require the full result set, so they cannot be used when streaming.
+
+        :param chunks:
+            An iterable of data frames, such as the chunks yielded by `SlicerQueryBuilder.iter_fetch`. The chunks are
+            modified while being transformed.
+        :param slicer:
+            The slicer that is in use.
+        :param dimensions:
+            A list of dimensions that are being rendered.
+        :param references:
+            A list of references that are being rendered.
+        :return:
+            A generator of CSV strings. The first string contains the header row and each following string contains
+            the rows of one chunk.
+        """
+        if self.pivot or self.transpose or self.sort:
+            raise QueryException('Cannot stream a CSV which is pivoted, transposed or sorted.')
+
+        return self._transform_chunks(chunks, dimensions, references)
+
+    def _transform_chunks(self, chunks, dimensions, references):
+        header = True
+
+        for chunk in chunks:
+            result_df = self.transform_rows(chunk, dimensions, references)
+            result_df.columns.names = [None]
+
+            yield result_df.to_csv(header=header)
+            header = False
+
+        if header:
+            # Still write the header if there are no results
+            yield self._empty_data_frame(dimensions, references).to_csv()
+
+    def _empty_data_frame(self, dimensions, references):
+        index_names = [dimension.label or dimension.key
+                       for dimension in dimensions]
+        columns = [reference_label(item, reference)
+                   for item in self.items
+                   for reference in [None] + references]
+
+        data_frame = pd.DataFrame(columns=index_names + columns)
+        return data_frame.set_index(index_names) \
+            if index_names \
+            else data_frame
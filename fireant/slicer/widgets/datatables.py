@@ -1,4 +1,8 @@
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
+from pandas.core.dtypes.cast import find_common_type
 
 from fireant import (
     ContinuousDimension,
@@ -16,9 +20,12 @@ from fireant.utils import (
 from .base import (
     TransformableWidget,
 )
+from .context import RenderContext
 from .helpers import (
+    dictionary_encode,
     dimensional_metric_label,
-    extract_display_values,
+    find_pivot_rows_to_keep,
+    unstack_rows,
 )
 from ..references import (
     reference_key,
@@ -26,62 +33,40 @@ from ..references import (
 )
 
 
-def _render_dimension_cell(dimension_value: str, display_values: dict):
+def _render_dimension_column(dimension_values: pd.Index, display_values: dict):
     """
-    Renders a table cell in a dimension column.
+    Renders the table cells of a dimension column. A cell is only rendered once for each distinct value and the raw
+    values of the distinct values are formatted all at once.
 
-    :param dimension_value:
-        The raw value for the table cell.
+    :param dimension_values:
+        The raw values for the table cells.
 
     :param display_values:
-        The display value mapped from the raw value.
+        The display values mapped from the raw values.
 
     :return:
-        A dict with the keys value and possible display.
+        A list containing a dict with the keys value and possible display for each cell.
     """
-    dimension_cell = {'value': formats.dimension_value(dimension_value)}
+    codes, uniques = pd.factorize(dimension_values)
 
-    if display_values is not None:
-        if dimension_value in TOTALS_MARKERS:
-            dimension_cell['display'] = 'Totals'
-        elif pd.isnull(dimension_value):
-            dimension_cell['display'] = NULL_VALUE
-        else:
-            display_value = display_values.get(dimension_value, dimension_value)
-            dimension_cell['display'] = formats.dimension_value(display_value)
+    # Null values are not included in the distinct values, so they are added at the end
+    uniques = pd.Index(uniques).insert(len(uniques), None)
+    values = formats.dimension_value_series(uniques).tolist()
 
-    return dimension_cell
+    if display_values is None:
+        cells = [{'value': value} for value in values]
 
+    else:
+        displays = np.empty(len(uniques), dtype=object)
+        displays[:-1] = [display_values.get(value, value) for value in uniques[:-1]]
+        displays = formats.dimension_value_series(displays)
+        displays[-1] = NULL_VALUE
+        displays[uniques.isin(TOTALS_MARKERS)] = 'Totals'
 
-def _render_dimensional_metric_cell(row_data: pd.Series, metric: Metric):
-    """
-    Renders a table cell in a metric column for pivoted tables where there are two or more dimensions. This function
-    is recursive to traverse multi-dimensional indices.
+        cells = [{'value': value, 'display': display}
+                 for value, display in zip(values, displays.tolist())]
 
-    :param row_data:
-        A series containing the value for the metric and it's index (for the dimension values).
-
-    :param metric:
-        A reference to the slicer metric to access the display formatting.
-
-    :return:
-        A deep dict in a tree structure with keys matching each dimension level. The top level will have keys matching
-        the first level of dimension values, and the next level will contain the next level of dimension values, for as
-        many index levels as there are. The last level will contain the return value of `_format_metric_cell`.
-    """
-    level = {}
-
-    # Group by the last dimension, drop it, and fill the dict with either the raw metric values or the next level of
-    # dicts.
-    for key, next_row in row_data.groupby(level=1):
-        next_row.reset_index(level=1, drop=True, inplace=True)
-
-        df_key = format_metric_key(metric.key)
-        level[key] = _render_dimensional_metric_cell(next_row, metric) \
-            if isinstance(next_row.index, pd.MultiIndex) \
-            else _format_metric_cell(next_row[df_key], metric)
-
-    return level
+    return [cells[code] for code in codes]
 
 
 def _format_metric_cell(value, metric):
@@ -108,63 +93,153 @@ def _format_metric_cell(value, metric):
     }
 
 
+def _format_metric_column(values: pd.Series, metric: Metric, display_values: pd.Series = None):
+    """
+    Renders the cells of a metric column. This is the vectorized counterpart of `_format_metric_cell` and the display
+    values of numeric columns are formatted for the whole column at once.
+
+    :param values:
+        A series containing the raw values of the metric.
+
+    :param metric:
+        A reference to the slicer metric to access the display formatting.
+    :param display_values:
+        The display values of a numeric metric column if they have already been formatted.
+    :return:
+        A dict containing the keys value and display with lists of the raw and display metric values.
+    """
+    if values.dtype.kind not in 'iuf':
+        # The display values of other types need to be formatted value by value
+        raw_values = formats.metric_value_series(values).tolist()
+        return {
+            'value': raw_values,
+            'display': [formats.metric_display(value,
+                                               prefix=metric.prefix,
+                                               suffix=metric.suffix,
+                                               precision=metric.precision)
+                        if value is not None
+                        else None
+                        for value in raw_values],
+        }
+
+    if display_values is None:
+        display_values = formats.metric_display_series(values,
+                                                       prefix=metric.prefix,
+                                                       suffix=metric.suffix,
+                                                       precision=metric.precision)
+
+    raw_values = values.tolist()
+    display_values = display_values.tolist()
+
+    # NaN and inf values do not have a raw value or a display value
+    for i in np.flatnonzero(~np.isfinite(values.values)):
+        raw_values[i] = display_values[i] = None
+
+    return {
+        'value': raw_values,
+        'display': display_values,
+    }
+
+
 HARD_MAX_COLUMNS = 24
 
 
 class DataTablesJS(TransformableWidget):
-    def __init__(self, metric, *metrics: Metric, pivot=False, max_columns=None):
+    def __init__(self, metric, *metrics: Metric, pivot=False, max_columns=None, max_columns_by=None, columnar=False):
+        """
+        :param pivot:
+            If True, the dimensions after the first one are pivoted to columns.
+        :param max_columns:
+            The maximum number of columns, at most `HARD_MAX_COLUMNS`. When pivoting, the rows of the pivoted values
+            which do not fit in the columns are removed before pivoting.
+        :param max_columns_by:
+            A metric. If given, the pivoted values with the greatest total of this metric are kept, otherwise the first
+            values are kept.
+        :param columnar:
+            If True, the data is rendered one column at a time instead of one row at a time.
+        """
         super(DataTablesJS, self).__init__(metric, *metrics)
         self.pivot = pivot
+        self.columnar = columnar
         self.max_columns = min(max_columns, HARD_MAX_COLUMNS) \
             if max_columns is not None \
             else HARD_MAX_COLUMNS
+        self.max_columns_by = max_columns_by
 
     def __repr__(self):
         return '{}({},pivot={})'.format(self.__class__.__name__,
                                         ','.join(str(m) for m in self.items),
                                         self.pivot)
 
-    def transform(self, data_frame, slicer, dimensions, references):
+    def transform(self, data_frame, slicer, dimensions, references, context=None):
         """
         WRITEME
 
+        If the widget is columnar, `data` contains one entry per column instead of one dict per row. The entries are
+        keyed by the `data` attribute of the columns. The cells of dimension columns are dictionary-encoded into
+        `labels` and `codes` and metric columns contain a list of the `value`s and a list of the `display` values.
+
         :param data_frame:
         :param slicer:
         :param dimensions:
+        :param references:
+        :param context:
+            A `RenderContext` shared by the widgets in the query.
         :return:
         """
-        dimension_display_values = extract_display_values(dimensions, data_frame)
+        context = context or RenderContext(data_frame, dimensions)
+        dimension_display_values = context.display_values
 
         metric_keys = [format_metric_key(reference_key(metric, reference))
                        for metric in self.items
                        for reference in [None] + references]
-        data_frame = data_frame[metric_keys]
-
         pivot_index_to_columns = self.pivot and isinstance(data_frame.index, pd.MultiIndex)
         if pivot_index_to_columns:
             levels = data_frame.index.names[1:]
-            data_frame = data_frame \
-                .unstack(level=levels) \
-                .fillna(value=0)
-
             dimension_columns = self._dimension_columns(dimensions[:1])
 
+            # Each pivoted value has a column for each metric and reference, so the values which do not fit in the
+            # columns can be removed before pivoting
+            max_columns_by_key = format_metric_key(self.max_columns_by.key) \
+                if self.max_columns_by is not None \
+                else None
+            max_values = (self.max_columns - len(dimension_columns)) // len(metric_keys)
+            is_kept = find_pivot_rows_to_keep(data_frame,
+                                              levels,
+                                              max(1, max_values),
+                                              max_columns_by_key)
+
+            data_frame = unstack_rows(data_frame[metric_keys], levels, is_kept) \
+                .fillna(value=0)
+
             render_column_label = dimensional_metric_label(dimensions, dimension_display_values)
             metric_columns = self._metric_columns_pivoted(references,
                                                           data_frame.columns,
                                                           render_column_label)
 
         else:
+            data_frame = data_frame[metric_keys]
             dimension_columns = self._dimension_columns(dimensions)
             metric_columns = self._metric_columns(references)
 
         columns = (dimension_columns + metric_columns)[:self.max_columns]
-        data = [self._data_row(dimensions,
-                               dimension_values,
-                               dimension_display_values,
-                               references,
-                               row_data)
-                for dimension_values, row_data in data_frame.iterrows()]
+
+        transform_data = self._columnar_data \
+            if self.columnar \
+            else self._data_rows
+        data = transform_data(dimensions[:1] if pivot_index_to_columns else dimensions,
+                              dimension_display_values,
+                              references,
+                              data_frame,
+                              # The formatted metric columns can only be shared when the data frame is not pivoted
+                              context if not pivot_index_to_columns else None)
+
+        if self.columnar:
+            # Only the entries of the columns which fit in `max_columns` are kept
+            column_keys = {column['data'] for column in columns}
+            data = OrderedDict((key, cells)
+                               for key, cells in data.items()
+                               if key in column_keys)
 
         return dict(columns=columns, data=data)
 
@@ -220,10 +295,12 @@ class DataTablesJS(TransformableWidget):
         """
         columns = []
         single_metric = 1 == len(self.items)
-        for metric in self.items:
-            dimension_value_sets = [row[1:]
-                                    for row in list(df_columns)]
 
+        # The data frame has a column for each metric and reference with the same pivoted values
+        dimension_value_sets = list(OrderedDict.fromkeys(row[1:]
+                                                         for row in list(df_columns)))
+
+        for metric in self.items:
             for dimension_values in dimension_value_sets:
                 for reference in [None] + references:
                     key = reference_key(metric, reference)
@@ -236,29 +313,117 @@ class DataTablesJS(TransformableWidget):
 
         return columns
 
-    def _data_row(self, dimensions, dimension_values, dimension_display_values, references, row_data):
+    def _render_columns(self, dimensions, dimension_display_values, references, data_frame, context=None):
         """
-        WRITEME
+        Renders the cells of the table one column at a time. For pivoted tables, the data frame has a column for each
+        combination of metric and pivoted dimension values, which is rendered as a metric column with a path containing
+        the metric key and the dimension values.
 
         :param dimensions:
-        :param dimension_values:
         :param dimension_display_values:
-        :param row_data:
+        :param references:
+        :param data_frame:
+        :param context:
+            A `RenderContext` with the formatted metric columns of the data frame, or None if they cannot be shared.
         :return:
+            A tuple with a list of tuples containing the key and cells of each dimension column and a list of tuples
+            containing the path and the rendered values of each metric column.
         """
-        row = {}
-
-        for dimension, dimension_value in zip(dimensions, utils.wrap_list(dimension_values)):
+        dimension_columns = []
+        for i, dimension in enumerate(dimensions):
             df_key = format_dimension_key(dimension.key)
-            row[dimension.key] = _render_dimension_cell(dimension_value, dimension_display_values.get(df_key))
+            display_values = dimension_display_values.get(df_key)
+            dimension_values = data_frame.index.get_level_values(i)
 
-        for metric in self.items:
-            for reference in [None] + references:
-                key = reference_key(metric, reference)
-                df_key = format_metric_key(key)
+            dimension_columns.append((dimension.key, _render_dimension_column(dimension_values, display_values)))
+
+        metrics = {format_metric_key(reference_key(metric, reference)): (reference_key(metric, reference), metric)
+                   for metric in self.items
+                   for reference in [None] + references}
+
+        # The values of all columns are cast to a common type, the same as when iterating over the rows of the data
+        # frame
+        common_dtype = find_common_type(list(data_frame.dtypes))
+
+        metric_columns = []
+        for i, column in enumerate(data_frame.columns):
+            df_key, *dimension_values = utils.wrap_list(column)
+            key, metric = metrics[df_key]
+
+            values = data_frame.iloc[:, i]
+            display_values = None
+            if values.dtype != common_dtype:
+                values = values.astype(common_dtype)
+
+            elif context is not None and values.dtype.kind in 'iuf':
+                display_values = context.metric_display(df_key,
+                                                        prefix=metric.prefix,
+                                                        suffix=metric.suffix,
+                                                        precision=metric.precision)
+
+            metric_columns.append(([key] + dimension_values, _format_metric_column(values, metric, display_values)))
 
-                row[key] = _render_dimensional_metric_cell(row_data, metric) \
-                    if isinstance(row_data.index, pd.MultiIndex) \
-                    else _format_metric_cell(row_data[df_key], metric)
+        return dimension_columns, metric_columns
 
-        return row
+    def _data_rows(self, dimensions, dimension_display_values, references, data_frame, context=None):
+        """
+        Builds a dict for each row of the table. The cells are rendered column by column and then assembled into rows.
+        For pivoted tables, the metric cells are nested in the rows by the pivoted dimension values.
+
+        :param dimensions:
+        :param dimension_display_values:
+        :param references:
+        :param data_frame:
+        :param context:
+        :return:
+        """
+        dimension_columns, metric_columns = self._render_columns(dimensions,
+                                                                 dimension_display_values,
+                                                                 references,
+                                                                 data_frame,
+                                                                 context)
+
+        dimension_keys = [key for key, _ in dimension_columns]
+        rows = [dict(zip(dimension_keys, cells))
+                for cells in zip(*[cells for _, cells in dimension_columns])] \
+            if dimension_columns \
+            else [{} for _ in range(len(data_frame))]
+
+        for path, rendered in metric_columns:
+            cells = [{'value': value, 'display': display}
+                     for value, display in zip(rendered['value'], rendered['display'])]
+
+            if 1 == len(path):
+                key = path[0]
+                for row, cell in zip(rows, cells):
+                    row[key] = cell
+                continue
+
+            for row, cell in zip(rows, cells):
+                utils.setdeepattr(row, path, cell)
+
+        return rows
+
+    def _columnar_data(self, dimensions, dimension_display_values, references, data_frame, context=None):
+        """
+        Builds the data for the table with one entry per column, keyed by the `data` attribute of the column.
+
+        :param dimensions:
+        :param dimension_display_values:
+        :param references:
+        :param data_frame:
+        :param context:
+        :return:
+        """
+        dimension_columns, metric_columns = self._render_columns(dimensions,
+                                                                 dimension_display_values,
+                                                                 references,
+                                                                 data_frame,
+                                                                 context)
+
+        data = OrderedDict((key, dictionary_encode(cells))
+                           for key, cells in dimension_columns)
+        for path, rendered in metric_columns:
+            data['.'.join([str(x) for x in path])] = rendered
+
+        return data
@@ -1,11 +1,9 @@
 import numpy as np
+import pandas as pd
 
 from fireant import utils
-from fireant.formats import (
-    INF_VALUE,
-    NULL_VALUE,
-)
 from fireant.slicer.totals import TOTALS_MARKERS
+from .context import RenderContext
 from ..references import reference_label
 
 
@@ -25,24 +23,7 @@ def extract_display_values(dimensions, data_frame):
         dimension's key will not be present). The value of the dict will be either a dict or a data frame where the
         display value can be accessed using the display value as the key.
     """
-    display_values = {}
-
-    for dimension in dimensions:
-        key = utils.format_dimension_key(dimension.key)
-
-        if hasattr(dimension, 'display_values'):
-            display_values[key] = dimension.display_values
-
-        elif dimension.has_display_field:
-            f_display_key = utils.format_dimension_key(dimension.display_key)
-
-            display_values[key] = data_frame[f_display_key] \
-                .groupby(level=key) \
-                .first() \
-                .fillna(value=NULL_VALUE) \
-                .replace([np.inf, -np.inf], INF_VALUE)
-
-    return display_values
+    return RenderContext(data_frame, dimensions).display_values
 
 
 def dimensional_metric_label(dimensions, dimension_display_values):
@@ -98,3 +79,208 @@ def dimensional_metric_label(dimensions, dimension_display_values):
         return reference_label(metric, reference)
 
     return render_series_label
+
+
+def map_unique(values, func):
+    """
+    Applies a function to each value of an index or series, calling the function only once per unique value.
+
+    :param values:
+        A `pd.Index` or `pd.Series`.
+    :param func:
+        A function with one argument, the value.
+    :return:
+        A list containing the result of the function for each value.
+    """
+    codes, uniques = pd.factorize(values)
+    mapped = [func(value) for value in uniques]
+
+    if not (codes == -1).any():
+        return [mapped[code] for code in codes]
+
+    # NaN values are not included in the uniques
+    return [mapped[code] if -1 != code else func(value)
+            for code, value in zip(codes, values)]
+
+
+def dictionary_encode(cells):
+    """
+    Dictionary-encodes a column of table cells for a columnar payload. Each distinct cell is only included once and
+    each row refers to its cell by position.
+
+    :param cells:
+        A list of dicts containing the cell for each row. The values of the dicts must be hashable.
+    :return:
+        A dict with the keys `labels`, a list of the distinct cells, and `codes`, a list containing the position of the
+        cell of each row in `labels`.
+    """
+    labels, codes, positions = [], [], {}
+
+    for cell in cells:
+        key = tuple(sorted(cell.items()))
+
+        position = positions.get(key)
+        if position is None:
+            position = positions[key] = len(labels)
+            labels.append(cell)
+
+        codes.append(position)
+
+    return {'labels': labels, 'codes': codes}
+
+
+def lttb(x, y, max_points):
+    """
+    Downsamples a series of points with the Largest-Triangle-Three-Buckets algorithm, which keeps the points that
+    preserve the visual shape of the series. The first and last points are always kept and the points in between are
+    split into buckets of equal size. One point is selected from each bucket, the one forming the largest triangle with
+    the point selected from the previous bucket and the average of the next bucket. The areas of the triangles are
+    computed for all of the points of a bucket at once.
+
+    :param x:
+        A numpy array with the x values of the points in ascending order.
+    :param y:
+        A numpy array with the y values of the points. Points with NaN values are only selected from a bucket which
+        contains no other points.
+    :param max_points:
+        The maximum number of points to select. Series with at most this many points are not downsampled.
+    :return:
+        A numpy array with the positions of the selected points in ascending order.
+    """
+    n_points = len(x)
+    if n_points <= max_points or max_points < 3:
+        return np.arange(n_points)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # The bucket i contains the points from edges[i] up to edges[i + 1]
+    edges = np.linspace(1, n_points - 1, max_points - 1).astype(np.int64)
+    bucket_sizes = np.diff(edges)
+
+    # The average of the next bucket is the third point of the triangles, the last point is used for the last bucket
+    is_valid = ~np.isnan(y)
+    offsets = edges[:-1] - 1
+    average_x = np.add.reduceat(x[1:-1], offsets) / bucket_sizes
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average_y = np.add.reduceat(np.where(is_valid, y, 0)[1:-1], offsets) \
+                    / np.add.reduceat(is_valid[1:-1].astype(np.int64), offsets)
+    next_x = np.append(average_x[1:], x[-1])
+    next_y = np.append(average_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n_points - 1
+
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        areas = np.abs((x[previous] - next_x[i]) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y[i] - y[previous]))
+        areas[np.isnan(areas)] = -1
+
+        previous = selected[i + 1] = start + np.argmax(areas)
+
+    return selected
+
+
+def find_pivot_rows_to_keep(data_frame, levels, max_values, metric_key=None):
+    """
+    Finds the rows of at most `max_values` combinations of the values of the index levels that are pivoted, so that
+    unstacking a data frame only creates the columns which fit in the column budget of a table instead of creating a
+    column for every value and discarding most of them afterwards.
+
+    :param data_frame:
+        The data frame to be pivoted.
+    :param levels:
+        A list of the names of the index levels which are pivoted. If the data frame has a single level index, it is
+        transposed instead and the rows are kept in order.
+    :param max_values:
+        The maximum number of combinations of pivoted values to keep.
+    :param metric_key:
+        The key of a metric column. If given, the combinations with the greatest total of this metric are kept,
+        otherwise the first combinations in the order that unstacking creates the columns.
+    :return:
+        None if the data frame has at most `max_values` combinations of pivoted values, otherwise a numpy bool array
+        which is True for the rows of the kept combinations.
+    """
+    index = data_frame.index
+
+    if isinstance(index, pd.MultiIndex):
+        keys = np.zeros(len(index), dtype=np.int64)
+        for level in levels:
+            position = index.names.index(level)
+            size = len(index.levels[position]) + 1
+            codes = np.asarray(index.labels[position], dtype=np.int64)
+            keys = keys * size + np.where(-1 == codes, size - 1, codes)
+    else:
+        keys = np.arange(len(index))
+
+    # Unstacking a single level orders the columns by the values of the level, with nulls last, whereas unstacking
+    # several levels orders the combinations of values by their first row
+    inverse, uniques = pd.factorize(keys, sort=1 == len(levels))
+    if len(uniques) <= max_values:
+        return None
+
+    if metric_key is None:
+        kept = np.arange(max_values)
+    else:
+        weights = np.nan_to_num(np.asarray(data_frame[metric_key], dtype=np.float64))
+        totals = np.bincount(inverse, weights=weights)
+        kept = np.argsort(-totals, kind='mergesort')[:max_values]
+
+    is_kept = np.zeros(len(uniques), dtype=bool)
+    is_kept[kept] = True
+    return is_kept[inverse]
+
+
+def unstack_rows(data_frame, levels, is_kept=None):
+    """
+    Unstacks index levels of a data frame to columns, with only the given rows of the pivoted values. The unstacked data
+    frame still has a row for every combination of the values of the other levels, including those which only have
+    values for the pivoted values that were removed, so the rows are the same as when unstacking all of the rows.
+
+    :param data_frame:
+        The data frame to unstack.
+    :param levels:
+        A list of the names of the index levels to unstack.
+    :param is_kept: (Optional)
+        A numpy bool array which is True for the rows to unstack, see `find_pivot_rows_to_keep`.
+    :return:
+        The unstacked data frame. The cells without a value are NaN.
+    """
+    if is_kept is None:
+        return data_frame.unstack(level=levels)
+
+    rows = _get_unstacked_rows(data_frame.index, levels)
+
+    limited_data_frame = data_frame[is_kept]
+    limited_data_frame.index = _remove_unused_levels(limited_data_frame.index)
+
+    return limited_data_frame \
+        .unstack(level=levels) \
+        .reindex(rows)
+
+
+def _get_unstacked_rows(index, levels):
+    # Unstacking orders the rows by the codes of the other levels, with nulls first
+    keys = np.zeros(len(index), dtype=np.int64)
+    for position, name in enumerate(index.names):
+        if name not in levels:
+            size = len(index.levels[position]) + 1
+            keys = keys * size + np.asarray(index.labels[position], dtype=np.int64) + 1
+
+    _, first_rows = np.unique(keys, return_index=True)
+    return index.droplevel(levels)[first_rows]
+
+
+def _remove_unused_levels(index):
+    # Unlike `MultiIndex.remove_unused_levels` in pandas 0.23, this keeps the levels in order, which is the order that
+    # unstacking creates the columns in
+    levels, labels = [], []
+    for level, codes in zip(index.levels, index.labels):
+        codes = np.asarray(codes)
+        used = np.unique(codes[-1 != codes])
+        levels.append(level.take(used))
+        labels.append(np.where(-1 == codes, -1, np.searchsorted(used, codes)))
+
+    return pd.MultiIndex(levels=levels, labels=labels, names=index.names, verify_integrity=False)
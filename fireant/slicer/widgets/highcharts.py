@@ -1,5 +1,6 @@
 import itertools
 
+import numpy as np
 import pandas as pd
 from datetime import timedelta
 
@@ -13,9 +14,15 @@ from .chart_base import (
     ChartWidget,
     ContinuousAxisSeries,
 )
+from .context import RenderContext
 from .helpers import (
     dimensional_metric_label,
-    extract_display_values,
+    lttb,
+)
+from ..intervals import (
+    daily,
+    hourly,
+    weekly,
 )
 from ..references import (
     reference_key,
@@ -61,22 +68,32 @@ MARKER_SYMBOLS = (
 SERIES_NEEDING_MARKER = (ChartWidget.LineSeries, ChartWidget.AreaSeries)
 TS_UPPER_BOUND = pd.Timestamp.max - timedelta(seconds=1)
 
+# The length in milliseconds of the date/time intervals which always have the same length. Series with these intervals
+# are rendered with a start and an interval instead of a timestamp for each point. Other intervals, such as months,
+# vary in length.
+POINT_INTERVALS = {
+    hourly: 60 * 60 * 1000,
+    daily: 24 * 60 * 60 * 1000,
+    weekly: 7 * 24 * 60 * 60 * 1000,
+}
+
 
 class HighCharts(ChartWidget, TransformableWidget):
     # Pagination should be applied to groups of the 0th index level (the x-axis) in order to paginate series
     group_pagination = True
 
-    def __init__(self, title=None, colors=None, x_axis_visible=True, tooltip_visible=True):
+    def __init__(self, title=None, colors=None, x_axis_visible=True, tooltip_visible=True, max_points=None):
         super(HighCharts, self).__init__()
         self.title = title
         self.colors = colors or DEFAULT_COLORS
         self.x_axis_visible = x_axis_visible
         self.tooltip_visible = tooltip_visible
+        self.max_points = max_points
 
     def __repr__(self):
         return ".".join(["HighCharts()"] + [repr(axis) for axis in self.items])
 
-    def transform(self, data_frame, slicer, dimensions, references):
+    def transform(self, data_frame, slicer, dimensions, references, context=None):
         """
         - Main entry point -
 
@@ -92,24 +109,45 @@ class HighCharts(ChartWidget, TransformableWidget):
             A list of dimensions that are being rendered.
         :param references:
             A list of references that are being rendered.
+        :param context:
+            A `RenderContext` shared by the widgets in the query.
         :return:
             A dict meant to be dumped as JSON.
         """
+        context = context or RenderContext(data_frame, dimensions)
         colors = itertools.cycle(self.colors)
 
-        dimension_display_values = extract_display_values(dimensions, data_frame)
+        dimension_display_values = context.display_values
         render_series_label = dimensional_metric_label(dimensions, dimension_display_values)
         is_timeseries = dimensions and isinstance(dimensions[0], DatetimeDimension)
 
         # Timestamp.max is used as a marker for rolled up dimensions (totals). Filter out the totals value for the
         # dimension used for the x-axis
-        if is_timeseries and len(data_frame) > 0:
-            data_frame = self._remove_date_totals(data_frame)
+        rows = self._date_totals_filter(data_frame) \
+            if is_timeseries and len(data_frame) > 0 \
+            else None
+        if rows is not None:
+            data_frame = data_frame[rows]
+
+        # The values of each metric are converted once for the whole result set and shared with the other widgets
+        metric_values = {}
+
+        def get_metric_values(metric_key):
+            if metric_key not in metric_values:
+                values = context.metric_values(metric_key)
+                metric_values[metric_key] = values[rows] if rows is not None else values
+            return metric_values[metric_key]
 
         # Group the results by index levels after the 0th, one for each series
         # This will result in a series for every combination of dimension values and each series will contain a data set
         # across the 0th dimension (used for the x-axis)
-        series_data_frames = self._group_by_series(data_frame)
+        series_positions = self._group_by_series(data_frame, is_timeseries)
+
+        # The x values are rendered once for the whole chart and shared by all of the series
+        x_values = self._render_x_values(data_frame, is_timeseries)
+        point_interval = POINT_INTERVALS.get(dimensions[0].interval) \
+            if is_timeseries \
+            else None
 
         total_num_series = sum([len(axis)
                                 for axis in self.items])
@@ -132,10 +170,14 @@ class HighCharts(ChartWidget, TransformableWidget):
                                           axis_idx,
                                           axis_color,
                                           colors,
-                                          series_data_frames,
+                                          data_frame,
+                                          series_positions,
+                                          x_values,
+                                          get_metric_values,
                                           render_series_label,
                                           references,
-                                          is_timeseries)
+                                          is_timeseries,
+                                          point_interval)
 
         x_axis = self._render_x_axis(data_frame, dimensions, dimension_display_values)
 
@@ -150,22 +192,19 @@ class HighCharts(ChartWidget, TransformableWidget):
         }
 
     @staticmethod
-    def _remove_date_totals(data_frame):
+    def _date_totals_filter(data_frame):
         """
-        This function filters the totals value for the date/time dimension from the result set. There is no way to
-        represent this value on a chart so it is just removed.
+        This function creates a filter for the totals value for the date/time dimension in the result set. There is no
+        way to represent this value on a chart so it is just removed.
 
         :param data_frame:
         :return:
+            A numpy bool array which is False for the rows to remove, or None if no rows need to be removed.
         """
-        if isinstance(data_frame.index, pd.MultiIndex):
-            index_slice = data_frame.index.get_level_values(0) < TS_UPPER_BOUND
-            return data_frame.loc[index_slice, :]
-
-        if isinstance(data_frame.index, pd.DatetimeIndex):
-            return data_frame[data_frame.index < TS_UPPER_BOUND]
+        if isinstance(data_frame.index, (pd.MultiIndex, pd.DatetimeIndex)):
+            return np.asarray(data_frame.index.get_level_values(0) < TS_UPPER_BOUND)
 
-        return data_frame
+        return None
 
     def _render_x_axis(self, data_frame, dimensions, dimension_display_values):
         """
@@ -193,8 +232,7 @@ class HighCharts(ChartWidget, TransformableWidget):
                                     (first_level.name, dimension_value),
                                     dimension_value)
                   for dimension_value in first_level]
-        categories = [formats.dimension_value(category)
-                      for category in categories]
+        categories = formats.dimension_value_series(pd.Index(categories, dtype=object)).tolist()
 
         return {
             "type": "category",
@@ -202,13 +240,6 @@ class HighCharts(ChartWidget, TransformableWidget):
             "visible": self.x_axis_visible,
         }
 
-    def _group_by_series(self, data_frame):
-        if len(data_frame) == 0 or not isinstance(data_frame.index, pd.MultiIndex):
-            return [([], data_frame)]
-
-        series = data_frame.index.names[1:]
-        return data_frame.groupby(level=series, sort=False)
-
     def _render_y_axis(self, axis_idx, color, references):
         """
         Renders the yAxis configuration.
@@ -241,8 +272,8 @@ class HighCharts(ChartWidget, TransformableWidget):
 
         return y_axes
 
-    def _render_series(self, axis, axis_idx, axis_color, colors, series_data_frames, render_series_label,
-                       references, is_timeseries=False):
+    def _render_series(self, axis, axis_idx, axis_color, colors, data_frame, series_positions, x_values,
+                       get_metric_values, render_series_label, references, is_timeseries=False, point_interval=None):
         """
         Renders the series configuration.
 
@@ -252,24 +283,30 @@ class HighCharts(ChartWidget, TransformableWidget):
         :param axis_idx:
         :param axis_color:
         :param colors:
-        :param series_data_frames:
+        :param data_frame:
+        :param series_positions:
+        :param x_values:
+        :param get_metric_values:
+            A function returning the converted values of a metric column for each row of the data frame.
         :param render_series_label:
         :param references:
         :param is_timeseries:
+        :param point_interval:
+            The length of the interval of the x-axis in milliseconds, if it is always the same.
         :return:
         """
+        numeric_metric_values = {}
+
         hc_series = []
         for series in axis:
             symbols = itertools.cycle(MARKER_SYMBOLS)
 
-            for (dimension_values, group_df), symbol in zip(series_data_frames, symbols):
-                if is_timeseries:
-                    group_df = group_df.sort_index(level=0)
-
+            for (dimension_values, positions), symbol in zip(series_positions, symbols):
                 dimension_values = utils.wrap_list(dimension_values)
 
                 if isinstance(series, self.PieSeries):
                     # pie charts suck
+                    group_df = data_frame.iloc[positions]
                     for reference in [None] + references:
                         hc_series.append(self._render_pie_series(series,
                                                                  reference,
@@ -281,6 +318,16 @@ class HighCharts(ChartWidget, TransformableWidget):
                 # With multiple axes, use the same color for the entire axis and only change the dash style
                 series_color = next(colors)
 
+                if self.max_points is not None and is_timeseries:
+                    # The points are selected using the values of the metric and the same points are used for each
+                    # reference so that they stay aligned
+                    metric_key = utils.format_metric_key(series.metric.key)
+                    if metric_key not in numeric_metric_values:
+                        numeric_metric_values[metric_key] = pd.to_numeric(data_frame[metric_key], errors='coerce') \
+                            .values.astype(np.float64)
+
+                    positions = self._downsample(positions, x_values, numeric_metric_values[metric_key])
+
                 for reference, dash_style in zip([None] + references, itertools.cycle(DASH_STYLES)):
                     metric_key = utils.format_metric_key(reference_key(series.metric, reference))
 
@@ -289,12 +336,6 @@ class HighCharts(ChartWidget, TransformableWidget):
 
                         "name": render_series_label(dimension_values, series.metric, reference),
 
-                        "data": (
-                            self._render_timeseries_data(group_df, metric_key)
-                            if is_timeseries
-                            else self._render_category_data(group_df, metric_key)
-                        ),
-
                         "tooltip": self._render_tooltip(series.metric, reference),
 
                         "yAxis": ("{}_{}".format(axis_idx, reference.key)
@@ -308,6 +349,12 @@ class HighCharts(ChartWidget, TransformableWidget):
                         "stacking": series.stacking,
                     })
 
+                    hc_series[-1].update(self._render_data(get_metric_values(metric_key),
+                                                           positions,
+                                                           x_values,
+                                                           is_timeseries,
+                                                           point_interval))
+
                     if isinstance(series, ContinuousAxisSeries):
                         # Set each series in a continuous series to a specific color
                         hc_series[-1]["color"] = series_color
@@ -320,11 +367,13 @@ class HighCharts(ChartWidget, TransformableWidget):
         name = reference_label(metric, reference)
         df_key = utils.format_metric_key(series.metric.key)
 
+        values = data_frame[df_key].sort_values(ascending=False)
+
         data = []
-        for dimension_values, y in data_frame[df_key].sort_values(ascending=False).iteritems():
+        for dimension_values, y in zip(values.index, formats.metric_value_series(values)):
             data.append({
                 "name": render_series_label(dimension_values) if dimension_values else name,
-                "y": formats.metric_value(y),
+                "y": y,
             })
 
         return {
@@ -341,35 +390,102 @@ class HighCharts(ChartWidget, TransformableWidget):
         }
 
     @staticmethod
-    def _render_category_data(group_df, metric_key):
-        categories = list(group_df.index.levels[0]) \
-            if isinstance(group_df.index, pd.MultiIndex) \
-            else list(group_df.index)
-
-        series = []
-        for labels, y in group_df[metric_key].iteritems():
-            label = labels[0] if isinstance(labels, tuple) else labels
-
-            series.append({
-                'x': categories.index(label),
-                'y': formats.metric_value(y)
-            })
+    def _render_x_values(data_frame, is_timeseries):
+        """
+        Renders the x values for the rows of the data frame. For time series, these are the milliseconds since the epoch
+        of the first index level. For category charts, these are the positions of the labels of the first index level in
+        the categories on the x-axis.
+
+        :param data_frame:
+        :param is_timeseries:
+        :return:
+            A tuple containing a numpy array with the x value of each row and a boolean mask of the rows with an x
+            value, which is None if every row has one.
+        """
+        first_level = data_frame.index.get_level_values(0)
+
+        if not is_timeseries:
+            if isinstance(data_frame.index, pd.MultiIndex):
+                # The categories are the values of the first index level
+                return data_frame.index.levels[0].get_indexer(first_level), None
+
+            # The categories are the index values, so the position is that of the first occurrence of each label
+            codes, _ = pd.factorize(first_level)
+            unique_codes, first_positions = np.unique(codes, return_index=True)
+            return first_positions[np.searchsorted(unique_codes, codes)], None
+
+        # Ignore totals on the x-axis.
+        mask = pd.notnull(first_level)
+
+        if pd.api.types.is_datetime64_any_dtype(first_level):
+            x_values = formats.dates_as_millis(first_level)
+        else:
+            x_values = np.zeros(len(first_level), dtype=np.int64)
+            x_values[mask] = [formats.date_as_millis(value) for value in first_level[mask]]
+
+        return x_values, None if mask.all() else mask
+
+    def _downsample(self, positions, x_values, metric_values):
+        """
+        Selects at most `max_points` rows of a time series with the Largest-Triangle-Three-Buckets algorithm.
+
+        :param positions:
+            A numpy array with the positions of the rows of the series in the data frame, sorted by the x values.
+        :param x_values:
+            A tuple containing the x values for every row of the data frame and the mask of the rows with an x value.
+        :param metric_values:
+            A numpy array containing the values of the metric as floats for every row of the data frame.
+        :return:
+            A numpy array with the positions of the selected rows in the data frame.
+        """
+        x_values, mask = x_values
+        if mask is not None:
+            positions = positions[mask[positions]]
 
-        return series
+        return positions[lttb(x_values[positions], metric_values[positions], self.max_points)]
 
     @staticmethod
-    def _render_timeseries_data(group_df, metric_key):
-        series = []
-        for dimension_values, y in group_df[metric_key].iteritems():
-            first_dimension_value = utils.wrap_list(dimension_values)[0]
-
-            if pd.isnull(first_dimension_value):
-                # Ignore totals on the x-axis.
-                continue
-
-            series.append((formats.date_as_millis(first_dimension_value),
-                           formats.metric_value(y)))
-        return series
+    def _render_data(metric_values, positions, x_values, is_timeseries, point_interval=None):
+        """
+        Renders the data points of a series by pairing the x values of the rows of the series with the values of a
+        metric.
+
+        If the points of a time series are all exactly one interval apart, only the y values are rendered along with the
+        start of the series and the length of the interval, which HighCharts uses to compute the x values. Series with
+        missing points fall back to pairs of x and y values.
+
+        :param metric_values:
+            A numpy array containing the converted values of the metric for every row of the data frame.
+        :param positions:
+            A numpy array with the positions of the rows of the series in the data frame.
+        :param x_values:
+            A tuple containing the x values for every row of the data frame and the mask of the rows with an x value.
+        :param is_timeseries:
+        :param point_interval:
+            The length of the interval of the x-axis in milliseconds, if it is always the same.
+        :return:
+            A dict with the data of the series. For time series this is a list of tuples of x and y values or a list of
+            y values with the keys pointStart and pointInterval, otherwise a list of dicts with the keys x and y.
+        """
+        x_values, mask = x_values
+        if mask is not None:
+            positions = positions[mask[positions]]
+
+        x_values = x_values[positions]
+        y_values = metric_values[positions].tolist()
+
+        if not is_timeseries:
+            return {"data": [{'x': x, 'y': y}
+                             for x, y in zip(x_values.tolist(), y_values)]}
+
+        if point_interval is not None and len(x_values) and (np.diff(x_values) == point_interval).all():
+            return {
+                "pointStart": int(x_values[0]),
+                "pointInterval": point_interval,
+                "data": y_values,
+            }
+
+        return {"data": list(zip(x_values.tolist(), y_values))}
 
     def _render_tooltip(self, metric, reference):
         return {
@@ -1,8 +1,13 @@
 import itertools
 
+import numpy as np
+import pandas as pd
+
 from fireant import utils
 from .base import TransformableWidget
 from .chart_base import ChartWidget
+from .context import RenderContext
+from .helpers import lttb
 from ..references import (
     reference_key,
     reference_label,
@@ -22,13 +27,17 @@ MAP_SERIES_TO_PLOT_FUNC = {
 
 
 class Matplotlib(ChartWidget, TransformableWidget):
-    def __init__(self, title=None):
+    # pyplot keeps the current figure in global state
+    thread_safe = False
+
+    def __init__(self, title=None, max_points=None):
         super(Matplotlib, self).__init__()
         self.title = title
+        self.max_points = max_points
 
-    def transform(self, data_frame, slicer, dimensions, references):
+    def transform(self, data_frame, slicer, dimensions, references, context=None):
         import matplotlib.pyplot as plt
-        data_frame = data_frame.copy()
+        context = context or RenderContext(data_frame, dimensions)
 
         n_axes = len(self.items)
         figsize = (14, 5 * n_axes)
@@ -45,13 +54,23 @@ class Matplotlib(ChartWidget, TransformableWidget):
             for series in axis:
                 series_color = next(colors)
 
+                # The rows are selected using the values of the metric and the same rows are used for each reference
+                # so that they stay aligned
+                positions = self._downsample(data_frame, utils.format_metric_key(series.metric.key), context) \
+                    if self.max_points is not None \
+                    else None
+
                 linestyles = itertools.cycle(['-', '--', '-.', ':'])
                 for reference in [None] + references:
                     metric = series.metric
                     f_metric_key = utils.format_metric_key(reference_key(metric, reference))
                     f_metric_label = reference_label(metric, reference)
 
-                    plot = self.get_plot_func_for_series_type(data_frame[f_metric_key], f_metric_label, series)
+                    pd_series = data_frame[f_metric_key] \
+                        if positions is None \
+                        else data_frame[f_metric_key].iloc[positions]
+
+                    plot = self.get_plot_func_for_series_type(pd_series, f_metric_label, series)
                     plot(ax=plt_axis,
                          title=axis.label,
                          color=series_color,
@@ -62,6 +81,45 @@ class Matplotlib(ChartWidget, TransformableWidget):
 
         return plt_axes
 
+    def _downsample(self, data_frame, metric_key, context):
+        """
+        Selects at most `max_points` rows for each series in the data frame with the Largest-Triangle-Three-Buckets
+        algorithm. The series are grouped by the index levels after the 0th, which must contain date/time or numeric
+        values. Totals rows and rows without a value for the 0th index level are always selected.
+
+        :param data_frame:
+        :param metric_key:
+            The key of the column of the metric used to select the rows.
+        :param context:
+            The `RenderContext` of the data frame.
+        :return:
+            A numpy array with the positions of the selected rows in the data frame, or None if the data frame cannot be
+            downsampled.
+        """
+        first_level = data_frame.index.get_level_values(0)
+
+        if pd.api.types.is_datetime64_any_dtype(first_level):
+            x_values = first_level.asi8
+
+        elif pd.api.types.is_numeric_dtype(first_level):
+            x_values = first_level.values
+
+        else:
+            return None
+
+        is_kept = np.asarray(pd.isnull(first_level)) | context.totals_mask(0)
+
+        metric_values = pd.to_numeric(data_frame[metric_key], errors='coerce').values.astype(np.float64)
+
+        is_selected = np.ones(len(data_frame), dtype=bool)
+        for _, positions in self._group_by_series(data_frame, is_timeseries=True):
+            positions = positions[~is_kept[positions]]
+
+            is_selected[positions] = False
+            is_selected[positions[lttb(x_values[positions], metric_values[positions], self.max_points)]] = True
+
+        return np.flatnonzero(is_selected)
+
     @staticmethod
     def get_plot_func_for_series_type(pd_series, label, chart_series):
         pd_series.name = label
@@ -1,6 +1,8 @@
 from typing import Iterable
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_categorical_dtype
 
 from fireant import (
     Metric,
@@ -13,6 +15,11 @@ from fireant.utils import (
 from .base import (
     TransformableWidget,
 )
+from .context import RenderContext
+from .helpers import (
+    find_pivot_rows_to_keep,
+    unstack_rows,
+)
 from ..references import (
     reference_key,
     reference_label,
@@ -25,7 +32,17 @@ HARD_MAX_COLUMNS = 24
 
 class Pandas(TransformableWidget):
     def __init__(self, metric: Metric, *metrics: Iterable[Metric],
-                 pivot=(), transpose=False, sort=None, ascending=None, max_columns=None):
+                 pivot=(), transpose=False, sort=None, ascending=None, max_columns=None, max_columns_by=None):
+        """
+        :param pivot:
+            A list of dimensions to pivot to columns.
+        :param max_columns: (Optional)
+            The maximum number of values of the pivoted dimensions to pivot to columns, at most `HARD_MAX_COLUMNS`. The
+            rows of the other values are removed before pivoting. By default, all of the values are pivoted.
+        :param max_columns_by:
+            A metric. If given, the pivoted values with the greatest total of this metric are kept, otherwise the first
+            values are kept.
+        """
         super(Pandas, self).__init__(metric, *metrics)
         self.pivot = pivot
         self.transpose = transpose
@@ -33,9 +50,10 @@ class Pandas(TransformableWidget):
         self.ascending = ascending
         self.max_columns = min(max_columns, HARD_MAX_COLUMNS) \
             if max_columns is not None \
-            else HARD_MAX_COLUMNS
+            else None
+        self.max_columns_by = max_columns_by
 
-    def transform(self, data_frame, slicer, dimensions, references):
+    def transform(self, data_frame, slicer, dimensions, references, context=None):
         """
         WRITEME
 
@@ -43,9 +61,44 @@ class Pandas(TransformableWidget):
         :param slicer:
         :param dimensions:
         :param references:
+        :param context:
+            A `RenderContext` shared by the widgets in the query.
+        :return:
+        """
+        context = context or RenderContext(data_frame, dimensions)
+        is_kept = self.find_pivot_rows_to_keep(data_frame)
+
+        # Only the columns used by this widget are copied, since the data frame is shared by the widgets
+        columns = [format_dimension_key(dimension.display_key)
+                   for dimension in dimensions
+                   if dimension.has_display_field] \
+                  + [format_metric_key(reference_key(item, reference))
+                     for reference in [None] + references
+                     for item in self.items]
+        result = self.transform_rows(data_frame.reindex(columns=columns), dimensions, references, context)
+
+        return self.pivot_data_frame(result, [d.label or d.key for d in self.pivot], self.transpose, is_kept)
+
+    def transform_rows(self, data_frame, dimensions, references, context=None):
+        """
+        Applies the formatting, display values and labels to the rows of a data frame. Unlike pivoting, transposing and
+        sorting, this works on each row independently so it can also be applied to chunks of a result set.
+
+        :param data_frame:
+            The data frame to transform. This data frame is modified.
+        :param dimensions:
+        :param references:
+        :param context:
+            A `RenderContext` with the same rows as the data frame, used to share the formatted metric columns with
+            other widgets. If None, the metric columns are formatted for this data frame.
         :return:
         """
-        result = data_frame.copy()
+        metric_display = context.metric_display \
+            if context is not None \
+            else lambda df_key, *args: formats.metric_display_series(data_frame[df_key], *args)
+
+        result = data_frame
+        is_multi_index = isinstance(result.index, pd.MultiIndex)
 
         for metric in self.items:
             if any([metric.precision is not None,
@@ -53,28 +106,34 @@ class Pandas(TransformableWidget):
                     metric.suffix is not None]):
                 df_key = format_metric_key(metric.key)
 
-                result[df_key] = result[df_key] \
-                    .apply(lambda x: formats.metric_display(x, metric.prefix, metric.suffix, metric.precision))
+                result[df_key] = metric_display(df_key,
+                                                metric.prefix,
+                                                metric.suffix,
+                                                metric.precision)
 
             for reference in references:
                 df_ref_key = format_metric_key(reference_key(metric, reference))
 
                 if reference.delta_percent:
-                    result[df_ref_key] = result[df_ref_key].apply(lambda x: formats.metric_display(
-                        x,
-                        reference_prefix(metric, reference),
-                        reference_suffix(metric, reference),
-                        metric.precision))
+                    result[df_ref_key] = metric_display(df_ref_key,
+                                                        reference_prefix(metric, reference),
+                                                        reference_suffix(metric, reference),
+                                                        metric.precision)
 
         for dimension in dimensions:
             if dimension.has_display_field:
-                result = result.set_index(format_dimension_key(dimension.display_key), append=True)
+                f_display_key = format_dimension_key(dimension.display_key)
+                if is_categorical_dtype(result[f_display_key].dtype):
+                    # The index encodes its levels already, so it uses the plain values instead of a categorical
+                    result[f_display_key] = np.asarray(result[f_display_key])
+
+                result = result.set_index(f_display_key, append=True)
                 result = result.reset_index(format_dimension_key(dimension.key), drop=True)
 
             if hasattr(dimension, 'display_values'):
                 self._replace_display_values_in_index(dimension, result)
 
-        if isinstance(data_frame.index, pd.MultiIndex):
+        if is_multi_index:
             index_levels = [dimension.display_key
                             if dimension.has_display_field
                             else dimension.key
@@ -88,17 +147,41 @@ class Pandas(TransformableWidget):
                          for item in self.items]]
 
         if dimensions:
-            result.index.names = [dimension.label or dimension.key
-                                  for dimension in dimensions]
+            # The index is replaced rather than renamed in place since it can be shared with the data frame of the query
+            result.index = result.index.set_names([dimension.label or dimension.key
+                                                   for dimension in dimensions])
 
         result.columns = pd.Index([reference_label(item, reference)
                                    for item in self.items
                                    for reference in [None] + references],
                                   name='Metrics')
 
-        return self.pivot_data_frame(result, [d.label or d.key for d in self.pivot], self.transpose)
+        return result
 
-    def pivot_data_frame(self, data_frame, pivot=(), transpose=False):
+    def find_pivot_rows_to_keep(self, data_frame):
+        """
+        Finds the rows of the values of the pivoted dimensions which fit in `max_columns`, so that pivoting does not
+        create more columns than are kept.
+
+        :param data_frame:
+            The result set data frame, indexed by the dimension keys.
+        :return:
+            None if all of the rows are kept, otherwise a numpy bool array which is True for the rows of the kept
+            values.
+        """
+        levels = [format_dimension_key(dimension.key)
+                  for dimension in self.pivot
+                  if format_dimension_key(dimension.key) in data_frame.index.names]
+        if not levels or self.max_columns is None:
+            return None
+
+        metric_key = format_metric_key(self.max_columns_by.key) \
+            if self.max_columns_by is not None \
+            else None
+
+        return find_pivot_rows_to_keep(data_frame, levels, self.max_columns, metric_key)
+
+    def pivot_data_frame(self, data_frame, pivot=(), transpose=False, is_kept=None):
         """
         Pivot and transpose the data frame. Dimensions including in the `pivot` arg will be unshifted to columns. If
         `transpose` is True the data frame will be transposed. If there is only index level in the data frame (ie. one
@@ -112,6 +195,8 @@ class Pandas(TransformableWidget):
             A list of index keys for `data_frame` of levels to shift
         :param transpose:
             A boolean true or false whether to transpose the data frame.
+        :param is_kept: (Optional)
+            A numpy bool array which is True for the rows of the pivoted values to keep, see `find_pivot_rows_to_keep`.
         :return:
             The shifted/transposed data frame
         """
@@ -123,7 +208,10 @@ class Pandas(TransformableWidget):
         should_transpose_instead_of_pivot = len(pivot) == len(data_frame.index.names)
 
         if pivot and not should_transpose_instead_of_pivot:
-            data_frame = data_frame.unstack(level=pivot)
+            data_frame = unstack_rows(data_frame, pivot, is_kept)
+
+        elif is_kept is not None:
+            data_frame = data_frame[is_kept]
 
         if transpose or should_transpose_instead_of_pivot:
             data_frame = data_frame.transpose()
@@ -181,9 +269,8 @@ class Pandas(TransformableWidget):
             level = result.index.names.index(df_key)
             values = [dimension.display_values.get(x, x)
                       for x in result.index.levels[level]]
-            result.index.set_levels(level=df_key,
-                                    levels=values,
-                                    inplace=True)
+            result.index = result.index.set_levels(level=df_key,
+                                                   levels=values)
             return result
 
         values = [dimension.display_values.get(x, x)
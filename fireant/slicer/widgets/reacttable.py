@@ -1,9 +1,13 @@
 import re
 from collections import OrderedDict
+from functools import partial
+from string import Formatter
 
 import numpy as np
 import pandas as pd
+from pandas.core.dtypes.cast import find_common_type
 
+from fireant import formats
 from fireant.formats import (
     INF_VALUE,
     NULL_VALUE,
@@ -17,6 +21,11 @@ from fireant.utils import (
     getdeepattr,
     setdeepattr,
 )
+from .context import RenderContext
+from .helpers import (
+    dictionary_encode,
+    map_unique,
+)
 from .pandas import Pandas
 from ..dimensions import (
     DatetimeDimension,
@@ -63,7 +72,7 @@ metrics_dimension_key = format_dimension_key(metrics.key)
 
 def map_index_level(index, level, func):
     # If the index is empty, do not do anything
-    if 0 == index.size:
+    if 0 == len(index):
         return index
 
     if isinstance(index, pd.MultiIndex):
@@ -121,27 +130,29 @@ class ReactTable(Pandas):
     """
 
     def __init__(self, metric, *metrics: Metric, pivot=(), transpose=False, sort=None, ascending=None,
-                 max_columns=None):
+                 max_columns=None, max_columns_by=None, columnar=False):
         super(ReactTable, self).__init__(metric, *metrics,
                                          pivot=pivot,
                                          transpose=transpose,
                                          sort=sort,
                                          ascending=ascending,
-                                         max_columns=max_columns)
+                                         max_columns=max_columns,
+                                         max_columns_by=max_columns_by)
+        self.columnar = columnar
 
     def __repr__(self):
         return '{}({})'.format(self.__class__.__name__,
                                ','.join(str(m) for m in self.items))
 
     @staticmethod
-    def map_display_values(df, dimensions):
+    def map_display_values(context, dimensions):
         """
         Creates a mapping for dimension values to their display values.
 
-        :param df:
-            The result data set that is being transformed.
+        :param context:
+            The `RenderContext` of the result data set that is being transformed.
         :param dimensions:
-            The list of dimensions included in the query that created the result data set df.
+            The list of dimensions included in the query that created the result data set.
         :return:
             A tree-structure dict with two levels of depth. The top level dict has keys for each dimension's display
             key. The lower level dict has keys for each raw dimension value and values which are the display value.
@@ -152,12 +163,7 @@ class ReactTable(Pandas):
             f_dimension_key = format_dimension_key(dimension.key)
 
             if dimension.has_display_field:
-                f_display_key = format_dimension_key(dimension.display_key)
-
-                dimension_display_values[f_dimension_key] = \
-                    df[f_display_key].groupby(f_dimension_key).first().to_dict()
-
-                del df[f_display_key]
+                dimension_display_values[f_dimension_key] = context.display_field_values(dimension).to_dict()
 
             if hasattr(dimension, 'display_values'):
                 dimension_display_values[f_dimension_key] = dimension.display_values
@@ -365,53 +371,133 @@ class ReactTable(Pandas):
         return _make_columns(column_frame)
 
     @classmethod
-    def transform_data_row_index(cls, index_values, dimension_display_values, dimension_hyperlink_templates):
-        # Add the index to the row
-        row = {}
-        for key, value in index_values.items():
+    def transform_index_columns(cls, data_frame, item_map, dimension_display_values, dimension_hyperlink_templates):
+        """
+        Builds the cells for each level of the index of the data frame, one index level at a time. The raw values and
+        display values are only determined once for each unique value in the index level.
+
+        :param data_frame:
+            The result set data frame
+        :param item_map:
+            A map to find metrics/operations based on their keys found in the data frame.
+        :param dimension_display_values:
+            A map for finding display values for dimensions based on their key and value.
+        :param dimension_hyperlink_templates:
+            A map for finding the hyperlink template for dimensions based on their key.
+        :return:
+            A list of tuples containing the key of the index level and a list with the cell for each row.
+        """
+        index = data_frame.index
+        index_names = list(index.names)
+
+        def get_cell_values(value, key):
+            # Get the value from the index. These can be metrics or dimensions so it checks in the item map if there is
+            # a display value for the value
+            label = value \
+                if value not in item_map \
+                else getattr(item_map[value], 'label', item_map[value].key)
+
+            # Try to find a display value for the item. If this is a metric the raw value is replaced with the display
+            # value because there is no raw value for a metric label
+            return label, metric_value(label), getdeepattr(dimension_display_values, (key, label))
+
+        levels = [index.get_level_values(i) if isinstance(index, pd.MultiIndex) else index
+                  for i in range(len(index_names))]
+        levels_cell_values = [map_unique(level, partial(get_cell_values, key=key))
+                              for key, level in zip(index_names, levels)]
+        labels = [[label for label, _, _ in cell_values]
+                  for cell_values in levels_cell_values]
+
+        columns = []
+        for key, cell_values in zip(index_names, levels_cell_values):
             if key is None:
                 continue
 
-            data = {RAW_VALUE: metric_value(value)}
+            hyperlinks = cls._render_hyperlinks(dimension_hyperlink_templates[key], index_names, labels) \
+                if key in dimension_hyperlink_templates \
+                else None
 
-            # Try to find a display value for the item. If this is a metric the raw value is replaced with the
-            # display value because there is no raw value for a metric label
-            display = getdeepattr(dimension_display_values, (key, value))
-            if display is not None:
-                data['display'] = display
+            cells = []
+            for i, (_, raw, display) in enumerate(cell_values):
+                cell = {RAW_VALUE: raw}
+                if display is not None:
+                    cell['display'] = display
+                if hyperlinks is not None:
+                    cell['hyperlink'] = hyperlinks[i]
+                cells.append(cell)
 
-            # If the dimension has a hyperlink template, then apply the template by formatting it with the dimension
-            # values for this row. The values contained in `index_values` will always contain all of the required values
-            # at this point, otherwise the hyperlink template will not be included.
-            if key in dimension_hyperlink_templates:
-                data['hyperlink'] = dimension_hyperlink_templates[key].format(**index_values)
+            columns.append((key, cells))
 
-            row[key] = data
+        return columns
 
-        return row
+    @staticmethod
+    def _render_hyperlinks(hyperlink_template, index_names, labels):
+        """
+        Applies a hyperlink template by formatting it with the dimension values for each row. The template is only
+        formatted once for each combination of values of the dimensions used in the template. The index values will
+        always contain all of the required values at this point, otherwise the hyperlink template will not be included.
+        """
+        fields = {re.split(r'[.\[]', field_name)[0]
+                  for _, field_name, _, _ in Formatter().parse(hyperlink_template)
+                  if field_name}
+        field_labels = [level_labels
+                        for key, level_labels in zip(index_names, labels)
+                        if key in fields]
+
+        hyperlinks, rendered = [], {}
+        for i, row_labels in enumerate(zip(*labels)):
+            cache_key = tuple(level_labels[i] for level_labels in field_labels)
+            if cache_key not in rendered:
+                rendered[cache_key] = hyperlink_template.format(**OrderedDict(zip(index_names, row_labels)))
+            hyperlinks.append(rendered[cache_key])
+
+        return hyperlinks
 
     @classmethod
-    def transform_data_row_values(cls, series, item_map):
-        # Add the values to the row
-        row = {}
-        for key, value in series.iteritems():
+    def transform_value_columns(cls, data_frame, item_map):
+        """
+        Builds the cells for each column of the data frame, one column at a time. The display values of numeric columns
+        are formatted for the whole column at once.
+
+        :param data_frame:
+            The result set data frame
+        :param item_map:
+            A map to find metrics/operations based on their keys found in the data frame.
+        :return:
+            A list of tuples containing the path of keys for the column in the row dicts, a list with the raw value for
+            each row and a list with the display value for each row.
+        """
+        # The values of all columns are cast to a common type, the same as when iterating over the rows of the data
+        # frame
+        common_dtype = find_common_type(list(data_frame.dtypes)) \
+            if len(data_frame.columns) \
+            else None
+
+        columns = []
+        for i, key in enumerate(data_frame.columns):
+            series = data_frame.iloc[:, i]
+            if series.dtype != common_dtype:
+                series = series.astype(common_dtype)
+
             key = wrap_list(key)
-            value = metric_value(value)
-            data = {RAW_VALUE: metric_value(value)}
 
-            # Try to find a display value for the item
             item = item_map.get(key[0])
-            display = metric_display(value,
-                                     getattr(item, 'prefix', None),
-                                     getattr(item, 'suffix', None),
-                                     getattr(item, 'precision', None))
+            prefix, suffix, precision = getattr(item, 'prefix', None), \
+                                        getattr(item, 'suffix', None), \
+                                        getattr(item, 'precision', None)
 
-            if display is not None:
-                data['display'] = display
+            if series.dtype.kind in 'iu' or ('f' == series.dtype.kind and np.isfinite(series.values).all()):
+                raw_values = series.tolist()
+                display_values = formats.metric_display_series(series, prefix, suffix, precision).tolist()
 
-            setdeepattr(row, key, data)
+            else:
+                # The display values of other types need to be formatted value by value
+                raw_values = formats.metric_value_series(series).tolist()
+                display_values = [metric_display(value, prefix, suffix, precision) for value in raw_values]
 
-        return row
+            columns.append((key, raw_values, display_values))
+
+        return columns
 
     @classmethod
     def transform_data(cls, data_frame, item_map, dimension_display_values, dimension_hyperlink_templates):
@@ -419,6 +505,8 @@ class ReactTable(Pandas):
         Builds a list of dicts containing the data for ReactTable. This aligns with the accessors set by
         #transform_dimension_column_headers and #transform_metric_column_headers
 
+        The cells are built column by column and then assembled into rows in one final pass.
+
         :param data_frame:
             The result set data frame
         :param item_map:
@@ -427,35 +515,73 @@ class ReactTable(Pandas):
             A map for finding display values for dimensions based on their key and value.
         :param dimension_hyperlink_templates:
         """
-        index_names = data_frame.index.names
-
-        rows = []
-
-        for index, series in data_frame.iterrows():
-            if not isinstance(index, tuple):
-                index = (index,)
-
-            # Get a list of values from the index. These can be metrics or dimensions so it checks in the item map if
-            # there is a display value for the value
-            index = [item
-                     if item not in item_map
-                     else getattr(item_map[item], 'label', item_map[item].key)
-                     for item in index]
-            index_values = OrderedDict(zip(index_names, index))
+        index_columns = cls.transform_index_columns(data_frame,
+                                                    item_map,
+                                                    dimension_display_values,
+                                                    dimension_hyperlink_templates)
+        value_columns = cls.transform_value_columns(data_frame, item_map)
+
+        index_keys = [key for key, _ in index_columns]
+        rows = [dict(zip(index_keys, cells))
+                for cells in zip(*[cells for _, cells in index_columns])] \
+            if index_columns \
+            else [{} for _ in range(len(data_frame))]
+
+        value_paths = [path for path, _, _ in value_columns]
+        value_cells = zip(*[[{RAW_VALUE: raw, 'display': display}
+                             for raw, display in zip(raw_values, display_values)]
+                            for _, raw_values, display_values in value_columns])
+
+        if all(1 == len(path) for path in value_paths):
+            value_keys = [path[0] for path in value_paths]
+            for row, cells in zip(rows, value_cells):
+                row.update(zip(value_keys, cells))
+
+        else:
+            for row, cells in zip(rows, value_cells):
+                values = {}
+                for path, cell in zip(value_paths, cells):
+                    setdeepattr(values, path, cell)
+                row.update(values)
 
-            index_cols = cls.transform_data_row_index(index_values,
-                                                      dimension_display_values,
-                                                      dimension_hyperlink_templates)
-            value_cols = cls.transform_data_row_values(series, item_map)
+        return rows
 
-            row = {}
-            row.update(index_cols)
-            row.update(value_cols)
-            rows.append(row)
+    @classmethod
+    def transform_columnar_data(cls, data_frame, item_map, dimension_display_values, dimension_hyperlink_templates):
+        """
+        Builds a dict containing the data for ReactTable with one entry per column instead of one dict per row. The keys
+        are the accessors set by #transform_dimension_column_headers and #transform_metric_column_headers.
 
-        return rows
+        The cells of dimension columns are dictionary-encoded, so each distinct cell is only included once in `labels`
+        and `codes` contains the position of the cell for each row. Metric columns contain a list of the `raw` values
+        and a list of the `display` values.
 
-    def transform(self, data_frame, slicer, dimensions, references):
+        :param data_frame:
+            The result set data frame
+        :param item_map:
+            A map to find metrics/operations based on their keys found in the data frame.
+        :param dimension_display_values:
+            A map for finding display values for dimensions based on their key and value.
+        :param dimension_hyperlink_templates:
+            A map for finding the hyperlink template for dimensions based on their key.
+        """
+        index_columns = cls.transform_index_columns(data_frame,
+                                                    item_map,
+                                                    dimension_display_values,
+                                                    dimension_hyperlink_templates)
+        value_columns = cls.transform_value_columns(data_frame, item_map)
+
+        data = OrderedDict((key, dictionary_encode(cells))
+                           for key, cells in index_columns)
+        for path, raw_values, display_values in value_columns:
+            data['.'.join(map(str, path))] = {
+                RAW_VALUE: raw_values,
+                'display': display_values,
+            }
+
+        return data
+
+    def transform(self, data_frame, slicer, dimensions, references, context=None):
         """
         Transforms a data frame into a format for ReactTable. This is an object containing attributes `columns` and
         `data` which align with the props in ReactTable with the same name.
@@ -468,13 +594,13 @@ class ReactTable(Pandas):
             A list of dimensions that were selected in the data query
         :param references:
             A list of references that were selected in the data query
+        :param context:
+            A `RenderContext` shared by the widgets in the query.
         :return:
             An dict containing attributes `columns` and `data` which align with the props in ReactTable with the same
-            names.
+            names. If the widget is columnar, `data` contains the columns of the table instead of a list of rows.
         """
-        df_dimension_columns = [format_dimension_key(d.display_key)
-                                for d in dimensions
-                                if d.has_display_field]
+        context = context or RenderContext(data_frame, dimensions)
         item_map = OrderedDict([(format_metric_key(reference_key(i, reference)), ReferenceItem(i, reference))
                                 for i in self.items
                                 for reference in [None] + references])
@@ -485,14 +611,16 @@ class ReactTable(Pandas):
         item_map[MAX_STRING] = TotalsItem
         item_map[TOTALS_LABEL] = TotalsItem
 
-        df = data_frame[df_dimension_columns + df_metric_columns].copy()
+        # Selecting the columns creates a new data frame, so the data frame shared by the widgets is not modified
+        df = data_frame[df_metric_columns]
+        is_kept = self.find_pivot_rows_to_keep(data_frame)
 
-        dimension_display_values = self.map_display_values(df, dimensions)
+        dimension_display_values = self.map_display_values(context, dimensions)
 
         self.format_data_frame(df, dimensions)
 
         dimension_keys = [format_dimension_key(dimension.key) for dimension in self.pivot]
-        df = self.pivot_data_frame(df, dimension_keys, self.transpose) \
+        df = self.pivot_data_frame(df, dimension_keys, self.transpose, is_kept) \
             .fillna(value=NULL_VALUE) \
             .replace([np.inf, -np.inf], INF_VALUE)
 
@@ -500,7 +628,10 @@ class ReactTable(Pandas):
 
         dimension_columns = self.transform_dimension_column_headers(df, dimensions)
         metric_columns = self.transform_metric_column_headers(df, item_map, dimension_display_values)
-        data = self.transform_data(df, item_map, dimension_display_values, dimension_hyperlink_templates)
+        transform_data = self.transform_columnar_data \
+            if self.columnar \
+            else self.transform_data
+        data = transform_data(df, item_map, dimension_display_values, dimension_hyperlink_templates)
 
         return {
             'columns': dimension_columns + metric_columns,
@@ -0,0 +1,275 @@
+import copy
+from datetime import date
+from unittest import TestCase
+from unittest.mock import (
+    Mock,
+    patch,
+)
+
+import numpy as np
+import pandas as pd
+import pandas.testing
+
+import fireant as f
+from fireant.database import CubeDatabase
+from fireant.database.cube import (
+    CubeException,
+    CubeTable,
+)
+from pypika import (
+    Table,
+    functions as fn,
+)
+
+politicians_table = Table('politician_daily', schema='politics')
+
+rows = pd.DataFrame({
+    'timestamp': pd.to_datetime(['2016-01-01', '2016-01-15', '2016-02-03', '2017-01-04', '2017-02-05', '2017-02-06']),
+    'political_party': ['d', 'r', 'd', 'r', 'd', None],
+    'candidate_name': ['Hillary Clinton', 'Donald Trump', 'Hillary Clinton', 'Donald Trump', 'Hillary Clinton',
+                       'Gary Johnson'],
+    'votes': [1., 2., 3., 4., 5., 6.],
+}, columns=['timestamp', 'political_party', 'candidate_name', 'votes'])
+
+
+def make_slicer(database):
+    return f.Slicer(
+        politicians_table,
+        database,
+        dimensions=[
+            f.DatetimeDimension('timestamp', definition=politicians_table.timestamp),
+            f.CategoricalDimension('political_party',
+                                   definition=politicians_table.political_party,
+                                   display_values={'d': 'Democrat', 'r': 'Republican'}),
+            f.UniqueDimension('candidate', definition=politicians_table.candidate_name),
+        ],
+        metrics=[
+            f.Metric('votes', definition=fn.Sum(politicians_table.votes)),
+            f.Metric('count', definition=fn.Count('*')),
+            f.Metric('max_votes', definition=fn.Max(politicians_table.votes)),
+        ],
+    )
+
+
+class CubeDatabaseQueryTests(TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        self.database = CubeDatabase()
+        self.database.load(politicians_table, rows)
+        self.slicer = make_slicer(self.database)
+
+    def fetch(self, *metrics, dimensions=(), filters=()):
+        query = self.slicer.data.widget(f.Pandas(*metrics))
+        for dimension in dimensions:
+            query = query.dimension(dimension)
+        for filter_ in filters:
+            query = query.filter(filter_)
+        return query.fetch()[0]
+
+    def test_group_by_truncated_dates(self):
+        result = self.fetch(self.slicer.metrics.votes, self.slicer.metrics.count, self.slicer.metrics.max_votes,
+                            dimensions=[self.slicer.dimensions.timestamp(f.monthly)])
+
+        self.assertListEqual([pd.Timestamp('2016-01-01'), pd.Timestamp('2016-02-01'),
+                              pd.Timestamp('2017-01-01'), pd.Timestamp('2017-02-01')], list(result.index))
+        self.assertListEqual([3., 3., 4., 11.], list(result['votes']))
+        self.assertListEqual([2., 1., 1., 2.], list(result['count']))
+        self.assertListEqual([2., 3., 4., 6.], list(result['max_votes']))
+
+    def test_weeks_start_on_monday(self):
+        result = self.fetch(self.slicer.metrics.votes, dimensions=[self.slicer.dimensions.timestamp(f.weekly)])
+
+        self.assertEqual(pd.Timestamp('2015-12-28'), result.index[0])
+
+    def test_isin_and_range_filters(self):
+        result = self.fetch(self.slicer.metrics.votes,
+                            dimensions=[self.slicer.dimensions.candidate],
+                            filters=[self.slicer.dimensions.political_party.isin(['d', 'r']),
+                                     self.slicer.dimensions.timestamp.between(date(2016, 1, 1), date(2016, 12, 31))])
+
+        self.assertDictEqual({'Donald Trump': 2., 'Hillary Clinton': 4.}, result['votes'].to_dict())
+
+    def test_notin_filter_excludes_nulls(self):
+        result = self.fetch(self.slicer.metrics.votes,
+                            dimensions=[self.slicer.dimensions.candidate],
+                            filters=[self.slicer.dimensions.political_party.notin(['d'])])
+
+        self.assertDictEqual({'Donald Trump': 6.}, result['votes'].to_dict())
+
+    def test_pattern_filters_exclude_nulls(self):
+        result = self.fetch(self.slicer.metrics.votes,
+                            filters=[self.slicer.dimensions.political_party.like('D%')])
+        self.assertListEqual([9.], list(result['votes']))
+
+        result = self.fetch(self.slicer.metrics.votes,
+                            filters=[self.slicer.dimensions.political_party.not_like('D%')])
+        self.assertListEqual([6.], list(result['votes']))
+
+    def test_metric_filter(self):
+        result = self.fetch(self.slicer.metrics.votes,
+                            dimensions=[self.slicer.dimensions.candidate],
+                            filters=[self.slicer.metrics.votes > 6])
+
+        self.assertDictEqual({'Hillary Clinton': 9.}, result['votes'].to_dict())
+
+    def test_rollup(self):
+        result = self.fetch(self.slicer.metrics.votes,
+                            dimensions=[self.slicer.dimensions.political_party.rollup()])
+
+        self.assertEqual(21., result['votes'].iloc[-1])
+
+    def test_year_over_year_reference(self):
+        result = self.slicer.data \
+            .widget(f.Pandas(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.timestamp(f.monthly)) \
+            .reference(f.YearOverYear(self.slicer.dimensions.timestamp)) \
+            .fetch()[0]
+
+        self.assertEqual(3., result.loc[pd.Timestamp('2017-02-01'), 'votes (YoY)'])
+
+    def test_choices(self):
+        choices = self.slicer.dimensions.candidate.choices.fetch()
+
+        self.assertListEqual(['Donald Trump', 'Gary Johnson', 'Hillary Clinton'], list(choices))
+
+    def test_latest(self):
+        latest = self.slicer.latest(self.slicer.dimensions.timestamp).fetch()
+
+        self.assertEqual(pd.Timestamp('2017-02-06'), latest['timestamp'])
+
+    def test_fetch_page(self):
+        query = self.slicer.data \
+            .widget(f.Pandas(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.candidate)
+
+        first_page = query.fetch_page(2)
+        second_page = query.fetch_page(2, after=first_page.cursor)
+
+        self.assertListEqual(['Donald Trump', 'Gary Johnson'], list(first_page.data[0].index))
+        self.assertListEqual(['Hillary Clinton'], list(second_page.data[0].index))
+        self.assertIsNone(second_page.cursor)
+
+    def test_fetch_page_with_null_value_on_page_boundary(self):
+        query = self.slicer.data \
+            .widget(f.Pandas(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.political_party)
+
+        pages = [query.fetch_page(1)]
+        while pages[-1].cursor is not None:
+            pages.append(query.fetch_page(1, after=pages[-1].cursor))
+
+        # The NULL value is ordered first and every row is on exactly one page
+        self.assertListEqual([[6.], [9.], [6.]], [list(page.data[0]['votes']) for page in pages])
+
+    def test_iter_fetch_streams_chunks(self):
+        chunks = list(self.slicer.data
+                      .widget(f.Pandas(self.slicer.metrics.votes))
+                      .dimension(self.slicer.dimensions.timestamp(f.daily))
+                      .iter_fetch(chunksize=4))
+
+        self.assertListEqual([4, 2], [len(chunk) for chunk in chunks])
+
+    def test_queries_with_joins_are_not_supported(self):
+        query = self.database.query_cls.from_(politicians_table) \
+            .join(Table('district')).on(politicians_table.district_id == Table('district').id) \
+            .select('*')
+
+        with self.assertRaises(CubeException):
+            str(query)
+
+    def test_queries_of_tables_which_are_not_loaded_are_not_supported(self):
+        slicer = make_slicer(CubeDatabase())
+
+        with self.assertRaises(CubeException):
+            slicer.data.widget(f.Pandas(slicer.metrics.votes)).fetch()
+
+
+class CubeTableTests(TestCase):
+    def test_dimensions_are_dictionary_encoded_in_order(self):
+        table = CubeTable.from_data_frame(rows)
+
+        self.assertListEqual(['timestamp', 'political_party', 'candidate_name'], table.dimensions)
+
+        party = table.columns['political_party']
+        self.assertListEqual(['d', 'r'], list(party.dictionary))
+        self.assertListEqual([0, 1, 0, 1, 0, -1], list(party.codes))
+
+    def test_concat_merges_dictionaries(self):
+        table = CubeTable.from_data_frame(rows[:2]).concat(CubeTable.from_data_frame(rows[2:]))
+
+        candidate = table.columns['candidate_name']
+        self.assertListEqual(['Donald Trump', 'Gary Johnson', 'Hillary Clinton'], list(candidate.dictionary))
+        self.assertListEqual(list(rows['candidate_name']), list(candidate.decode()))
+
+
+class CubeDatabaseLoadTests(TestCase):
+    def test_load_from_database(self):
+        warehouse = Mock(query_cls=f.VerticaDatabase.query_cls)
+        warehouse.fetch_dataframe.return_value = rows
+
+        database = CubeDatabase()
+        database.load_from_database(politicians_table, warehouse)
+
+        warehouse.fetch_dataframe.assert_called_once_with('SELECT * FROM "politics"."politician_daily"')
+        self.assertEqual(6, database._tables['"politics"."politician_daily"'].length)
+
+    @patch('fireant.database.cube.pd.read_parquet')
+    def test_load_parquet(self, mock_read_parquet):
+        mock_read_parquet.return_value = rows
+
+        database = CubeDatabase()
+        database.load_parquet(politicians_table, 'politicians.parquet')
+
+        mock_read_parquet.assert_called_once_with('politicians.parquet')
+        self.assertListEqual([21.], list(make_slicer(database).data
+                                         .widget(f.Pandas(make_slicer(database).metrics.votes))
+                                         .fetch()[0]['votes']))
+
+    def test_refresh_replaces_rows_from_the_latest_value(self):
+        warehouse = Mock(query_cls=f.VerticaDatabase.query_cls)
+        warehouse.fetch_dataframe.return_value = pd.DataFrame({
+            'timestamp': pd.to_datetime(['2017-02-06', '2017-02-07']),
+            'political_party': ['i', 'd'],
+            'candidate_name': ['Gary Johnson', 'Hillary Clinton'],
+            'votes': [7., 8.],
+        }, columns=rows.columns)
+
+        database = CubeDatabase()
+        database.load(politicians_table, rows)
+        database.refresh(politicians_table, warehouse, 'timestamp')
+
+        warehouse.fetch_dataframe.assert_called_once_with('SELECT * FROM "politics"."politician_daily" '
+                                                          'WHERE "timestamp">=\'2017-02-06T00:00:00\'')
+
+        slicer = make_slicer(database)
+        result = slicer.data \
+            .widget(f.Pandas(slicer.metrics.votes)) \
+            .dimension(slicer.dimensions.political_party) \
+            .fetch()[0]
+
+        pandas.testing.assert_series_equal(pd.Series([17., 7., 6.],
+                                                     index=pd.Index(['Democrat', 'i', 'Republican'],
+                                                                    name='political_party'),
+                                                     name='votes'),
+                                           result['votes'],
+                                           check_names=False)
+
+    def test_refresh_loads_a_table_which_is_not_loaded_with_the_dimensions(self):
+        warehouse = Mock(query_cls=f.VerticaDatabase.query_cls)
+        warehouse.fetch_dataframe.return_value = rows
+
+        database = CubeDatabase()
+        database.refresh(politicians_table, warehouse, 'timestamp', dimensions=['political_party'])
+
+        warehouse.fetch_dataframe.assert_called_once_with('SELECT * FROM "politics"."politician_daily"')
+        self.assertListEqual(['political_party'], database._tables['"politics"."politician_daily"'].dimensions)
+
+    def test_copies_share_the_tables(self):
+        database = CubeDatabase()
+        database_copy = copy.deepcopy(database)
+        database.load(politicians_table, rows)
+
+        self.assertIs(database._tables, database_copy._tables)
+        self.assertTrue(np.array_equal(rows['votes'].values,
+                                       database_copy._tables['"politics"."politician_daily"'].columns['votes']))
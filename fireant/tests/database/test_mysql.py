@@ -44,6 +44,15 @@ class TestMySQLDatabase(TestCase):
             user='test_user', password='password', cursorclass=ANY
         )
 
+    def test_streaming_cursor_is_unbuffered_cursor(self):
+        mock_pymysql = Mock()
+        mock_connection = Mock()
+        with patch.dict('sys.modules', pymysql=mock_pymysql):
+            result = self.mysql.streaming_cursor(mock_connection)
+
+        self.assertEqual(mock_connection.cursor.return_value, result)
+        mock_connection.cursor.assert_called_once_with(mock_pymysql.cursors.SSCursor)
+
     def test_trunc_hour(self):
         result = self.mysql.trunc_date(Field('date'), hourly)
 
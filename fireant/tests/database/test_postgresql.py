@@ -41,6 +41,15 @@ class TestPostgreSQL(TestCase):
             user='test_user', password='password',
         )
 
+    def test_streaming_cursor_is_named_server_side_cursor(self):
+        mock_connection = Mock()
+
+        result = self.database.streaming_cursor(mock_connection)
+
+        self.assertEqual(mock_connection.cursor.return_value, result)
+        cursor_name = mock_connection.cursor.call_args[1]['name']
+        self.assertTrue(cursor_name.startswith('fireant_'))
+
     def test_trunc_hour(self):
         result = self.database.trunc_date(Field('date'), hourly)
 
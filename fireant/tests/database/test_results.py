@@ -0,0 +1,157 @@
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from fireant.database import Database
+from fireant.database.results import read_data_frame
+
+
+class SQLiteDatabase(Database):
+    def connect(self):
+        connection = sqlite3.connect(':memory:', detect_types=sqlite3.PARSE_DECLTYPES)
+        connection.executescript('CREATE TABLE politician ('
+                                 '"timestamp" TIMESTAMP, '
+                                 'political_party TEXT, '
+                                 'is_winner BOOLEAN, '
+                                 'votes INTEGER);'
+                                 'INSERT INTO politician VALUES '
+                                 '("1996-01-01 00:00:00", "d", 1, 1), '
+                                 '("1996-01-01 00:00:00", "r", 0, 2), '
+                                 '("2000-01-01 00:00:00", "d", 0, 3), '
+                                 '("2000-01-01 00:00:00", NULL, 1, NULL);')
+        return connection
+
+
+class ReadDataFrameTests(TestCase):
+    def setUp(self):
+        self.cursor = Mock()
+        self.cursor.description = [('$d$political_party',), ('$m$votes',)]
+
+    def test_columns_are_read_in_batches(self):
+        self.cursor.fetchmany.side_effect = [[('d', 1), ('r', 2)], [('i', 3)], []]
+
+        result = read_data_frame(self.cursor, batch_size=2)
+
+        self.cursor.fetchmany.assert_called_with(2)
+        assert_frame_equal(pd.DataFrame({'$d$political_party': ['d', 'r', 'i'], '$m$votes': [1, 2, 3]},
+                                        columns=['$d$political_party', '$m$votes']),
+                           result)
+
+    def test_columns_with_dtypes_are_typed(self):
+        self.cursor.fetchmany.side_effect = [[('d', 1), ('r', None)], []]
+
+        result = read_data_frame(self.cursor, dtypes={'$m$votes': np.float64})
+
+        self.assertEqual(np.float64, result['$m$votes'].dtype)
+        self.assertTrue(np.isnan(result['$m$votes'][1]))
+
+    def test_decimals_are_coerced_to_floats(self):
+        self.cursor.fetchmany.side_effect = [[('d', Decimal('1.5')), ('r', None)], []]
+
+        result = read_data_frame(self.cursor)
+
+        self.assertEqual(np.float64, result['$m$votes'].dtype)
+        self.assertEqual(1.5, result['$m$votes'][0])
+
+    def test_bool_column_with_nulls_is_inferred(self):
+        self.cursor.description = [('$d$winner',)]
+        self.cursor.fetchmany.side_effect = [[(True,), (None,)], []]
+
+        result = read_data_frame(self.cursor, dtypes={'$d$winner': np.dtype(bool)})
+
+        self.assertListEqual([True, None], list(result['$d$winner']))
+
+    def test_column_which_cannot_be_typed_is_inferred(self):
+        self.cursor.description = [('$m$votes',)]
+        self.cursor.fetchmany.side_effect = [[('abc',)], []]
+
+        result = read_data_frame(self.cursor, dtypes={'$m$votes': np.float64})
+
+        self.assertListEqual(['abc'], list(result['$m$votes']))
+
+    def test_numeric_columns_of_integers_are_read_as_integers(self):
+        self.cursor.fetchmany.side_effect = [[('d', 1), ('r', 2)], []]
+
+        result = read_data_frame(self.cursor, dtypes={'$m$votes': 'numeric'})
+
+        self.assertEqual(np.int64, result['$m$votes'].dtype)
+
+    def test_numeric_columns_with_nulls_or_decimals_are_read_as_floats(self):
+        self.cursor.fetchmany.side_effect = [[('d', 1), ('r', None)], [('i', Decimal('1.5'))], []]
+
+        result = read_data_frame(self.cursor, dtypes={'$m$votes': 'numeric'}, batch_size=2)
+
+        self.assertEqual(np.float64, result['$m$votes'].dtype)
+        self.assertListEqual([1., 1.5], list(result['$m$votes'].dropna()))
+
+    def test_numeric_columns_do_not_convert_strings(self):
+        self.cursor.fetchmany.side_effect = [[('d', '1.5')], []]
+
+        result = read_data_frame(self.cursor, dtypes={'$m$votes': 'numeric'})
+
+        self.assertListEqual(['1.5'], list(result['$m$votes']))
+
+    def test_categorical_columns_are_combined_across_batches(self):
+        self.cursor.fetchmany.side_effect = [[('d', 1), ('r', 2)], [(None, 3), ('d', 4)], []]
+
+        result = read_data_frame(self.cursor, dtypes={'$d$political_party': 'category'}, batch_size=2)
+
+        self.assertEqual('category', result['$d$political_party'].dtype)
+        self.assertListEqual(['d', 'r'], list(result['$d$political_party'].cat.categories))
+        self.assertListEqual(['d', 'r', 'd'], list(result['$d$political_party'].dropna()))
+        self.assertTrue(pd.isnull(result['$d$political_party'][2]))
+
+    def test_categorical_columns_with_batch_of_only_nulls(self):
+        self.cursor.fetchmany.side_effect = [[(1, 1)], [(None, 2)], []]
+
+        result = read_data_frame(self.cursor, dtypes={'$d$political_party': 'category'}, batch_size=1)
+
+        self.assertEqual('category', result['$d$political_party'].dtype)
+        self.assertEqual(1, result['$d$political_party'][0])
+        self.assertTrue(pd.isnull(result['$d$political_party'][1]))
+
+    def test_empty_result_set_has_columns_from_description(self):
+        self.cursor.fetchmany.side_effect = [[]]
+
+        result = read_data_frame(self.cursor, dtypes={'$m$votes': np.float64})
+
+        self.assertListEqual(['$d$political_party', '$m$votes'], list(result.columns))
+        self.assertEqual(0, len(result))
+        self.assertEqual(np.float64, result['$m$votes'].dtype)
+
+
+class DatabaseFetchDataFrameTests(TestCase):
+    query = 'SELECT ' \
+            '"timestamp" "$d$timestamp",' \
+            'is_winner "$d$winner",' \
+            'political_party "$d$political_party",' \
+            'votes "$m$votes" ' \
+            'FROM politician'
+
+    def test_result_matches_read_sql(self):
+        database = SQLiteDatabase()
+
+        result = database.fetch_dataframe(self.query)
+
+        with database.connect() as connection:
+            expected = pd.read_sql(self.query, connection, coerce_float=True, parse_dates=True)
+        assert_frame_equal(expected, result)
+
+    def test_result_with_dtypes(self):
+        result = SQLiteDatabase().fetch_dataframe(self.query, dtypes={'$d$timestamp': np.dtype('datetime64[ns]'),
+                                                                      '$d$winner': np.dtype(bool),
+                                                                      '$m$votes': np.dtype(np.float64)})
+
+        assert_frame_equal(pd.DataFrame({'$d$timestamp': [datetime(1996, 1, 1), datetime(1996, 1, 1),
+                                                          datetime(2000, 1, 1), datetime(2000, 1, 1)],
+                                         '$d$winner': [True, False, False, True],
+                                         '$d$political_party': ['d', 'r', 'd', None],
+                                         '$m$votes': [1., 2., 3., np.nan]},
+                                        columns=['$d$timestamp', '$d$winner', '$d$political_party', '$m$votes']),
+                           result)
@@ -0,0 +1,180 @@
+import copy
+from datetime import (
+    date,
+    datetime,
+)
+from unittest import TestCase
+
+import fireant as f
+from fireant.slicer.exceptions import SlicerException
+from pypika import (
+    Table,
+    functions as fn,
+)
+from ..mocks import (
+    politicians_table,
+    slicer,
+)
+
+daily_table = Table('politician_daily', schema='politics')
+monthly_party_table = Table('politician_monthly_party', schema='politics')
+
+
+# noinspection SqlDialectInspection,SqlNoDataSourceInspection
+class QueryBuilderAggregateTableTests(TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        self.slicer = copy.deepcopy(slicer)
+        self.slicer.metrics.votes.additive = True
+        self.slicer.metrics.wins.additive = True
+
+        dimensions, metrics = self.slicer.dimensions, self.slicer.metrics
+        self.slicer.aggregate_tables = [
+            f.AggregateTable(daily_table,
+                             [dimensions.timestamp(f.daily), dimensions.political_party, dimensions.candidate],
+                             [metrics.votes, metrics.wins],
+                             rows=100000),
+            f.AggregateTable(monthly_party_table,
+                             [dimensions.timestamp(f.monthly), dimensions.political_party],
+                             [metrics.votes],
+                             rows=1000),
+        ]
+
+    def test_query_is_sent_to_the_smallest_aggregate_table_which_can_answer_it(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.timestamp(f.quarterly)) \
+            .dimension(self.slicer.dimensions.political_party) \
+            .queries
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual('SELECT '
+                         'TRUNC("timestamp",\'Q\') "$d$timestamp",'
+                         '"political_party" "$d$political_party",'
+                         'SUM("votes") "$m$votes" '
+                         'FROM "politics"."politician_monthly_party" '
+                         'GROUP BY "$d$timestamp","$d$political_party" '
+                         'ORDER BY "$d$timestamp","$d$political_party"', str(queries[0]))
+
+    def test_finer_interval_is_sent_to_an_aggregate_table_with_that_interval(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.timestamp(f.weekly)) \
+            .queries
+
+        self.assertIn('FROM "politics"."politician_daily" ', str(queries[0]))
+
+    def test_filters_on_dimensions_of_an_aggregate_table(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(self.slicer.metrics.wins)) \
+            .dimension(self.slicer.dimensions.timestamp) \
+            .filter(self.slicer.dimensions.candidate.display.isin(['Bill Clinton'])) \
+            .filter(self.slicer.dimensions.timestamp.between(date(2018, 1, 1), date(2018, 6, 30))) \
+            .queries
+
+        self.assertIn('FROM "politics"."politician_daily" ', str(queries[0]))
+
+    def test_date_range_aligned_to_the_months_is_sent_to_the_monthly_aggregate_table(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.timestamp(f.monthly)) \
+            .filter(self.slicer.dimensions.timestamp.between(date(2018, 1, 1), date(2018, 6, 30))) \
+            .queries
+
+        self.assertIn('FROM "politics"."politician_monthly_party" ', str(queries[0]))
+
+    def test_date_range_within_the_months_is_sent_to_a_finer_aggregate_table(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.timestamp(f.monthly)) \
+            .filter(self.slicer.dimensions.timestamp.between(date(2018, 1, 15), date(2018, 6, 20))) \
+            .queries
+
+        self.assertIn('FROM "politics"."politician_daily" ', str(queries[0]))
+
+    def test_date_range_within_the_days_is_sent_to_the_table(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.timestamp(f.monthly)) \
+            .filter(self.slicer.dimensions.timestamp.between(datetime(2018, 1, 15, 12), date(2018, 6, 20))) \
+            .queries
+
+        self.assertIn('FROM "politics"."politician" ', str(queries[0]))
+
+    def test_metric_which_is_not_in_an_aggregate_table_is_sent_to_the_table(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(f.Metric('max_votes', definition=fn.Max(politicians_table.votes)))) \
+            .dimension(self.slicer.dimensions.political_party) \
+            .queries
+
+        self.assertIn('FROM "politics"."politician" ', str(queries[0]))
+
+    def test_metric_with_the_definition_of_an_aggregate_table_metric_is_sent_to_the_table(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(f.Metric('total_votes', definition=fn.Sum(politicians_table.votes)))) \
+            .dimension(self.slicer.dimensions.political_party) \
+            .queries
+
+        self.assertIn('FROM "politics"."politician" ', str(queries[0]))
+
+    def test_dimension_which_is_not_in_an_aggregate_table_is_sent_to_the_table(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.election) \
+            .queries
+
+        self.assertIn('FROM "politics"."politician" ', str(queries[0]))
+
+    def test_finer_interval_than_the_aggregate_tables_is_sent_to_the_table(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.timestamp(f.hourly)) \
+            .queries
+
+        self.assertIn('FROM "politics"."politician" ', str(queries[0]))
+
+    def test_filter_on_a_dimension_which_is_not_in_an_aggregate_table_is_sent_to_the_table(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.political_party) \
+            .filter(self.slicer.dimensions.winner.is_(True)) \
+            .queries
+
+        self.assertIn('FROM "politics"."politician" ', str(queries[0]))
+
+    def test_query_with_joins_is_sent_to_the_table(self):
+        self.slicer.aggregate_tables[0].dimensions.append(self.slicer.dimensions.district)
+
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.district) \
+            .queries
+
+        self.assertIn('FROM "politics"."politician" OUTER JOIN "locations"."district" ', str(queries[0]))
+
+    def test_totals_query_is_sent_to_a_smaller_aggregate_table(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.timestamp(f.monthly)) \
+            .dimension(self.slicer.dimensions.candidate.rollup()) \
+            .queries
+
+        self.assertEqual(len(queries), 2)
+        self.assertIn('FROM "politics"."politician_daily" ', str(queries[0]))
+        self.assertIn('FROM "politics"."politician_monthly_party" ', str(queries[1]))
+
+    def test_reference_query_is_sent_to_an_aggregate_table(self):
+        queries = self.slicer.data \
+            .widget(f.DataTablesJS(self.slicer.metrics.votes)) \
+            .dimension(self.slicer.dimensions.timestamp(f.monthly)) \
+            .reference(f.YearOverYear(self.slicer.dimensions.timestamp)) \
+            .queries
+
+        self.assertEqual(len(queries), 2)
+        for query in queries:
+            self.assertIn('FROM "politics"."politician_monthly_party" ', str(query))
+
+    def test_metrics_of_an_aggregate_table_must_be_additive(self):
+        with self.assertRaises(SlicerException):
+            f.AggregateTable(daily_table, [self.slicer.dimensions.timestamp], [self.slicer.metrics.voters])
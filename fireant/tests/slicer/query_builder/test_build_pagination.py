@@ -9,7 +9,12 @@ import numpy as np
 import pandas as pd
 from pandas.testing import assert_frame_equal
 
-from fireant.slicer.queries.pagination import paginate
+from fireant.slicer.queries.pagination import (
+    decode_cursor,
+    encode_cursor,
+    keyset_paginate,
+    paginate,
+)
 from pypika import Order
 from ..mocks import (
     cat_uni_dim_df,
@@ -196,3 +201,28 @@ class GroupPaginationTests(TestCase):
 
         expected = cont_cat_dim_df.iloc[[0, 3, 5, 7, 9, 11]]
         assert_frame_equal(expected, paginated)
+
+
+class KeysetCursorTests(TestCase):
+    def test_encode_decode_cursor_round_trip(self):
+        cursor = encode_cursor([1, 'abc'])
+
+        self.assertIsInstance(cursor, str)
+        self.assertListEqual([1, 'abc'], decode_cursor(cursor))
+
+    def test_encode_cursor_with_numpy_and_timestamp_values(self):
+        cursor = encode_cursor([np.int64(5), pd.Timestamp('2018-01-01')])
+
+        self.assertListEqual([5, '2018-01-01 00:00:00'], decode_cursor(cursor))
+
+    def test_keyset_paginate_returns_cursor_for_last_row_when_more_rows(self):
+        data, cursor = keyset_paginate(cont_cat_dim_df, 5)
+
+        assert_frame_equal(cont_cat_dim_df[:5], data)
+        self.assertListEqual(list(map(str, cont_cat_dim_df.index[4])), decode_cursor(cursor))
+
+    def test_keyset_paginate_returns_no_cursor_on_last_page(self):
+        data, cursor = keyset_paginate(cont_cat_dim_df, len(cont_cat_dim_df))
+
+        assert_frame_equal(cont_cat_dim_df, data)
+        self.assertIsNone(cursor)
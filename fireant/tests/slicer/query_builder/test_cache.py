@@ -0,0 +1,188 @@
+import threading
+from unittest import TestCase
+from unittest.mock import (
+    Mock,
+    patch,
+)
+
+from fireant.slicer.queries.cache import QueryCache
+from pypika import Table
+
+
+@patch('fireant.slicer.queries.cache.time')
+class QueryCacheStaleWhileRevalidateTests(TestCase):
+    def setUp(self):
+        self.cache = QueryCache(ttl=60, hard_ttl=300)
+        self.release = threading.Event()
+        self.loaded = threading.Event()
+        self.values = iter(['old', 'new'])
+
+    def _load(self):
+        value = next(self.values)
+        if 'new' == value:
+            self.release.wait(5)
+        self.loaded.set()
+        return value
+
+    def _wait_for_refresh(self):
+        self.release.set()
+        for thread in threading.enumerate():
+            if thread is not threading.current_thread() and thread.daemon:
+                thread.join(5)
+
+    def test_stale_value_is_returned_while_refreshing(self, mock_time):
+        mock_time.monotonic.return_value = 0
+        self.assertEqual('old', self.cache.get('key', self._load))
+
+        mock_time.monotonic.return_value = 100
+        self.assertEqual('old', self.cache.get('key', self._load))
+        self._wait_for_refresh()
+
+        self.assertEqual('new', self.cache.get('key', self._load))
+
+    def test_only_one_refresh_runs_for_a_key(self, mock_time):
+        load = Mock(side_effect=self._load)
+
+        mock_time.monotonic.return_value = 0
+        self.cache.get('key', load)
+
+        mock_time.monotonic.return_value = 100
+        for _ in range(5):
+            self.cache.get('key', load)
+        self._wait_for_refresh()
+
+        self.assertEqual(2, load.call_count)
+
+    def test_failed_refresh_keeps_the_stale_value(self, mock_time):
+        load = Mock(side_effect=['old', Exception('Connection lost')])
+
+        mock_time.monotonic.return_value = 0
+        self.cache.get('key', load)
+
+        mock_time.monotonic.return_value = 100
+        with patch('fireant.slicer.queries.cache.query_logger'):
+            self.cache.get('key', load)
+            self._wait_for_refresh()
+
+        self.assertEqual('old', self.cache.get('key', Mock()))
+
+    def test_refresh_started_before_invalidate_is_not_cached(self, mock_time):
+        mock_time.monotonic.return_value = 0
+        self.cache.get('key', self._load)
+
+        mock_time.monotonic.return_value = 100
+        self.cache.get('key', self._load)
+        self.cache.invalidate('key')
+        self._wait_for_refresh()
+
+        self.assertIsNone(self.cache.peek('key'))
+
+    def test_refresh_started_before_invalidate_table_is_not_cached(self, mock_time):
+        mock_time.monotonic.return_value = 0
+        self.cache.get('key', self._load, table='politician')
+
+        mock_time.monotonic.return_value = 100
+        self.cache.get('key', self._load, table='politician')
+        self.cache.invalidate_table('politician')
+        self._wait_for_refresh()
+
+        self.assertIsNone(self.cache.peek('key'))
+
+    def test_value_older_than_hard_ttl_is_loaded_before_returning(self, mock_time):
+        load = Mock(side_effect=['old', 'new'])
+
+        mock_time.monotonic.return_value = 0
+        self.cache.get('key', load)
+
+        mock_time.monotonic.return_value = 300
+        self.assertEqual('new', self.cache.get('key', load))
+
+
+class QueryCacheWatermarkTests(TestCase):
+    def test_value_is_reused_while_the_watermark_is_unchanged(self):
+        cache, load = QueryCache(ttl=None), Mock()
+
+        cache.get('key', load, watermark=1)
+        cache.get('key', load, watermark=1)
+
+        load.assert_called_once_with()
+
+    def test_value_is_loaded_again_when_the_watermark_moves(self):
+        cache, load = QueryCache(ttl=None), Mock(side_effect=['old', 'new'])
+
+        cache.get('key', load, watermark=1)
+
+        self.assertEqual('new', cache.get('key', load, watermark=2))
+
+    def test_invalidate_table_removes_only_the_values_of_the_table(self):
+        cache, load = QueryCache(ttl=None), Mock()
+
+        cache.get('politicians', load, table=Table('politician', schema='politics'))
+        cache.get('voters', load, table='voter')
+        cache.invalidate_table('politician')
+        cache.get('politicians', load, table='politician')
+        cache.get('voters', load, table='voter')
+
+        self.assertEqual(3, load.call_count)
+
+    def test_value_loaded_while_the_table_is_invalidated_is_returned_but_not_cached(self):
+        cache = QueryCache(ttl=None)
+
+        def load():
+            cache.invalidate_table('politician')
+            return 'old'
+
+        self.assertEqual('old', cache.get('key', load, table='politician'))
+        self.assertEqual('new', cache.get('key', Mock(return_value='new'), table='politician'))
+
+
+class QueryCacheMaxEntriesTests(TestCase):
+    def test_least_recently_used_values_are_removed(self):
+        cache = QueryCache(ttl=None, max_entries=2)
+
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.peek('a')
+        cache.put('c', 3)
+
+        self.assertListEqual(['a', 'c'], cache.keys())
+        self.assertIsNone(cache.peek('b'))
+
+    def test_values_are_not_limited_by_default(self):
+        cache = QueryCache(ttl=None)
+
+        for key in range(100):
+            cache.put(key, key)
+
+        self.assertEqual(100, len(cache.keys()))
+
+
+class QueryCacheGroupTests(TestCase):
+    def test_keys_of_a_group(self):
+        cache = QueryCache(ttl=None)
+
+        cache.put('a', 1, group='x')
+        cache.put('b', 2, group='y')
+        cache.put('c', 3, group='x')
+        cache.put('d', 4)
+
+        self.assertListEqual(['a', 'c'], cache.keys('x'))
+        self.assertListEqual(['a', 'b', 'c', 'd'], cache.keys())
+
+    def test_removed_values_are_removed_from_their_group(self):
+        cache = QueryCache(ttl=None, max_entries=2)
+
+        cache.put('a', 1, group='x', table='politician')
+        cache.put('b', 2, group='x')
+        cache.put('c', 3, group='x')
+        self.assertListEqual(['b', 'c'], cache.keys('x'))
+
+        cache.invalidate('b')
+        self.assertListEqual(['c'], cache.keys('x'))
+
+        cache.put('c', 3, group='y', table='politician')
+        self.assertListEqual([], cache.keys('x'))
+
+        cache.invalidate_table('politician')
+        self.assertListEqual([], cache.keys('y'))
+        self.assertDictEqual({}, cache._groups)
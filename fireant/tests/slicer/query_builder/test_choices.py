@@ -0,0 +1,106 @@
+from unittest import TestCase
+from unittest.mock import (
+    Mock,
+    patch,
+)
+
+import numpy as np
+import pandas as pd
+
+from fireant.slicer.queries.choices import (
+    ChoicesCache,
+    ChoicesIndex,
+    PrefixIndex,
+)
+from ..mocks import slicer
+
+
+class PrefixIndexTests(TestCase):
+    def setUp(self):
+        self.index = PrefixIndex(['Bill Clinton', 'Bob Dole', None, 'bob_dole', 'Hillary Clinton', '100%'])
+
+    def _matches(self, pattern):
+        return list(np.flatnonzero(self.index.match(pattern)))
+
+    def test_prefix_pattern_ignores_case(self):
+        self.assertListEqual([1, 3], self._matches('BOB%'))
+
+    def test_pattern_without_wildcards_matches_whole_value(self):
+        self.assertListEqual([1], self._matches('bob dole'))
+
+    def test_strings_are_not_padded_to_the_longest_value(self):
+        self.assertEqual(object, self.index.strings.dtype)
+        self.assertListEqual([4], self._matches('hillary%'))
+
+    def test_contains_pattern(self):
+        self.assertListEqual([0, 4], self._matches('%clinton'))
+
+    def test_single_character_wildcard(self):
+        self.assertListEqual([1, 3], self._matches('bob_dole'))
+
+    def test_escaped_wildcards_are_matched_literally(self):
+        self.assertListEqual([3], self._matches('bob\\_%'))
+        self.assertListEqual([5], self._matches('%\\%'))
+
+    def test_null_values_never_match(self):
+        self.assertListEqual([0, 1, 3, 4, 5], self._matches('%'))
+
+
+class ChoicesIndexTests(TestCase):
+    def setUp(self):
+        self.choices = pd.Series(['Bill Clinton', 'Bob Dole', np.nan],
+                                 index=pd.Index([1, 2, 3], name='$d$candidate'),
+                                 name='$d$candidate_display')
+        self.index = ChoicesIndex(slicer.dimensions.candidate, self.choices)
+
+    def test_supports_filters_on_the_dimension(self):
+        self.assertTrue(ChoicesIndex.supports(slicer.dimensions.candidate,
+                                              [slicer.dimensions.candidate.like('b%'),
+                                               slicer.dimensions.candidate.isin([1])]))
+
+    def test_does_not_support_filters_on_other_dimensions(self):
+        self.assertFalse(ChoicesIndex.supports(slicer.dimensions.candidate,
+                                               [slicer.dimensions.political_party.isin(['d'])]))
+
+    def test_not_like_excludes_null_display_values(self):
+        result = self.index.filter([slicer.dimensions.candidate.not_like('bill%')])
+
+        self.assertListEqual([2], list(result.index))
+
+    def test_like_with_several_patterns(self):
+        result = self.index.filter([slicer.dimensions.candidate.like('bill%', 'bob%')])
+
+        self.assertListEqual([1, 2], list(result.index))
+
+
+class ChoicesCacheTests(TestCase):
+    def test_choices_are_loaded_once(self):
+        cache, load = ChoicesCache(), Mock()
+
+        first, second = cache.get('candidate', load), cache.get('candidate', load)
+
+        load.assert_called_once_with()
+        self.assertIs(first, second)
+
+    @patch('fireant.slicer.queries.cache.time')
+    def test_choices_are_reloaded_after_ttl(self, mock_time):
+        cache, load = ChoicesCache(ttl=60), Mock()
+
+        mock_time.monotonic.return_value = 0
+        cache.get('candidate', load)
+        mock_time.monotonic.return_value = 59
+        cache.get('candidate', load)
+        self.assertEqual(1, load.call_count)
+
+        mock_time.monotonic.return_value = 60
+        cache.get('candidate', load)
+        self.assertEqual(2, load.call_count)
+
+    def test_invalidated_choices_are_reloaded(self):
+        cache, load = ChoicesCache(), Mock()
+
+        cache.get('candidate', load)
+        cache.invalidate('candidate')
+        cache.get('candidate', load)
+
+        self.assertEqual(2, load.call_count)
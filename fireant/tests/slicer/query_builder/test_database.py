@@ -6,12 +6,19 @@ from unittest.mock import (
     patch,
 )
 
+import numpy as np
 import pandas as pd
 
-from fireant.slicer.queries.execution import _do_fetch_data
+import fireant as f
+from fireant.slicer.queries.execution import (
+    _do_fetch_data,
+    _get_column_dtypes,
+    iter_fetch_data,
+)
 from fireant.tests.slicer.mocks import (
     cat_dim_df,
     cont_uni_dim_df,
+    slicer,
     uni_dim_df,
 )
 from fireant.utils import format_dimension_key as fd
@@ -35,13 +42,111 @@ class FetchDataTests(TestCase):
         self.mock_dimensions[1].is_rollup = True
 
     def test_do_fetch_data_calls_database_fetch_data(self, ):
-        with patch('fireant.slicer.queries.execution.pd.read_sql', return_value=self.mock_data_frame) as mock_read_sql:
-            _do_fetch_data(self.mock_query, self.mock_database)
+        _do_fetch_data(self.mock_query, self.mock_database)
+
+        self.mock_database.fetch_dataframe.assert_called_once_with(self.mock_query, dtypes={})
+
+    def test_do_fetch_data_passes_column_dtypes_to_database(self, ):
+        _do_fetch_data(self.mock_query, self.mock_database, (('$m$votes', 'numeric'),))
+
+        self.mock_database.fetch_dataframe.assert_called_once_with(self.mock_query,
+                                                                   dtypes={'$m$votes': 'numeric'})
+
+    def test_do_fetch_data_returns_data_frame_from_database(self, ):
+        result = _do_fetch_data(self.mock_query, self.mock_database)
+
+        self.assertIs(self.mock_database.fetch_dataframe.return_value, result)
+
+
+class GetColumnDtypesTests(TestCase):
+    def test_metrics_are_read_as_numbers(self):
+        query = slicer.data.widget(f.Pandas(slicer.metrics.votes, slicer.metrics.wins)).queries[0]
+
+        dtypes = _get_column_dtypes(query, [])
+
+        self.assertEqual((('$m$votes', 'numeric'),
+                          ('$m$wins', 'numeric')), dtypes)
+
+    def test_datetime_and_boolean_dimensions_are_typed(self):
+        dimensions = [slicer.dimensions.timestamp, slicer.dimensions.winner]
+        query = slicer.data \
+            .widget(f.Pandas(slicer.metrics.votes)) \
+            .dimension(*dimensions) \
+            .queries[0]
+
+        dtypes = _get_column_dtypes(query, dimensions)
+
+        self.assertEqual((('$d$timestamp', np.dtype('datetime64[ns]')),
+                          ('$d$winner', np.dtype(bool)),
+                          ('$m$votes', 'numeric')), dtypes)
+
+    def test_categorical_unique_and_display_columns_are_categorical(self):
+        dimensions = [slicer.dimensions.political_party, slicer.dimensions.candidate]
+        query = slicer.data \
+            .widget(f.Pandas(slicer.metrics.votes)) \
+            .dimension(*dimensions) \
+            .queries[0]
+
+        dtypes = _get_column_dtypes(query, dimensions)
+
+        self.assertEqual((('$d$political_party', 'category'),
+                          ('$d$candidate', 'category'),
+                          ('$d$candidate_display', 'category'),
+                          ('$m$votes', 'numeric')), dtypes)
+
+
+class IterFetchDataTests(TestCase):
+    def setUp(self):
+        self.mock_database = Mock()
+        self.mock_database.slow_query_log_min_seconds = 15
+
+        mock_connect = self.mock_database.connect.return_value = MagicMock()
+        self.mock_connection = mock_connect.__enter__.return_value
+        self.mock_cursor = self.mock_database.streaming_cursor.return_value
+        self.mock_cursor.description = [('$d$political_party',), ('$m$votes',)]
+        self.mock_cursor.fetchmany.side_effect = [[('d', 1), ('i', 2)], [('r', 3)], []]
+
+        self.dimensions = [Mock(key='political_party')]
+
+    def test_uses_streaming_cursor_of_database(self):
+        list(iter_fetch_data(self.mock_database, 'SELECT *', self.dimensions, 2))
+
+        self.mock_database.streaming_cursor.assert_called_once_with(self.mock_connection)
+        self.mock_cursor.execute.assert_called_once_with('SELECT *')
+        self.mock_cursor.close.assert_called_once_with()
+
+    def test_yields_chunks_of_chunksize_with_dimensions_as_index(self):
+        chunks = list(iter_fetch_data(self.mock_database, 'SELECT *', self.dimensions, 2))
+
+        self.assertEqual(2, len(chunks))
+        self.mock_cursor.fetchmany.assert_called_with(2)
+        pd.testing.assert_frame_equal(pd.DataFrame({'$m$votes': [1, 2]},
+                                                   index=pd.Index(['d', 'i'], name='$d$political_party')),
+                                      chunks[0])
+        pd.testing.assert_frame_equal(pd.DataFrame({'$m$votes': [3]},
+                                                   index=pd.Index(['r'], name='$d$political_party')),
+                                      chunks[1])
+
+    def test_does_not_query_until_iterated(self):
+        iter_fetch_data(self.mock_database, 'SELECT *', self.dimensions, 2)
+
+        self.mock_database.connect.assert_not_called()
+
+    @patch('fireant.slicer.queries.execution.query_logger')
+    def test_duration_is_logged_when_iteration_stops_early(self, mock_logger):
+        chunks = iter_fetch_data(self.mock_database, 'SELECT *', self.dimensions, 2)
+        next(chunks)
+        chunks.close()
+
+        mock_logger.info.assert_called_once()
+        self.mock_cursor.close.assert_called_once_with()
+
+    @patch('fireant.slicer.queries.execution.query_logger')
+    def test_duration_does_not_include_time_spent_by_the_consumer(self, mock_logger):
+        with patch.object(time, 'time', side_effect=[0., 1., 11., 12., 22., 23.]):
+            list(iter_fetch_data(self.mock_database, 'SELECT *', self.dimensions, 2))
 
-            mock_read_sql.assert_called_once_with(self.mock_query,
-                                                  self.mock_connection,
-                                                  coerce_float=True,
-                                                  parse_dates=True)
+        mock_logger.info.assert_called_once_with('[3.0 seconds]: SELECT *')
 
 
 @patch('fireant.slicer.queries.execution.pd.read_sql')
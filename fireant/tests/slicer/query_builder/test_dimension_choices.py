@@ -1,3 +1,4 @@
+import copy
 from unittest import TestCase
 from unittest.mock import (
     ANY,
@@ -5,6 +6,17 @@ from unittest.mock import (
     patch,
 )
 
+import numpy as np
+import pandas as pd
+
+import fireant as f
+from fireant.database import MySQLDatabase
+from fireant.slicer.queries.choices import ChoicesCache
+from fireant.slicer.queries.pagination import (
+    decode_cursor,
+    encode_cursor,
+)
+from pypika import Table
 from ..matchers import (
     DimensionMatcher,
     PypikaQueryMatcher,
@@ -93,3 +105,309 @@ class DimensionsChoicesFetchTests(TestCase):
                                                                     'GROUP BY "$d$candidate","$d$candidate_display" '
                                                                     'ORDER BY "$d$candidate_display"')],
                                                 DimensionMatcher(slicer.dimensions.candidate))
+
+
+# noinspection SqlDialectInspection,SqlNoDataSourceInspection
+@patch('fireant.slicer.queries.builder.fetch_data')
+class DimensionsChoicesFetchPageTests(TestCase):
+    def test_first_page_orders_by_dimension_and_limits_to_one_more_than_page(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$d$candidate_display': ['a', 'b']},
+                                                    index=pd.Index([1, 2], name='$d$candidate'))
+
+        slicer.dimensions.candidate \
+            .choices \
+            .fetch_page(2)
+
+        mock_fetch_data.assert_called_once_with(ANY,
+                                                [PypikaQueryMatcher('SELECT '
+                                                                    '"candidate_id" "$d$candidate",'
+                                                                    '"candidate_name" "$d$candidate_display" '
+                                                                    'FROM "politics"."politician" '
+                                                                    'GROUP BY "$d$candidate","$d$candidate_display" '
+                                                                    'ORDER BY '
+                                                                    'CASE WHEN "candidate_id" IS NULL '
+                                                                    'THEN 0 ELSE 1 END ASC,'
+                                                                    '"$d$candidate" ASC '
+                                                                    'LIMIT 3')],
+                                                DimensionMatcher(slicer.dimensions.candidate),
+                                                keep_order=True)
+
+    def test_page_after_cursor_filters_on_last_value(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$d$candidate_display': ['c']},
+                                                    index=pd.Index([3], name='$d$candidate'))
+
+        slicer.dimensions.candidate \
+            .choices \
+            .filter(slicer.dimensions.political_party.isin(['d'])) \
+            .fetch_page(2, after=encode_cursor([2]))
+
+        mock_fetch_data.assert_called_once_with(ANY,
+                                                [PypikaQueryMatcher('SELECT '
+                                                                    '"candidate_id" "$d$candidate",'
+                                                                    '"candidate_name" "$d$candidate_display" '
+                                                                    'FROM "politics"."politician" '
+                                                                    'WHERE "political_party" IN (\'d\') '
+                                                                    'AND "candidate_id">2 '
+                                                                    'GROUP BY "$d$candidate","$d$candidate_display" '
+                                                                    'ORDER BY '
+                                                                    'CASE WHEN "candidate_id" IS NULL '
+                                                                    'THEN 0 ELSE 1 END ASC,'
+                                                                    '"$d$candidate" ASC '
+                                                                    'LIMIT 3')],
+                                                ANY,
+                                                keep_order=True)
+
+    def test_page_after_null_cursor_filters_on_values_which_are_not_null(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$d$candidate_display': ['a']},
+                                                    index=pd.Index([1], name='$d$candidate'))
+
+        slicer.dimensions.candidate \
+            .choices \
+            .fetch_page(2, after=encode_cursor([None]))
+
+        mock_fetch_data.assert_called_once_with(ANY,
+                                                [PypikaQueryMatcher('SELECT '
+                                                                    '"candidate_id" "$d$candidate",'
+                                                                    '"candidate_name" "$d$candidate_display" '
+                                                                    'FROM "politics"."politician" '
+                                                                    'WHERE NOT "candidate_id" IS NULL '
+                                                                    'GROUP BY "$d$candidate","$d$candidate_display" '
+                                                                    'ORDER BY '
+                                                                    'CASE WHEN "candidate_id" IS NULL '
+                                                                    'THEN 0 ELSE 1 END ASC,'
+                                                                    '"$d$candidate" ASC '
+                                                                    'LIMIT 3')],
+                                                ANY,
+                                                keep_order=True)
+
+    def test_cursor_returned_when_there_are_more_rows(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$d$candidate_display': ['a', 'b', 'c']},
+                                                    index=pd.Index([1, 2, 3], name='$d$candidate'))
+
+        data, cursor = slicer.dimensions.candidate \
+            .choices \
+            .fetch_page(2)
+
+        self.assertListEqual(['a', 'b'], list(data))
+        self.assertListEqual([2], decode_cursor(cursor))
+
+    def test_no_cursor_returned_on_last_page(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$d$candidate_display': ['a', 'b']},
+                                                    index=pd.Index([1, 2], name='$d$candidate'))
+
+        data, cursor = slicer.dimensions.candidate \
+            .choices \
+            .fetch_page(2)
+
+        self.assertListEqual(['a', 'b'], list(data))
+        self.assertIsNone(cursor)
+
+
+@patch('fireant.slicer.queries.builder.fetch_data')
+class DimensionsChoicesCacheTests(TestCase):
+    def setUp(self):
+        self.slicer = copy.deepcopy(slicer)
+        self.slicer.choices_cache = ChoicesCache()
+
+    @staticmethod
+    def _candidates():
+        return pd.DataFrame({'$d$candidate_display': ['Bill Clinton', 'Bob Dole', 'Donald Trump', 'Hillary Clinton']},
+                            index=pd.Index([1, 2, 5, 4], name='$d$candidate'))
+
+    def test_choices_are_fetched_once_for_all_patterns(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = self._candidates()
+        choices = self.slicer.dimensions.candidate.choices
+
+        b_choices = choices.filter(self.slicer.dimensions.candidate.like('b%')).fetch()
+        bo_choices = choices.filter(self.slicer.dimensions.candidate.like('Bo%')).fetch()
+
+        mock_fetch_data.assert_called_once_with(ANY,
+                                                [PypikaQueryMatcher('SELECT '
+                                                                    '"candidate_id" "$d$candidate",'
+                                                                    '"candidate_name" "$d$candidate_display" '
+                                                                    'FROM "politics"."politician" '
+                                                                    'GROUP BY "$d$candidate","$d$candidate_display" '
+                                                                    'ORDER BY "$d$candidate_display"')],
+                                                DimensionMatcher(self.slicer.dimensions.candidate))
+        self.assertListEqual(['Bill Clinton', 'Bob Dole'], list(b_choices))
+        self.assertListEqual([2], list(bo_choices.index))
+
+    def test_isin_and_notin_filter_the_cached_values(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = self._candidates()
+
+        result = self.slicer.dimensions.candidate.choices \
+            .filter(self.slicer.dimensions.candidate.isin([1, 4, 5]),
+                    self.slicer.dimensions.candidate.notin([5])) \
+            .fetch()
+
+        self.assertListEqual([1, 4], list(result.index))
+
+    def test_force_include_and_pagination_are_applied_to_the_cached_choices(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = self._candidates()
+
+        result = self.slicer.dimensions.candidate.choices \
+            .limit(2) \
+            .fetch(force_include=[4])
+
+        self.assertListEqual(['Hillary Clinton', 'Bill Clinton'], list(result))
+
+    def test_fetch_page_orders_cached_null_choice_first(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$d$candidate_display': ['Bill Clinton', None, 'Bob Dole']},
+                                                    index=pd.Index([1.0, np.nan, 2.0], name='$d$candidate'))
+        choices = self.slicer.dimensions.candidate.choices
+
+        data, cursor = choices.fetch_page(1)
+        next_data, next_cursor = choices.fetch_page(2, after=cursor)
+
+        self.assertTrue(np.isnan(data.index[0]))
+        self.assertListEqual([None], decode_cursor(cursor))
+        self.assertListEqual([1, 2], list(next_data.index))
+        self.assertIsNone(next_cursor)
+
+    def test_fetch_page_orders_cached_choices_by_value(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = self._candidates()
+        choices = self.slicer.dimensions.candidate.choices
+
+        data, cursor = choices.fetch_page(2)
+        next_data, next_cursor = choices.fetch_page(2, after=cursor)
+
+        self.assertListEqual([1, 2], list(data.index))
+        self.assertListEqual([4, 5], list(next_data.index))
+        self.assertIsNone(next_cursor)
+        mock_fetch_data.assert_called_once()
+
+    def test_filters_on_other_dimensions_are_queried(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = self._candidates()
+
+        self.slicer.dimensions.candidate.choices \
+            .filter(self.slicer.dimensions.political_party.isin(['d'])) \
+            .fetch()
+
+        mock_fetch_data.assert_called_once_with(ANY,
+                                                [PypikaQueryMatcher('SELECT '
+                                                                    '"candidate_id" "$d$candidate",'
+                                                                    '"candidate_name" "$d$candidate_display" '
+                                                                    'FROM "politics"."politician" '
+                                                                    'WHERE "political_party" IN (\'d\') '
+                                                                    'GROUP BY "$d$candidate","$d$candidate_display" '
+                                                                    'ORDER BY "$d$candidate_display"')],
+                                                ANY)
+        self.assertEqual({}, self.slicer.choices_cache._entries)
+
+    def test_choices_are_cached_for_each_table_of_the_slicers_sharing_the_cache(self, mock_fetch_data: Mock):
+        mock_fetch_data.side_effect = [self._candidates(), self._candidates().iloc[:1]]
+        daily_table = Table('politician_daily', schema='politics')
+        other_slicer = f.Slicer(daily_table,
+                                self.slicer.database,
+                                dimensions=[f.UniqueDimension('candidate',
+                                                              definition=daily_table.candidate_id,
+                                                              display_definition=daily_table.candidate_name)],
+                                metrics=[],
+                                choices_cache=self.slicer.choices_cache)
+
+        self.slicer.dimensions.candidate.choices.fetch()
+        result = other_slicer.dimensions.candidate.choices.fetch()
+
+        self.assertListEqual(['Bill Clinton'], list(result))
+
+
+# noinspection SqlDialectInspection,SqlNoDataSourceInspection
+class MultipleDimensionChoicesQueryBuilderTests(TestCase):
+    maxDiff = None
+
+    def test_choices_are_queried_with_grouping_sets(self):
+        query = slicer.choices(slicer.dimensions.political_party, slicer.dimensions.candidate) \
+            .filter(slicer.dimensions.political_party.isin(['d', 'r'])) \
+            .queries[0]
+
+        self.assertEqual('SELECT '
+                         '"political_party" "$d$political_party",'
+                         '"candidate_id" "$d$candidate",'
+                         '"candidate_name" "$d$candidate_display",'
+                         'CASE '
+                         'WHEN GROUPING("political_party")=0 THEN \'political_party\' '
+                         'WHEN GROUPING("candidate_id")=0 THEN \'candidate\' '
+                         'END "$choices$" '
+                         'FROM "politics"."politician" '
+                         'WHERE "political_party" IN (\'d\',\'r\') '
+                         'GROUP BY GROUPING SETS(("political_party"),("candidate_id","candidate_name"))', str(query))
+
+    def test_choices_are_queried_with_union_when_own_filters_are_excluded(self):
+        query = slicer.choices(slicer.dimensions.political_party, slicer.dimensions.candidate,
+                               exclude_own_filters=True) \
+            .filter(slicer.dimensions.political_party.isin(['d', 'r'])) \
+            .queries[0]
+
+        self.assertEqual('(SELECT '
+                         '"political_party" "$d$political_party",'
+                         'NULL "$d$candidate",'
+                         'NULL "$d$candidate_display",'
+                         '\'political_party\' "$choices$" '
+                         'FROM "politics"."politician" '
+                         'GROUP BY "$d$political_party") '
+                         'UNION ALL '
+                         '(SELECT '
+                         'NULL "$d$political_party",'
+                         '"candidate_id" "$d$candidate",'
+                         '"candidate_name" "$d$candidate_display",'
+                         '\'candidate\' "$choices$" '
+                         'FROM "politics"."politician" '
+                         'WHERE "political_party" IN (\'d\',\'r\') '
+                         'GROUP BY "$d$candidate","$d$candidate_display")', str(query))
+
+    def test_choices_are_queried_with_union_when_database_does_not_support_grouping_sets(self):
+        mysql_slicer = copy.deepcopy(slicer)
+        mysql_slicer.database = MySQLDatabase(database='test')
+
+        query = mysql_slicer.choices(mysql_slicer.dimensions.political_party, mysql_slicer.dimensions.candidate) \
+            .queries[0]
+
+        self.assertEqual('SELECT '
+                         '`political_party` `$d$political_party`,'
+                         'NULL `$d$candidate`,'
+                         'NULL `$d$candidate_display`,'
+                         '\'political_party\' `$choices$` '
+                         'FROM `politics`.`politician` '
+                         'GROUP BY `$d$political_party` '
+                         'UNION ALL '
+                         'SELECT '
+                         'NULL `$d$political_party`,'
+                         '`candidate_id` `$d$candidate`,'
+                         '`candidate_name` `$d$candidate_display`,'
+                         '\'candidate\' `$choices$` '
+                         'FROM `politics`.`politician` '
+                         'GROUP BY `$d$candidate`,`$d$candidate_display`', str(query))
+
+    @patch('fireant.slicer.queries.builder.fetch_data')
+    def test_fetch_returns_choices_for_each_dimension(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({
+            '$d$political_party': ['r', None, 'd', None],
+            '$d$candidate': [None, 2, None, 1],
+            '$d$candidate_display': [None, 'Bob Dole', None, 'Bill Clinton'],
+            '$choices$': ['political_party', 'candidate', 'political_party', 'candidate'],
+        })
+
+        result = slicer.choices(slicer.dimensions.political_party, slicer.dimensions.candidate) \
+            .fetch()
+
+        self.assertListEqual(['political_party', 'candidate'], list(result))
+        self.assertListEqual(['d', 'r'], list(result['political_party'].index))
+        self.assertListEqual(['Democrat', 'Republican'], list(result['political_party']))
+        self.assertListEqual([1, 2], list(result['candidate'].index))
+        self.assertListEqual(['Bill Clinton', 'Bob Dole'], list(result['candidate']))
+
+    @patch('fireant.slicer.queries.builder.fetch_data')
+    def test_fetch_orders_choices_like_the_choices_of_a_single_dimension(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({
+            '$d$political_party': [None, None, 'r', 'd'],
+            '$d$candidate': [1, 2, None, None],
+            '$d$candidate_display': ['Donald Trump', 'Bernie Sanders', None, None],
+            '$choices$': ['candidate', 'candidate', 'political_party', 'political_party'],
+        })
+
+        result = slicer.choices(slicer.dimensions.political_party, slicer.dimensions.candidate) \
+            .fetch()
+
+        self.assertListEqual(['d', 'r'], list(result['political_party'].index))
+        self.assertListEqual([2, 1], list(result['candidate'].index))
+        self.assertListEqual(['Bernie Sanders', 'Donald Trump'], list(result['candidate']))
@@ -1,3 +1,4 @@
+import copy
 from unittest import TestCase
 from unittest.mock import (
     ANY,
@@ -5,8 +6,12 @@ from unittest.mock import (
     patch,
 )
 
+import numpy as np
+import pandas as pd
+
 import fireant as f
 from fireant import Share
+from fireant.slicer.queries.cache import QueryCache
 from pypika import (
     Order,
     functions as fn,
@@ -15,7 +20,10 @@ from ..matchers import (
     DimensionMatcher,
     PypikaQueryMatcher,
 )
-from ..mocks import slicer
+from ..mocks import (
+    cont_dim_df,
+    slicer,
+)
 
 
 # noinspection SqlDialectInspection,SqlNoDataSourceInspection
@@ -33,7 +41,7 @@ class FindShareDimensionsTests(TestCase):
             .dimension(*dimensions) \
             .fetch()
 
-        mock_fetch_data.assert_called_once_with(ANY, ANY, ANY, [], ANY)
+        mock_fetch_data.assert_called_once_with(ANY, ANY, ANY, [], ANY, keep_order=False)
 
     def test_find_share_dimensions_with_a_single_share_operation(self, mock_fetch_data: Mock, mock_paginate: Mock):
         mock_widget = f.Widget(Share(slicer.metrics.votes, over=slicer.dimensions.state))
@@ -46,7 +54,8 @@ class FindShareDimensionsTests(TestCase):
             .dimension(*dimensions) \
             .fetch()
 
-        mock_fetch_data.assert_called_once_with(ANY, ANY, ANY, DimensionMatcher(slicer.dimensions.state), ANY)
+        mock_fetch_data.assert_called_once_with(ANY, ANY, ANY, DimensionMatcher(slicer.dimensions.state), ANY,
+                                                keep_order=False)
 
     def test_find_share_dimensions_with_a_multiple_share_operations(self, mock_fetch_data: Mock, mock_paginate: Mock):
         mock_widget = f.Widget(Share(slicer.metrics.votes, over=slicer.dimensions.state),
@@ -60,7 +69,8 @@ class FindShareDimensionsTests(TestCase):
             .dimension(*dimensions) \
             .fetch()
 
-        mock_fetch_data.assert_called_once_with(ANY, ANY, ANY, DimensionMatcher(slicer.dimensions.state), ANY)
+        mock_fetch_data.assert_called_once_with(ANY, ANY, ANY, DimensionMatcher(slicer.dimensions.state), ANY,
+                                                keep_order=False)
 
     def test_find_share_dimensions_with_a_multiple_share_operations_over_different_dimensions(self,
                                                                                               mock_fetch_data: Mock,
@@ -77,7 +87,7 @@ class FindShareDimensionsTests(TestCase):
             .fetch()
 
         expected = DimensionMatcher(slicer.dimensions.state, slicer.dimensions.political_party)
-        mock_fetch_data.assert_called_once_with(ANY, ANY, ANY, expected, ANY)
+        mock_fetch_data.assert_called_once_with(ANY, ANY, ANY, expected, ANY, keep_order=False)
 
 
 # noinspection SqlDialectInspection,SqlNoDataSourceInspection
@@ -92,7 +102,7 @@ class QueryBuilderFetchDataTests(TestCase):
             .widget(mock_widget) \
             .fetch()
 
-        mock_fetch_data.assert_called_once_with(slicer.database, ANY, ANY, ANY, ANY)
+        mock_fetch_data.assert_called_once_with(slicer.database, ANY, ANY, ANY, ANY, keep_order=False)
 
     def test_pass_query_from_builder_as_arg(self, mock_fetch_data: Mock, mock_paginate: Mock):
         mock_widget = f.Widget(slicer.metrics.votes)
@@ -107,7 +117,7 @@ class QueryBuilderFetchDataTests(TestCase):
                                                                     'FROM "politics"."politician"')],
                                                 ANY,
                                                 ANY,
-                                                ANY)
+                                                ANY, keep_order=False)
 
     def test_builder_dimensions_as_arg_with_zero_dimensions(self, mock_fetch_data: Mock, mock_paginate: Mock):
         mock_widget = f.Widget(slicer.metrics.votes)
@@ -117,7 +127,7 @@ class QueryBuilderFetchDataTests(TestCase):
             .widget(mock_widget) \
             .fetch()
 
-        mock_fetch_data.assert_called_once_with(ANY, ANY, [], ANY, ANY)
+        mock_fetch_data.assert_called_once_with(ANY, ANY, [], ANY, ANY, keep_order=False)
 
     def test_builder_dimensions_as_arg_with_one_dimension(self, mock_fetch_data: Mock, mock_paginate: Mock):
         mock_widget = f.Widget(slicer.metrics.votes)
@@ -130,7 +140,7 @@ class QueryBuilderFetchDataTests(TestCase):
             .dimension(*dimensions) \
             .fetch()
 
-        mock_fetch_data.assert_called_once_with(ANY, ANY, DimensionMatcher(*dimensions), ANY, ANY)
+        mock_fetch_data.assert_called_once_with(ANY, ANY, DimensionMatcher(*dimensions), ANY, ANY, keep_order=False)
 
     def test_builder_dimensions_as_arg_with_multiple_dimensions(self, mock_fetch_data: Mock, mock_paginate: Mock):
         mock_widget = f.Widget(slicer.metrics.votes)
@@ -143,7 +153,7 @@ class QueryBuilderFetchDataTests(TestCase):
             .dimension(*dimensions) \
             .fetch()
 
-        mock_fetch_data.assert_called_once_with(ANY, ANY, DimensionMatcher(*dimensions), ANY, ANY)
+        mock_fetch_data.assert_called_once_with(ANY, ANY, DimensionMatcher(*dimensions), ANY, ANY, keep_order=False)
 
     def test_call_transform_on_widget(self, mock_fetch_data: Mock, mock_paginate: Mock):
         mock_widget = f.Widget(slicer.metrics.votes)
@@ -158,7 +168,8 @@ class QueryBuilderFetchDataTests(TestCase):
         mock_widget.transform.assert_called_once_with(mock_paginate.return_value,
                                                       slicer,
                                                       DimensionMatcher(slicer.dimensions.timestamp),
-                                                      [])
+                                                      [],
+                                                      context=ANY)
 
     def test_returns_results_from_widget_transform(self, mock_fetch_data: Mock, mock_paginate: Mock):
         mock_widget = f.Widget(slicer.metrics.votes)
@@ -172,6 +183,19 @@ class QueryBuilderFetchDataTests(TestCase):
 
         self.assertListEqual(result, [mock_widget.transform.return_value])
 
+    def test_widgets_share_render_context(self, mock_fetch_data: Mock, mock_paginate: Mock):
+        mock_widget, mock_other_widget = f.Widget(slicer.metrics.votes), f.Widget(slicer.metrics.wins)
+        mock_widget.transform, mock_other_widget.transform = Mock(), Mock()
+
+        slicer.data \
+            .dimension(slicer.dimensions.timestamp) \
+            .widget(mock_widget, mock_other_widget) \
+            .fetch()
+
+        context = mock_widget.transform.call_args[1]['context']
+        self.assertIs(mock_paginate.return_value, context.data_frame)
+        self.assertIs(context, mock_other_widget.transform.call_args[1]['context'])
+
 
 @patch('fireant.slicer.queries.builder.scrub_totals_from_share_results', side_effect=lambda *args: args[0])
 @patch('fireant.slicer.queries.builder.paginate')
@@ -235,3 +259,196 @@ class QueryBuilderPaginationTests(TestCase):
                                               limit=None, offset=None, orders=orders)
 
 
+# noinspection SqlDialectInspection,SqlNoDataSourceInspection
+@patch('fireant.slicer.queries.builder.iter_fetch_data')
+class QueryBuilderIterFetchTests(TestCase):
+    def test_iter_fetch_streams_query_with_chunksize(self, mock_iter_fetch_data: Mock):
+        mock_iter_fetch_data.return_value = iter([])
+
+        list(slicer.data
+             .widget(f.Pandas(slicer.metrics.votes))
+             .dimension(slicer.dimensions.political_party)
+             .iter_fetch(chunksize=500))
+
+        mock_iter_fetch_data.assert_called_once_with(slicer.database,
+                                                     PypikaQueryMatcher('SELECT '
+                                                                        '"political_party" "$d$political_party",'
+                                                                        'SUM("votes") "$m$votes" '
+                                                                        'FROM "politics"."politician" '
+                                                                        'GROUP BY "$d$political_party" '
+                                                                        'ORDER BY "$d$political_party"'),
+                                                     DimensionMatcher(slicer.dimensions.political_party),
+                                                     500)
+
+    def test_iter_fetch_yields_chunks(self, mock_iter_fetch_data: Mock):
+        mock_iter_fetch_data.return_value = iter(['chunk1', 'chunk2'])
+
+        chunks = slicer.data \
+            .widget(f.Pandas(slicer.metrics.votes)) \
+            .dimension(slicer.dimensions.political_party) \
+            .iter_fetch()
+
+        self.assertListEqual(['chunk1', 'chunk2'], list(chunks))
+
+    def test_iter_fetch_with_totals_raises_exception_immediately(self, mock_iter_fetch_data: Mock):
+        with self.assertRaises(f.QueryException):
+            slicer.data \
+                .widget(f.Pandas(slicer.metrics.votes)) \
+                .dimension(slicer.dimensions.political_party.rollup()) \
+                .iter_fetch()
+
+    def test_iter_fetch_with_rolling_operation_raises_exception(self, mock_iter_fetch_data: Mock):
+        with self.assertRaises(f.QueryException):
+            slicer.data \
+                .widget(f.Pandas(f.RollingMean(slicer.metrics.votes, 3))) \
+                .dimension(slicer.dimensions.timestamp) \
+                .iter_fetch()
+
+
+@patch('fireant.slicer.queries.builder.fetch_data')
+class QueryBuilderDowncastMetricsTests(TestCase):
+    def test_metrics_with_dtype_are_downcast_before_transform(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = cont_dim_df.astype(np.float64)
+        votes = f.Metric('votes', slicer.metrics.votes.definition, dtype='float32')
+        mock_widget = f.Widget(votes, slicer.metrics.wins)
+        mock_widget.transform = Mock()
+
+        slicer.data \
+            .dimension(slicer.dimensions.timestamp) \
+            .widget(mock_widget) \
+            .fetch()
+
+        data_frame = mock_widget.transform.call_args[0][0]
+        self.assertEqual(np.float32, data_frame['$m$votes'].dtype)
+        self.assertEqual(np.float64, data_frame['$m$wins'].dtype)
+
+
+# noinspection SqlDialectInspection,SqlNoDataSourceInspection
+@patch('fireant.slicer.queries.builder.fetch_data')
+class QueryBuilderResultCacheTests(TestCase):
+    def setUp(self):
+        self.slicer = copy.deepcopy(slicer)
+        self.slicer.result_cache = QueryCache()
+        self.index = pd.Index([1, 2], name='$d$candidate')
+
+    def _fetch(self, *metrics, filters=()):
+        widget = f.Widget(*metrics)
+        widget.transform = Mock()
+
+        self.slicer.data \
+            .dimension(self.slicer.dimensions.candidate) \
+            .filter(*filters) \
+            .widget(widget) \
+            .fetch()
+
+        return widget.transform.call_args[0][0]
+
+    def test_only_metrics_which_are_not_cached_are_fetched(self, mock_fetch_data: Mock):
+        mock_fetch_data.side_effect = [
+            pd.DataFrame({'$d$candidate_display': ['Bill Clinton', 'Bob Dole'], '$m$votes': [7, 6]}, index=self.index),
+            pd.DataFrame({'$d$candidate_display': ['Bill Clinton', 'Bob Dole'], '$m$wins': [2, 0]}, index=self.index),
+        ]
+
+        self._fetch(self.slicer.metrics.votes)
+        data_frame = self._fetch(self.slicer.metrics.votes, self.slicer.metrics.wins)
+
+        mock_fetch_data.assert_called_with(ANY,
+                                           [PypikaQueryMatcher('SELECT '
+                                                               '"candidate_id" "$d$candidate",'
+                                                               '"candidate_name" "$d$candidate_display",'
+                                                               'SUM("is_winner") "$m$wins" '
+                                                               'FROM "politics"."politician" '
+                                                               'GROUP BY "$d$candidate","$d$candidate_display" '
+                                                               'ORDER BY "$d$candidate_display"')],
+                                           ANY, ANY, ANY, keep_order=False)
+        self.assertListEqual(['$d$candidate_display', '$m$votes', '$m$wins'], list(data_frame.columns))
+        self.assertListEqual([7, 6], list(data_frame['$m$votes']))
+        self.assertListEqual([2, 0], list(data_frame['$m$wins']))
+
+    def test_cached_metrics_are_not_fetched_again(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$d$candidate_display': ['Bill Clinton', 'Bob Dole'],
+                                                     '$m$votes': [7, 6],
+                                                     '$m$wins': [2, 0]}, index=self.index)
+
+        self._fetch(self.slicer.metrics.votes, self.slicer.metrics.wins)
+        data_frame = self._fetch(self.slicer.metrics.wins)
+
+        mock_fetch_data.assert_called_once()
+        self.assertListEqual(['$d$candidate_display', '$m$wins'], list(data_frame.columns))
+
+    def test_metrics_are_fetched_again_for_broader_filters(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$d$candidate_display': ['Bill Clinton', 'Bob Dole'],
+                                                     '$m$votes': [7, 6]}, index=self.index)
+
+        self._fetch(self.slicer.metrics.votes, filters=[self.slicer.dimensions.candidate.isin([1, 2])])
+        self._fetch(self.slicer.metrics.votes)
+
+        self.assertEqual(2, mock_fetch_data.call_count)
+
+    def test_narrower_filters_are_applied_to_a_cached_broader_result(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$d$candidate_display': ['Bill Clinton', 'Bob Dole'],
+                                                     '$m$votes': [7, 6],
+                                                     '$m$wins': [2, 0]}, index=self.index)
+
+        self._fetch(self.slicer.metrics.votes, self.slicer.metrics.wins)
+        data_frame = self._fetch(self.slicer.metrics.votes, filters=[self.slicer.dimensions.candidate.isin([2])])
+
+        mock_fetch_data.assert_called_once()
+        self.assertListEqual(['$d$candidate_display', '$m$votes'], list(data_frame.columns))
+        self.assertListEqual([2], list(data_frame.index))
+
+    def test_cached_result_is_not_filtered_for_totals(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$d$candidate_display': ['Bill Clinton', 'Bob Dole'],
+                                                     '$m$votes': [7, 6]}, index=self.index)
+        widget = f.Widget(self.slicer.metrics.votes)
+        widget.transform = Mock()
+
+        for filters in [(), (self.slicer.dimensions.candidate.isin([2]),)]:
+            self.slicer.data \
+                .dimension(self.slicer.dimensions.candidate.rollup()) \
+                .filter(*filters) \
+                .widget(widget) \
+                .fetch()
+
+        self.assertEqual(2, mock_fetch_data.call_count)
+
+
+@patch('fireant.slicer.queries.builder.fetch_data')
+class QueryBuilderResultCacheResampleTests(TestCase):
+    def setUp(self):
+        self.slicer = copy.deepcopy(slicer)
+        self.slicer.result_cache = QueryCache()
+        self.slicer.metrics.votes.additive = True
+
+    def _fetch(self, dimension, metric):
+        widget = f.Widget(metric)
+        widget.transform = Mock()
+
+        self.slicer.data \
+            .dimension(dimension) \
+            .widget(widget) \
+            .fetch()
+
+        return widget.transform.call_args[0][0]
+
+    def test_additive_metrics_are_rolled_up_from_a_finer_interval(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$m$votes': [1, 2, 4]},
+                                                    index=pd.DatetimeIndex(['2018-01-01', '2018-01-02', '2018-02-01'],
+                                                                           name='$d$timestamp'))
+
+        self._fetch(self.slicer.dimensions.timestamp, self.slicer.metrics.votes)
+        data_frame = self._fetch(self.slicer.dimensions.timestamp(f.monthly), self.slicer.metrics.votes)
+
+        mock_fetch_data.assert_called_once()
+        self.assertListEqual([3, 4], list(data_frame['$m$votes']))
+        self.assertListEqual(list(pd.to_datetime(['2018-01-01', '2018-02-01'])), list(data_frame.index))
+
+    def test_metrics_which_are_not_additive_are_fetched_again(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$m$wins': [1, 2]},
+                                                    index=pd.DatetimeIndex(['2018-01-01', '2018-01-02'],
+                                                                           name='$d$timestamp'))
+
+        self._fetch(self.slicer.dimensions.timestamp, self.slicer.metrics.wins)
+        self._fetch(self.slicer.dimensions.timestamp(f.monthly), self.slicer.metrics.wins)
+
+        self.assertEqual(2, mock_fetch_data.call_count)
@@ -1,5 +1,15 @@
+import copy
 from unittest import TestCase
+from unittest.mock import (
+    Mock,
+    patch,
+)
 
+import pandas as pd
+
+import fireant as f
+from fireant.slicer.queries.cache import QueryCache
+from pypika import Table
 from ..mocks import slicer
 
 
@@ -32,3 +42,50 @@ class DimensionsLatestQueryBuilderTests(TestCase):
                          'MAX("timestamp") "$d$timestamp",'
                          'MAX("timestamp2") "$d$timestamp2" '
                          'FROM "politics"."politician"', str(query))
+
+
+@patch('fireant.slicer.queries.builder.fetch_data')
+class DimensionsLatestCacheTests(TestCase):
+    def setUp(self):
+        self.slicer = copy.deepcopy(slicer)
+        self.slicer.latest_cache = QueryCache()
+
+    def test_latest_values_are_fetched_once(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$d$timestamp': [pd.Timestamp('2018-01-01')]})
+
+        first = self.slicer.latest(self.slicer.dimensions.timestamp).fetch()
+        second = self.slicer.latest(self.slicer.dimensions.timestamp).fetch()
+
+        mock_fetch_data.assert_called_once()
+        self.assertEqual(pd.Timestamp('2018-01-01'), second['timestamp'])
+        self.assertIsNot(first, second)
+
+    def test_latest_values_are_cached_for_each_set_of_dimensions(self, mock_fetch_data: Mock):
+        mock_fetch_data.side_effect = [
+            pd.DataFrame({'$d$timestamp': [pd.Timestamp('2018-01-01')]}),
+            pd.DataFrame({'$d$timestamp': [pd.Timestamp('2018-01-01')],
+                          '$d$timestamp2': [pd.Timestamp('2018-02-01')]}),
+        ]
+
+        self.slicer.latest(self.slicer.dimensions.timestamp).fetch()
+        result = self.slicer.latest(self.slicer.dimensions.timestamp, self.slicer.dimensions.timestamp2).fetch()
+
+        self.assertEqual(2, mock_fetch_data.call_count)
+        self.assertEqual(pd.Timestamp('2018-02-01'), result['timestamp2'])
+
+    def test_latest_values_are_cached_for_each_table_of_the_slicers_sharing_the_cache(self, mock_fetch_data: Mock):
+        mock_fetch_data.side_effect = [
+            pd.DataFrame({'$d$timestamp': [pd.Timestamp('2018-01-01')]}),
+            pd.DataFrame({'$d$timestamp': [pd.Timestamp('2018-02-01')]}),
+        ]
+        daily_table = Table('politician_daily', schema='politics')
+        other_slicer = f.Slicer(daily_table,
+                                self.slicer.database,
+                                dimensions=[f.DatetimeDimension('timestamp', definition=daily_table.timestamp)],
+                                metrics=[],
+                                latest_cache=self.slicer.latest_cache)
+
+        self.slicer.latest(self.slicer.dimensions.timestamp).fetch()
+        result = other_slicer.latest(other_slicer.dimensions.timestamp).fetch()
+
+        self.assertEqual(pd.Timestamp('2018-02-01'), result['timestamp'])
@@ -5,9 +5,17 @@ from unittest.mock import (
     patch,
 )
 
+import numpy as np
+import pandas as pd
+
 import fireant as f
+from fireant.slicer.queries.pagination import (
+    decode_cursor,
+    encode_cursor,
+)
 from fireant.tests.slicer.mocks import (
     ElectionOverElection,
+    cont_dim_df,
     slicer,
 )
 from fireant.utils import format_metric_key
@@ -81,3 +89,133 @@ class QueryBuilderOperationsTests(TestCase):
         f_op_key = format_metric_key(mock_operation.key)
         self.assertIn(f_op_key, mock_df)
         self.assertEqual(mock_df[f_op_key], mock_operation.apply.return_value)
+
+
+# noinspection SqlDialectInspection,SqlNoDataSourceInspection
+class QueryBuilderKeysetPaginationTests(TestCase):
+    maxDiff = None
+
+    def test_first_page_orders_by_dimensions_and_limits_to_one_more_than_page(self):
+        queries = slicer.data \
+            .widget(f.DataTablesJS(slicer.metrics.votes)) \
+            .dimension(slicer.dimensions.timestamp, slicer.dimensions.political_party) \
+            ._make_keyset_queries(10)
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual('SELECT '
+                         'TRUNC("timestamp",\'DD\') "$d$timestamp",'
+                         '"political_party" "$d$political_party",'
+                         'SUM("votes") "$m$votes" '
+                         'FROM "politics"."politician" '
+                         'GROUP BY "$d$timestamp","$d$political_party" '
+                         'ORDER BY '
+                         'CASE WHEN TRUNC("timestamp",\'DD\') IS NULL THEN 0 ELSE 1 END ASC,"$d$timestamp" ASC,'
+                         'CASE WHEN "political_party" IS NULL THEN 0 ELSE 1 END ASC,"$d$political_party" ASC '
+                         'LIMIT 11', str(queries[0]))
+
+    def test_page_after_cursor_filters_on_last_dimension_values(self):
+        queries = slicer.data \
+            .widget(f.DataTablesJS(slicer.metrics.votes)) \
+            .dimension(slicer.dimensions.timestamp, slicer.dimensions.political_party) \
+            ._make_keyset_queries(10, after=encode_cursor(['2016-01-01', 'd']))
+
+        self.assertEqual('SELECT '
+                         'TRUNC("timestamp",\'DD\') "$d$timestamp",'
+                         '"political_party" "$d$political_party",'
+                         'SUM("votes") "$m$votes" '
+                         'FROM "politics"."politician" '
+                         'WHERE TRUNC("timestamp",\'DD\')>\'2016-01-01\' '
+                         'OR (TRUNC("timestamp",\'DD\')=\'2016-01-01\' AND "political_party">\'d\') '
+                         'GROUP BY "$d$timestamp","$d$political_party" '
+                         'ORDER BY '
+                         'CASE WHEN TRUNC("timestamp",\'DD\') IS NULL THEN 0 ELSE 1 END ASC,"$d$timestamp" ASC,'
+                         'CASE WHEN "political_party" IS NULL THEN 0 ELSE 1 END ASC,"$d$political_party" ASC '
+                         'LIMIT 11', str(queries[0]))
+
+    def test_page_after_cursor_with_null_value_filters_with_is_null(self):
+        queries = slicer.data \
+            .widget(f.DataTablesJS(slicer.metrics.votes)) \
+            .dimension(slicer.dimensions.timestamp, slicer.dimensions.political_party) \
+            ._make_keyset_queries(10, after=encode_cursor([None, 'd']))
+
+        self.assertEqual('SELECT '
+                         'TRUNC("timestamp",\'DD\') "$d$timestamp",'
+                         '"political_party" "$d$political_party",'
+                         'SUM("votes") "$m$votes" '
+                         'FROM "politics"."politician" '
+                         'WHERE NOT TRUNC("timestamp",\'DD\') IS NULL '
+                         'OR (TRUNC("timestamp",\'DD\') IS NULL AND "political_party">\'d\') '
+                         'GROUP BY "$d$timestamp","$d$political_party" '
+                         'ORDER BY '
+                         'CASE WHEN TRUNC("timestamp",\'DD\') IS NULL THEN 0 ELSE 1 END ASC,"$d$timestamp" ASC,'
+                         'CASE WHEN "political_party" IS NULL THEN 0 ELSE 1 END ASC,"$d$political_party" ASC '
+                         'LIMIT 11', str(queries[0]))
+
+    def test_keyset_pagination_requires_a_dimension(self):
+        with self.assertRaises(f.QueryException):
+            slicer.data \
+                .widget(f.DataTablesJS(slicer.metrics.votes)) \
+                ._make_keyset_queries(10)
+
+    def test_keyset_pagination_not_allowed_with_totals(self):
+        with self.assertRaises(f.QueryException):
+            slicer.data \
+                .widget(f.DataTablesJS(slicer.metrics.votes)) \
+                .dimension(slicer.dimensions.timestamp.rollup()) \
+                ._make_keyset_queries(10)
+
+    def test_keyset_pagination_not_allowed_with_references(self):
+        with self.assertRaises(f.QueryException):
+            slicer.data \
+                .widget(f.DataTablesJS(slicer.metrics.votes)) \
+                .dimension(slicer.dimensions.timestamp) \
+                .reference(ElectionOverElection(slicer.dimensions.timestamp)) \
+                ._make_keyset_queries(10)
+
+    def test_keyset_pagination_not_allowed_with_cumulative_operations(self):
+        with self.assertRaises(f.QueryException):
+            slicer.data \
+                .widget(f.DataTablesJS(f.CumSum(slicer.metrics.votes))) \
+                .dimension(slicer.dimensions.timestamp) \
+                ._make_keyset_queries(10)
+
+    @patch('fireant.slicer.queries.builder.fetch_data')
+    def test_fetch_page_transforms_page_and_returns_cursor(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = cont_dim_df
+
+        mock_widget = f.Widget(slicer.metrics.votes)
+        mock_widget.transform = Mock()
+
+        widgets, cursor = slicer.data \
+            .dimension(slicer.dimensions.timestamp) \
+            .widget(mock_widget) \
+            .fetch_page(2)
+
+        self.assertListEqual([mock_widget.transform.return_value], widgets)
+        self.assertListEqual(['2000-01-01 00:00:00'], decode_cursor(cursor))
+        self.assertEqual(2, len(mock_widget.transform.call_args[0][0]))
+
+    @patch('fireant.slicer.queries.builder.fetch_data')
+    def test_fetch_page_with_null_dimension_value_on_page_boundary(self, mock_fetch_data: Mock):
+        # The rows are in the order of the database, which orders NULLs first
+        mock_fetch_data.return_value = pd.DataFrame({
+            '$m$votes': [1, 2, 3],
+        }, index=pd.MultiIndex.from_tuples([(pd.Timestamp('2016-01-01'), np.nan),
+                                            (pd.Timestamp('2016-01-01'), 'd'),
+                                            (pd.Timestamp('2016-01-01'), 'r')],
+                                           names=['$d$timestamp', '$d$political_party']))
+
+        mock_widget = f.Widget(slicer.metrics.votes)
+        mock_widget.transform = Mock()
+
+        query = slicer.data \
+            .dimension(slicer.dimensions.timestamp, slicer.dimensions.political_party) \
+            .widget(mock_widget)
+        widgets, cursor = query.fetch_page(1)
+
+        self.assertTrue(mock_fetch_data.call_args[1]['keep_order'])
+        self.assertListEqual([1], list(mock_widget.transform.call_args[0][0]['$m$votes']))
+        self.assertListEqual(['2016-01-01 00:00:00', None], decode_cursor(cursor))
+        self.assertIn('WHERE TRUNC("timestamp",\'DD\')>\'2016-01-01 00:00:00\' '
+                      'OR (TRUNC("timestamp",\'DD\')=\'2016-01-01 00:00:00\' AND NOT "political_party" IS NULL) ',
+                      str(query._make_keyset_queries(1, after=cursor)[0]))
@@ -0,0 +1,82 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from fireant import (
+    NumericInterval,
+    monthly,
+    quarterly,
+    weekly,
+)
+from fireant.slicer.queries.resampling import (
+    can_resample,
+    is_finer_interval,
+    resample,
+)
+from fireant.slicer.totals import MAX_TIMESTAMP
+from ..mocks import slicer
+
+timestamp = slicer.dimensions.timestamp
+party = slicer.dimensions.political_party
+
+
+class IsFinerIntervalTests(TestCase):
+    def test_days_are_finer_than_weeks_and_months(self):
+        self.assertTrue(is_finer_interval(timestamp.interval, weekly))
+        self.assertTrue(is_finer_interval(timestamp.interval, monthly))
+
+    def test_weeks_are_not_finer_than_months(self):
+        self.assertFalse(is_finer_interval(weekly, monthly))
+
+    def test_months_are_not_finer_than_days(self):
+        self.assertFalse(is_finer_interval(monthly, timestamp.interval))
+
+    def test_numeric_interval_with_a_multiple_of_the_size(self):
+        self.assertTrue(is_finer_interval(NumericInterval(5, 0), NumericInterval(10, 0)))
+        self.assertFalse(is_finer_interval(NumericInterval(5, 0), NumericInterval(10, 2)))
+
+
+class CanResampleTests(TestCase):
+    def test_same_dimensions_with_a_coarser_interval(self):
+        self.assertTrue(can_resample([timestamp, party], [timestamp(monthly), party]))
+
+    def test_same_intervals_are_not_resampled(self):
+        self.assertFalse(can_resample([timestamp, party], [timestamp, party]))
+
+    def test_other_dimensions_are_not_resampled(self):
+        self.assertFalse(can_resample([timestamp, party], [timestamp(monthly)]))
+
+
+class ResampleTests(TestCase):
+    def setUp(self):
+        self.data_frame = pd.DataFrame({'$d$political_party_display': ['Democrat', 'Republican', None,
+                                                                        'Democrat', 'Democrat'],
+                                        '$m$votes': [1., 2., 3., 4., 10.]},
+                                       index=pd.MultiIndex.from_arrays(
+                                           [pd.to_datetime(['2018-01-01', '2018-01-01', '2018-01-15', '2018-02-03',
+                                                            MAX_TIMESTAMP]),
+                                            ['d', 'r', np.nan, 'd', 'd']],
+                                           names=['$d$timestamp', '$d$political_party']))
+
+    def test_metrics_are_summed_for_each_month(self):
+        result = resample(self.data_frame, [timestamp(monthly), party], ['$m$votes'])
+
+        self.assertListEqual([3., 1., 2., 4., 10.], list(result['$m$votes']))
+        self.assertListEqual(list(pd.to_datetime(['2018-01-01', '2018-01-01', '2018-01-01', '2018-02-01']))
+                             + [MAX_TIMESTAMP],
+                             list(result.index.get_level_values(0)))
+        self.assertListEqual(['Democrat', 'Republican', 'Democrat'],
+                             list(result['$d$political_party_display'].dropna()[:3]))
+
+    def test_weeks_start_on_monday(self):
+        result = resample(self.data_frame.xs('d', level=1), [timestamp(weekly)], ['$m$votes'])
+
+        self.assertListEqual(list(pd.to_datetime(['2018-01-01', '2018-01-29'])) + [MAX_TIMESTAMP],
+                             list(result.index))
+
+    def test_totals_are_kept(self):
+        result = resample(self.data_frame, [timestamp(quarterly), party], ['$m$votes'])
+
+        self.assertEqual(10., result.loc[(MAX_TIMESTAMP, 'd'), '$m$votes'])
+        self.assertEqual(5., result.loc[(pd.Timestamp('2018-01-01'), 'd'), '$m$votes'])
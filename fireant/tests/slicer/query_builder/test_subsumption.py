@@ -0,0 +1,125 @@
+from datetime import (
+    date,
+    datetime,
+)
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from fireant import (
+    monthly,
+    weekly,
+)
+from fireant.slicer.queries.subsumption import (
+    apply_filters,
+    find_filters_to_apply,
+)
+from ..mocks import slicer
+
+timestamp = slicer.dimensions.timestamp
+party = slicer.dimensions.political_party
+candidate = slicer.dimensions.candidate
+
+
+class FindFiltersToApplyTests(TestCase):
+    def test_isin_with_fewer_values_is_narrower(self):
+        filters = [party.isin(['d'])]
+
+        result = find_filters_to_apply([party], [party.isin(['d', 'r'])], filters)
+
+        self.assertListEqual(filters, result)
+
+    def test_isin_with_other_values_is_not_narrower(self):
+        self.assertIsNone(find_filters_to_apply([party], [party.isin(['d', 'r'])], [party.isin(['i'])]))
+
+    def test_notin_with_more_values_is_narrower(self):
+        filters = [party.notin(['i', 'r'])]
+
+        self.assertListEqual(filters, find_filters_to_apply([party], [party.notin(['i'])], filters))
+
+    def test_unchanged_filters_are_not_applied_again(self):
+        result = find_filters_to_apply([party, candidate],
+                                       [party.isin(['d'])],
+                                       [party.isin(['d']), candidate.isin([1])])
+
+        self.assertEqual(1, len(result))
+        self.assertEqual('candidate', result[0].dimension_key)
+
+    def test_filter_on_a_dimension_which_is_not_selected_cannot_be_applied(self):
+        self.assertIsNone(find_filters_to_apply([candidate], [], [party.isin(['d'])]))
+
+    def test_filter_on_display_values_is_applied(self):
+        filters = [candidate.display.isin(['Bill Clinton'])]
+
+        self.assertListEqual(filters, find_filters_to_apply([candidate], [], filters))
+
+    def test_metric_filters_are_not_supported(self):
+        self.assertIsNone(find_filters_to_apply([party], [], [slicer.metrics.votes > 10]))
+
+    def test_date_range_starting_at_an_interval_with_the_same_stop(self):
+        filters = [timestamp(monthly).between(date(2018, 2, 1), date(2018, 6, 30))]
+
+        result = find_filters_to_apply([timestamp(monthly)],
+                                       [timestamp.between(date(2018, 1, 15), date(2018, 6, 30))],
+                                       filters)
+
+        self.assertListEqual(filters, result)
+
+    def test_date_range_starting_inside_an_interval_is_not_applied(self):
+        self.assertIsNone(find_filters_to_apply([timestamp(monthly)],
+                                                [timestamp.between(date(2018, 1, 1), date(2018, 6, 30))],
+                                                [timestamp.between(date(2018, 2, 15), date(2018, 6, 30))]))
+
+    def test_date_range_with_an_earlier_stop_is_not_applied(self):
+        self.assertIsNone(find_filters_to_apply([timestamp],
+                                                [timestamp.between(date(2018, 1, 1), date(2018, 6, 30))],
+                                                [timestamp.between(date(2018, 1, 1), date(2018, 5, 31))]))
+
+    def test_date_range_of_datetimes_within_a_range_of_dates(self):
+        filters = [timestamp.between(datetime(2018, 2, 1), date(2018, 6, 30))]
+
+        result = find_filters_to_apply([timestamp(monthly)],
+                                       [timestamp.between(date(2018, 1, 1), date(2018, 6, 30))],
+                                       filters)
+
+        self.assertListEqual(filters, result)
+
+    def test_weekly_date_range_starting_on_monday(self):
+        filters = [timestamp.between(date(2018, 1, 8), date(2018, 6, 30))]
+
+        result = find_filters_to_apply([timestamp(weekly)],
+                                       [timestamp.between(date(2018, 1, 1), date(2018, 6, 30))],
+                                       filters)
+
+        self.assertListEqual(filters, result)
+
+    def test_weekly_date_range_starting_on_another_day_is_not_applied(self):
+        self.assertIsNone(find_filters_to_apply([timestamp(weekly)],
+                                                [timestamp.between(date(2018, 1, 1), date(2018, 6, 30))],
+                                                [timestamp.between(date(2018, 1, 9), date(2018, 6, 30))]))
+
+
+class ApplyFiltersTests(TestCase):
+    def setUp(self):
+        self.data_frame = pd.DataFrame({'$d$candidate_display': ['Bill Clinton', 'Bob Dole', 'Ross Perot'],
+                                        '$m$votes': [7, 6, 1]},
+                                       index=pd.MultiIndex.from_arrays(
+                                           [pd.to_datetime(['2018-01-01', '2018-02-01', '2018-03-01']),
+                                            ['d', 'r', np.nan]],
+                                           names=['$d$timestamp', '$d$political_party']))
+
+    def test_date_range_filters_the_index(self):
+        result = apply_filters(self.data_frame, [timestamp.between(date(2018, 2, 1), date(2018, 3, 1))])
+
+        self.assertListEqual([6, 1], list(result['$m$votes']))
+
+    def test_notin_excludes_null_values(self):
+        result = apply_filters(self.data_frame, [party.notin(['d'])])
+
+        self.assertListEqual([6], list(result['$m$votes']))
+
+    def test_display_value_filter(self):
+        result = apply_filters(self.data_frame, [candidate.display.isin(['Bob Dole', 'Ross Perot'])])
+
+        self.assertListEqual([6, 1], list(result['$m$votes']))
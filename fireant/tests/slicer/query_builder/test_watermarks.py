@@ -0,0 +1,98 @@
+import copy
+from unittest import TestCase
+from unittest.mock import (
+    ANY,
+    Mock,
+    patch,
+)
+
+import pandas as pd
+
+from fireant.slicer.queries.cache import QueryCache
+from fireant.slicer.queries.watermarks import (
+    CallbackWatermark,
+    ColumnWatermark,
+)
+from ..matchers import PypikaQueryMatcher
+from ..mocks import (
+    politicians_table,
+    slicer,
+)
+
+
+# noinspection SqlDialectInspection,SqlNoDataSourceInspection
+@patch('fireant.slicer.queries.watermarks.fetch_data')
+class ColumnWatermarkTests(TestCase):
+    def test_watermark_is_the_greatest_value_of_the_column(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$watermark$': [pd.Timestamp('2018-01-01')]})
+
+        watermark = ColumnWatermark(politicians_table.timestamp).get(slicer)
+
+        mock_fetch_data.assert_called_once_with(ANY,
+                                                [PypikaQueryMatcher('SELECT MAX("timestamp") "$watermark$" '
+                                                                    'FROM "politics"."politician"')],
+                                                ())
+        self.assertEqual(pd.Timestamp('2018-01-01'), watermark)
+
+    def test_watermark_of_an_empty_table_is_none(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$watermark$': [pd.NaT]})
+
+        self.assertIsNone(ColumnWatermark(politicians_table.timestamp).get(slicer))
+
+
+@patch('fireant.slicer.queries.cache.time')
+class CallbackWatermarkTests(TestCase):
+    def test_watermark_is_polled_once_per_ttl(self, mock_time):
+        callback = Mock(side_effect=[1, 2])
+        watermark = CallbackWatermark(callback, ttl=60)
+
+        mock_time.monotonic.return_value = 0
+        watermark.get(slicer)
+        mock_time.monotonic.return_value = 59
+        self.assertEqual(1, watermark.get(slicer))
+        mock_time.monotonic.return_value = 60
+        self.assertEqual(2, watermark.get(slicer))
+
+        callback.assert_called_with(politicians_table)
+
+    def test_invalidated_watermark_is_polled_again(self, mock_time):
+        mock_time.monotonic.return_value = 0
+        callback = Mock(side_effect=[1, 2])
+        watermark = CallbackWatermark(callback, ttl=60)
+
+        watermark.get(slicer)
+        watermark.invalidate(politicians_table)
+
+        self.assertEqual(2, watermark.get(slicer))
+
+
+@patch('fireant.slicer.queries.builder.fetch_data')
+class SlicerWatermarkTests(TestCase):
+    def setUp(self):
+        self.watermark = Mock(side_effect=[1, 1, 2])
+        self.slicer = copy.deepcopy(slicer)
+        self.slicer.latest_cache = QueryCache(ttl=None)
+        self.slicer.watermark = CallbackWatermark(lambda table: self.watermark(), ttl=0)
+
+    def _fetch_latest(self):
+        return self.slicer.latest(self.slicer.dimensions.timestamp).fetch()
+
+    def test_cached_values_are_reused_until_the_watermark_moves(self, mock_fetch_data: Mock):
+        mock_fetch_data.side_effect = [pd.DataFrame({'$d$timestamp': [pd.Timestamp('2018-01-01')]}),
+                                       pd.DataFrame({'$d$timestamp': [pd.Timestamp('2018-01-02')]})]
+
+        self._fetch_latest()
+        self.assertEqual(pd.Timestamp('2018-01-01'), self._fetch_latest()['timestamp'])
+        self.assertEqual(pd.Timestamp('2018-01-02'), self._fetch_latest()['timestamp'])
+        self.assertEqual(2, mock_fetch_data.call_count)
+
+    def test_invalidate_caches_removes_the_values_of_the_table(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$d$timestamp': [pd.Timestamp('2018-01-01')]})
+        self.watermark.side_effect = None
+        self.watermark.return_value = 1
+
+        self._fetch_latest()
+        self.slicer.invalidate_caches()
+        self._fetch_latest()
+
+        self.assertEqual(2, mock_fetch_data.call_count)
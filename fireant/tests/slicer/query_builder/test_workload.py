@@ -0,0 +1,84 @@
+import copy
+import json
+from datetime import date
+from unittest import TestCase
+from unittest.mock import (
+    Mock,
+    patch,
+)
+
+import pandas as pd
+
+import fireant as f
+from fireant.slicer.queries.workload import make_workload_record
+from ..mocks import slicer
+
+
+def _record(slicer, dimensions, metrics, filters=(), duration=1., rows=10):
+    return make_workload_record(slicer.database, slicer.table, dimensions, metrics, filters, (), duration, rows)
+
+
+class WorkloadRecordTests(TestCase):
+    def setUp(self):
+        self.slicer = copy.deepcopy(slicer)
+        self.slicer.metrics.votes.additive = True
+
+    def test_dimensions_are_recorded_with_their_intervals_and_columns(self):
+        record = _record(self.slicer,
+                         [self.slicer.dimensions.timestamp(f.monthly), self.slicer.dimensions.candidate],
+                         [self.slicer.metrics.votes])
+
+        self.assertEqual('"politics"."politician"', record['table'])
+        self.assertListEqual([], record['joins'])
+        self.assertDictEqual({'key': 'timestamp',
+                              'interval': 'month',
+                              'rollup': False,
+                              'definition': 'TRUNC("timestamp",\'MM\')',
+                              'column': 'timestamp'}, record['dimensions'][0])
+        self.assertEqual('candidate_name', record['dimensions'][1]['display_column'])
+
+    def test_only_additive_sums_of_a_column_can_be_pre_aggregated(self):
+        record = _record(self.slicer, [], [self.slicer.metrics.votes, self.slicer.metrics.wins])
+
+        self.assertListEqual([{'key': 'votes', 'definition': 'SUM("votes")', 'column': 'votes'},
+                              {'key': 'wins', 'definition': 'SUM("is_winner")', 'column': None}],
+                             record['metrics'])
+
+    def test_joined_tables_are_recorded(self):
+        record = _record(self.slicer, [self.slicer.dimensions.district], [self.slicer.metrics.votes])
+
+        self.assertListEqual(['"locations"."district"'], record['joins'])
+
+    def test_filters_are_recorded_with_their_dimension_or_metric(self):
+        record = _record(self.slicer, [], [self.slicer.metrics.votes],
+                         [self.slicer.dimensions.candidate.display.isin(['Bill Clinton']),
+                          self.slicer.metrics.votes > 10])
+
+        self.assertListEqual([{'dimensions': ['candidate_display']}, {'metric': 'votes'}], record['filters'])
+
+    def test_date_ranges_are_recorded_with_their_bounds(self):
+        record = _record(self.slicer, [], [self.slicer.metrics.votes],
+                         [self.slicer.dimensions.timestamp.between(date(2018, 1, 15), date(2018, 2, 3))])
+
+        self.assertListEqual([{'dimensions': ['timestamp'],
+                               'start': '2018-01-15T00:00:00',
+                               'stop': '2018-02-03T00:00:00'}], record['filters'])
+
+
+@patch('fireant.slicer.queries.builder.fetch_data')
+class WorkloadLogTests(TestCase):
+    def test_fetched_queries_are_logged_as_json(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$m$votes': [1., 2.]})
+        widget = f.Widget(slicer.metrics.votes)
+        widget.transform = Mock()
+
+        with self.assertLogs('fireant.workload_log', level='INFO') as logs:
+            slicer.data \
+                .dimension(slicer.dimensions.political_party) \
+                .widget(widget) \
+                .fetch()
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(2, record['rows'])
+        self.assertEqual('political_party', record['dimensions'][0]['key'])
+        self.assertEqual('votes', record['metrics'][0]['key'])
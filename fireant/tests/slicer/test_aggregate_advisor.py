@@ -0,0 +1,115 @@
+import copy
+import io
+import json
+from contextlib import redirect_stdout
+from datetime import date
+from unittest import TestCase
+from unittest.mock import patch
+
+import fireant as f
+from fireant.slicer.aggregate_advisor import (
+    main,
+    read_workload_log,
+    recommend_aggregate_tables,
+)
+from fireant.slicer.queries.workload import make_workload_record
+from pypika import functions as fn
+from .mocks import (
+    politicians_table,
+    slicer,
+)
+
+
+def _record(slicer, dimensions, metrics, filters=(), duration=1., rows=10):
+    return make_workload_record(slicer.database, slicer.table, dimensions, metrics, filters, (), duration, rows)
+
+
+class ReadWorkloadLogTests(TestCase):
+    def test_log_lines_of_other_loggers_are_skipped(self):
+        record = _record(slicer, [], [slicer.metrics.votes])
+        lines = ['INFO:fireant.query_log:[0.1 seconds]: SELECT 1',
+                 'INFO:fireant.workload_log:' + json.dumps(record)]
+
+        self.assertListEqual([record], list(read_workload_log(lines)))
+
+
+class RecommendAggregateTablesTests(TestCase):
+    def setUp(self):
+        self.slicer = copy.deepcopy(slicer)
+        self.slicer.metrics.votes.additive = True
+        self.dimensions = self.slicer.dimensions
+
+    def test_aggregate_table_with_finer_interval_answers_coarser_queries(self):
+        records = [_record(self.slicer, [self.dimensions.timestamp(f.daily)], [self.slicer.metrics.votes],
+                           duration=2., rows=100),
+                   _record(self.slicer, [self.dimensions.timestamp(f.monthly)], [self.slicer.metrics.votes],
+                           duration=3., rows=4)]
+
+        recommendations = recommend_aggregate_tables(records)
+
+        self.assertEqual(2, len(recommendations))
+        self.assertListEqual([('timestamp', 'day')], recommendations[0].dimensions)
+        self.assertEqual(2, recommendations[0].queries)
+        self.assertEqual(5., recommendations[0].seconds_saved)
+        self.assertEqual('CREATE TABLE "politics"."politician_by_timestamp_day" AS '
+                         'SELECT TRUNC("timestamp",\'DD\') "timestamp",SUM("votes") "votes" '
+                         'FROM "politics"."politician" '
+                         'GROUP BY TRUNC("timestamp",\'DD\')', recommendations[0].ddl)
+
+    def test_seconds_saved_are_reduced_by_the_size_of_the_aggregate_table(self):
+        records = [_record(self.slicer, [self.dimensions.candidate], [self.slicer.metrics.votes],
+                           duration=10., rows=250)]
+
+        recommendation, = recommend_aggregate_tables(records, table_rows=1000)
+
+        self.assertEqual(7.5, recommendation.seconds_saved)
+        self.assertEqual('CREATE TABLE "politics"."politician_by_candidate" AS '
+                         'SELECT "candidate_id" "candidate_id","candidate_name" "candidate_name",SUM("votes") "votes" '
+                         'FROM "politics"."politician" '
+                         'GROUP BY "candidate_id","candidate_name"', recommendation.ddl)
+
+    def test_queries_filtering_other_dimensions_are_not_answered(self):
+        records = [_record(self.slicer, [self.dimensions.political_party], [self.slicer.metrics.votes],
+                           [self.dimensions.candidate.display.isin(['Bill Clinton'])], duration=5.),
+                   _record(self.slicer, [self.dimensions.political_party, self.dimensions.candidate],
+                           [self.slicer.metrics.votes], duration=1.)]
+
+        recommendations = recommend_aggregate_tables(records)
+
+        self.assertListEqual([('political_party', None), ('candidate', None)], recommendations[0].dimensions)
+        self.assertEqual(6., recommendations[0].seconds_saved)
+        self.assertEqual(1, len(recommendations))
+
+    def test_queries_with_date_ranges_within_the_intervals_are_not_answered(self):
+        records = [_record(self.slicer, [self.dimensions.timestamp(f.monthly)], [self.slicer.metrics.votes],
+                           [self.dimensions.timestamp.between(date(2018, 1, 15), date(2018, 2, 3))], duration=5.),
+                   _record(self.slicer, [self.dimensions.timestamp(f.monthly)], [self.slicer.metrics.votes],
+                           [self.dimensions.timestamp.between(date(2018, 1, 1), date(2018, 2, 28))], duration=1.)]
+
+        recommendation, = recommend_aggregate_tables(records)
+
+        self.assertListEqual([('timestamp', 'month')], recommendation.dimensions)
+        self.assertEqual(1, recommendation.queries)
+        self.assertEqual(1., recommendation.seconds_saved)
+
+    def test_queries_which_cannot_be_pre_aggregated_are_ignored(self):
+        records = [_record(self.slicer, [self.dimensions.district], [self.slicer.metrics.votes]),
+                   _record(self.slicer, [self.dimensions.political_party], [self.slicer.metrics.wins]),
+                   _record(self.slicer, [self.dimensions.political_party],
+                           [f.Metric('max_votes', definition=fn.Max(politicians_table.votes), additive=True)])]
+
+        self.assertListEqual([], recommend_aggregate_tables(records))
+
+    def test_command_line_prints_the_ddl_of_the_recommendations(self):
+        record = _record(self.slicer, [self.dimensions.political_party], [self.slicer.metrics.votes], duration=4.)
+        log = io.StringIO(json.dumps(record) + '\n')
+        output = io.StringIO()
+
+        with patch('sys.stdin', log), redirect_stdout(output):
+            main([])
+
+        self.assertEqual('-- 1. Saves 4.0 seconds on 1 queries, about 10 rows\n'
+                         'CREATE TABLE "politics"."politician_by_political_party" AS '
+                         'SELECT "political_party" "political_party",SUM("votes") "votes" '
+                         'FROM "politics"."politician" '
+                         'GROUP BY "political_party";\n\n', output.getvalue())
@@ -1,14 +1,36 @@
+import copy
+import pickle
+import threading
+import time
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
 from unittest import (
     TestCase,
     skip,
 )
+from unittest.mock import patch
 
 import numpy as np
 import pandas as pd
 import pandas.testing
 
-from fireant.slicer.queries.execution import reduce_result_set
+from fireant import (
+    DayOverDay,
+    Metric,
+)
+from fireant.slicer.queries.cache import QueryCache
+from fireant.slicer.queries.execution import (
+    downcast_metrics,
+    reduce_result_set,
+    transform_widgets,
+)
 from fireant.slicer.totals import get_totals_marker_for_dtype
+from fireant.slicer.widgets import (
+    DataTablesJS,
+    ReactTable,
+)
+from fireant.slicer.widgets.base import TransformableWidget
+from fireant.slicer.widgets.context import RenderContext
 from .mocks import (
     cat_dim_df,
     cat_dim_totals_df,
@@ -19,6 +41,7 @@ from .mocks import (
     cont_cat_uni_dim_all_totals_df,
     cont_cat_uni_dim_df,
     cont_dim_df,
+    cont_uni_dim_df,
     single_metric_df,
     slicer,
 )
@@ -216,3 +239,173 @@ class ReduceResultSetsWithTotalsTests(TestCase):
         result = reduce_result_set([raw_df, totals_df], (), dimensions, ())
 
         pandas.testing.assert_frame_equal(expected, result)
+
+
+def categorize(data_frame, columns):
+    data_frame = data_frame.copy()
+    for column in columns:
+        data_frame[column] = data_frame[column].astype('category')
+    return data_frame
+
+
+class ReduceResultSetsWithCategoricalsTests(TestCase):
+    def test_categorical_dimension_values_are_plain_values_in_index(self):
+        expected = cat_uni_dim_df.sort_index()
+        raw_df = categorize(replace_totals(expected), ['$d$political_party', '$d$candidate'])
+
+        dimensions = (slicer.dimensions.political_party, slicer.dimensions.candidate)
+        result = reduce_result_set([raw_df], (), dimensions, ())
+
+        pandas.testing.assert_frame_equal(expected, result)
+
+    def test_raw_result_sets_are_not_modified(self):
+        raw_df = categorize(replace_totals(cat_dim_df), ['$d$political_party'])
+
+        reduce_result_set([raw_df], (), (slicer.dimensions.political_party,), ())
+
+        self.assertEqual('category', raw_df['$d$political_party'].dtype)
+
+    def test_display_values_stay_categorical_with_totals(self):
+        expected = cont_cat_uni_dim_all_totals_df.loc[(slice(None), slice('d', 'r')), :]
+        raw_df = replace_totals(cont_cat_uni_dim_df)
+        totals_df = raw_df.groupby(['$d$timestamp', '$d$political_party']).sum().reset_index()
+        totals_df['$d$state'] = None
+        totals_df['$d$state_display'] = None
+        totals_df = totals_df[['$d$timestamp', '$d$political_party', '$d$state', '$d$state_display',
+                               '$m$votes', '$m$wins']]
+        categorical_columns = ['$d$political_party', '$d$state', '$d$state_display']
+
+        dimensions = (slicer.dimensions.timestamp, slicer.dimensions.political_party, slicer.dimensions.state.rollup())
+        result = reduce_result_set([categorize(raw_df, categorical_columns),
+                                    categorize(totals_df, categorical_columns)],
+                                   (), dimensions, ())
+
+        self.assertEqual('category', result['$d$state_display'].dtype)
+        pandas.testing.assert_frame_equal(expected, result, check_dtype=False, check_categorical=False)
+
+
+class DowncastMetricsTests(TestCase):
+    votes = Metric('votes', slicer.metrics.votes.definition, dtype='float32')
+    wins = Metric('wins', slicer.metrics.wins.definition, dtype='int32')
+
+    def test_metrics_without_dtype_are_not_downcast(self):
+        result = downcast_metrics(cont_dim_df.astype(np.float64), [slicer.metrics.votes, slicer.metrics.wins])
+
+        self.assertEqual(np.float64, result['$m$votes'].dtype)
+        self.assertEqual(np.float64, result['$m$wins'].dtype)
+
+    def test_metrics_are_downcast_to_dtype(self):
+        result = downcast_metrics(cont_dim_df.astype(np.float64), [self.votes, self.wins])
+
+        self.assertEqual(np.float32, result['$m$votes'].dtype)
+        self.assertEqual(np.int32, result['$m$wins'].dtype)
+        self.assertListEqual(list(cont_dim_df['$m$wins']), list(result['$m$wins']))
+
+    def test_metrics_with_nans_are_not_downcast_to_int(self):
+        data_frame = cont_dim_df.astype(np.float64)
+        data_frame.iloc[0, 1] = np.nan
+
+        result = downcast_metrics(data_frame, [self.wins])
+
+        self.assertEqual(np.float64, result['$m$wins'].dtype)
+
+    def test_reference_columns_are_downcast_except_delta_percent(self):
+        data_frame = cont_dim_df.astype(np.float64)
+        data_frame['$m$votes_dod'] = data_frame['$m$votes']
+        data_frame['$m$votes_dod_delta_percent'] = data_frame['$m$votes']
+
+        result = downcast_metrics(data_frame, [self.votes],
+                                  [DayOverDay(slicer.dimensions.timestamp),
+                                   DayOverDay(slicer.dimensions.timestamp, delta_percent=True)])
+
+        self.assertEqual(np.float32, result['$m$votes_dod'].dtype)
+        self.assertEqual(np.float64, result['$m$votes_dod_delta_percent'].dtype)
+
+
+class SleepWidget(TransformableWidget):
+    def __init__(self, seconds, thread_safe=True):
+        super(SleepWidget, self).__init__(slicer.metrics.votes)
+        self.seconds = seconds
+        self.thread_safe = thread_safe
+
+    def transform(self, data_frame, slicer, dimensions, references, context=None):
+        time.sleep(self.seconds)
+        return self.seconds, threading.current_thread(), context
+
+
+class TransformWidgetsTests(TestCase):
+    def setUp(self):
+        self.context = RenderContext(cont_uni_dim_df, [slicer.dimensions.timestamp, slicer.dimensions.state])
+        self.pool = ThreadPool(3)
+
+    def tearDown(self):
+        self.pool.terminate()
+
+    def test_results_keep_the_order_of_the_widgets_with_threads(self):
+        widgets = [SleepWidget(0.2), SleepWidget(0.1), SleepWidget(0)]
+
+        results = transform_widgets(widgets, self.context, slicer, [], pool=self.pool)
+
+        self.assertListEqual([0.2, 0.1, 0], [seconds for seconds, _, _ in results])
+        self.assertEqual(3, len({thread for _, thread, _ in results}))
+
+    def test_widgets_share_the_context(self):
+        widgets = [SleepWidget(0), SleepWidget(0)]
+
+        results = transform_widgets(widgets, self.context, slicer, [], pool=self.pool)
+
+        for _, _, context in results:
+            self.assertIs(self.context, context)
+
+    def test_widgets_which_are_not_thread_safe_are_transformed_in_the_current_thread(self):
+        widgets = [SleepWidget(0), SleepWidget(0, thread_safe=False), SleepWidget(0)]
+
+        results = transform_widgets(widgets, self.context, slicer, [], pool=self.pool)
+
+        self.assertIs(threading.current_thread(), results[1][1])
+        self.assertIsNot(threading.current_thread(), results[0][1])
+
+    def test_widgets_are_transformed_in_the_current_thread_without_a_pool(self):
+        widgets = [SleepWidget(0), SleepWidget(0)]
+
+        results = transform_widgets(widgets, self.context, slicer, [])
+
+        self.assertListEqual([threading.current_thread()] * 2, [thread for _, thread, _ in results])
+
+    def test_results_with_processes_match_results_in_the_current_thread(self):
+        widgets = [DataTablesJS(slicer.metrics.votes), ReactTable(slicer.metrics.votes, slicer.metrics.wins)]
+
+        expected = transform_widgets(widgets, self.context, slicer, [])
+        with Pool(2) as pool:
+            results = transform_widgets(widgets, self.context, slicer, [], pool=pool)
+
+        self.assertEqual(expected, results)
+
+    def test_each_process_receives_the_pickled_context_once_with_a_batch_of_widgets(self):
+        widgets = [DataTablesJS(slicer.metrics.votes),
+                   ReactTable(slicer.metrics.votes),
+                   ReactTable(slicer.metrics.wins)]
+
+        expected = transform_widgets(widgets, self.context, slicer, [])
+        with Pool(2) as pool, patch.object(pool, 'map_async', wraps=pool.map_async) as mock_map_async:
+            results = transform_widgets(widgets, self.context, slicer, [], pool=pool)
+
+        tasks = mock_map_async.call_args[0][1]
+        self.assertEqual(2, len(tasks))
+        self.assertIs(tasks[0][0], tasks[1][0])
+        self.assertIsInstance(tasks[0][0], bytes)
+        self.assertListEqual([2, 1], [len(batch) for _, batch in tasks])
+        self.assertEqual(expected, results)
+
+    def test_slicer_caches_are_not_sent_to_the_processes(self):
+        cached_slicer = copy.deepcopy(slicer)
+        cached_slicer.result_cache = QueryCache()
+        cached_slicer.result_cache.put('key', cont_uni_dim_df)
+        widgets = [DataTablesJS(slicer.metrics.votes), ReactTable(slicer.metrics.votes)]
+
+        with Pool(2) as pool, patch.object(pool, 'map_async', wraps=pool.map_async) as mock_map_async:
+            transform_widgets(widgets, self.context, cached_slicer, [], pool=pool)
+
+        state, _ = mock_map_async.call_args[0][1][0]
+        _, unpickled_slicer, _ = pickle.loads(state)
+        self.assertListEqual([], unpickled_slicer.result_cache.keys())
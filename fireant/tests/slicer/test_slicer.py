@@ -1,8 +1,19 @@
+import copy
+import threading
+from multiprocessing.pool import ThreadPool
 from unittest import TestCase
+from unittest.mock import (
+    Mock,
+    patch,
+)
+
+import pandas as pd
 
 from fireant import (
     Dimension,
     Metric,
+    Pandas,
+    Slicer,
 )
 from fireant.slicer.dimensions import DisplayDimension
 from .mocks import slicer
@@ -48,3 +59,56 @@ class SlicerContainerTests(TestCase):
         self.assertListEqual(dimension_keys, ['timestamp', 'timestamp2', 'join_timestamp',
                                               'political_party', 'candidate', 'election', 'district',
                                               'state', 'winner', 'deepjoin'])
+
+
+class SlicerTransformPoolTests(TestCase):
+    def make_slicer(self, **kwargs):
+        return Slicer(slicer.table, slicer.database, dimensions=[], metrics=[slicer.metrics.votes], **kwargs)
+
+    def test_widgets_are_transformed_without_a_pool_by_default(self):
+        self.assertIsNone(self.make_slicer().transform_pool)
+
+    def test_pool_is_created_once_and_reused(self):
+        threaded_slicer = self.make_slicer(max_transform_threads=2)
+        pool = threaded_slicer.transform_pool
+
+        try:
+            self.assertIsInstance(pool, ThreadPool)
+            self.assertIs(pool, threaded_slicer.transform_pool)
+        finally:
+            pool.terminate()
+
+    def test_pool_can_be_passed_in(self):
+        with ThreadPool(2) as pool:
+            self.assertIs(pool, self.make_slicer(transform_pool=pool).transform_pool)
+
+    def test_copies_of_the_slicer_share_the_pool(self):
+        threaded_slicer = self.make_slicer(max_transform_threads=2)
+        slicer_copy = copy.deepcopy(threaded_slicer)
+
+        try:
+            self.assertIs(threaded_slicer.transform_pool, slicer_copy.transform_pool)
+        finally:
+            threaded_slicer.transform_pool.terminate()
+
+    @patch('fireant.slicer.queries.builder.fetch_data')
+    def test_repeated_fetches_reuse_the_pool(self, mock_fetch_data: Mock):
+        mock_fetch_data.return_value = pd.DataFrame({'$m$votes': [1]})
+        threaded_slicer = self.make_slicer(max_transform_threads=3)
+
+        def fetch():
+            threaded_slicer.data \
+                .widget(Pandas(threaded_slicer.metrics.votes), Pandas(threaded_slicer.metrics.votes)) \
+                .fetch()
+
+        try:
+            fetch()
+            pool, thread_count = threaded_slicer.transform_pool, threading.active_count()
+
+            for _ in range(20):
+                fetch()
+
+            self.assertIs(pool, threaded_slicer.transform_pool)
+            self.assertEqual(thread_count, threading.active_count())
+        finally:
+            threaded_slicer.transform_pool.terminate()
@@ -0,0 +1,117 @@
+from threading import (
+    Event,
+    Thread,
+)
+from unittest import TestCase
+
+import pandas as pd
+import pandas.testing
+
+from fireant.slicer.widgets.context import RenderContext
+from fireant.slicer.widgets.datatables import DataTablesJS
+from fireant.slicer.widgets.highcharts import HighCharts
+from fireant.slicer.widgets.pandas import Pandas
+from fireant.slicer.widgets.reacttable import ReactTable
+from fireant.tests.slicer.mocks import (
+    cont_uni_dim_df,
+    cont_uni_dim_totals_df,
+    slicer,
+)
+
+
+class RenderContextTests(TestCase):
+    dimensions = [slicer.dimensions.timestamp, slicer.dimensions.state]
+
+    def test_display_values_are_computed_once(self):
+        context = RenderContext(cont_uni_dim_df, self.dimensions)
+
+        display_values = context.display_values
+
+        self.assertIs(display_values, context.display_values)
+        self.assertEqual('Texas', display_values['$d$state']['1'])
+
+    def test_display_field_values_keep_null_values(self):
+        df = cont_uni_dim_df.copy()
+        df['$d$state_display'] = df['$d$state_display'].astype(object)
+        df.loc[df.index.get_level_values(1) == '1', '$d$state_display'] = None
+
+        context = RenderContext(df, self.dimensions)
+
+        self.assertTrue(pd.isnull(context.display_field_values(slicer.dimensions.state)['1']))
+        self.assertEqual('null', context.display_values['$d$state']['1'])
+
+    def test_metric_display_is_cached_by_format(self):
+        context = RenderContext(cont_uni_dim_df, self.dimensions)
+
+        display = context.metric_display('$m$votes', prefix='$')
+
+        self.assertIs(display, context.metric_display('$m$votes', prefix='$'))
+        self.assertIsNot(display, context.metric_display('$m$votes', suffix='%'))
+        self.assertTrue(display.str.startswith('$').all())
+
+    def test_totals_mask(self):
+        context = RenderContext(cont_uni_dim_totals_df, self.dimensions)
+
+        mask = context.totals_mask(1)
+
+        self.assertEqual(len(cont_uni_dim_totals_df), len(mask))
+        self.assertTrue((cont_uni_dim_totals_df.index.get_level_values(1)[mask] == '~~totals').all())
+        self.assertFalse(context.totals_mask(0).any())
+
+    def test_values_are_computed_once(self):
+        context = RenderContext(cont_uni_dim_df, self.dimensions)
+        computed = []
+
+        for _ in range(2):
+            context._get_or_compute('key', lambda: computed.append(1) or len(computed))
+
+        self.assertListEqual([1], computed)
+
+    def test_different_values_are_computed_concurrently(self):
+        context = RenderContext(cont_uni_dim_df, self.dimensions)
+        a_started, b_computed = Event(), Event()
+        results = {}
+
+        def compute_a():
+            a_started.set()
+            # Only returns True if the other value can be computed while this one is being computed
+            return b_computed.wait(5)
+
+        thread = Thread(target=lambda: results.update(a=context._get_or_compute('a', compute_a)))
+        thread.start()
+        a_started.wait(5)
+        context._get_or_compute('b', lambda: b_computed.set() or 'b')
+        thread.join(5)
+
+        self.assertTrue(results['a'])
+
+
+class SharedRenderContextTests(TestCase):
+    dimensions = [slicer.dimensions.timestamp, slicer.dimensions.state]
+
+    def test_widgets_render_the_same_with_a_shared_context(self):
+        widgets = [
+            HighCharts().axis(HighCharts.LineSeries(slicer.metrics.votes)),
+            DataTablesJS(slicer.metrics.votes, slicer.metrics.wins),
+            ReactTable(slicer.metrics.votes, slicer.metrics.wins),
+        ]
+        context = RenderContext(cont_uni_dim_df, self.dimensions)
+
+        for widget in widgets:
+            with self.subTest(widget=widget):
+                expected = widget.transform(cont_uni_dim_df, slicer, self.dimensions, [])
+                result = widget.transform(cont_uni_dim_df, slicer, self.dimensions, [], context=context)
+
+                self.assertEqual(expected, result)
+
+    def test_widgets_do_not_modify_the_data_frame(self):
+        df = cont_uni_dim_df.copy()
+        context = RenderContext(df, self.dimensions)
+
+        for widget in [Pandas(slicer.metrics.votes, pivot=[slicer.dimensions.state]),
+                       ReactTable(slicer.metrics.votes),
+                       DataTablesJS(slicer.metrics.votes)]:
+            widget.transform(df, slicer, self.dimensions, [], context=context)
+
+        pandas.testing.assert_frame_equal(cont_uni_dim_df, df)
+        self.assertListEqual(list(cont_uni_dim_df.index.names), list(df.index.names))
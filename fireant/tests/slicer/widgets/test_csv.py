@@ -2,6 +2,7 @@ from unittest import TestCase
 
 import pandas as pd
 
+from fireant.slicer.exceptions import QueryException
 from fireant.slicer.widgets import CSV
 from fireant.tests.slicer.mocks import (
     CumSum,
@@ -178,3 +179,78 @@ class CSVWidgetTests(TestCase):
         expected.columns = ['Votes', 'Votes (EoE)']
 
         self.assertEqual(expected.to_csv(), result)
+
+
+class CSVWidgetStreamingTests(TestCase):
+    maxDiff = None
+
+    @staticmethod
+    def _chunks(data_frame, chunksize):
+        return [data_frame[i:i + chunksize].copy()
+                for i in range(0, len(data_frame), chunksize)]
+
+    def test_single_chunk_matches_transform(self):
+        widget = CSV(slicer.metrics.votes)
+        chunks = self._chunks(single_metric_df, 1)
+
+        result = ''.join(widget.transform_chunks(chunks, slicer, [], []))
+
+        self.assertEqual(widget.transform(single_metric_df, slicer, [], []), result)
+
+    def test_time_series_dim_in_chunks_matches_transform(self):
+        widget = CSV(slicer.metrics.wins)
+        dimensions = [slicer.dimensions.timestamp]
+        chunks = self._chunks(cont_dim_df, 2)
+
+        result = ''.join(widget.transform_chunks(chunks, slicer, dimensions, []))
+
+        self.assertEqual(widget.transform(cont_dim_df, slicer, dimensions, []), result)
+
+    def test_cat_dim_with_display_values_in_chunks_matches_transform(self):
+        widget = CSV(slicer.metrics.wins)
+        dimensions = [slicer.dimensions.political_party]
+        chunks = self._chunks(cat_dim_df, 2)
+
+        result = ''.join(widget.transform_chunks(chunks, slicer, dimensions, []))
+
+        self.assertEqual(widget.transform(cat_dim_df, slicer, dimensions, []), result)
+
+    def test_multi_dims_with_display_field_in_chunks_matches_transform(self):
+        widget = CSV(slicer.metrics.wins)
+        dimensions = [slicer.dimensions.timestamp, slicer.dimensions.state]
+        chunks = self._chunks(cont_uni_dim_df, 5)
+
+        result = ''.join(widget.transform_chunks(chunks, slicer, dimensions, []))
+
+        self.assertEqual(widget.transform(cont_uni_dim_df, slicer, dimensions, []), result)
+
+    def test_formatted_metric_in_chunks_matches_transform(self):
+        widget = CSV(slicer.metrics.wins_with_suffix_and_prefix)
+        dimensions = [slicer.dimensions.timestamp]
+        data_frame = cont_dim_df.rename(columns={fm('wins'): fm('wins_with_suffix_and_prefix')})
+        chunks = self._chunks(data_frame, 3)
+
+        result = ''.join(widget.transform_chunks(chunks, slicer, dimensions, []))
+
+        self.assertEqual(widget.transform(data_frame, slicer, dimensions, []), result)
+
+    def test_header_only_written_once(self):
+        widget = CSV(slicer.metrics.wins)
+        chunks = self._chunks(cont_dim_df, 2)
+
+        result = list(widget.transform_chunks(chunks, slicer, [slicer.dimensions.timestamp], []))
+
+        self.assertEqual(len(chunks), len(result))
+        self.assertTrue(result[0].startswith('Timestamp,Wins\n'))
+        self.assertNotIn('Wins', ''.join(result[1:]))
+
+    def test_header_written_when_there_are_no_chunks(self):
+        result = list(CSV(slicer.metrics.wins)
+                      .transform_chunks([], slicer, [slicer.dimensions.timestamp], []))
+
+        self.assertListEqual(['Timestamp,Wins\n'], result)
+
+    def test_pivot_cannot_be_streamed(self):
+        with self.assertRaises(QueryException):
+            CSV(slicer.metrics.wins, pivot=[slicer.dimensions.state]) \
+                .transform_chunks([], slicer, [slicer.dimensions.timestamp, slicer.dimensions.state], [])
@@ -2,6 +2,7 @@ from datetime import date
 from unittest import TestCase
 from unittest.mock import Mock
 
+import numpy as np
 import pandas as pd
 
 from fireant.slicer.widgets.datatables import (
@@ -642,6 +643,48 @@ class DataTablesTransformerTests(TestCase):
             }],
         }, result)
 
+    def test_pivoted_values_are_limited_to_max_columns(self):
+        result = DataTablesJS(slicer.metrics.wins, pivot=True, max_columns=3) \
+            .transform(cont_cat_dim_df, slicer, [slicer.dimensions.timestamp, slicer.dimensions.political_party], [])
+
+        self.assertListEqual(['timestamp', 'wins.d', 'wins.i'], [column['data'] for column in result['columns']])
+        for row in result['data']:
+            self.assertSetEqual({'d', 'i'}, set(row['wins']))
+
+    def test_rows_without_values_for_the_kept_pivoted_values_are_kept(self):
+        dimensions = [slicer.dimensions.timestamp, slicer.dimensions.political_party]
+        expected = DataTablesJS(slicer.metrics.wins, pivot=True) \
+            .transform(cont_cat_dim_df.iloc[1:], slicer, dimensions, [])
+        result = DataTablesJS(slicer.metrics.wins, pivot=True, max_columns=2) \
+            .transform(cont_cat_dim_df.iloc[1:], slicer, dimensions, [])
+
+        self.assertEqual(len(expected['data']), len(result['data']))
+        self.assertEqual({'d': {'display': '0', 'value': 0.0}}, result['data'][0]['wins'])
+
+    def test_pivoted_values_with_greatest_total_are_kept_with_max_columns_by(self):
+        result = DataTablesJS(slicer.metrics.wins, pivot=True, max_columns=3, max_columns_by=slicer.metrics.votes) \
+            .transform(cont_cat_dim_df, slicer, [slicer.dimensions.timestamp, slicer.dimensions.political_party], [])
+
+        self.assertListEqual(['timestamp', 'wins.d', 'wins.r'], [column['data'] for column in result['columns']])
+        self.assertEqual({
+            'timestamp': {'value': '1996-01-01'},
+            'wins': {
+                'd': {'display': '2', 'value': 2.0},
+                'r': {'display': '0', 'value': 0.0}
+            }
+        }, result['data'][0])
+
+    def test_pivoted_values_are_limited_to_the_columns_of_every_metric(self):
+        result = DataTablesJS(slicer.metrics.votes, slicer.metrics.wins,
+                              pivot=True, max_columns=5, max_columns_by=slicer.metrics.votes) \
+            .transform(cont_cat_dim_df, slicer, [slicer.dimensions.timestamp, slicer.dimensions.political_party], [])
+
+        self.assertListEqual(['timestamp', 'votes.d', 'votes.r', 'wins.d', 'wins.r'],
+                             [column['data'] for column in result['columns']])
+        for row in result['data']:
+            self.assertSetEqual({'d', 'r'}, set(row['votes']))
+            self.assertSetEqual({'d', 'r'}, set(row['wins']))
+
     def test_pivoted_multi_dims_time_series_and_uni(self):
         result = DataTablesJS(slicer.metrics.votes, pivot=True) \
             .transform(cont_uni_dim_df, slicer, [slicer.dimensions.timestamp, slicer.dimensions.state], [])
@@ -781,6 +824,102 @@ class DataTablesTransformerTests(TestCase):
             }],
         }, result)
 
+    def test_pivoted_time_series_ref(self):
+        result = DataTablesJS(slicer.metrics.votes, pivot=True) \
+            .transform(cont_uni_dim_ref_df,
+                       slicer,
+                       [
+                           slicer.dimensions.timestamp,
+                           slicer.dimensions.state
+                       ], [
+                           ElectionOverElection(slicer.dimensions.timestamp)
+                       ])
+
+        self.assertEqual([{
+            'timestamp': {'value': '2000-01-01'},
+            'votes': {
+                '1': {'display': '6,233,385', 'value': 6233385.},
+                '2': {'display': '10,428,632', 'value': 10428632.},
+            },
+            'votes_eoe': {
+                '1': {'display': '5,574,387', 'value': 5574387.},
+                '2': {'display': '9,646,062', 'value': 9646062.},
+            },
+        }, {
+            'timestamp': {'value': '2004-01-01'},
+            'votes': {
+                '1': {'display': '7,359,621', 'value': 7359621.},
+                '2': {'display': '12,255,311', 'value': 12255311.},
+            },
+            'votes_eoe': {
+                '1': {'display': '6,233,385', 'value': 6233385.},
+                '2': {'display': '10,428,632', 'value': 10428632.},
+            },
+        }], result['data'][:2])
+
+
+class DataTablesColumnarTransformerTests(TestCase):
+    maxDiff = None
+
+    def test_dimension_cells_are_dictionary_encoded(self):
+        result = DataTablesJS(slicer.metrics.wins, columnar=True) \
+            .transform(cat_dim_df.append(cat_dim_df), slicer, [slicer.dimensions.political_party], [])
+
+        self.assertEqual({
+            'columns': [{
+                'data': 'political_party',
+                'title': 'Party',
+                'render': {'_': 'value', 'display': 'display'},
+            }, {
+                'data': 'wins',
+                'title': 'Wins',
+                'render': {'_': 'value', 'display': 'display'},
+            }],
+            'data': {
+                'political_party': {
+                    'labels': [{'display': 'Democrat', 'value': 'd'},
+                               {'display': 'Independent', 'value': 'i'},
+                               {'display': 'Republican', 'value': 'r'}],
+                    'codes': [0, 1, 2, 0, 1, 2],
+                },
+                'wins': {'display': ['6', '0', '6', '6', '0', '6'], 'value': [6, 0, 6, 6, 0, 6]},
+            },
+        }, result)
+
+    def test_metric_with_null_and_inf_values(self):
+        df = cat_dim_df.copy()
+        df['$m$votes'] = [np.nan, np.inf, 1.5]
+
+        result = DataTablesJS(slicer.metrics.votes, columnar=True) \
+            .transform(df, slicer, [slicer.dimensions.political_party], [])
+
+        self.assertEqual({'display': [None, None, '1.5'], 'value': [None, None, 1.5]},
+                         result['data']['votes'])
+
+    def test_pivoted_columns_are_keyed_by_data(self):
+        result = DataTablesJS(slicer.metrics.wins, pivot=True, columnar=True) \
+            .transform(cont_cat_dim_df[:5], slicer, [slicer.dimensions.timestamp, slicer.dimensions.political_party],
+                       [])
+
+        self.assertEqual(['timestamp', 'wins.d', 'wins.i', 'wins.r'],
+                         [column['data'] for column in result['columns']])
+        self.assertEqual({
+            'timestamp': {
+                'labels': [{'value': '1996-01-01'}, {'value': '2000-01-01'}],
+                'codes': [0, 1],
+            },
+            'wins.d': {'display': ['2', '0'], 'value': [2.0, 0.0]},
+            'wins.i': {'display': ['0', '0'], 'value': [0.0, 0.0]},
+            'wins.r': {'display': ['0', '2'], 'value': [0.0, 2.0]},
+        }, result['data'])
+
+    def test_columns_are_limited_to_max_columns(self):
+        result = DataTablesJS(slicer.metrics.votes, slicer.metrics.wins, max_columns=2, columnar=True) \
+            .transform(cat_dim_df, slicer, [slicer.dimensions.political_party], [])
+
+        self.assertEqual(['political_party', 'votes'], [column['data'] for column in result['columns']])
+        self.assertEqual(['political_party', 'votes'], list(result['data']))
+
 
 class MetricCellFormatTests(TestCase):
     def _mock_metric(self, prefix=None, suffix=None, precision=None):
@@ -4,7 +4,12 @@ from unittest import (
     skip,
 )
 
+import numpy as np
+import pandas as pd
+
 from fireant import CumSum
+from fireant.slicer.intervals import monthly
+from fireant.slicer.widgets.helpers import lttb
 from fireant.slicer.widgets.highcharts import (
     DEFAULT_COLORS,
     HighCharts,
@@ -1167,6 +1172,22 @@ class HighChartsLineChartTransformerTests(TestCase):
             "colors": DEFAULT_COLORS,
         }, result)
 
+    def test_null_and_inf_values_are_rendered_as_none(self):
+        df = cont_dim_df.copy()
+        df['$m$votes'] = [1.5, np.nan, np.inf, -np.inf, 2., 3.]
+
+        result = HighCharts() \
+            .axis(self.chart_class(slicer.metrics.votes)) \
+            .transform(df, slicer, [slicer.dimensions.timestamp], [])
+
+        self.assertEqual([(820454400000, 1.5),
+                          (946684800000, None),
+                          (1072915200000, None),
+                          (1199145600000, None),
+                          (1325376000000, 2.),
+                          (1451606400000, 3.)], result['series'][0]['data'])
+
+
 
 class HighChartsBarChartTransformerTests(TestCase):
     maxDiff = None
@@ -2296,3 +2317,94 @@ class HighChartsPieChartTransformerTests(TestCase):
                 "stacking": self.stacking,
             }]
         }, result)
+
+
+class HighChartsPointIntervalTests(TestCase):
+    def _transform(self, timestamps, dimension=slicer.dimensions.timestamp):
+        df = pd.DataFrame({'$m$votes': list(range(1, len(timestamps) + 1))},
+                          index=pd.DatetimeIndex(timestamps, name='$d$timestamp'))
+
+        return HighCharts() \
+            .axis(HighCharts.LineSeries(slicer.metrics.votes)) \
+            .transform(df, slicer, [dimension], [])
+
+    def test_regular_daily_series_uses_point_start_and_interval(self):
+        result = self._transform(['2018-01-01', '2018-01-02', '2018-01-03'])
+
+        series = result['series'][0]
+        self.assertEqual(1514764800000, series['pointStart'])
+        self.assertEqual(24 * 60 * 60 * 1000, series['pointInterval'])
+        self.assertEqual([1, 2, 3], series['data'])
+
+    def test_daily_series_with_missing_points_uses_pairs(self):
+        result = self._transform(['2018-01-01', '2018-01-03'])
+
+        series = result['series'][0]
+        self.assertNotIn('pointStart', series)
+        self.assertEqual([(1514764800000, 1), (1514937600000, 2)], series['data'])
+
+    def test_monthly_series_uses_pairs(self):
+        result = self._transform(['2018-01-01', '2018-02-01', '2018-03-01'], slicer.dimensions.timestamp(monthly))
+
+        series = result['series'][0]
+        self.assertNotIn('pointStart', series)
+        self.assertEqual([(1514764800000, 1), (1517443200000, 2), (1519862400000, 3)], series['data'])
+
+
+class HighChartsMaxPointsTests(TestCase):
+    def _transform(self, data_frame, dimensions, references=(), max_points=10):
+        return HighCharts(max_points=max_points) \
+            .axis(HighCharts.LineSeries(slicer.metrics.votes)) \
+            .transform(data_frame, slicer, dimensions, list(references))
+
+    def test_series_are_downsampled_to_max_points(self):
+        timestamps = pd.date_range('2018-01-01', periods=100, freq='D', name='$d$timestamp')
+        df = pd.DataFrame({'$m$votes': np.sin(np.arange(100) / 5.)}, index=timestamps)
+
+        result = self._transform(df, [slicer.dimensions.timestamp])
+
+        data = result['series'][0]['data']
+        self.assertEqual(10, len(data))
+        self.assertEqual((1514764800000, 0.), data[0])
+        self.assertEqual(timestamps[-1].value // 10 ** 6, data[-1][0])
+
+    def test_series_with_fewer_points_than_max_points_are_not_downsampled(self):
+        result = self._transform(cont_uni_dim_df, [slicer.dimensions.timestamp, slicer.dimensions.state],
+                                 max_points=1000)
+        expected = self._transform(cont_uni_dim_df, [slicer.dimensions.timestamp, slicer.dimensions.state],
+                                   max_points=None)
+
+        self.assertEqual(expected, result)
+
+    def test_references_use_the_same_points_as_the_metric(self):
+        result = self._transform(cont_uni_dim_ref_df, [slicer.dimensions.timestamp, slicer.dimensions.state],
+                                 [ElectionOverElection(slicer.dimensions.timestamp)], max_points=3)
+
+        series = result['series']
+        self.assertEqual(4, len(series))
+        for metric_series, reference_series in zip(series[::2], series[1::2]):
+            self.assertEqual(3, len(metric_series['data']))
+            self.assertEqual([x for x, _ in metric_series['data']],
+                             [x for x, _ in reference_series['data']])
+
+
+class LTTBTests(TestCase):
+    def test_all_points_are_kept_when_there_are_fewer_than_max_points(self):
+        result = lttb(np.arange(5.), np.arange(5.), 10)
+
+        self.assertListEqual([0, 1, 2, 3, 4], list(result))
+
+    def test_first_and_last_points_are_kept(self):
+        result = lttb(np.arange(100.), np.random.RandomState(0).rand(100), 7)
+
+        self.assertEqual(7, len(result))
+        self.assertEqual(0, result[0])
+        self.assertEqual(99, result[-1])
+
+    def test_peak_is_selected(self):
+        y = np.zeros(100)
+        y[42] = 10.
+
+        result = lttb(np.arange(100.), y, 5)
+
+        self.assertIn(42, result)
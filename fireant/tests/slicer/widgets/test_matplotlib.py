@@ -1,5 +1,8 @@
 from unittest import TestCase
 
+import numpy as np
+import pandas as pd
+
 from fireant.slicer.widgets.matplotlib import Matplotlib
 from fireant.tests.slicer.mocks import (
     cont_dim_df,
@@ -25,5 +28,17 @@ try:
 
             self.assertEqual(1, len(result))
 
+        def test_line_chart_downsampled_to_max_points(self):
+            timestamps = pd.date_range('2018-01-01', periods=100, freq='D', name='$d$timestamp')
+            df = pd.DataFrame({'$m$votes': np.sin(np.arange(100) / 5.)}, index=timestamps)
+
+            result = Matplotlib(max_points=10) \
+                .axis(self.chart_class(slicer.metrics.votes)) \
+                .transform(df, slicer, [slicer.dimensions.timestamp], [])
+
+            lines = result[0].get_lines()
+            self.assertEqual(1, len(lines))
+            self.assertEqual(10, len(lines[0].get_xdata()))
+
 except ImportError:
     pass
@@ -5,6 +5,10 @@ import numpy as np
 import pandas as pd
 import pandas.testing
 
+from fireant.slicer.widgets.helpers import (
+    find_pivot_rows_to_keep,
+    unstack_rows,
+)
 from fireant.slicer.widgets.pandas import Pandas
 from fireant.tests.slicer.mocks import (
     CumSum,
@@ -138,6 +142,34 @@ class PandasTransformerTests(TestCase):
 
         pandas.testing.assert_frame_equal(expected, result)
 
+    def test_multi_dims_time_series_and_uni_with_categorical_display_values(self):
+        data_frame = cont_uni_dim_df.copy()
+        data_frame[fd('state_display')] = data_frame[fd('state_display')].astype('category')
+
+        result = Pandas(slicer.metrics.wins) \
+            .transform(data_frame, slicer, [slicer.dimensions.timestamp, slicer.dimensions.state], [])
+
+        expected = cont_uni_dim_df.copy() \
+            .set_index(fd('state_display'), append=True) \
+            .reset_index(fd('state'), drop=False)[[fm('wins')]]
+        expected.index.names = ['Timestamp', 'State']
+        expected.columns = ['Wins']
+        expected.columns.name = 'Metrics'
+
+        pandas.testing.assert_frame_equal(expected, result)
+
+    def test_pivoted_multi_dims_time_series_and_uni_with_categorical_display_values(self):
+        data_frame = cont_uni_dim_df.copy()
+        data_frame[fd('state_display')] = data_frame[fd('state_display')].astype('category')
+        dimensions = [slicer.dimensions.timestamp, slicer.dimensions.state]
+
+        result = Pandas(slicer.metrics.votes, pivot=[slicer.dimensions.state]) \
+            .transform(data_frame, slicer, dimensions, [])
+
+        expected = Pandas(slicer.metrics.votes, pivot=[slicer.dimensions.state]) \
+            .transform(cont_uni_dim_df, slicer, dimensions, [])
+        pandas.testing.assert_frame_equal(expected, result)
+
     def test_transpose_single_dimension(self):
         result = Pandas(slicer.metrics.wins, transpose=True) \
             .transform(cat_dim_df, slicer, [slicer.dimensions.political_party], [])
@@ -188,6 +220,28 @@ class PandasTransformerTests(TestCase):
 
         pandas.testing.assert_frame_equal(expected, result)
 
+    def test_pivoted_values_are_limited_to_max_columns(self):
+        dimensions = [slicer.dimensions.timestamp, slicer.dimensions.political_party]
+        expected = Pandas(slicer.metrics.votes, pivot=[slicer.dimensions.political_party]) \
+            .transform(cont_cat_dim_df, slicer, dimensions, [])
+
+        result = Pandas(slicer.metrics.votes, pivot=[slicer.dimensions.political_party], max_columns=2) \
+            .transform(cont_cat_dim_df, slicer, dimensions, [])
+
+        pandas.testing.assert_frame_equal(expected[['Democrat', 'Independent']], result)
+
+    def test_pivoted_values_with_greatest_total_are_kept_with_max_columns_by(self):
+        dimensions = [slicer.dimensions.timestamp, slicer.dimensions.political_party]
+        expected = Pandas(slicer.metrics.votes, pivot=[slicer.dimensions.political_party]) \
+            .transform(cont_cat_dim_df, slicer, dimensions, [])
+
+        result = Pandas(slicer.metrics.votes, pivot=[slicer.dimensions.political_party],
+                        max_columns=2, max_columns_by=slicer.metrics.votes) \
+            .transform(cont_cat_dim_df, slicer, dimensions, [])
+
+        # Without the independent party, there are no missing values which upcast the votes to floats
+        pandas.testing.assert_frame_equal(expected[['Democrat', 'Republican']], result, check_dtype=False)
+
     def test_time_series_ref(self):
         result = Pandas(slicer.metrics.votes) \
             .transform(cont_uni_dim_ref_df, slicer,
@@ -565,3 +619,56 @@ class PandasTransformerSortTests(TestCase):
         expected.columns.name = 'Metrics'
 
         pandas.testing.assert_frame_equal(expected, result)
+
+
+class LimitPivotValuesTests(TestCase):
+    def setUp(self):
+        index = pd.MultiIndex.from_product([[1, 2], ['c', 'b', 'a'], ['x', 'y']], names=['t', 's', 'u'])
+        self.data_frame = pd.DataFrame({'m': np.arange(12.)}, index=index)
+
+    def test_all_rows_are_kept_when_values_fit(self):
+        self.assertIsNone(find_pivot_rows_to_keep(self.data_frame, ['s'], 3))
+
+    def test_columns_are_the_first_columns_of_unstacking_a_single_level(self):
+        is_kept = find_pivot_rows_to_keep(self.data_frame, ['s'], 2)
+        result = unstack_rows(self.data_frame, ['s'], is_kept)
+
+        self.assertListEqual(list(self.data_frame.unstack(level=['s']).columns[:2]), list(result.columns))
+
+    def test_columns_are_the_first_columns_of_unstacking_several_levels(self):
+        is_kept = find_pivot_rows_to_keep(self.data_frame, ['s', 'u'], 3)
+        result = unstack_rows(self.data_frame, ['s', 'u'], is_kept)
+
+        self.assertListEqual(list(self.data_frame.unstack(level=['s', 'u']).columns[:3]), list(result.columns))
+
+    def test_values_with_greatest_total_are_kept_with_metric(self):
+        is_kept = find_pivot_rows_to_keep(self.data_frame, ['s'], 1, 'm')
+
+        self.assertListEqual(['a'], list(self.data_frame[is_kept].index.get_level_values('s').unique()))
+
+    def test_rows_which_only_have_values_for_removed_values_are_kept(self):
+        data_frame = self.data_frame[(self.data_frame.index.get_level_values('s') != 'a')
+                                     | (self.data_frame.index.get_level_values('u') == 'y')]
+        data_frame = data_frame[(data_frame.index.get_level_values('s') == 'a')
+                                | (data_frame.index.get_level_values('u') == 'x')]
+
+        is_kept = find_pivot_rows_to_keep(data_frame, ['s'], 2)
+        result = unstack_rows(data_frame, ['s'], is_kept)
+
+        expected = data_frame.unstack(level=['s'])
+        pandas.testing.assert_frame_equal(expected[expected.columns[:2]], result)
+
+    def test_rows_are_kept_when_pivoting_with_max_columns(self):
+        result = Pandas(slicer.metrics.votes, pivot=[slicer.dimensions.political_party], max_columns=1) \
+            .transform(cont_cat_dim_df.iloc[1:], slicer,
+                       [slicer.dimensions.timestamp, slicer.dimensions.political_party], [])
+
+        expected = Pandas(slicer.metrics.votes, pivot=[slicer.dimensions.political_party]) \
+            .transform(cont_cat_dim_df.iloc[1:], slicer,
+                       [slicer.dimensions.timestamp, slicer.dimensions.political_party], [])
+
+        self.assertListEqual(list(expected.index), list(result.index))
+        self.assertListEqual(list(expected.columns[:1]), list(result.columns))
+
+    def test_values_are_not_limited_by_default(self):
+        self.assertIsNone(Pandas(slicer.metrics.votes).max_columns)
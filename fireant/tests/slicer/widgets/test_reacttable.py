@@ -1,6 +1,8 @@
 import copy
 from unittest import TestCase
 
+import numpy as np
+
 from fireant.slicer.totals import MAX_STRING
 from fireant.slicer.widgets.reacttable import ReactTable
 from fireant.slicer.widgets.reacttable import ReferenceItem
@@ -9,6 +11,7 @@ from fireant.tests.slicer.mocks import (
     ElectionOverElection,
     cat_dim_df,
     cat_uni_dim_df,
+    cont_cat_dim_df,
     cont_dim_df,
     cont_dim_operation_df,
     cont_uni_dim_all_totals_df,
@@ -834,6 +837,27 @@ class ReactTableTransformerTests(TestCase):
             }]
         }, result)
 
+    def test_metric_with_null_and_inf_values(self):
+        df = cat_dim_df.copy()
+        df['$m$votes'] = [np.nan, np.inf, 1.5]
+
+        result = ReactTable(slicer.metrics.votes, slicer.metrics.wins) \
+            .transform(df, slicer, [slicer.dimensions.political_party], [])
+
+        self.assertEqual([{
+            '$d$political_party': {'display': 'Democrat', 'raw': 'd'},
+            '$m$votes': {'display': 'null', 'raw': 'null'},
+            '$m$wins': {'display': '6', 'raw': 6.0}
+        }, {
+            '$d$political_party': {'display': 'Independent', 'raw': 'i'},
+            '$m$votes': {'display': 'Inf', 'raw': 'Inf'},
+            '$m$wins': {'display': '0', 'raw': 0.0}
+        }, {
+            '$d$political_party': {'display': 'Republican', 'raw': 'r'},
+            '$m$votes': {'display': '1.5', 'raw': 1.5},
+            '$m$wins': {'display': '6', 'raw': 6.0}
+        }], result['data'])
+
 
 class ReactTableHyperlinkTransformerTests(TestCase):
     maxDiff = None
@@ -921,6 +945,66 @@ class ReactTableHyperlinkTransformerTests(TestCase):
         }, result)
 
 
+class ReactTableColumnarTransformerTests(TestCase):
+    maxDiff = None
+
+    def test_dimension_cells_are_dictionary_encoded(self):
+        result = ReactTable(slicer.metrics.wins, columnar=True) \
+            .transform(cat_dim_df.append(cat_dim_df), slicer, [slicer.dimensions.political_party], [])
+
+        self.assertEqual({
+            'columns': [{'Header': 'Party', 'accessor': '$d$political_party'},
+                        {'Header': 'Wins', 'accessor': '$m$wins'}],
+            'data': {
+                '$d$political_party': {
+                    'labels': [{'display': 'Democrat', 'raw': 'd'},
+                               {'display': 'Independent', 'raw': 'i'},
+                               {'display': 'Republican', 'raw': 'r'}],
+                    'codes': [0, 1, 2, 0, 1, 2],
+                },
+                '$m$wins': {'display': ['6', '0', '6', '6', '0', '6'], 'raw': [6, 0, 6, 6, 0, 6]},
+            }
+        }, result)
+
+    def test_dimension_cells_with_hyperlinks(self):
+        slicer = copy.deepcopy(globals()['slicer'])
+        slicer.dimensions.political_party.hyperlink_template = 'http://example.com/candidates/{candidate}/'
+
+        result = ReactTable(slicer.metrics.wins, columnar=True) \
+            .transform(cat_uni_dim_df[:2], slicer, [slicer.dimensions.political_party, slicer.dimensions.candidate], [])
+
+        self.assertEqual({
+            '$d$political_party': {
+                'labels': [{'display': 'Democrat', 'hyperlink': 'http://example.com/candidates/1/', 'raw': 'd'},
+                           {'display': 'Democrat', 'hyperlink': 'http://example.com/candidates/5/', 'raw': 'd'}],
+                'codes': [0, 1],
+            },
+            '$d$candidate': {
+                'labels': [{'display': 'Bill Clinton', 'raw': '1'},
+                           {'display': 'Al Gore', 'raw': '5'}],
+                'codes': [0, 1],
+            },
+            '$m$wins': {'display': ['2', '0'], 'raw': [2, 0]},
+        }, result['data'])
+
+    def test_pivoted_columns_are_keyed_by_accessor(self):
+        result = ReactTable(slicer.metrics.wins, pivot=[slicer.dimensions.political_party], columnar=True) \
+            .transform(cont_cat_dim_df[:5], slicer, [slicer.dimensions.timestamp, slicer.dimensions.political_party],
+                       [])
+
+        self.assertEqual(['$d$timestamp', 'd', 'i', 'r'],
+                         [column['accessor'] for column in result['columns']])
+        self.assertEqual({
+            '$d$timestamp': {
+                'labels': [{'raw': '1996-01-01'}, {'raw': '2000-01-01'}],
+                'codes': [0, 1],
+            },
+            'd': {'display': ['2', '0'], 'raw': [2.0, 0.0]},
+            'i': {'display': ['0', 'null'], 'raw': [0.0, None]},
+            'r': {'display': ['0', '2'], 'raw': [0.0, 2.0]},
+        }, result['data'])
+
+
 class ReactTableReferenceItemFormatTests(TestCase):
 
     @classmethod
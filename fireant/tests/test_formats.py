@@ -10,6 +10,11 @@ from datetime import (
 )
 
 from fireant import formats
+from fireant.slicer.totals import (
+    MAX_NUMBER,
+    MAX_STRING,
+    MAX_TIMESTAMP,
+)
 
 
 class FormatMetricValueTests(TestCase):
@@ -43,6 +48,16 @@ class FormatMetricValueTests(TestCase):
         result = formats.metric_value(np.int64(1))
         self.assertEqual(int(1), result)
 
+    def test_int32_data_point_is_returned_as_py_int(self):
+        result = formats.metric_value(np.int32(1))
+        self.assertIsInstance(result, int)
+        self.assertEqual(1, result)
+
+    def test_float32_data_point_is_returned_as_py_float(self):
+        result = formats.metric_value(np.float32(1.5))
+        self.assertIsInstance(result, float)
+        self.assertEqual(1.5, result)
+
     def test_data_data_point_is_returned_as_string_iso_no_time(self):
         # Needs to be converted to milliseconds
         result = formats.metric_value(date(2000, 1, 1))
@@ -177,6 +192,140 @@ class DisplayValueTests(TestCase):
         display = formats.metric_display(-12, prefix='$')
         self.assertEqual('-$12', display)
 
+    def test_float32_value(self):
+        display = formats.metric_display(np.float32(1234.5), precision=2)
+        self.assertEqual('1,234.50', display)
+
+    def test_float32_integer_value(self):
+        display = formats.metric_display(np.float32(6))
+        self.assertEqual('6', display)
+
+    def test_int32_value(self):
+        display = formats.metric_display(np.int32(-1234), prefix='$')
+        self.assertEqual('-$1,234', display)
+
+
+class DisplaySeriesTests(TestCase):
+    def assert_matches_metric_display(self, values, **kwargs):
+        series = pd.Series(values)
+        expected = [formats.metric_display(value, **kwargs) for value in series]
+
+        result = formats.metric_display_series(series, **kwargs)
+
+        self.assertListEqual(expected, list(result))
+        self.assertListEqual(list(series.index), list(result.index))
+
+    def test_int_values(self):
+        self.assert_matches_metric_display([1, -12, 1000000])
+
+    def test_float_values_with_nan_and_inf(self):
+        self.assert_matches_metric_display([1.5, 1.0, np.nan, np.inf, -np.inf, 1234.5678])
+
+    def test_float_values_with_precision(self):
+        self.assert_matches_metric_display([1.5, 0.1234, np.nan], precision=2)
+
+    def test_usd_values(self):
+        self.assert_matches_metric_display([-12.5, 12, 0.0, np.nan], prefix='$', precision=2)
+
+    def test_prefix_and_suffix(self):
+        self.assert_matches_metric_display([1, 2], prefix='~', suffix='%')
+
+    def test_bool_values(self):
+        self.assert_matches_metric_display([True, False])
+
+    def test_mixed_values(self):
+        self.assert_matches_metric_display(['abc', 1, None])
+
+    def test_empty_series(self):
+        self.assert_matches_metric_display(pd.Series([], dtype=float))
+
+
+class ValueSeriesTests(TestCase):
+    def assert_matches_metric_value(self, values):
+        series = pd.Series(values)
+        expected = [formats.metric_value(value) for value in series]
+
+        result = formats.metric_value_series(series)
+
+        self.assertListEqual(expected, list(result))
+        self.assertListEqual([type(value) for value in expected], [type(value) for value in result])
+
+    def test_int_values(self):
+        self.assert_matches_metric_value([1, -12, 1000000])
+
+    def test_float_values_with_nan_and_inf(self):
+        self.assert_matches_metric_value([1.5, 1.0, np.nan, np.inf, -np.inf])
+
+    def test_float32_values(self):
+        self.assert_matches_metric_value(np.array([1.5, np.nan], dtype=np.float32))
+
+    def test_date_values(self):
+        self.assert_matches_metric_value([date(2018, 1, 1), datetime(2018, 1, 1, 12, 30)])
+
+    def test_mixed_values(self):
+        self.assert_matches_metric_value(['abc', 1, None])
+
+
+class DimensionValueSeriesTests(TestCase):
+    def assert_matches_dimension_value(self, values):
+        expected = [formats.dimension_value(value) for value in values]
+
+        result = formats.dimension_value_series(values)
+
+        self.assertListEqual(expected, list(result))
+        self.assertListEqual([type(value) for value in expected], [type(value) for value in result])
+
+    def test_int_values_with_totals(self):
+        self.assert_matches_dimension_value(pd.Index([1, 2, MAX_NUMBER]))
+
+    def test_float_values_with_nan(self):
+        self.assert_matches_dimension_value(pd.Index([1.5, -2.0, np.nan]))
+
+    def test_float_values_which_round_to_the_totals_marker(self):
+        self.assert_matches_dimension_value(pd.Index([1.5, float(MAX_NUMBER)]))
+
+    def test_date_values_with_nat_and_totals(self):
+        self.assert_matches_dimension_value(pd.DatetimeIndex(['2018-01-01', '2018-01-01 12:30:15', None,
+                                                              MAX_TIMESTAMP]))
+
+    def test_str_values_with_none_and_totals(self):
+        self.assert_matches_dimension_value(pd.Index(['a', None, 'True', '1', 'nan', MAX_STRING], dtype=object))
+
+    def test_categorical_values(self):
+        self.assert_matches_dimension_value(pd.CategoricalIndex(['a', 'b', None, 'a', MAX_STRING]))
+
+    def test_empty_values(self):
+        self.assertListEqual([], list(formats.dimension_value_series(pd.Index([], dtype=object))))
+
+
+class CoerceTypeSeriesTests(TestCase):
+    def assert_matches_coerce_type(self, values):
+        expected = [formats.coerce_type(value) for value in values]
+
+        result = formats.coerce_type_series(values)
+
+        self.assertListEqual([type(value) for value in expected], [type(value) for value in result])
+        self.assertListEqual([value for value in expected if value == value],
+                             [value for value in result if value == value])
+
+    def test_bool_values(self):
+        self.assert_matches_coerce_type(pd.Index([True, False]))
+
+    def test_float_values_are_truncated(self):
+        self.assert_matches_coerce_type(pd.Index([1.5, -2.7, np.nan, np.inf, 1e20]))
+
+    def test_str_values(self):
+        self.assert_matches_coerce_type(pd.Index(['1', '1.5', 'null', 'False', 'abc', None], dtype=object))
+
+
+class DatesAsMillisTests(TestCase):
+    def test_matches_date_as_millis(self):
+        values = pd.DatetimeIndex(['1996-01-01', '2000-01-01 12:30:15.250', '1969-12-31'])
+
+        result = formats.dates_as_millis(values)
+
+        self.assertListEqual([formats.date_as_millis(value) for value in values], list(result))
+
 
 class CoerceTypeTests(TestCase):
     def allow_literal_nan(self):
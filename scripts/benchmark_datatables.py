@@ -0,0 +1,61 @@
+"""
+Measures the time taken by the DataTablesJS widget to transform a result set with a date/time and a unique dimension,
+in rows and pivoted on the unique dimension.
+
+    python scripts/benchmark_datatables.py [rows]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from fireant.slicer.widgets.datatables import DataTablesJS
+from fireant.tests.slicer.mocks import slicer
+from fireant.utils import (
+    format_dimension_key as fd,
+    format_metric_key as fm,
+)
+
+CANDIDATES = 20
+
+
+def make_data_frame(rows):
+    timestamps = pd.date_range('2000-01-01', periods=rows // CANDIDATES, freq='D')
+    index = pd.MultiIndex.from_product([timestamps, [str(i) for i in range(CANDIDATES)]],
+                                       names=[fd('timestamp'), fd('candidate')])
+    random = np.random.RandomState(0)
+
+    return pd.DataFrame({
+        fd('candidate_display'): ['Candidate {}'.format(i % CANDIDATES) for i in range(len(index))],
+        fm('votes'): random.randint(0, 10 ** 6, len(index)),
+        fm('wins'): random.randint(0, 2, len(index)),
+    }, index=index)
+
+
+def measure(func, repeat=3):
+    durations = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start_time)
+    return min(durations)
+
+
+def main(rows):
+    data_frame = make_data_frame(rows)
+    dimensions = [slicer.dimensions.timestamp, slicer.dimensions.candidate]
+
+    widgets = [
+        ('rows', DataTablesJS(slicer.metrics.votes, slicer.metrics.wins)),
+        ('pivoted', DataTablesJS(slicer.metrics.votes, slicer.metrics.wins, pivot=True)),
+    ]
+
+    print('{:,} rows'.format(len(data_frame)))
+    for name, widget in widgets:
+        duration = measure(lambda: widget.transform(data_frame, slicer, dimensions, []))
+        print('{:<8} {:>8.3f} s'.format(name, duration))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if 1 < len(sys.argv) else 50000)
@@ -0,0 +1,89 @@
+"""
+Compares reading a result set with `pd.read_sql` against `Database.fetch_dataframe`, using an in-memory SQLite
+database as a stand-in for a real database platform.
+
+    python scripts/benchmark_fetch_dataframe.py [rows]
+"""
+import sqlite3
+import sys
+import time
+import tracemalloc
+from datetime import (
+    datetime,
+    timedelta,
+)
+
+import numpy as np
+import pandas as pd
+
+from fireant.database import Database
+
+QUERY = 'SELECT ' \
+        '"timestamp" "$d$timestamp",' \
+        'is_winner "$d$winner",' \
+        'state "$d$state",' \
+        'votes "$m$votes",' \
+        'wins "$m$wins" ' \
+        'FROM politician'
+
+DTYPES = {
+    '$d$timestamp': np.dtype('datetime64[ns]'),
+    '$d$winner': np.dtype(bool),
+    '$m$votes': np.dtype(np.float64),
+    '$m$wins': np.dtype(np.float64),
+}
+
+
+class SQLiteDatabase(Database):
+    def __init__(self, connection):
+        super(SQLiteDatabase, self).__init__()
+        self.connection = connection
+
+    def connect(self):
+        return self.connection
+
+
+def make_connection(rows):
+    connection = sqlite3.connect(':memory:', detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+    connection.execute('CREATE TABLE politician ("timestamp" TIMESTAMP, is_winner BOOLEAN, state TEXT, '
+                       'votes INTEGER, wins REAL)')
+
+    start = datetime(2000, 1, 1)
+    connection.executemany('INSERT INTO politician VALUES (?, ?, ?, ?, ?)',
+                           ((start + timedelta(days=i % 3650), i % 2, 'state_{}'.format(i % 50), i, i * .5)
+                            for i in range(rows)))
+    return connection
+
+
+def measure(func, repeat=3):
+    durations = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start_time)
+
+    # Memory is measured separately since tracing allocations slows down the function
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(durations), peak
+
+
+def main(rows):
+    connection = make_connection(rows)
+    database = SQLiteDatabase(connection)
+
+    results = [
+        ('pd.read_sql', measure(lambda: pd.read_sql(QUERY, connection, coerce_float=True, parse_dates=True))),
+        ('fetch_dataframe', measure(lambda: database.fetch_dataframe(QUERY, dtypes=DTYPES))),
+    ]
+
+    print('{:,} rows'.format(rows))
+    for name, (duration, peak) in results:
+        print('{:<16} {:>8.3f} s {:>10.1f} MiB peak'.format(name, duration, peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if 1 < len(sys.argv) else 200000)
@@ -0,0 +1,74 @@
+"""
+Measures the time taken by the HighCharts widget to transform a result set with a date/time and a unique dimension into
+a line chart with a series for each value of the unique dimension, and with the unique dimension on a category x-axis.
+
+    python scripts/benchmark_highcharts.py [rows]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from fireant.slicer.widgets.highcharts import HighCharts
+from fireant.tests.slicer.mocks import slicer
+from fireant.utils import (
+    format_dimension_key as fd,
+    format_metric_key as fm,
+)
+
+CANDIDATES = 20
+
+
+def make_data_frame(rows, reverse=False):
+    timestamps = pd.date_range('2000-01-01', periods=rows // CANDIDATES, freq='H')
+    candidates = [str(i) for i in range(CANDIDATES)]
+    levels, names = ([candidates, timestamps], [fd('candidate'), fd('timestamp')]) \
+        if reverse \
+        else ([timestamps, candidates], [fd('timestamp'), fd('candidate')])
+    index = pd.MultiIndex.from_product(levels, names=names)
+    random = np.random.RandomState(0)
+
+    votes = random.rand(len(index)) * 10 ** 6
+    votes[::100] = np.nan
+
+    return pd.DataFrame({
+        fd('candidate_display'): ['Candidate {}'.format(i % CANDIDATES) for i in range(len(index))],
+        fm('votes'): votes,
+        fm('wins'): random.randint(0, 2, len(index)),
+    }, index=index)
+
+
+def measure(func, repeat=3):
+    durations = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start_time)
+    return min(durations)
+
+
+def main(rows):
+    timeseries_df = make_data_frame(rows)
+    category_df = make_data_frame(rows, reverse=True)
+
+    widget = HighCharts() \
+        .axis(HighCharts.LineSeries(slicer.metrics.votes)) \
+        .axis(HighCharts.LineSeries(slicer.metrics.wins))
+
+    results = [
+        ('timeseries', measure(lambda: widget.transform(timeseries_df, slicer,
+                                                        [slicer.dimensions.timestamp, slicer.dimensions.candidate],
+                                                        []))),
+        ('category', measure(lambda: widget.transform(category_df, slicer,
+                                                      [slicer.dimensions.candidate, slicer.dimensions.timestamp],
+                                                      []))),
+    ]
+
+    print('{:,} rows'.format(len(timeseries_df)))
+    for name, duration in results:
+        print('{:<10} {:>8.3f} s'.format(name, duration))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if 1 < len(sys.argv) else 50000)
@@ -0,0 +1,67 @@
+"""
+Measures the time taken by the ReactTable widget to transform a result set with a date/time and a unique dimension and
+serialize it to JSON, in rows, pivoted on the unique dimension and as columns. The size of the JSON payload is also
+printed.
+
+    python scripts/benchmark_reacttable.py [rows]
+"""
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from fireant.slicer.widgets.reacttable import ReactTable
+from fireant.tests.slicer.mocks import slicer
+from fireant.utils import (
+    format_dimension_key as fd,
+    format_metric_key as fm,
+)
+
+CANDIDATES = 20
+
+
+def make_data_frame(rows):
+    timestamps = pd.date_range('2000-01-01', periods=rows // CANDIDATES, freq='D')
+    index = pd.MultiIndex.from_product([timestamps, [str(i) for i in range(CANDIDATES)]],
+                                       names=[fd('timestamp'), fd('candidate')])
+    random = np.random.RandomState(0)
+
+    return pd.DataFrame({
+        fd('candidate_display'): ['Candidate {}'.format(i % CANDIDATES) for i in range(len(index))],
+        fm('votes'): random.randint(0, 10 ** 6, len(index)),
+        fm('wins'): random.randint(0, 2, len(index)),
+    }, index=index)
+
+
+def measure(func, repeat=3):
+    durations = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start_time)
+    return min(durations)
+
+
+def main(rows):
+    data_frame = make_data_frame(rows)
+    dimensions = [slicer.dimensions.timestamp, slicer.dimensions.candidate]
+
+    widgets = [
+        ('rows', ReactTable(slicer.metrics.votes, slicer.metrics.wins)),
+        ('pivoted', ReactTable(slicer.metrics.votes, slicer.metrics.wins, pivot=[slicer.dimensions.candidate])),
+        ('columnar', ReactTable(slicer.metrics.votes, slicer.metrics.wins, columnar=True)),
+    ]
+
+    print('{:,} rows'.format(len(data_frame)))
+    for name, widget in widgets:
+        def transform():
+            return json.dumps(widget.transform(data_frame, slicer, dimensions, []))
+
+        duration = measure(transform)
+        print('{:<8} {:>8.3f} s {:>10.1f} MiB'.format(name, duration, len(transform()) / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if 1 < len(sys.argv) else 50000)
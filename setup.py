@@ -91,6 +91,7 @@ setup(
           'redshift': ['psycopg2==2.7.3.2'],
           'postgresql': ['psycopg2==2.7.3.2'],
           'matplotlib': ['matplotlib'],
+          'parquet': ['pyarrow'],
       },
 
       test_suite='fireant.tests',